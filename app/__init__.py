@@ -90,6 +90,14 @@ def create_app(config_name=None):
         app.logger and app.logger.warning('Redis unreachable and RATELIMIT_STORAGE_URI points to Redis; switching to memory://')
         app.config['RATELIMIT_STORAGE_URI'] = 'memory://'
     limiter.init_app(app)
+
+    # Queued enrollment (Redis-backed when reachable, in-process otherwise)
+    from app.services.enrollment_queue import enrollment_queue
+    enrollment_queue.init_app(app, redis_available=redis_available)
+
+    # Transactional outbox dispatcher (notifications and e-mail)
+    from app.services.outbox_service import outbox_dispatcher
+    outbox_dispatcher.init_app(app)
     
     # Configure login manager
     login_manager.login_view = 'auth.login'
@@ -309,9 +317,9 @@ from flask import request, jsonify
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user by ID for Flask-Login."""
-    from app.models.user import User
-    return User.query.get(int(user_id))
+    """Load user by ID for Flask-Login (active users only; see principal_cache)."""
+    from app.services.principal_cache import principal_user
+    return principal_user(int(user_id))
 
 
 @jwt.user_identity_loader
@@ -322,10 +330,10 @@ def user_identity_lookup(user):
 
 @jwt.user_lookup_loader
 def user_lookup_callback(_jwt_header, jwt_data):
-    """Load user from JWT."""
-    from app.models.user import User
+    """Load user from JWT (active users only; see principal_cache)."""
+    from app.services.principal_cache import principal_user
     identity = jwt_data["sub"]
-    return User.query.filter_by(id=identity).one_or_none()
+    return principal_user(int(identity))
 
 
 def make_celery(app):
@@ -1,13 +1,15 @@
 """Admin blueprint routes."""
 
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
 from functools import wraps
 from app import db
 from app.admin import admin_bp
 from app.forms import ProfileForm, CourseForm, CourseSectionForm, RegistrationForm, DepartmentForm, ConfirmDeleteForm, AdminUserEditForm
 from app.models import User, Course, CourseSection, Department, Enrollment, Room, InstructorProfile, StudentProfile
+from app.models.course import PrerequisiteCycleError
 from app.models.user import Role
+from app.services import admin_reports, pdf_render, report_export
 
 
 def admin_required(f):
@@ -221,10 +223,10 @@ def create_course():
         )
         db.session.add(course)
         db.session.flush()  # get course.id
-        # Set prerequisites
+        # Set prerequisites (also refreshes the prerequisite closure)
         if form.prerequisites.data:
             prereq_objs = Course.query.filter(Course.id.in_(form.prerequisites.data)).all()
-            course.prerequisites = prereq_objs
+            course.set_prerequisites(prereq_objs)
         db.session.commit()
         flash('Course created successfully', 'success')
         return redirect(url_for('admin.courses'))
@@ -253,8 +255,13 @@ def edit_course(course_id):
         course.level = form.level.data
         course.max_capacity_default = form.max_capacity_default.data
         course.lab_required = form.lab_required.data
-        # Update prerequisites
-        course.prerequisites = Course.query.filter(Course.id.in_(form.prerequisites.data or [])).all()
+        # Update prerequisites; a prerequisite that depends on this course would form a cycle
+        try:
+            course.set_prerequisites(Course.query.filter(Course.id.in_(form.prerequisites.data or [])).all())
+        except PrerequisiteCycleError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+            return render_template('admin/course_form.html', title='Edit Course', form=form, course=course)
         db.session.commit()
         flash('Course updated successfully', 'success')
         return redirect(url_for('admin.courses'))
@@ -796,7 +803,8 @@ def enroll_by_student_number():
 def section_enrollments(section_id):
     section = CourseSection.query.get_or_404(section_id)
     enrolled = Enrollment.query.filter_by(course_section_id=section_id, status='Enrolled').all()
-    waitlisted = Enrollment.query.filter_by(course_section_id=section_id, status='Waitlisted').order_by(Enrollment.waitlist_position).all()
+    waitlisted = Enrollment.query.filter_by(course_section_id=section_id, status='Waitlisted').order_by(*Enrollment.waitlist_sort_key()).all()
+    Enrollment.load_waitlist_positions(waitlisted)
     return render_template('admin/section_enrollments.html', title=f"Enrollments for {section.course.code}-{section.section_code}", section=section, enrolled=enrolled, waitlisted=waitlisted)
 
 
@@ -814,127 +822,83 @@ def admin_drop_enrollment(enrollment_id):
 @admin_required
 def admin_promote_waitlist(section_id):
     section = CourseSection.query.get_or_404(section_id)
-    section.promote_from_waitlist()
+    # Fill every free seat from the waitlist in one pass
+    promoted = section.promote_waitlisted()
     db.session.commit()
-    flash('Promoted next student from waitlist.', 'success')
+    if promoted:
+        flash(f'Promoted {len(promoted)} student(s) from waitlist.', 'success')
+    else:
+        flash('No promotion performed (section may be full or no waitlisted students).', 'warning')
     return redirect(request.referrer or url_for('admin.section_enrollments', section_id=section_id))
 
 
-# -------- Reports (PDF) --------
-@admin_bp.route('/reports/courses_by_department.pdf')
+# -------- Reports (JSON) --------
+@admin_bp.route('/reports/grade_analytics.json')
 @admin_required
-def report_courses_by_department():
-    """Download a PDF of all courses grouped by department."""
+def report_grade_analytics():
+    """Term grade analytics (cached JSON); ?term=Spring 2025[&refresh=1]."""
+    term = (request.args.get('term') or '').strip()
+    if not term:
+        return jsonify({'error': 'term is required'}), 400
     try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    except Exception:
-        flash('PDF generation is not available on this server.', 'danger')
-        return redirect(url_for('admin.dashboard'))
+        from app.services.grade_analytics import get_term_analytics_json
+        payload = get_term_analytics_json(term, refresh=request.args.get('refresh') == '1')
+    except ImportError:
+        return jsonify({'error': 'Grade analytics are not available on this server'}), 503
+    return current_app.response_class(payload, mimetype='application/json')
 
-    buffer = __import__('io').BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=0.5*inch, leftMargin=0.5*inch)
-    styles = getSampleStyleSheet()
-    elements = [Paragraph('All Courses by Department', styles['Title']), Spacer(1, 0.2*inch)]
 
+# -------- Reports (PDF, CSV, XLSX) --------
+@admin_bp.route('/reports/courses_by_department.pdf')
+@admin_required
+def report_courses_by_department():
+    """Download a PDF of all courses grouped by department."""
     departments = Department.query.order_by(Department.name).all()
-    for dept in departments:
-        elements.append(Paragraph(dept.name, styles['Heading2']))
-        data = [["Code", "Title", "Credits", "Active"]]
-        for c in dept.courses:
-            data.append([c.code, c.title, str(c.credits), 'Yes' if c.is_active else 'No'])
-        table = Table(data, colWidths=[1.0*inch, 3.5*inch, 0.7*inch, 0.8*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#003366')),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-            ('FONTSIZE', (0,0), (-1,-1), 8),
-        ]))
-        elements.append(table)
-        elements.append(Spacer(1, 0.2*inch))
-
-    doc.build(elements)
-    buffer.seek(0)
-    from flask import send_file
-    return send_file(buffer, mimetype='application/pdf', as_attachment=True, download_name='courses_by_department.pdf')
+    rows = [(dept.name, [(c.code, c.title, c.credits, c.is_active) for c in dept.courses]) for dept in departments]
+    return _report_pdf('courses_by_department', rows, 'courses_by_department.pdf')
 
 
 @admin_bp.route('/reports/students_per_course.pdf')
 @admin_required
 def report_students_per_course():
-    """Download a PDF of student counts per course (by section)."""
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    except Exception:
-        flash('PDF generation is not available on this server.', 'danger')
-        return redirect(url_for('admin.dashboard'))
+    """Download a PDF of student counts per course (by section).
 
-    buffer = __import__('io').BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=0.5*inch, leftMargin=0.5*inch)
-    styles = getSampleStyleSheet()
-    elements = [Paragraph('Students Enrolled per Course Section', styles['Title']), Spacer(1, 0.2*inch)]
+    Unlike the CSV/XLSX export, every row is held in memory here and passed to the render job.
+    """
+    rows = [(code, section, term, enrolled) for code, section, term, enrolled, _, _ in admin_reports.students_per_course()]
+    return _report_pdf('students_per_course', rows, 'students_per_course.pdf')
 
-    sections = CourseSection.query.join(Course).order_by(Course.code, CourseSection.term.desc(), CourseSection.section_code).all()
-    data = [["Course", "Section", "Term", "Enrolled"]]
-    for s in sections:
-        data.append([s.course.code, s.section_code, s.term, str(s.enrolled_count or 0)])
-    table = Table(data, colWidths=[1.2*inch, 0.8*inch, 1.4*inch, 0.8*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#003366')),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('FONTSIZE', (0,0), (-1,-1), 8),
-    ]))
-    elements.append(table)
-
-    doc.build(elements)
-    buffer.seek(0)
-    from flask import send_file
-    return send_file(buffer, mimetype='application/pdf', as_attachment=True, download_name='students_per_course.pdf')
+
+@admin_bp.route('/reports/students_per_course.<any(csv, xlsx):fmt>')
+@admin_required
+def export_students_per_course(fmt):
+    """Download student counts per course section as CSV or XLSX, streamed from the database."""
+    return report_export.export_response(fmt, 'students_per_course', 'Students per Course',
+                                         admin_reports.STUDENTS_PER_COURSE_HEADER,
+                                         admin_reports.students_per_course())
 
 
 @admin_bp.route('/reports/instructors_with_courses.pdf')
 @admin_required
 def report_instructors_with_courses():
-    """Download a PDF of instructors with their assigned courses."""
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    except Exception:
-        flash('PDF generation is not available on this server.', 'danger')
-        return redirect(url_for('admin.dashboard'))
+    """Download a PDF of instructors with their assigned courses.
 
-    buffer = __import__('io').BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=0.5*inch, leftMargin=0.5*inch)
-    styles = getSampleStyleSheet()
-    elements = [Paragraph('Instructors with Assigned Courses', styles['Title']), Spacer(1, 0.2*inch)]
+    Unlike the CSV/XLSX export, every row is held in memory here and passed to the render job.
+    """
+    rows = list(admin_reports.instructors_with_courses())
+    return _report_pdf('instructors_with_courses', rows, 'instructors_with_courses.pdf')
 
-    instructors = InstructorProfile.query.order_by(InstructorProfile.id).all()
-    data = [["Instructor", "Department", "Courses (most recent term)"]]
-    for i in instructors:
-        courses = [f"{s.course.code}-{s.section_code} ({s.term})" for s in i.course_sections]
-        dept_name = i.department.name if i.department else ''
-        data.append([i.user.full_name, dept_name, ", ".join(courses) or 'None'])
-    table = Table(data, colWidths=[2.2*inch, 1.6*inch, 3.0*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#003366')),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('FONTSIZE', (0,0), (-1,-1), 8),
-    ]))
-    elements.append(table)
-
-    doc.build(elements)
-    buffer.seek(0)
-    from flask import send_file
-    return send_file(buffer, mimetype='application/pdf', as_attachment=True, download_name='instructors_with_courses.pdf')
+
+@admin_bp.route('/reports/instructors_with_courses.<any(csv, xlsx):fmt>')
+@admin_required
+def export_instructors_with_courses(fmt):
+    """Download instructors with their assigned courses as CSV or XLSX, streamed from the database."""
+    return report_export.export_response(fmt, 'instructors_with_courses', 'Instructors',
+                                         admin_reports.INSTRUCTORS_WITH_COURSES_HEADER,
+                                         admin_reports.instructors_with_courses_table())
+
+
+def _report_pdf(kind, rows, download_name):
+    # Rendered by the PDF render service; a slow report hands out a job to wait on
+    return pdf_render.pdf_response(kind, (rows,), download_name, user=current_user,
+                                   fallback=url_for('admin.dashboard'))
@@ -6,6 +6,6 @@ from flask import Blueprint
 api_bp = Blueprint('api', __name__)
 
 # Import routes after blueprint creation to avoid circular imports
-from app.api import courses, enrollments, users, auth, grades, transcripts
+from app.api import courses, enrollments, users, auth, grades, transcripts, cart, analytics, standing, finalization
 
 __all__ = ['api_bp']
@@ -0,0 +1,48 @@
+"""API routes for term-wide grade analytics (admin/registrar)."""
+
+from flask import jsonify, request, current_app
+from flask_jwt_extended import jwt_required, current_user as jwt_current_user
+from app.api import api_bp
+
+
+@api_bp.route('/analytics/grades', methods=['GET'])
+@jwt_required()
+def get_grade_analytics():
+    """Grade statistics for every section, course and department of a term.
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - in: query
+        name: term
+        required: true
+        schema:
+          type: string
+          example: Spring 2025
+      - in: query
+        name: refresh
+        schema:
+          type: boolean
+        description: Recompute instead of returning the cached result
+    responses:
+      200:
+        description: Distributions, mean/std/percentiles of grade points, DFW rates and inflation deltas
+      400:
+        description: Missing term
+      403:
+        description: Forbidden
+      503:
+        description: Analytics libraries not installed
+    """
+    if not (jwt_current_user.is_admin() or jwt_current_user.is_registrar()):
+        return jsonify({'error': 'Forbidden'}), 403
+    term = (request.args.get('term') or '').strip()
+    if not term:
+        return jsonify({'error': 'term is required'}), 400
+    refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+    try:
+        from app.services.grade_analytics import get_term_analytics_json
+        payload = get_term_analytics_json(term, refresh=refresh)
+    except ImportError:
+        return jsonify({'error': 'Grade analytics are not available on this server'}), 503
+    return current_app.response_class(payload, mimetype='application/json')
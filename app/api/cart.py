@@ -0,0 +1,148 @@
+"""API routes for the registration cart."""
+
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required, current_user as jwt_current_user
+from app.api import api_bp
+from app.models.course import CourseSection
+from app.services.cart_service import (get_cart, add_to_cart, remove_from_cart, validate_cart, submit_cart,
+                                       MAX_CART_SECTIONS)
+from app import limiter
+
+
+def _student_or_403():
+    if not jwt_current_user.is_student() or not jwt_current_user.student_profile:
+        return None
+    return jwt_current_user.student_profile
+
+
+def _section_ids(data):
+    """Optional `course_section_ids` list from a JSON body; None means 'use the cart'."""
+    section_ids = data.get('course_section_ids')
+    if section_ids is None:
+        return None, None
+    if not isinstance(section_ids, list) or not section_ids:
+        return None, 'course_section_ids must be a non-empty list'
+    if len(section_ids) > MAX_CART_SECTIONS:
+        return None, f'At most {MAX_CART_SECTIONS} sections per request'
+    try:
+        return [int(sid) for sid in section_ids], None
+    except (TypeError, ValueError):
+        return None, 'course_section_ids must contain integers'
+
+
+@api_bp.route('/cart', methods=['GET'])
+@jwt_required()
+def get_cart_items():
+    """List the sections staged in the current student's cart."""
+    student = _student_or_403()
+    if not student:
+        return jsonify({'error': 'Student account required'}), 403
+    items = get_cart(student)
+    return jsonify([{
+        'course_section_id': item.course_section_id,
+        'course_code': item.course_section.course.code,
+        'section_code': item.course_section.section_code,
+        'term': item.course_section.term,
+        'added_at': item.created_at.isoformat(),
+    } for item in items]), 200
+
+
+@api_bp.route('/cart/items', methods=['POST'])
+@jwt_required()
+@limiter.limit("120 per hour")
+def add_cart_item():
+    """Stage a course section in the cart."""
+    student = _student_or_403()
+    if not student:
+        return jsonify({'error': 'Student account required'}), 403
+    data = request.get_json() or {}
+    section_id = data.get('course_section_id')
+    if not section_id:
+        return jsonify({'error': 'course_section_id is required'}), 400
+    section = CourseSection.query.get_or_404(section_id)
+    ok, messages = add_to_cart(student, section)
+    if not ok:
+        return jsonify({'errors': messages}), 400
+    return jsonify({'course_section_id': section.id, 'messages': messages}), 201
+
+
+@api_bp.route('/cart/items/<int:section_id>', methods=['DELETE'])
+@jwt_required()
+def remove_cart_item(section_id):
+    """Remove a course section from the cart."""
+    student = _student_or_403()
+    if not student:
+        return jsonify({'error': 'Student account required'}), 403
+    if not remove_from_cart(student, section_id):
+        return jsonify({'error': 'Not found'}), 404
+    return '', 204
+
+
+@api_bp.route('/cart/validate', methods=['POST'])
+@jwt_required()
+@limiter.limit("120 per hour")
+def validate_cart_items():
+    """Validate the cart (or the given sections) as one schedule without enrolling.
+    ---
+    tags:
+      - Enrollments
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            course_section_ids:
+              type: array
+              items:
+                type: integer
+    responses:
+      200:
+        description: Per-section results, in cart order
+    """
+    student = _student_or_403()
+    if not student:
+        return jsonify({'error': 'Student account required'}), 403
+    section_ids, error = _section_ids(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({'error': error}), 400
+    ok, results = validate_cart(student, section_ids)
+    return jsonify({'ok': ok, 'results': results}), 200
+
+
+@api_bp.route('/cart/submit', methods=['POST'])
+@jwt_required()
+@limiter.limit("60 per hour")
+def submit_cart_items():
+    """Enroll in every cart section (or the given sections) at once, all or nothing.
+    ---
+    tags:
+      - Enrollments
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            course_section_ids:
+              type: array
+              items:
+                type: integer
+    responses:
+      201:
+        description: All sections enrolled
+      400:
+        description: Nothing enrolled; see per-section results
+    """
+    student = _student_or_403()
+    if not student:
+        return jsonify({'error': 'Student account required'}), 403
+    section_ids, error = _section_ids(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({'error': error}), 400
+    enrollments, success, messages, results = submit_cart(student, section_ids)
+    if not success:
+        return jsonify({'errors': messages, 'results': results}), 400
+    return jsonify({'enrollments': [e.to_dict() for e in enrollments], 'messages': messages}), 201
@@ -1,37 +1,45 @@
 """API routes for courses."""
 
-from flask import jsonify, request
+from flask import abort, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity, current_user as jwt_current_user
 from app.api import api_bp
 from app.models import Course, CourseSection, Department, db
-from app import cache
+from app.services import tag_cache
 
 @api_bp.route('/courses', methods=['GET'])
-@cache.cached(timeout=60, query_string=True)
 def get_courses():
     """Get all courses."""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
-    
-    courses = Course.query.filter_by(is_active=True).paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False
-    )
-    
-    return jsonify({
-        'courses': [course.to_dict() for course in courses.items],
-        'total': courses.total,
-        'page': page,
-        'pages': courses.pages
-    })
+
+    def load():
+        courses = Course.query.filter_by(is_active=True).paginate(
+            page=page,
+            per_page=per_page,
+            error_out=False
+        )
+        return {
+            'courses': [course.to_dict() for course in courses.items],
+            'total': courses.total,
+            'page': page,
+            'pages': courses.pages
+        }
+
+    # Fresh as soon as any course changes (see app/services/tag_cache.py)
+    return jsonify(tag_cache.cached(f'api:courses:{page}:{per_page}', load, tags=['courses']))
 
 
 @api_bp.route('/courses/<int:id>', methods=['GET'])
 def get_course(id):
     """Get a specific course."""
-    course = Course.query.get_or_404(id)
-    return jsonify(course.to_dict())
+    def load():
+        course = db.session.get(Course, id)
+        return course.to_dict() if course else None
+
+    data = tag_cache.cached(f'api:course:{id}', load, tags=[f'course:{id}'])
+    if data is None:
+        abort(404)
+    return jsonify(data)
 
 
 @api_bp.route('/courses', methods=['POST'])
@@ -157,13 +165,17 @@ def delete_course(id):
 @api_bp.route('/courses/<int:id>/sections', methods=['GET'])
 def get_course_sections(id):
     """Get sections for a course."""
-    sections = CourseSection.query.filter_by(course_id=id, status='Open').all()
-    return jsonify([{
-        'id': s.id,
-        'section_code': s.section_code,
-        'term': s.term,
-        'instructor': s.instructor.user.full_name if s.instructor else None,
-        'capacity': s.capacity,
-        'enrolled': s.enrolled_count,
-        'available': s.capacity - s.enrolled_count
-    } for s in sections])
+    def load():
+        sections = CourseSection.query.filter_by(course_id=id, status='Open').all()
+        return [{
+            'id': s.id,
+            'section_code': s.section_code,
+            'term': s.term,
+            'instructor': s.instructor.user.full_name if s.instructor else None,
+            'capacity': s.capacity,
+            'enrolled': s.enrolled_count,
+            'available': s.capacity - s.enrolled_count
+        } for s in sections]
+
+    # course:<id> is bumped by changes to the course's sections and their enrollments
+    return jsonify(tag_cache.cached(f'api:course-sections:{id}', load, tags=[f'course:{id}']))
@@ -7,8 +7,16 @@ from app.models import db
 from app.models.enrollment import Enrollment
 from app.models.course import CourseSection
 from app.services.enrollment_service import can_enroll as svc_can_enroll, enroll_student as svc_enroll_student, drop_enrollment as svc_drop_enrollment
+from app.services.eligibility_service import check_sections
+from app.services.enrollment_queue import enrollment_queue
 from app import limiter
 
+# Upper bound for /enrollments/check-batch (one browse page is 30-50 sections)
+MAX_BATCH_SECTIONS = 100
+
+# Longest a status request may block waiting for a queued enrollment (seconds)
+MAX_LONG_POLL = 25
+
 
 @api_bp.route('/enrollments', methods=['GET'])
 @jwt_required()
@@ -18,6 +26,7 @@ def list_enrollments():
         return jsonify({'error': 'Student account required'}), 403
     student = jwt_current_user.student_profile
     enrollments = Enrollment.query.filter_by(student_id=student.id).all()
+    Enrollment.load_waitlist_positions(enrollments)
     return jsonify([e.to_dict() for e in enrollments]), 200
 
 
@@ -36,6 +45,56 @@ def check_enrollment():
     return jsonify({'eligible': ok, 'errors': errors, 'warnings': warnings}), 200
 
 
+@api_bp.route('/enrollments/check-batch', methods=['POST'])
+@jwt_required()
+@limiter.limit("120 per hour")
+def check_enrollment_batch():
+    """Check eligibility for many course sections at once.
+    ---
+    tags:
+      - Enrollments
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            course_section_ids:
+              type: array
+              items:
+                type: integer
+    responses:
+      200:
+        description: Eligibility per section
+      400:
+        description: Validation error
+      403:
+        description: Student account required
+    """
+    if not jwt_current_user.is_student() or not jwt_current_user.student_profile:
+        return jsonify({'error': 'Student account required'}), 403
+    data = request.get_json() or {}
+    section_ids = data.get('course_section_ids')
+    if not isinstance(section_ids, list) or not section_ids:
+        return jsonify({'error': 'course_section_ids must be a non-empty list'}), 400
+    try:
+        section_ids = [int(sid) for sid in section_ids]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'course_section_ids must contain integers'}), 400
+    if len(section_ids) > MAX_BATCH_SECTIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_SECTIONS} sections per request'}), 400
+
+    results, missing = check_sections(jwt_current_user.student_profile, section_ids)
+    return jsonify({
+        'results': [
+            {'course_section_id': sid, 'eligible': ok, 'errors': errors, 'warnings': warnings}
+            for sid, (ok, errors, warnings) in results.items()
+        ],
+        'missing': missing,
+    }), 200
+
+
 @api_bp.route('/enrollments', methods=['POST'])
 @jwt_required()
 @limiter.limit("60 per hour")
@@ -54,12 +113,51 @@ def create_enrollment():
     if not ok:
         return jsonify({'eligible': False, 'errors': errors, 'warnings': warnings}), 400
 
+    if enrollment_queue.enabled:
+        record = enrollment_queue.submit(student, section)
+        resp = jsonify(record)
+        resp.headers['Location'] = f"/api/v1/enrollments/requests/{record['request_id']}"
+        return resp, 202
+
     enrollment, success, messages = svc_enroll_student(student, section)
     if not success or not enrollment:
         return jsonify({'eligible': False, 'errors': messages}), 400
     return jsonify(enrollment.to_dict()), 201
 
 
+@api_bp.route('/enrollments/requests/<request_id>', methods=['GET'])
+@jwt_required()
+def enrollment_request_status(request_id):
+    """Status of a queued enrollment request.
+    ---
+    tags:
+      - Enrollments
+    parameters:
+      - in: path
+        name: request_id
+        type: string
+        required: true
+      - in: query
+        name: wait
+        type: integer
+        description: Seconds to wait for the request to finish (long-poll, max 25)
+    responses:
+      200:
+        description: Request status (queued, processing, completed or failed)
+      403:
+        description: Student account required
+      404:
+        description: Unknown or expired request
+    """
+    if not jwt_current_user.is_student() or not jwt_current_user.student_profile:
+        return jsonify({'error': 'Student account required'}), 403
+    wait = min(max(request.args.get('wait', 0, type=int), 0), MAX_LONG_POLL)
+    record = enrollment_queue.wait(request_id, wait) if wait else enrollment_queue.status(request_id)
+    if not record or record.get('student_id') != jwt_current_user.student_profile.id:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(record), 200
+
+
 @api_bp.route('/enrollments/<int:enrollment_id>', methods=['DELETE'])
 @jwt_required()
 def drop_enrollment(enrollment_id):
@@ -0,0 +1,72 @@
+"""API routes for term grade finalization (admin/registrar)."""
+
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required, current_user as jwt_current_user
+from app.api import api_bp
+from app.services.grade_finalization import latest_run, start_grade_finalization
+
+
+def _allowed():
+    return jwt_current_user.is_admin() or jwt_current_user.is_registrar()
+
+
+@api_bp.route('/terms/<path:term>/finalize', methods=['POST'])
+@jwt_required()
+def finalize_term_grades(term):
+    """Start (or resume) grade finalization for a term.
+    ---
+    tags:
+      - Grades
+    parameters:
+      - in: path
+        name: term
+        required: true
+        schema:
+          type: string
+      - in: query
+        name: restart
+        schema:
+          type: boolean
+        description: Start a new run even if the term was already finalized
+    responses:
+      202:
+        description: Run started or resumed; poll GET on the same URL for progress
+      200:
+        description: A run is already active, or the term is already finalized
+      403:
+        description: Forbidden
+    """
+    if not _allowed():
+        return jsonify({'error': 'Forbidden'}), 403
+    restart = request.args.get('restart', 'false').lower() in ['true', '1', 'yes', 'on']
+    run, started = start_grade_finalization(term, user_id=jwt_current_user.id, restart=restart)
+    return jsonify(run.to_dict()), 202 if started else 200
+
+
+@api_bp.route('/terms/<path:term>/finalize', methods=['GET'])
+@jwt_required()
+def grade_finalization_status(term):
+    """Progress of the latest grade finalization run for a term.
+    ---
+    tags:
+      - Grades
+    parameters:
+      - in: path
+        name: term
+        required: true
+        schema:
+          type: string
+    responses:
+      200:
+        description: Phase, section and student progress, counts per final status
+      403:
+        description: Forbidden
+      404:
+        description: The term has not been finalized
+    """
+    if not _allowed():
+        return jsonify({'error': 'Forbidden'}), 403
+    run = latest_run(term)
+    if run is None:
+        return jsonify({'error': 'No finalization run for this term'}), 404
+    return jsonify(run.to_dict()), 200
@@ -1,4 +1,4 @@
-"""Grades API routes: set grades and view section roster."""
+"""Grades API routes: set grades (one or in bulk) and view section roster."""
 
 from flask import jsonify, request
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
@@ -8,6 +8,7 @@ from app.models import db
 from app.models.enrollment import Enrollment
 from app.models.course import CourseSection
 from app.services.grade_service import GradeService
+from app.services.grade_import import GradeImport, GradeImportError, detect_format, json_grade_rows, parse_grade_rows
 
 
 def _can_grade(enrollment: Enrollment) -> (bool, str | None):
@@ -68,6 +69,50 @@ def set_enrollment_grade(enrollment_id: int):
     return jsonify({'success': ok, 'messages': messages, 'enrollment': enrollment.to_dict()}), status
 
 
+@api_bp.route('/enrollments/<int:enrollment_id>/resolve-incomplete', methods=['POST'])
+@jwt_required()
+def resolve_incomplete(enrollment_id: int):
+    """Give an Incomplete its final grade, also after the term is finalized (admin/registrar).
+    ---
+    tags:
+      - Grades
+    parameters:
+      - in: path
+        name: enrollment_id
+        required: true
+        schema:
+          type: integer
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            grade:
+              type: string
+              example: B
+    responses:
+      200:
+        description: Incomplete resolved
+      400:
+        description: Not Incomplete, or invalid grade
+      403:
+        description: Forbidden
+    """
+    enrollment = Enrollment.query.get_or_404(enrollment_id)
+
+    if not (jwt_current_user.is_admin() or jwt_current_user.is_registrar()):
+        return jsonify({'error': 'Forbidden'}), 403
+
+    grade = (request.get_json() or {}).get('grade')
+    if not grade:
+        return jsonify({'error': 'grade is required'}), 400
+
+    ok, messages = GradeService.resolve_incomplete(enrollment, grade, grader_id=jwt_current_user.id)
+    status = 200 if ok else 400
+    return jsonify({'success': ok, 'messages': messages, 'enrollment': enrollment.to_dict()}), status
+
+
 @api_bp.route('/sections/<int:section_id>/roster', methods=['GET'])
 @jwt_required()
 def get_section_roster(section_id: int):
@@ -97,3 +142,66 @@ def get_section_roster(section_id: int):
 
     enrollments = GradeService.get_section_roster(section_id)
     return jsonify([e.to_dict() for e in enrollments]), 200
+
+
+@api_bp.route('/sections/<int:section_id>/grades/import', methods=['POST'])
+@jwt_required()
+def import_section_grades(section_id: int):
+    """Set many grades for a section from a CSV/JSON upload or a JSON body (instructor/admin/registrar).
+    Rows are keyed by student number. Valid rows are applied together; the
+    response reports the outcome of every row.
+    ---
+    tags:
+      - Grades
+    consumes:
+      - multipart/form-data
+      - application/json
+    parameters:
+      - in: path
+        name: section_id
+        required: true
+        schema:
+          type: integer
+      - in: formData
+        name: file
+        type: file
+        description: CSV (student_number,grade header) or JSON file
+      - in: body
+        name: body
+        schema:
+          type: object
+          properties:
+            grades:
+              type: array
+              items:
+                type: object
+                properties:
+                  student_number:
+                    type: string
+                  grade:
+                    type: string
+    responses:
+      200:
+        description: Per-row import report
+      400:
+        description: Unreadable upload
+      403:
+        description: Forbidden
+    """
+    section = CourseSection.query.get_or_404(section_id)
+
+    if not (jwt_current_user.is_admin() or jwt_current_user.is_registrar() or (
+        jwt_current_user.is_instructor() and jwt_current_user.instructor_profile and section.instructor_id == jwt_current_user.instructor_profile.id
+    )):
+        return jsonify({'error': 'Forbidden'}), 403
+
+    upload = request.files.get('file')
+    try:
+        if upload and upload.filename:
+            rows = parse_grade_rows(upload.stream, detect_format(upload.filename, upload.mimetype))
+        else:
+            rows = json_grade_rows(request.get_json(silent=True))
+        report = GradeImport(section, grader_id=jwt_current_user.id).run(rows)
+    except GradeImportError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(report), 200
@@ -0,0 +1,34 @@
+"""API routes for term-close academic standing runs (admin/registrar)."""
+
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required, current_user as jwt_current_user
+from app.api import api_bp
+from app.models.standing import StandingRun
+
+
+@api_bp.route('/standing/runs', methods=['GET'])
+@jwt_required()
+def list_standing_runs():
+    """Progress of term-close standing runs, newest first.
+    ---
+    tags:
+      - Academic Standing
+    parameters:
+      - in: query
+        name: term
+        schema:
+          type: string
+    responses:
+      200:
+        description: Runs with processed/total counts and standing counts
+      403:
+        description: Forbidden
+    """
+    if not (jwt_current_user.is_admin() or jwt_current_user.is_registrar()):
+        return jsonify({'error': 'Forbidden'}), 403
+    query = StandingRun.query
+    term = request.args.get('term')
+    if term:
+        query = query.filter_by(term=term)
+    runs = query.order_by(StandingRun.id.desc()).limit(20).all()
+    return jsonify([run.to_dict() for run in runs]), 200
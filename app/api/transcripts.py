@@ -1,12 +1,21 @@
 """Transcript API endpoints for PDF generation."""
 
-from flask import jsonify, request, send_file
+import os
+
+from flask import jsonify, request, send_file, url_for
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
 
 from app.api import api_bp
 from app.models.user import User
+from app.models.transcript import TranscriptBatch
 from app.models import db
-from app.services.transcript_service import TranscriptService
+from app.services import pdf_render
+from app.services.transcript_batch import batch_path, create_batch, start_batch
+from app.services.transcript_cache import transcript_data, transcript_response
+
+
+def _wants_json():
+    return request.args.get('format', '').lower() == 'json'
 
 
 @api_bp.route('/transcripts/me', methods=['GET'])
@@ -18,24 +27,35 @@ def transcript_me():
       - Transcripts
     produces:
       - application/pdf
+    parameters:
+      - in: header
+        name: If-None-Match
+        required: false
+        schema:
+          type: string
+      - in: query
+        name: format
+        required: false
+        schema:
+          type: string
+          enum: [pdf, json]
+        description: json returns the transcript data (terms with credit and point totals) instead of a PDF
     responses:
       200:
-        description: PDF content
+        description: PDF content (ETag identifies the transcript's content), or JSON with format=json
+      202:
+        description: The PDF is still being rendered; poll the returned status_url (see /pdf-jobs)
+      304:
+        description: The transcript has not changed since the given ETag
       403:
         description: Student account required
     """
     if not jwt_current_user.is_student() or not jwt_current_user.student_profile:
         return jsonify({'error': 'Student account required'}), 403
 
-    pdf_buffer = TranscriptService.generate_transcript(jwt_current_user.student_profile, official=False)
-    filename = TranscriptService.generate_filename(jwt_current_user.student_profile, official=False)
-    return send_file(
-        pdf_buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename,
-        max_age=0,
-    )
+    if _wants_json():
+        return jsonify(transcript_data(jwt_current_user.student_profile).to_dict()), 200
+    return transcript_response(jwt_current_user.student_profile, official=False, user=jwt_current_user, api=True)
 
 
 @api_bp.route('/transcripts/<int:user_id>', methods=['GET'])
@@ -58,11 +78,22 @@ def transcript_user(user_id: int):
         schema:
           type: boolean
         description: When true, generate official transcript
+      - in: query
+        name: format
+        required: false
+        schema:
+          type: string
+          enum: [pdf, json]
+        description: json returns the transcript data instead of a PDF
     produces:
       - application/pdf
     responses:
       200:
-        description: PDF content
+        description: PDF content (ETag identifies the transcript's content), or JSON with format=json
+      202:
+        description: The PDF is still being rendered; poll the returned status_url (see /pdf-jobs)
+      304:
+        description: The transcript has not changed since the given ETag
       403:
         description: Forbidden
       400:
@@ -76,13 +107,184 @@ def transcript_user(user_id: int):
     if not user.student_profile:
         return jsonify({'error': 'User is not a student'}), 400
 
+    if _wants_json():
+        return jsonify(transcript_data(user.student_profile).to_dict()), 200
+
     official = str(request.args.get('official', 'true')).lower() in ['1', 'true', 'yes']
-    pdf_buffer = TranscriptService.generate_transcript(user.student_profile, official=official)
-    filename = TranscriptService.generate_filename(user.student_profile, official=official)
-    return send_file(
-        pdf_buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename,
-        max_age=0,
-    )
+    return transcript_response(user.student_profile, official=official, user=jwt_current_user, api=True)
+
+
+@api_bp.route('/transcripts/batches', methods=['POST'])
+@jwt_required()
+def create_transcript_batch():
+    """Generate transcripts for many students into one ZIP archive (admin/registrar).
+    Select approved requests (request_ids, or approved=true for all of them),
+    a graduating class (graduation_year) and/or student_ids.
+    ---
+    tags:
+      - Transcripts
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            request_ids:
+              type: array
+              items:
+                type: integer
+            approved:
+              type: boolean
+            graduation_year:
+              type: integer
+            student_ids:
+              type: array
+              items:
+                type: integer
+            official:
+              type: boolean
+    responses:
+      202:
+        description: Batch queued; poll GET /transcripts/batches/{id} for progress
+      400:
+        description: Nothing selected
+      403:
+        description: Forbidden
+    """
+    if not (jwt_current_user.is_admin() or jwt_current_user.is_registrar()):
+        return jsonify({'error': 'Forbidden'}), 403
+
+    data = request.get_json(silent=True) or {}
+    try:
+        batch = create_batch(
+            user_id=jwt_current_user.id,
+            request_ids=data.get('request_ids'),
+            all_approved=bool(data.get('approved')),
+            graduation_year=data.get('graduation_year'),
+            student_ids=data.get('student_ids'),
+            official=bool(data.get('official', True)),
+        )
+    except ValueError as ex:
+        return jsonify({'error': str(ex)}), 400
+    start_batch(batch)
+    return jsonify(batch.to_dict()), 202
+
+
+@api_bp.route('/transcripts/batches/<int:batch_id>', methods=['GET'])
+@jwt_required()
+def transcript_batch_status(batch_id: int):
+    """Progress of a transcript batch.
+    ---
+    tags:
+      - Transcripts
+    parameters:
+      - in: path
+        name: batch_id
+        required: true
+        schema:
+          type: integer
+    responses:
+      200:
+        description: Status, processed/total and per-student errors
+      403:
+        description: Forbidden
+    """
+    if not (jwt_current_user.is_admin() or jwt_current_user.is_registrar()):
+        return jsonify({'error': 'Forbidden'}), 403
+    batch = TranscriptBatch.query.get_or_404(batch_id)
+    return jsonify(batch.to_dict()), 200
+
+
+@api_bp.route('/transcripts/batches/<int:batch_id>/download', methods=['GET'])
+@jwt_required()
+def transcript_batch_download(batch_id: int):
+    """Download a completed batch's ZIP archive (streamed from disk).
+    ---
+    tags:
+      - Transcripts
+    produces:
+      - application/zip
+    parameters:
+      - in: path
+        name: batch_id
+        required: true
+        schema:
+          type: integer
+    responses:
+      200:
+        description: ZIP archive with one PDF per student
+      403:
+        description: Forbidden
+      409:
+        description: The batch has not completed
+    """
+    if not (jwt_current_user.is_admin() or jwt_current_user.is_registrar()):
+        return jsonify({'error': 'Forbidden'}), 403
+    batch = TranscriptBatch.query.get_or_404(batch_id)
+    path = batch_path(batch)
+    if batch.status != 'Completed' or not path or not os.path.exists(path):
+        return jsonify({'error': 'Batch is not complete', 'status': batch.status}), 409
+    return send_file(path, mimetype='application/zip', as_attachment=True,
+                     download_name=batch.filename, conditional=True)
+
+
+@api_bp.route('/pdf-jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def pdf_job(job_id: str):
+    """Status of a PDF render job (returned with 202 by the PDF endpoints).
+    ---
+    tags:
+      - Transcripts
+    parameters:
+      - in: path
+        name: job_id
+        required: true
+        schema:
+          type: string
+    responses:
+      200:
+        description: Status (pending, done or failed), with download_url when done and error when failed
+      404:
+        description: Unknown job, or not the caller's
+    """
+    if pdf_render.job_record(job_id, jwt_current_user) is None:
+        return jsonify({'error': 'Not found'}), 404
+    status = pdf_render.job_status(job_id)
+    payload = {'job_id': job_id, 'status': status}
+    if status == 'done':
+        payload['download_url'] = url_for('api.pdf_job_download', job_id=job_id)
+    elif status == 'failed':
+        payload['error'] = pdf_render.get_store().error(job_id)
+    return jsonify(payload), 200
+
+
+@api_bp.route('/pdf-jobs/<job_id>/download', methods=['GET'])
+@jwt_required()
+def pdf_job_download(job_id: str):
+    """Download the PDF of a finished render job.
+    ---
+    tags:
+      - Transcripts
+    produces:
+      - application/pdf
+    parameters:
+      - in: path
+        name: job_id
+        required: true
+        schema:
+          type: string
+    responses:
+      200:
+        description: PDF content
+      404:
+        description: Unknown job, or not the caller's
+      409:
+        description: The job has not finished
+    """
+    if pdf_render.job_record(job_id, jwt_current_user) is None:
+        return jsonify({'error': 'Not found'}), 404
+    status = pdf_render.job_status(job_id)
+    if status != 'done':
+        return jsonify({'error': 'Document is not ready', 'status': status}), 409
+    return pdf_render.job_response(job_id, status, api=True)
@@ -8,7 +8,9 @@ from app.instructor import instructor_bp
 from app.models import (CourseSection, Enrollment, Assignment, 
                        Submission, InstructorProfile)
 from app.forms import AssignmentForm, GradeForm, AnnouncementForm, InstructorProfileForm
+from app.models.grading_scale import scale_for_course
 from app.services.grade_service import GradeService
+from app.services.grade_import import GradeImport, GradeImportError, detect_format, parse_grade_rows
 
 
 def instructor_required(f):
@@ -137,13 +139,15 @@ def roster(section_id):
     # Get grade distribution
     distribution = GradeService.get_grade_distribution(section_id)
     
+    grading_scale = scale_for_course(section.course)
     return render_template('instructor/roster.html',
                          title=f'Roster - {section.course.code}',
                          section=section,
                          enrollments=enrollments,
                          summary=summary,
                          distribution=distribution,
-                         valid_grades=GradeService.VALID_GRADES)
+                         grading_scale=grading_scale,
+                         valid_grades=list(grading_scale.points))
 
 
 @instructor_bp.route('/set_grade/<int:enrollment_id>', methods=['POST'])
@@ -214,64 +218,30 @@ def roster_pdf(section_id):
         flash('You are not the instructor for this course.', 'danger')
         return redirect(url_for('instructor.courses'))
 
-    # Generate PDF roster via ReportLab
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.enums import TA_CENTER
-        from io import BytesIO
-    except Exception:
-        flash('PDF generation is not available on this server.', 'danger')
-        return redirect(url_for('instructor.roster', section_id=section_id))
-
     from app.services.grade_service import GradeService
+    from app.services import pdf_render
     enrollments = GradeService.get_section_roster(section_id)
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=0.5*inch, leftMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
-
-    elements = []
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], alignment=TA_CENTER, textColor=colors.HexColor('#003366'))
-
-    elements.append(Paragraph('COURSE ROSTER', title_style))
-    elements.append(Paragraph(f"{section.course.code} - {section.course.title}", styles['Heading2']))
-    elements.append(Paragraph(f"Section {section.section_code} • {section.term} • Instructor: {section.instructor.user.full_name if section.instructor else 'TBA'}", styles['Normal']))
-    elements.append(Spacer(1, 0.2*inch))
-
-    data = [["Student ID", "Full Name", "Email", "Enrolled On", "Grade"]]
-    for e in enrollments:
-        data.append([
-            e.student.student_number,
-            e.student.user.full_name,
-            e.student.user.email,
-            e.enrolled_at.strftime('%Y-%m-%d') if e.enrolled_at else '-',
-            e.grade or 'Unavailable'
-        ])
-
-    table = Table(data, colWidths=[1.2*inch, 2.2*inch, 2.4*inch, 1.0*inch, 0.9*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#003366')),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 9),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('FONTSIZE', (0,1), (-1,-1), 8),
-        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.whitesmoke, colors.lightgrey]),
-    ]))
-
-    elements.append(table)
-
-    doc.build(elements)
-    buffer.seek(0)
-
-    from flask import send_file
+    rows = [(
+        e.student.student_number,
+        e.student.user.full_name,
+        e.student.user.email,
+        e.enrolled_at.strftime('%Y-%m-%d') if e.enrolled_at else '-',
+        e.grade or 'Unavailable'
+    ) for e in enrollments]
+
+    # Generate PDF roster via the render service
     filename = f"roster_{section.course.code}_{section.section_code}_{section.term.replace(' ', '')}.pdf"
-    return send_file(buffer, mimetype='application/pdf', as_attachment=True, download_name=filename)
+    return pdf_render.pdf_response(
+        'roster',
+        (
+            f"{section.course.code} - {section.course.title}",
+            f"Section {section.section_code} • {section.term} • Instructor: {section.instructor.user.full_name if section.instructor else 'TBA'}",
+            rows,
+        ),
+        filename,
+        user=current_user,
+        fallback=url_for('instructor.roster', section_id=section_id),
+    )
 
 
 @instructor_bp.route('/inbox')
@@ -291,38 +261,61 @@ def bulk_grades(section_id):
         flash('You cannot grade students in sections you do not teach.', 'danger')
         return redirect(url_for('instructor.courses'))
     
-    # Parse form data
-    enrollment_grades = []
+    # Parse form data (checked against the section roster, no per-field queries)
+    rows = []
     for key, value in request.form.items():
         if key.startswith('grade_'):
-            enrollment_id = int(key.replace('grade_', ''))
             grade = value.strip()
             if grade:  # Only process non-empty grades
-                enrollment = Enrollment.query.get(enrollment_id)
-                if enrollment:
-                    enrollment_grades.append((enrollment, grade))
+                rows.append({'enrollment_id': int(key.replace('grade_', '')), 'grade': grade})
     
-    if not enrollment_grades:
+    if not rows:
         flash('No grades to submit', 'warning')
         return redirect(url_for('instructor.roster', section_id=section_id))
     
-    # Bulk set grades
-    success_count, fail_count, messages = GradeService.bulk_set_grades(
-        enrollment_grades,
-        grader_id=current_user.id
-    )
+    # Apply all grades in one bulk write
+    report = GradeImport(section, grader_id=current_user.id).run(rows)
     
     # Flash messages
-    if success_count > 0:
-        flash(f'Successfully set {success_count} grades', 'success')
-    if fail_count > 0:
-        flash(f'Failed to set {fail_count} grades', 'danger')
-        for msg in messages[1:]:  # Skip the summary message
-            flash(msg, 'warning')
+    if report['applied'] > 0:
+        flash(f"Successfully set {report['applied']} grades", 'success')
+    if report['failed'] > 0:
+        flash(f"Failed to set {report['failed']} grades", 'danger')
+        for row in report['rows']:
+            if row['result'] == 'error':
+                flash(row['message'], 'warning')
     
     return redirect(url_for('instructor.roster', section_id=section_id))
 
 
+@instructor_bp.route('/sections/<int:section_id>/grades/import', methods=['POST'])
+@instructor_required
+def import_grades(section_id):
+    """Upload a CSV or JSON grade file (keyed by student number) for a section."""
+    section = CourseSection.query.get_or_404(section_id)
+    
+    if section.instructor_id != current_user.instructor_profile.id:
+        flash('You cannot grade students in sections you do not teach.', 'danger')
+        return redirect(url_for('instructor.courses'))
+    
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Choose a CSV or JSON file to upload', 'warning')
+        return redirect(url_for('instructor.roster', section_id=section_id))
+    
+    try:
+        fmt = detect_format(upload.filename, upload.mimetype)
+        report = GradeImport(section, grader_id=current_user.id).run(parse_grade_rows(upload.stream, fmt))
+    except GradeImportError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('instructor.roster', section_id=section_id))
+    
+    return render_template('instructor/grade_import_report.html',
+                         title='Grade Import',
+                         section=section,
+                         report=report)
+
+
 @instructor_bp.route('/grade/<int:submission_id>', methods=['GET', 'POST'])
 @instructor_required
 def grade_submission(submission_id):
@@ -1,11 +1,12 @@
 """Main blueprint routes."""
 
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, abort
 from flask_login import current_user, login_required
 from app.main import main_bp
 from app.models import Course, CourseSection, Department, Announcement, User
 from app.models import db
 from app.forms import SearchForm
+from app.services import pdf_render
 
 
 @main_bp.route('/')
@@ -387,6 +388,31 @@ def notifications_mark_read(note_id):
     return redirect(next_url)
 
 
+@main_bp.route('/pdf-jobs/<job_id>')
+@login_required
+def pdf_job(job_id):
+    """Wait page for a PDF still being rendered; refreshes until it can be downloaded."""
+    record = pdf_render.job_record(job_id, current_user)
+    if record is None:
+        abort(404)
+    status = pdf_render.job_status(job_id)
+    error = pdf_render.get_store().error(job_id) if status == 'failed' else None
+    return render_template('main/pdf_job.html', title='Preparing Document', job_id=job_id,
+                           record=record, status=status, error=error)
+
+
+@main_bp.route('/pdf-jobs/<job_id>/download')
+@login_required
+def pdf_job_download(job_id):
+    """Download the PDF of a finished render job."""
+    if pdf_render.job_record(job_id, current_user) is None:
+        abort(404)
+    status = pdf_render.job_status(job_id)
+    if status != 'done':
+        return redirect(url_for('main.pdf_job', job_id=job_id))
+    return pdf_render.job_response(job_id, status)
+
+
 @main_bp.route('/health')
 def health():
     """Health check endpoint for monitoring."""
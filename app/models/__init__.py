@@ -49,7 +49,13 @@ from app.models.announcement import Announcement
 from app.models.notification import Notification
 from app.models.audit import AuditLog
 from app.models.media import Media
-from app.models.transcript import TranscriptRequest
+from app.models.transcript import TranscriptRequest, TranscriptBatch
+from app.models.outbox import OutboxMessage
+from app.models.cart import CartItem
+from app.models.term_load import StudentTermLoad
+from app.models.standing import TermStanding, StandingRun
+from app.models.finalization import GradeFinalizationRun
+from app.models.grading_scale import GradingScale, GradingScaleEntry
 
 __all__ = [
     'db',
@@ -72,5 +78,14 @@ __all__ = [
     'Notification',
     'AuditLog',
     'Media',
-    'TranscriptRequest'
+    'TranscriptRequest',
+    'TranscriptBatch',
+    'OutboxMessage',
+    'CartItem',
+    'StudentTermLoad',
+    'TermStanding',
+    'StandingRun',
+    'GradeFinalizationRun',
+    'GradingScale',
+    'GradingScaleEntry'
 ]
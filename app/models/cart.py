@@ -0,0 +1,22 @@
+"""Registration cart model."""
+
+from app.models import db, BaseModel
+
+
+class CartItem(BaseModel):
+    """A course section a student has staged for registration."""
+    __tablename__ = 'cart_items'
+
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id'), nullable=False, index=True)
+    course_section_id = db.Column(db.Integer, db.ForeignKey('course_sections.id'), nullable=False)
+
+    # Relationships
+    student = db.relationship('StudentProfile', backref=db.backref('cart_items', cascade='all, delete-orphan'))
+    course_section = db.relationship('CourseSection')
+
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'course_section_id'),
+    )
+
+    def __repr__(self):
+        return f'<CartItem student={self.student_id} section={self.course_section_id}>'
@@ -2,9 +2,75 @@
 
 from app.models import db, BaseModel
 from datetime import datetime, time
+from sqlalchemy import event
+from sqlalchemy.orm import validates
+from collections import deque
 import json
 
 
+# Weekly occupancy bitmaps: bit n is set when a section meets during minute n of the
+# week (Monday 00:00 = bit 0). Two sections overlap iff their bitmaps share a bit.
+MINUTES_PER_DAY = 24 * 60
+DAY_INDEX = {'Mon': 0, 'Tue': 1, 'Wed': 2, 'Thu': 3, 'Fri': 4, 'Sat': 5, 'Sun': 6}
+
+
+def _parse_minutes(value):
+    """Convert 'HH:MM' to minutes after midnight."""
+    hours, minutes = str(value).strip().split(':')[:2]
+    total = int(hours) * 60 + int(minutes)
+    if not 0 <= total <= MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time: {value}")
+    return total
+
+
+def compile_occupancy(schedule):
+    """Compile a schedule dict ({"days": [...], "start": "HH:MM", "end": "HH:MM"}) into a bitmap."""
+    if not schedule:
+        return 0
+    try:
+        start = _parse_minutes(schedule.get('start', '00:00'))
+        end = _parse_minutes(schedule.get('end', '00:00'))
+    except (TypeError, ValueError):
+        return 0
+    if end <= start:
+        return 0
+    day_mask = ((1 << (end - start)) - 1) << start
+    mask = 0
+    for day in schedule.get('days', []) or []:
+        index = DAY_INDEX.get(str(day).strip()[:3].title())
+        if index is not None:
+            mask |= day_mask << (index * MINUTES_PER_DAY)
+    return mask
+
+
+def conflict_matrix(sections):
+    """
+    Compute all pairwise schedule conflicts for a collection of sections.
+    Sections sharing a term and meeting pattern are grouped first, so the number of
+    bitmap comparisons grows with distinct patterns rather than sections.
+    Returns: {section_id: set of conflicting section ids}
+    """
+    patterns = {}
+    for section in sections:
+        mask = section.occupancy
+        if mask:
+            patterns.setdefault(section.term, {}).setdefault(mask, []).append(section.id)
+
+    result = {section.id: set() for section in sections}
+    for term_patterns in patterns.values():
+        items = list(term_patterns.items())
+        overlapping = {mask: set(ids) for mask, ids in items}
+        for i, (mask_a, ids_a) in enumerate(items):
+            for mask_b, ids_b in items[i + 1:]:
+                if mask_a & mask_b:
+                    overlapping[mask_a].update(ids_b)
+                    overlapping[mask_b].update(ids_a)
+        for mask, ids in items:
+            for section_id in ids:
+                result[section_id] = overlapping[mask] - {section_id}
+    return result
+
+
 class Department(BaseModel):
     """Department model."""
     __tablename__ = 'departments'
@@ -48,6 +114,78 @@ course_prerequisites = db.Table('course_prerequisites',
     db.Column('prerequisite_id', db.Integer, db.ForeignKey('courses.id'), primary_key=True)
 )
 
+# Transitive closure of course_prerequisites: one row per (course, direct or indirect
+# prerequisite), with the shortest chain length. Maintained by Course.set_prerequisites.
+course_prerequisite_closure = db.Table('course_prerequisite_closure',
+    db.Column('course_id', db.Integer, db.ForeignKey('courses.id'), primary_key=True),
+    db.Column('prerequisite_id', db.Integer, db.ForeignKey('courses.id'), primary_key=True, index=True),
+    db.Column('depth', db.Integer, nullable=False, default=1)
+)
+
+
+class PrerequisiteCycleError(ValueError):
+    """Raised when a prerequisite change would make a course (indirectly) require itself."""
+
+
+def _prerequisite_graph():
+    """All direct prerequisite edges as {course_id: [prerequisite_id, ...]} (one query)."""
+    graph = {}
+    for course_id, prereq_id in db.session.execute(
+        db.select(course_prerequisites.c.course_id, course_prerequisites.c.prerequisite_id)
+    ):
+        graph.setdefault(course_id, []).append(prereq_id)
+    return graph
+
+
+def _closure_from(graph, course_id):
+    """Shortest-chain depth of every prerequisite reachable from `course_id`."""
+    depths = {}
+    queue = deque((p, 1) for p in graph.get(course_id, []))
+    while queue:
+        prereq, depth = queue.popleft()
+        if prereq == course_id:
+            raise PrerequisiteCycleError(f"Course {course_id} would be its own prerequisite")
+        if prereq in depths:
+            continue
+        depths[prereq] = depth
+        queue.extend((p, depth + 1) for p in graph.get(prereq, []))
+    return depths
+
+
+def rebuild_prerequisite_closure(course_ids=None):
+    """Recompute closure rows for `course_ids` (all courses when None) from the direct edges.
+    Used after prerequisite edits and to backfill existing databases.
+    """
+    db.session.flush()
+    graph = _prerequisite_graph()
+    if course_ids is None:
+        course_ids = [cid for (cid,) in db.session.execute(db.select(Course.id))]
+    course_ids = list(set(course_ids))
+    if not course_ids:
+        return 0
+    rows = []
+    for course_id in course_ids:
+        rows.extend({'course_id': course_id, 'prerequisite_id': prereq, 'depth': depth}
+                    for prereq, depth in _closure_from(graph, course_id).items())
+    db.session.execute(course_prerequisite_closure.delete().where(
+        course_prerequisite_closure.c.course_id.in_(course_ids)))
+    if rows:
+        db.session.execute(course_prerequisite_closure.insert(), rows)
+    return len(rows)
+
+
+def prerequisite_closure(course_ids):
+    """{course_id: set of all (transitive) prerequisite ids} for several courses, in one query."""
+    result = {cid: set() for cid in course_ids}
+    if not result:
+        return result
+    for course_id, prereq_id in db.session.execute(
+        db.select(course_prerequisite_closure.c.course_id, course_prerequisite_closure.c.prerequisite_id)
+        .where(course_prerequisite_closure.c.course_id.in_(list(result)))
+    ):
+        result[course_id].add(prereq_id)
+    return result
+
 
 class Course(BaseModel):
     """Course catalog model."""
@@ -72,6 +210,9 @@ class Course(BaseModel):
     max_capacity_default = db.Column(db.Integer, default=30)
     lab_required = db.Column(db.Boolean, default=False)
     
+    # Grading scale for this course; None uses the institution default
+    grading_scale_id = db.Column(db.Integer, db.ForeignKey('grading_scales.id'))
+    
     # Status
     is_active = db.Column(db.Boolean, default=True)
     
@@ -98,25 +239,51 @@ class Course(BaseModel):
     def add_prerequisite(self, course):
         """Add a prerequisite course."""
         if not self.has_prerequisite(course):
-            self.prerequisites.append(course)
+            self.set_prerequisites(list(self.prerequisites) + [course])
     
     def remove_prerequisite(self, course):
         """Remove a prerequisite course."""
         if self.has_prerequisite(course):
-            self.prerequisites.remove(course)
+            self.set_prerequisites([p for p in self.prerequisites if p.id != course.id])
+    
+    def set_prerequisites(self, courses):
+        """Replace the direct prerequisites and update the closure table.
+        Raises PrerequisiteCycleError (leaving the course unchanged) if any new
+        prerequisite already requires this course, directly or indirectly.
+        """
+        courses = list({c.id: c for c in courses}.values())
+        new_ids = [c.id for c in courses]
+        if self.id is not None and new_ids:
+            if self.id in new_ids:
+                raise PrerequisiteCycleError(f"{self.code} cannot be its own prerequisite")
+            cycle = db.session.execute(
+                db.select(course_prerequisite_closure.c.course_id).where(
+                    course_prerequisite_closure.c.course_id.in_(new_ids),
+                    course_prerequisite_closure.c.prerequisite_id == self.id,
+                ).limit(1)
+            ).first()
+            if cycle:
+                blocker = next(c for c in courses if c.id == cycle[0])
+                raise PrerequisiteCycleError(f"{blocker.code} already requires {self.code}")
+        self.prerequisites = courses
+        db.session.flush()
+        # This course and every course that (indirectly) requires it see a new closure
+        dependents = [cid for (cid,) in db.session.execute(
+            db.select(course_prerequisite_closure.c.course_id)
+            .where(course_prerequisite_closure.c.prerequisite_id == self.id)
+        )]
+        rebuild_prerequisite_closure([self.id] + dependents)
+    
+    def prerequisite_ids(self):
+        """Ids of all direct and indirect prerequisites (one closure-table query)."""
+        return prerequisite_closure([self.id])[self.id] if self.id is not None else set()
     
     def get_all_prerequisites(self):
         """Get all prerequisites recursively."""
-        all_prereqs = set()
-        to_process = list(self.prerequisites)
-        
-        while to_process:
-            prereq = to_process.pop(0)
-            if prereq not in all_prereqs:
-                all_prereqs.add(prereq)
-                to_process.extend(prereq.prerequisites)
-        
-        return list(all_prereqs)
+        ids = self.prerequisite_ids()
+        if not ids:
+            return []
+        return Course.query.filter(Course.id.in_(ids)).all()
     
     def to_dict(self):
         return {
@@ -190,6 +357,9 @@ class CourseSection(BaseModel):
     allow_audit = db.Column(db.Boolean, default=True)
     require_permission = db.Column(db.Boolean, default=False)
     
+    # Set when the term's grades are finalized; grades can no longer be changed
+    grades_locked_at = db.Column(db.DateTime)
+    
     # Unique constraint on course, section, and term
     __table_args__ = (
         db.UniqueConstraint('course_id', 'section_code', 'term'),
@@ -203,25 +373,170 @@ class CourseSection(BaseModel):
     announcements = db.relationship('Announcement', back_populates='course_section', cascade='all, delete-orphan')
     room = db.relationship('Room', back_populates='course_sections')
     
+    @property
+    def grades_locked(self):
+        return self.grades_locked_at is not None
+    
     @property
     def is_full(self):
         """Check if section is full."""
         return self.enrolled_count >= self.capacity
-    
+
+    @property
+    def occupancy(self):
+        """Weekly minute-of-week bitmap of the meeting times (cached until the schedule changes)."""
+        mask = self.__dict__.get('_occupancy')
+        if mask is None:
+            mask = compile_occupancy(self.get_meeting_times())
+            self.__dict__['_occupancy'] = mask
+        return mask
+
+    @validates('schedule')
+    def _reset_occupancy(self, key, value):
+        self.__dict__.pop('_occupancy', None)
+        return value
+    
+    def _update_counts(self, values, *criteria):
+        """Apply a single conditional UPDATE to this section's counters.
+        The counters are expired afterwards so the next read reflects the database.
+        Returns True when the row was updated (i.e. the condition held).
+        """
+        from app.services.tag_cache import invalidate_tags, section_tags
+
+        result = db.session.execute(
+            db.update(CourseSection)
+            .where(CourseSection.id == self.id, *criteria)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.expire(self, ['enrolled_count', 'waitlist_count'])
+        if result.rowcount == 1:
+            invalidate_tags(section_tags(self))
+        return result.rowcount == 1
+
+    def claim_seat(self):
+        """Atomically take a seat; returns False when the section is already full."""
+        enrolled = db.func.coalesce(CourseSection.enrolled_count, 0)
+        return self._update_counts({'enrolled_count': enrolled + 1}, enrolled < CourseSection.capacity)
+
+    def release_seat(self):
+        """Atomically give a seat back (never below zero)."""
+        enrolled = db.func.coalesce(CourseSection.enrolled_count, 0)
+        return self._update_counts({'enrolled_count': enrolled - 1}, enrolled > 0)
+
+    def claim_waitlist_slot(self):
+        """Atomically add one entry to the waitlist counter."""
+        waitlisted = db.func.coalesce(CourseSection.waitlist_count, 0)
+        return self._update_counts({'waitlist_count': waitlisted + 1})
+
+    def release_waitlist_slot(self):
+        """Atomically remove one entry from the waitlist counter (never below zero)."""
+        waitlisted = db.func.coalesce(CourseSection.waitlist_count, 0)
+        return self._update_counts({'waitlist_count': waitlisted - 1}, waitlisted > 0)
+
     def promote_from_waitlist(self):
-        """Promote next student from waitlist."""
+        """Promote next student from waitlist.
+        Returns the promoted enrollment, or None when nobody could be promoted.
+        """
+        promoted = self.promote_waitlisted(1)
+        return promoted[0] if promoted else None
+
+    # Conditional seat claims tried before giving up under concurrent enrollment
+    PROMOTE_ATTEMPTS = 3
+
+    def promote_waitlisted(self, count=None):
+        """Move up to `count` waitlisted students (default: every free seat) into the section.
+
+        Seats are claimed with one conditional UPDATE on the section and the
+        enrollments flipped with one UPDATE over the first N of the waitlist
+        order, so filling 30 new seats costs the same as filling one. Each
+        promoted student gets a notice through the outbox. Returns the promoted
+        enrollments in waitlist order.
+        """
         from app.models.enrollment import Enrollment
-        next_student = Enrollment.query.filter_by(
-            course_section_id=self.id,
-            status='Waitlisted'
-        ).order_by(Enrollment.waitlist_position).first()
-        
-        if next_student and not self.is_full:
-            next_student.status = 'Enrolled'
-            next_student.enrolled_at = datetime.utcnow()
-            next_student.waitlist_position = None
-            self.enrolled_count = (self.enrolled_count or 0) + 1
-            self.waitlist_count = max(0, (self.waitlist_count or 0) - 1)
+        db.session.flush()
+        enrolled = db.func.coalesce(CourseSection.enrolled_count, 0)
+        for _ in range(self.PROMOTE_ATTEMPTS):
+            db.session.refresh(self, ['enrolled_count', 'capacity'])
+            free = max((self.capacity or 0) - (self.enrolled_count or 0), 0)
+            wanted = free if count is None else min(count, free)
+            if wanted <= 0:
+                return []
+            candidates = [row_id for (row_id,) in db.session.query(Enrollment.id).filter(
+                Enrollment.course_section_id == self.id,
+                Enrollment.status == 'Waitlisted',
+            ).order_by(*Enrollment.waitlist_sort_key()).limit(wanted)]
+            if not candidates:
+                return []
+            if self._update_counts({'enrolled_count': enrolled + len(candidates)},
+                                   enrolled + len(candidates) <= CourseSection.capacity):
+                break
+            # Seats were taken concurrently; retry with the seats that are left
+        else:
+            return []
+
+        # Guard on the waitlisted status so concurrent promotions cannot both take a row
+        now = datetime.utcnow()
+        promoted_rows = db.session.execute(
+            db.update(Enrollment)
+            .where(Enrollment.id.in_(candidates), Enrollment.status == 'Waitlisted')
+            .values(status='Enrolled', enrolled_at=now)
+            .returning(Enrollment.id, Enrollment.student_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        promoted_ids = [row_id for row_id, _ in promoted_rows]
+        unused = len(candidates) - len(promoted_ids)
+        if unused:
+            self._update_counts({'enrolled_count': enrolled - unused}, enrolled >= unused)
+        if promoted_ids:
+            waitlisted = db.func.coalesce(CourseSection.waitlist_count, 0)
+            self._update_counts({'waitlist_count': db.case(
+                (waitlisted > len(promoted_ids), waitlisted - len(promoted_ids)), else_=0)})
+
+            # The bulk UPDATE bypasses the flush hook that maintains term loads
+            from app.models.term_load import apply_term_load_deltas
+            credits = self.course.credits or 0
+            apply_term_load_deltas({
+                (student_id, self.term): {'enrolled_credits': credits, 'enrolled_count': 1, 'waitlisted_count': -1}
+                for _, student_id in promoted_rows
+            })
+            # and the transcript purge and student cache tags
+            from app.services.transcript_cache import invalidate_transcripts
+            invalidate_transcripts({student_id for _, student_id in promoted_rows})
+
+        # populate_existing: rows already in the session still say Waitlisted
+        promoted = Enrollment.query.filter(Enrollment.id.in_(promoted_ids)).populate_existing().all()
+        promoted.sort(key=lambda e: candidates.index(e.id))
+        for enrollment in promoted:
+            self._queue_promotion_notice(enrollment)
+        return promoted
+
+    def _queue_promotion_notice(self, enrollment):
+        """Queue the in-app notice and e-mail for a student promoted off the waitlist."""
+        from app.services.outbox_service import enqueue_notification
+        user = enrollment.student.user if enrollment.student else None
+        if not user:
+            return
+        label = f"{self.course.code}-{self.section_code} ({self.term})"
+        email = None
+        if getattr(user, 'email', None):
+            email = {
+                'to': [user.email],
+                'subject': 'Enrollment Update: Waitlist Promotion',
+                'body': (
+                    f"Good news! You have been moved from the waitlist to enrolled for {label}.\n"
+                    f"Please check your schedule."
+                ),
+            }
+        enqueue_notification(
+            user_id=user.id,
+            notification_type='enrollment',
+            title='Waitlist Promotion',
+            message=f"You have been enrolled in {label}.",
+            payload={'course_section_id': self.id},
+            email=email,
+        )
+
     def __repr__(self):
         return f'<CourseSection {self.course.code}-{self.section_code} ({self.term})>'
     
@@ -247,28 +562,7 @@ class CourseSection(BaseModel):
         """Check if this section has time conflict with another."""
         if self.term != other_section.term:
             return False
-        
-        if not self.schedule or not other_section.schedule:
-            return False
-        
-        my_schedule = self.get_meeting_times()
-        other_schedule = other_section.get_meeting_times()
-        
-        # Check for day overlap
-        my_days = set(my_schedule.get('days', []))
-        other_days = set(other_schedule.get('days', []))
-        
-        if not my_days.intersection(other_days):
-            return False
-        
-        # Check for time overlap
-        my_start = datetime.strptime(my_schedule.get('start', '00:00'), '%H:%M').time()
-        my_end = datetime.strptime(my_schedule.get('end', '00:00'), '%H:%M').time()
-        other_start = datetime.strptime(other_schedule.get('start', '00:00'), '%H:%M').time()
-        other_end = datetime.strptime(other_schedule.get('end', '00:00'), '%H:%M').time()
-        
-        # Check if times overlap
-        return not (my_end <= other_start or other_end <= my_start)
+        return (self.occupancy & other_section.occupancy) != 0
     
     def to_dict(self):
         return {
@@ -289,3 +583,9 @@ class CourseSection(BaseModel):
             'delivery_mode': self.delivery_mode,
             'status': self.status
         }
+
+
+@event.listens_for(CourseSection, 'refresh')
+def _drop_occupancy_on_refresh(target, context, attrs):
+    """Schedules reloaded from the database invalidate the cached bitmap."""
+    target.__dict__.pop('_occupancy', None)
@@ -2,8 +2,8 @@
 
 from app.models import db, BaseModel
 from datetime import datetime
+from sqlalchemy import event
 from sqlalchemy.orm import synonym
-from flask import current_app
 
 
 class EnrollmentStatus:
@@ -16,6 +16,19 @@ class EnrollmentStatus:
     FAILED = 'Failed'
     AUDITING = 'Auditing'
     PENDING = 'Pending'
+    INCOMPLETE = 'Incomplete'  # set at term close for enrollments left without a final grade
+
+
+# Minimum grade points for a completed course to satisfy a prerequisite (a "C")
+PREREQUISITE_MIN_GRADE_POINTS = 2.0
+
+# Per-student index of courses completed with the minimum grade met, so a
+# prerequisite check is one set difference. Kept in sync with enrollments by the
+# flush hooks at the bottom of this module.
+student_completed_courses = db.Table('student_completed_courses',
+    db.Column('student_id', db.Integer, db.ForeignKey('student_profiles.id'), primary_key=True),
+    db.Column('course_id', db.Integer, db.ForeignKey('courses.id'), primary_key=True)
+)
 
 
 class Enrollment(BaseModel):
@@ -38,8 +51,7 @@ class Enrollment(BaseModel):
     graded_at = db.Column(db.DateTime)
     grade_mode = db.Column(db.String(20))  # e.g., 'Audit'
     
-    # Waitlist information
-    waitlist_position = db.Column(db.Integer)
+    # Waitlist information (order is (waitlisted_at, id); positions are computed on read)
     waitlisted_at = db.Column(db.DateTime)
     
     # Attendance and participation
@@ -66,6 +78,7 @@ class Enrollment(BaseModel):
         db.UniqueConstraint('student_id', 'course_section_id'),
         db.Index('idx_enrollment_status', 'status'),
         db.Index('idx_enrollment_term', 'course_section_id', 'status'),
+        db.Index('idx_enrollment_waitlist_order', 'course_section_id', 'status', 'waitlisted_at'),
     )
     
     # Relationships
@@ -83,35 +96,15 @@ class Enrollment(BaseModel):
     
     @staticmethod
     def check_prerequisites(student, course):
-        """Check if student meets course prerequisites."""
-        # Local import to avoid circular dependency
-        from app.models.course import CourseSection
-        # Get all prerequisites for the course
-        prerequisites = course.get_all_prerequisites()
-        
-        if not prerequisites:
+        """Check if student meets course prerequisites (direct and indirect).
+        One closure-table query plus one completed-course index query.
+        """
+        from app.models.course import Course
+        required = course.prerequisite_ids()
+        if not required:
             return True, []
-        
-        missing_prereqs = []
-        
-        for prereq in prerequisites:
-            # Check if student has completed the prerequisite
-            completed = Enrollment.query.filter_by(
-                student_id=student.id,
-                status='Completed'
-            ).join(CourseSection).filter(
-                CourseSection.course_id == prereq.id
-            ).first()
-            
-            if not completed:
-                missing_prereqs.append(prereq)
-            elif completed.grade:
-                # Check if grade meets minimum requirement
-                grade_values = {'A': 4, 'B': 3, 'C': 2, 'D': 1, 'F': 0}
-                student_grade_val = grade_values.get(completed.grade[0], 0)
-                if student_grade_val < 2:  # Minimum C grade
-                    missing_prereqs.append(prereq)
-        
+        missing_ids = required - completed_course_ids(student.id)
+        missing_prereqs = Course.query.filter(Course.id.in_(missing_ids)).order_by(Course.code).all() if missing_ids else []
         return len(missing_prereqs) == 0, missing_prereqs
     
     @staticmethod
@@ -136,100 +129,52 @@ class Enrollment(BaseModel):
     
     @staticmethod
     def check_credit_limit(student, course_section, max_credits=18):
-        """Check if enrolling would exceed credit limit."""
-        from app.models.course import Course, CourseSection
-        
-        # Get current term credits
-        current_credits = db.session.query(
-            db.func.sum(Course.credits)
-        ).join(
-            CourseSection, Course.id == CourseSection.course_id
-        ).join(
-            Enrollment, CourseSection.id == Enrollment.course_section_id
-        ).filter(
-            Enrollment.student_id == student.id,
-            Enrollment.status == EnrollmentStatus.ENROLLED,
-            CourseSection.term == course_section.term
-        ).scalar() or 0
-        
-        new_credits = course_section.course.credits
-        
-        total_credits = current_credits + new_credits
-        
+        """Check if enrolling would exceed credit limit (same credit count as `can_enroll`)."""
+        from app.services.eligibility_service import EligibilityContext
+        context = EligibilityContext(student, [], max_credits=max_credits)
+        total_credits = context.term_credits(course_section.term) + (course_section.course.credits or 0)
         return total_credits <= max_credits, total_credits
     
     @staticmethod
     def can_enroll(student, course_section):
         """Comprehensive enrollment eligibility check."""
-        errors = []
-        warnings = []
-        
-        # Check if section is full
-        if course_section.is_full:
-            errors.append("Course section is full")
-        
-        # Prerequisites check disabled per product decision: allow enrollment regardless of prerequisites
-        # (Still visible in data, but no enforcement here.)
-        
-        # Check time conflicts
-        no_conflicts, conflicting_sections = Enrollment.check_time_conflicts(student, course_section)
-        if not no_conflicts:
-            conflict_names = [f"{s.course.code}-{s.section_code}" for s in conflicting_sections]
-            errors.append(f"Time conflict with: {', '.join(conflict_names)}")
-        
-        # Check credit limit
-        within_limit, total_credits = Enrollment.check_credit_limit(student, course_section)
-        if not within_limit:
-            warnings.append(f"Exceeds credit limit: {total_credits} credits")
-        
-        # Check if already enrolled
-        existing = Enrollment.query.filter_by(
-            student_id=student.id,
-            course_section_id=course_section.id
-        ).first()
-        if existing:
-            if existing.status == EnrollmentStatus.ENROLLED:
-                errors.append("Already enrolled in this section")
-            elif existing.status == EnrollmentStatus.WAITLISTED:
-                warnings.append("Already on waitlist")
-        
-        # Check academic standing
-        if student.academic_status != 'Active':
-            errors.append(f"Academic status is {student.academic_status}")
-        
-        return len(errors) == 0, errors, warnings
+        # Prerequisites are only enforced when ENFORCE_PREREQUISITES is on (off by product decision)
+        # Local import to avoid circular dependency
+        from app.services.eligibility_service import EligibilityContext
+        context = EligibilityContext.load(student, terms=[course_section.term])
+        return context.check(course_section)
     
     def enroll(self):
-        """Process enrollment."""
+        """Process enrollment.
+        Seats are claimed with a conditional UPDATE on the section row, so concurrent
+        enrollments can never push `enrolled_count` past `capacity`; when no seat is
+        left the student is waitlisted instead.
+        """
         # Ensure relationship is loaded if only FK was set
         if not self.course_section and self.course_section_id:
             from app.models.course import CourseSection
             self.course_section = CourseSection.query.get(self.course_section_id)
         if self.course_section is None:
             raise ValueError("course_section must be set before enrolling")
-        if self.course_section.is_full:
-            self.status = 'Waitlisted'
-            self.waitlist_position = (self.course_section.waitlist_count or 0) + 1
-            self.waitlisted_at = datetime.utcnow()
-            self.course_section.waitlist_count = (self.course_section.waitlist_count or 0) + 1
-        else:
+        section = self.course_section
+        if section.claim_seat():
             self.status = 'Enrolled'
             self.enrolled_at = datetime.utcnow()
-            self.course_section.enrolled_count = (self.course_section.enrolled_count or 0) + 1
+        else:
+            section.claim_waitlist_slot()
+            self.status = 'Waitlisted'
+            self.waitlisted_at = datetime.utcnow()
     
     
     def drop(self, reason=None):
         """Drop the enrollment."""
         if self.status == 'Enrolled':
-            if self.course_section.enrolled_count:
-                self.course_section.enrolled_count -= 1
+            self.course_section.release_seat()
             # Process waitlist if applicable
             self._process_waitlist()
         elif self.status == 'Waitlisted':
-            if self.course_section.waitlist_count:
-                self.course_section.waitlist_count -= 1
-            # Update waitlist positions
-            self._update_waitlist_positions()
+            # Later entries move up implicitly: positions are derived from waitlisted_at
+            self.course_section.release_waitlist_slot()
         
         self.status = 'Dropped'
         self.dropped_at = datetime.utcnow()
@@ -237,129 +182,86 @@ class Enrollment(BaseModel):
     
     def _process_waitlist(self):
         """Process waitlist when a seat becomes available."""
-        # Get next student on waitlist
-        next_waitlisted = Enrollment.query.filter_by(
-            course_section_id=self.course_section_id,
-            status='Waitlisted'
-        ).order_by(Enrollment.waitlist_position).first()
-        
-        if next_waitlisted:
-            # Move from waitlist to enrolled
-            next_waitlisted.status = 'Enrolled'
-            next_waitlisted.enrolled_at = datetime.utcnow()
-            next_waitlisted.waitlist_position = None
-            if self.course_section.waitlist_count:
-                self.course_section.waitlist_count -= 1
-            self.course_section.enrolled_count = (self.course_section.enrolled_count or 0) + 1
-            
-            # Notify student about promotion from waitlist
-            try:
-                from app.models.notification import Notification
-                from app import mail
-                from flask_mail import Message
-                promoted_user = next_waitlisted.student.user if next_waitlisted.student and next_waitlisted.student.user else None
-                # Create in-app notification
-                if promoted_user:
-                    note = Notification(
-                        user_id=promoted_user.id,
-                        notification_type='enrollment',
-                        title='Waitlist Promotion',
-                        message=f"You have been enrolled in {self.course_section.course.code}-{self.course_section.section_code} ({self.course_section.term}).",
-                        payload={'course_section_id': self.course_section_id}
-                    )
-                    db.session.add(note)
-                    # Attempt email delivery (best-effort)
-                    if getattr(promoted_user, 'email', None):
-                        msg = Message(
-                            subject='Enrollment Update: Waitlist Promotion',
-                            recipients=[promoted_user.email],
-                            body=(
-                                f"Good news! You have been moved from the waitlist to enrolled for "
-                                f"{self.course_section.course.code}-{self.course_section.section_code} ({self.course_section.term}).\n"
-                                f"Please check your schedule."
-                            )
-                        )
-                        try:
-                            mail.send(msg)
-                            note.email_sent = True
-                        except Exception:
-                            pass
-            except Exception:
-                # Avoid failing enrollment flow due to notification issues
-                pass
-            
-            # Update remaining waitlist positions
-            self._update_waitlist_positions()
+        # Move the next student from the waitlist into the freed seat; the section
+        # queues the promotion notice in the outbox
+        self.course_section.promote_waitlisted(1)
     
-    def _update_waitlist_positions(self):
-        """Update waitlist positions after changes."""
-        waitlisted = Enrollment.query.filter_by(
-            course_section_id=self.course_section_id,
-            status='Waitlisted'
-        ).order_by(Enrollment.waitlist_position).all()
-        
-        for i, enrollment in enumerate(waitlisted, 1):
-            enrollment.waitlist_position = i
+    @staticmethod
+    def waitlist_sort_key():
+        """Columns defining waitlist order: first come, first served, id breaks ties.
+        Plain columns, so idx_enrollment_waitlist_order serves the ordering; every
+        waitlisted row has waitlisted_at (see `_stamp_waitlisted_at`).
+        """
+        return (Enrollment.waitlisted_at, Enrollment.id)
+    
+    @property
+    def waitlist_position(self):
+        """1-based place on the section's waitlist, or None when not waitlisted.
+        Computed from the waitlist order (one COUNT), unless preloaded in bulk by
+        `load_waitlist_positions`, so drops and promotions never renumber rows.
+        """
+        if self.status != 'Waitlisted':
+            return None
+        preloaded = self.__dict__.get('_waitlist_position')
+        if preloaded is not None:
+            return preloaded
+        joined_at = self.waitlisted_at
+        ahead = Enrollment.query.filter(
+            Enrollment.course_section_id == self.course_section_id,
+            Enrollment.status == 'Waitlisted',
+            db.or_(Enrollment.waitlisted_at < joined_at,
+                   db.and_(Enrollment.waitlisted_at == joined_at, Enrollment.id < self.id)),
+        ).count()
+        return ahead + 1
+    
+    @staticmethod
+    def load_waitlist_positions(enrollments):
+        """Compute waitlist positions for many enrollments with one windowed query."""
+        waitlisted = [e for e in enrollments if e.status == 'Waitlisted' and e.id is not None]
+        if not waitlisted:
+            return
+        rank = db.func.row_number().over(
+            partition_by=Enrollment.course_section_id,
+            order_by=Enrollment.waitlist_sort_key(),
+        )
+        ranked = (
+            db.session.query(Enrollment.id.label('id'), rank.label('position'))
+            .filter(
+                Enrollment.course_section_id.in_({e.course_section_id for e in waitlisted}),
+                Enrollment.status == 'Waitlisted',
+            )
+            .subquery()
+        )
+        wanted = {e.id for e in waitlisted}
+        positions = {row.id: row.position for row in db.session.query(ranked).filter(ranked.c.id.in_(wanted))}
+        for e in waitlisted:
+            if e.id in positions:
+                e.__dict__['_waitlist_position'] = positions[e.id]
+    
+    @staticmethod
+    def resolve_grade(grade, status=None, scale=None):
+        """Stored grade, grade points and resulting status for a grade value.
+        Supports both letter grades and numeric percentage grades (points of the
+        letter equivalent) on `scale`, the institution default when omitted;
+        `status` is returned unchanged when the grade does not decide it (e.g. 'I').
+        Returns: (grade, grade_points, status)
+        """
+        from app.models.grading_scale import get_scale
+        return (scale or get_scale()).resolve(grade, status)
     
     def set_grade(self, grade, grader_id=None):
         """Set the final grade for the enrollment.
         Supports both letter grades and numeric percentage grades.
         """
-        grade_points_map = {
-            'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-            'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-            'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-            'D+': 1.3, 'D': 1.0, 'D-': 0.7,
-            'F': 0.0, 'W': None, 'I': None
-        }
-        
+        from app.models.course import CourseSection
+        from app.models.grading_scale import scale_for_course
+        section = self.course_section or (
+            db.session.get(CourseSection, self.course_section_id) if self.course_section_id else None)
         self.graded_at = datetime.utcnow()
-        passing_threshold = 50
-        try:
-            passing_threshold = int(current_app.config.get('PASSING_GRADE', 50))
-        except Exception:
-            passing_threshold = 50
-        
-        # Normalize grade input
-        g = grade.strip() if isinstance(grade, str) else grade
-        numeric_val = None
-        if isinstance(g, (int, float)):
-            numeric_val = float(g)
-        elif isinstance(g, str):
-            try:
-                # Strip a trailing percent sign if present
-                g_clean = g.replace('%', '').strip()
-                numeric_val = float(g_clean)
-            except Exception:
-                numeric_val = None
-        
-        if numeric_val is not None:
-            # Store as integer percentage if whole number, else as trimmed float string
-            self.grade = str(int(numeric_val)) if numeric_val.is_integer() else f"{numeric_val:.1f}"
-            # For numeric grades, do not compute grade_points; GPA logic can be extended separately
-            self.grade_points = None
-            # Update status based on threshold
-            if numeric_val >= passing_threshold:
-                self.status = 'Completed'
-            else:
-                self.status = 'Failed'
-        else:
-            # Treat as letter grade
-            self.grade = grade
-            self.grade_points = grade_points_map.get(grade)
-            # Update status based on grade
-            if grade == 'F':
-                self.status = 'Failed'
-            elif grade == 'W':
-                self.status = 'Withdrawn'
-            elif grade and grade != 'I':  # I = Incomplete
-                self.status = 'Completed'
-        
-        # Update student's GPA (will consider letter grades; numeric grades currently excluded)
-        try:
-            self.student.calculate_gpa()
-        except Exception:
-            pass
+        self.grade, self.grade_points, self.status = Enrollment.resolve_grade(
+            grade, self.status, scale_for_course(section.course if section else None))
+        # The student's GPA totals get the old-to-new delta when this change is
+        # flushed (see app/models/term_load.py)
 
     @property
     def numeric_grade(self):
@@ -369,6 +271,12 @@ class Enrollment(BaseModel):
         except Exception:
             return None
 
+    @property
+    def grading_scale(self):
+        """Compiled grading scale of this enrollment's course."""
+        from app.models.grading_scale import scale_for_course
+        return scale_for_course(self.course_section.course if self.course_section else None)
+
     @property
     def derived_status_label(self):
         """Human-readable status derived from grade and status."""
@@ -382,11 +290,7 @@ class Enrollment(BaseModel):
         # Numeric grade handling
         ng = self.numeric_grade
         if ng is not None:
-            try:
-                threshold = int(current_app.config.get('PASSING_GRADE', 50))
-            except Exception:
-                threshold = 50
-            return 'Completed (Pass)' if ng >= threshold else 'Failed'
+            return 'Completed (Pass)' if ng >= self.grading_scale.passing_percentage else 'Failed'
         # Letter grade handling
         return 'Failed' if self.grade == 'F' else 'Completed (Pass)'
 
@@ -401,11 +305,7 @@ class Enrollment(BaseModel):
             return False
         ng = self.numeric_grade
         if ng is not None:
-            try:
-                threshold = int(current_app.config.get('PASSING_GRADE', 50))
-            except Exception:
-                threshold = 50
-            return ng >= threshold
+            return ng >= self.grading_scale.passing_percentage
         return self.grade not in ('F', 'NP')
     
     def to_dict(self):
@@ -424,3 +324,87 @@ class Enrollment(BaseModel):
             'waitlist_position': self.waitlist_position,
             'credits': self.course_section.course.credits
         }
+
+
+@event.listens_for(Enrollment, 'refresh')
+@event.listens_for(Enrollment, 'expire')
+def _drop_waitlist_position(target, *args):
+    """Preloaded waitlist positions are only valid until the row is reloaded."""
+    target.__dict__.pop('_waitlist_position', None)
+
+
+@event.listens_for(Enrollment, 'before_insert')
+@event.listens_for(Enrollment, 'before_update')
+def _stamp_waitlisted_at(mapper, connection, target):
+    """Waitlist order is on waitlisted_at alone, so no waitlisted row may lack it."""
+    if target.status == EnrollmentStatus.WAITLISTED and target.waitlisted_at is None:
+        target.waitlisted_at = target.enrolled_at or datetime.utcnow()
+
+
+def backfill_waitlisted_at():
+    """Set waitlisted_at on waitlisted rows written before it was required. Returns rows updated."""
+    result = db.session.execute(
+        db.update(Enrollment)
+        .where(Enrollment.status == EnrollmentStatus.WAITLISTED, Enrollment.waitlisted_at.is_(None))
+        .values(waitlisted_at=db.func.coalesce(Enrollment.enrolled_at, Enrollment.created_at))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def completed_course_ids(student_id):
+    """Courses the student completed with the prerequisite minimum grade met."""
+    return {cid for (cid,) in db.session.execute(
+        db.select(student_completed_courses.c.course_id)
+        .where(student_completed_courses.c.student_id == student_id)
+    )}
+
+
+def refresh_completed_courses(student_ids=None):
+    """Rebuild the completed-course index for some students (all when None) from enrollments."""
+    from app.models.course import CourseSection
+    source = (
+        db.select(Enrollment.student_id, CourseSection.course_id)
+        .join(CourseSection, CourseSection.id == Enrollment.course_section_id)
+        .where(
+            Enrollment.status == 'Completed',
+            db.or_(Enrollment.grade_points.is_(None),
+                   Enrollment.grade_points >= PREREQUISITE_MIN_GRADE_POINTS),
+        )
+        .distinct()
+    )
+    delete = student_completed_courses.delete()
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        if not student_ids:
+            return
+        source = source.where(Enrollment.student_id.in_(student_ids))
+        delete = delete.where(student_completed_courses.c.student_id.in_(student_ids))
+    db.session.execute(delete)
+    db.session.execute(student_completed_courses.insert().from_select(['student_id', 'course_id'], source))
+
+
+_COMPLETION_FIELDS = ('status', 'grade', 'grade_points', 'course_section_id')
+
+
+@event.listens_for(db.session, 'before_flush')
+def _collect_completion_changes(session, flush_context, instances):
+    """Remember students whose completed courses may change in this flush."""
+    touched = session.info.setdefault('completed_courses_dirty', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Enrollment) or obj.student_id is None:
+            continue
+        if obj in session.new or obj in session.deleted:
+            if obj.status == 'Completed' or obj in session.deleted:
+                touched.add(obj.student_id)
+            continue
+        state = db.inspect(obj)
+        if any(state.attrs[name].history.has_changes() for name in _COMPLETION_FIELDS):
+            touched.add(obj.student_id)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_completion_index(session, flush_context):
+    touched = session.info.pop('completed_courses_dirty', None)
+    if touched:
+        refresh_completed_courses(touched)
@@ -0,0 +1,64 @@
+"""Term grade finalization runs (checkpointed bulk close of a term's grades)."""
+
+from datetime import datetime
+from app.models import db, BaseModel
+
+
+class GradeFinalizationRun(BaseModel):
+    """Progress and checkpoints of a term's grade finalization.
+
+    The run has two phases, each processed in id order with its checkpoint
+    committed together with the batch it covers:
+
+      sections  final statuses for remaining Enrolled rows, grade lock,
+                audit records and notifications (`last_section_id`)
+      students  GPA and credits recomputed for every affected student
+                (`last_student_id`)
+
+    An interrupted run resumes after the last committed checkpoint.
+    `updated_at` moves with every batch and serves as the heartbeat.
+    """
+    __tablename__ = 'grade_finalization_runs'
+
+    term = db.Column(db.String(20), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='Running')  # Running, Completed, Failed
+    phase = db.Column(db.String(20), nullable=False, default='sections')  # sections, students, done
+    started_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+    total_sections = db.Column(db.Integer, nullable=False, default=0)
+    sections_done = db.Column(db.Integer, nullable=False, default=0)
+    last_section_id = db.Column(db.Integer, nullable=False, default=0)
+    total_students = db.Column(db.Integer, nullable=False, default=0)
+    students_done = db.Column(db.Integer, nullable=False, default=0)
+    last_student_id = db.Column(db.Integer, nullable=False, default=0)
+    counts = db.Column(db.JSON)  # final status -> enrollments moved, plus 'notifications'
+
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+
+    @property
+    def percent_complete(self):
+        total = (self.total_sections or 0) + (self.total_students or 0)
+        done = (self.sections_done or 0) + (self.students_done or 0)
+        return round(done / total * 100, 1) if total else 100.0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'term': self.term,
+            'status': self.status,
+            'phase': self.phase,
+            'started_by': self.started_by,
+            'sections': {'total': self.total_sections, 'done': self.sections_done},
+            'students': {'total': self.total_students, 'done': self.students_done},
+            'percent_complete': self.percent_complete,
+            'counts': self.counts or {},
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'last_error': self.last_error,
+        }
+
+    def __repr__(self):
+        return f'<GradeFinalizationRun {self.term} {self.status} {self.phase}>'
@@ -0,0 +1,219 @@
+"""Grading scales: letter grades, grade points and percentage breakpoints.
+
+Scales live in the database (an institution default plus optional per-course
+scales, `Course.grading_scale_id`). Each is compiled once into sorted
+breakpoint arrays and kept in a per-process cache, so resolving a grade is a
+dict lookup for letters and a binary search for percentages, and whole
+columns of percentages convert in one vectorized call. When no default scale
+is stored, `DEFAULT_SCALE` is used.
+
+Numeric percentage grades get the grade points of their letter equivalent,
+so they count towards GPA like letter grades.
+"""
+
+import time
+from bisect import bisect_right
+from sqlalchemy import event
+from flask import current_app
+from app.models import db, BaseModel
+
+# Built-in institution scale: (letter, grade points, minimum percentage).
+# Letters without grade points (W, I, P, NP) do not count towards GPA.
+DEFAULT_SCALE = (
+    ('A+', 4.0, 90), ('A', 4.0, 85), ('A-', 3.7, 80),
+    ('B+', 3.3, 77), ('B', 3.0, 73), ('B-', 2.7, 70),
+    ('C+', 2.3, 67), ('C', 2.0, 63), ('C-', 1.7, 60),
+    ('D+', 1.3, 57), ('D', 1.0, 53), ('D-', 0.7, 50),
+    ('F', 0.0, 0),
+    ('W', None, None), ('I', None, None), ('P', None, None), ('NP', None, None),
+)
+
+# Letters that decide the enrollment status; 'I' (Incomplete) leaves it unchanged,
+# every other letter completes the course
+LETTER_STATUS = {'F': 'Failed', 'W': 'Withdrawn', 'I': None}
+
+
+class GradingScale(BaseModel):
+    """A named grading scale (institution default or course-specific)."""
+    __tablename__ = 'grading_scales'
+
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    description = db.Column(db.String(255))
+    is_default = db.Column(db.Boolean, nullable=False, default=False)
+    passing_percentage = db.Column(db.Float)  # None: the PASSING_GRADE setting
+
+    entries = db.relationship('GradingScaleEntry', back_populates='scale', cascade='all, delete-orphan',
+                              order_by='GradingScaleEntry.id')
+
+    def __repr__(self):
+        return f'<GradingScale {self.name}>'
+
+
+class GradingScaleEntry(BaseModel):
+    """One letter of a scale; `min_percentage` places it on the numeric scale."""
+    __tablename__ = 'grading_scale_entries'
+
+    scale_id = db.Column(db.Integer, db.ForeignKey('grading_scales.id'), nullable=False, index=True)
+    letter = db.Column(db.String(5), nullable=False)
+    grade_points = db.Column(db.Float)  # None: not counted in GPA
+    min_percentage = db.Column(db.Float)  # None: letter-only (W, I, P, ...)
+
+    scale = db.relationship('GradingScale', back_populates='entries')
+
+    __table_args__ = (
+        db.UniqueConstraint('scale_id', 'letter', name='uq_grading_scale_letter'),
+    )
+
+    def __repr__(self):
+        return f'<GradingScaleEntry {self.letter}>'
+
+
+def parse_percentage(grade):
+    """Float value of a numeric grade ('87', '87.5%', 87), or None for letters."""
+    if isinstance(grade, bool):
+        return None
+    if isinstance(grade, (int, float)):
+        return float(grade)
+    if isinstance(grade, str):
+        try:
+            return float(grade.replace('%', '').strip())
+        except ValueError:
+            return None
+    return None
+
+
+class CompiledScale:
+    """Lookup structure for one scale: letter -> points, sorted percentage breakpoints."""
+
+    __slots__ = ('id', 'name', 'passing_percentage', 'points', 'breakpoints', 'cut_letters', 'cut_points')
+
+    def __init__(self, entries, passing_percentage, scale_id=None, name='Default'):
+        self.id = scale_id
+        self.name = name
+        self.passing_percentage = float(passing_percentage)
+        self.points = {letter: points for letter, points, _ in entries}
+        cuts = sorted((minimum, letter, points) for letter, points, minimum in entries if minimum is not None)
+        self.breakpoints = tuple(float(c[0]) for c in cuts)
+        self.cut_letters = tuple(c[1] for c in cuts)
+        self.cut_points = tuple(c[2] for c in cuts)
+
+    def is_valid(self, grade) -> bool:
+        return grade in self.points or parse_percentage(grade) is not None
+
+    def _index(self, percentage):
+        # Below the lowest breakpoint counts as the lowest letter
+        return max(bisect_right(self.breakpoints, percentage) - 1, 0)
+
+    def letter_for(self, percentage):
+        """(letter, grade points) for a percentage."""
+        if not self.breakpoints:
+            return None, None
+        i = self._index(percentage)
+        return self.cut_letters[i], self.cut_points[i]
+
+    def convert(self, percentages):
+        """Vectorized `letter_for`: (letters, points) lists for a sequence of percentages."""
+        if not self.breakpoints:
+            return [None] * len(percentages), [None] * len(percentages)
+        try:
+            import numpy as np
+        except ImportError:  # numpy is optional (not installed on Windows)
+            pairs = [self.letter_for(p) for p in percentages]
+            return [p[0] for p in pairs], [p[1] for p in pairs]
+        index = np.searchsorted(np.asarray(self.breakpoints), np.asarray(percentages, dtype=float), side='right') - 1
+        index = np.clip(index, 0, len(self.breakpoints) - 1)
+        letters = np.asarray(self.cut_letters, dtype=object)[index]
+        points = np.asarray(self.cut_points, dtype=object)[index]
+        return letters.tolist(), points.tolist()
+
+    def resolve(self, grade, status=None):
+        """(stored grade, grade points, status) for a letter or percentage grade.
+        `status` is returned unchanged when the grade does not decide it (e.g. 'I').
+        """
+        g = grade.strip() if isinstance(grade, str) else grade
+        percentage = parse_percentage(g)
+        if percentage is not None:
+            # Store as integer percentage if whole number, else as trimmed float string
+            stored = str(int(percentage)) if percentage.is_integer() else f"{percentage:.1f}"
+            return stored, self.letter_for(percentage)[1], \
+                'Completed' if percentage >= self.passing_percentage else 'Failed'
+        if g in LETTER_STATUS:
+            new_status = LETTER_STATUS[g] or status
+        else:
+            new_status = 'Completed' if g else status
+        return g, self.points.get(g), new_status
+
+    def legend(self):
+        """'A = 4.0' style labels for letters that carry grade points, best first."""
+        graded = [(letter, points) for letter, points in self.points.items() if points is not None]
+        return [f"{letter} = {points:.1f}" for letter, points in sorted(graded, key=lambda item: -item[1])]
+
+
+_compiled = {}  # scale id (None: default) -> (expires_at, CompiledScale)
+
+
+def _passing_default():
+    try:
+        return float(current_app.config.get('PASSING_GRADE', 50))
+    except Exception:
+        return 50.0
+
+
+def _compile(scale):
+    entries = [(e.letter, e.grade_points, e.min_percentage) for e in scale.entries]
+    passing = scale.passing_percentage if scale.passing_percentage is not None else _passing_default()
+    return CompiledScale(entries, passing, scale_id=scale.id, name=scale.name)
+
+
+def _load(scale_id):
+    with db.session.no_autoflush:
+        if scale_id is None:
+            scale = GradingScale.query.filter_by(is_default=True).first()
+        else:
+            scale = db.session.get(GradingScale, scale_id)
+    if scale is None:
+        return get_scale() if scale_id is not None else CompiledScale(DEFAULT_SCALE, _passing_default())
+    return _compile(scale)
+
+
+def get_scale(scale_id=None) -> CompiledScale:
+    """Compiled scale by id (None or an unknown id: the institution default), cached per process."""
+    now = time.monotonic()
+    cached = _compiled.get(scale_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    try:
+        ttl = int(current_app.config.get('GRADING_SCALE_CACHE_TTL', 300))
+        scale = _load(scale_id)
+    except RuntimeError:  # no app context
+        return CompiledScale(DEFAULT_SCALE, 50.0)
+    _compiled[scale_id] = (now + ttl, scale)
+    return scale
+
+
+def scale_for_course(course) -> CompiledScale:
+    return get_scale(course.grading_scale_id if course is not None else None)
+
+
+def clear_scale_cache():
+    _compiled.clear()
+
+
+@event.listens_for(db.session, 'before_flush')
+def _note_scale_changes(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (GradingScale, GradingScaleEntry)):
+            session.info['grading_scales_changed'] = True
+            return
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_scales(session):
+    if session.info.pop('grading_scales_changed', False):
+        clear_scale_cache()
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _forget_scale_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('grading_scales_changed', None)
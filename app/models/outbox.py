@@ -0,0 +1,35 @@
+"""Transactional outbox for notifications and e-mail."""
+
+from datetime import datetime
+from app.models import db, BaseModel
+
+
+class OutboxMessage(BaseModel):
+    """A side effect (in-app notification and/or e-mail) recorded in the same
+    transaction as the business change and delivered later by the dispatcher
+    in app/services/outbox_service.py."""
+    __tablename__ = 'outbox_messages'
+
+    # notification: create a Notification row (and e-mail it if `payload['email']` is set)
+    # email: send the e-mail only
+    kind = db.Column(db.String(20), nullable=False, default='notification')
+    payload = db.Column(db.JSON, nullable=False)
+
+    # Delivery state
+    status = db.Column(db.String(20), nullable=False, default='Pending')  # Pending, Processing, Sent, Dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(32))
+    claimed_at = db.Column(db.DateTime)
+    sent_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+
+    # Set once the in-app notification exists, so e-mail retries don't duplicate it
+    notification_id = db.Column(db.Integer, db.ForeignKey('notifications.id'))
+
+    __table_args__ = (
+        db.Index('idx_outbox_status_available', 'status', 'available_at'),
+    )
+
+    def __repr__(self):
+        return f'<OutboxMessage {self.id} {self.kind} {self.status}>'
@@ -1,13 +1,19 @@
 """Profile models for Students and Instructors."""
 
-from app.models import db, BaseModel
 from datetime import datetime
 
+from flask import current_app
+
+from app.models import db, BaseModel
+
 
 class StudentProfile(BaseModel):
     """Student-specific profile information."""
     __tablename__ = 'student_profiles'
     
+    # Statuses that may register for courses (see enrollable_statuses)
+    ENROLLABLE_STATUSES = ('Active',)
+    
     # Foreign key to User (1:1 relationship)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), unique=True, nullable=False)
     
@@ -21,12 +27,15 @@ class StudentProfile(BaseModel):
     degree_type = db.Column(db.String(50))  # e.g., "Bachelor", "Master", "PhD"
     major = db.Column(db.String(100))
     minor = db.Column(db.String(100))
-    academic_status = db.Column(db.String(50), default='Active')  # Active, Graduated, Suspended, etc.
+    academic_status = db.Column(db.String(50), default='Active')  # Active, Probation, Suspended, Graduated, etc.
     
     # Academic performance (computed from enrollments, but cached for performance)
     total_credits_earned = db.Column(db.Float, default=0)
     total_credits_attempted = db.Column(db.Float, default=0)
     gpa = db.Column(db.Float, default=0.0)
+    # Running GPA totals, adjusted by the old-to-new delta on every grade change
+    quality_points = db.Column(db.Float, nullable=False, default=0)  # sum of credits * grade points
+    graded_credits = db.Column(db.Float, nullable=False, default=0)
     
     # Advisor information
     advisor_id = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -53,30 +62,26 @@ class StudentProfile(BaseModel):
         return f'<StudentProfile {self.student_number}>'
     
     def calculate_gpa(self):
-        """Calculate GPA from enrollments."""
-        grade_points = {
-            'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-            'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-            'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-            'D+': 1.3, 'D': 1.0, 'D-': 0.7,
-            'F': 0.0
-        }
-        
-        total_points = 0
-        total_credits = 0
-        
-        for enrollment in self.enrollments:
-            if enrollment.grade and enrollment.grade in grade_points:
-                credits = enrollment.course_section.course.credits
-                total_points += grade_points[enrollment.grade] * credits
-                total_credits += credits
-        
-        if total_credits > 0:
-            self.gpa = round(total_points / total_credits, 2)
-            self.total_credits_earned = total_credits
-        
+        """Recalculate GPA totals from scratch (one query).
+        Grade changes keep the totals current through `apply_gpa_deltas`; this
+        is for repairs and for the verifier.
+        """
+        quality_points, graded_credits = grade_totals([self.id]).get(self.id, (0.0, 0.0))
+        self.quality_points = quality_points
+        self.graded_credits = graded_credits
+        self.gpa = round(quality_points / graded_credits, 2) if graded_credits > 0 else 0.0
+        self.total_credits_earned = graded_credits
         return self.gpa
     
+    def can_register(self):
+        """Whether the academic status allows registering for courses.
+        Probation does too when STANDING_PROBATION_CAN_ENROLL is set.
+        """
+        statuses = self.ENROLLABLE_STATUSES
+        if current_app.config.get('STANDING_PROBATION_CAN_ENROLL'):
+            statuses += ('Probation',)
+        return self.academic_status in statuses
+    
     def can_graduate(self):
         """Check if student meets graduation requirements."""
         # This is a simplified check - real implementation would be more complex
@@ -103,6 +108,76 @@ class StudentProfile(BaseModel):
         }
 
 
+def grade_totals(student_ids=None):
+    """{student_id: (quality_points, graded_credits)} recomputed from enrollments in one query.
+    Counts completed or failed enrollments that carry grade points (letter grades).
+    """
+    from app.models.enrollment import Enrollment, EnrollmentStatus
+    from app.models.course import Course, CourseSection
+    credits = db.func.coalesce(Course.credits, 0)
+    query = db.session.query(
+        Enrollment.student_id,
+        db.func.sum(credits * Enrollment.grade_points),
+        db.func.sum(credits),
+    ).join(CourseSection, CourseSection.id == Enrollment.course_section_id) \
+     .join(Course, Course.id == CourseSection.course_id) \
+     .filter(Enrollment.grade_points.isnot(None),
+             Enrollment.status.in_([EnrollmentStatus.COMPLETED, EnrollmentStatus.FAILED])) \
+     .group_by(Enrollment.student_id)
+    if student_ids is not None:
+        query = query.filter(Enrollment.student_id.in_(list(student_ids)))
+    return {sid: (float(qp or 0), float(gc or 0)) for sid, qp, gc in query.all()}
+
+
+def apply_gpa_deltas(deltas):
+    """Add `{student_id: (quality_points_delta, graded_credits_delta)}` to the stored totals.
+    One UPDATE per student; GPA is derived from the new totals in the same statement.
+    """
+    for student_id, (d_points, d_credits) in deltas.items():
+        if not d_points and not d_credits:
+            continue
+        points = db.func.coalesce(StudentProfile.quality_points, 0) + d_points
+        credits = db.func.coalesce(StudentProfile.graded_credits, 0) + d_credits
+        db.session.execute(
+            db.update(StudentProfile)
+            .where(StudentProfile.id == student_id)
+            .values(
+                quality_points=points,
+                graded_credits=credits,
+                total_credits_earned=credits,
+                gpa=db.case((credits > 0, db.func.round(db.cast(points / credits, db.Numeric(10, 4)), 2)), else_=0.0),
+            ),
+            execution_options={'synchronize_session': False},
+        )
+
+
+def verify_gpa_totals(fix=False, tolerance=1e-6):
+    """Compare stored GPA totals with a full recomputation.
+    Returns one dict per student whose stored values drifted; with `fix` the
+    stored values are overwritten (caller commits).
+    """
+    expected = grade_totals()
+    drift = []
+    for profile in StudentProfile.query.order_by(StudentProfile.id):
+        quality_points, graded_credits = expected.get(profile.id, (0.0, 0.0))
+        gpa = round(quality_points / graded_credits, 2) if graded_credits > 0 else 0.0
+        stored = (profile.quality_points or 0, profile.graded_credits or 0, profile.gpa or 0)
+        # GPA is rounded in SQL by the delta path, so allow a rounding step there
+        if (abs(stored[0] - quality_points) > tolerance or abs(stored[1] - graded_credits) > tolerance
+                or abs(stored[2] - gpa) > 0.005 + tolerance):
+            drift.append({
+                'student_id': profile.id,
+                'stored': {'quality_points': stored[0], 'graded_credits': stored[1], 'gpa': stored[2]},
+                'expected': {'quality_points': quality_points, 'graded_credits': graded_credits, 'gpa': gpa},
+            })
+            if fix:
+                profile.quality_points = quality_points
+                profile.graded_credits = graded_credits
+                profile.gpa = gpa
+                profile.total_credits_earned = graded_credits
+    return drift
+
+
 class InstructorProfile(BaseModel):
     """Instructor-specific profile information."""
     __tablename__ = 'instructor_profiles'
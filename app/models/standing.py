@@ -0,0 +1,65 @@
+"""Term-end academic standing: per-student results and batch run checkpoints."""
+
+from datetime import datetime
+from app.models import db, BaseModel
+
+
+class TermStanding(BaseModel):
+    """A student's term GPA and the standing assigned at term close."""
+    __tablename__ = 'term_standings'
+
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id'), nullable=False, index=True)
+    term = db.Column(db.String(20), nullable=False, index=True)
+    term_gpa = db.Column(db.Float, nullable=False)
+    graded_credits = db.Column(db.Float, nullable=False)
+    standing = db.Column(db.String(20), nullable=False)  # Dean's List, Good Standing, Probation, Suspension
+    # academic_status before this term was closed, so a re-run starts from the same point
+    previous_status = db.Column(db.String(50))
+    academic_status = db.Column(db.String(50))
+
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'term', name='uq_term_standing'),
+    )
+
+    def __repr__(self):
+        return f'<TermStanding {self.student_id} {self.term} {self.standing}>'
+
+
+class StandingRun(BaseModel):
+    """Progress and checkpoint of a term-close standing run.
+
+    Students are processed in id order; `last_student_id` is committed together
+    with each batch of results, so an interrupted run resumes after it.
+    """
+    __tablename__ = 'standing_runs'
+
+    term = db.Column(db.String(20), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='Running')  # Running, Completed, Failed
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    last_student_id = db.Column(db.Integer, nullable=False, default=0)
+    counts = db.Column(db.JSON)  # standing -> number of students
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+
+    @property
+    def percent_complete(self):
+        return round(self.processed / self.total * 100, 1) if self.total else 100.0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'term': self.term,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'percent_complete': self.percent_complete,
+            'counts': self.counts or {},
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'last_error': self.last_error,
+        }
+
+    def __repr__(self):
+        return f'<StandingRun {self.term} {self.status} {self.processed}/{self.total}>'
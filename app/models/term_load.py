@@ -0,0 +1,273 @@
+"""Per-student, per-term load aggregates maintained alongside enrollments."""
+
+from collections import defaultdict
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app.models import db, BaseModel
+from app.models.enrollment import Enrollment, EnrollmentStatus
+from app.models.course import Course, CourseSection
+from app.models.profile import StudentProfile, apply_gpa_deltas
+
+# Aggregate columns; each enrollment contributes to them through `_contribution`
+LOAD_FIELDS = ('enrolled_credits', 'enrolled_count', 'waitlisted_count',
+               'completed_count', 'earned_credits', 'graded_credits', 'quality_points')
+
+# Enrollment attributes the contribution depends on
+_TRACKED = ('student_id', 'course_section_id', 'status', 'grade_points')
+
+
+class StudentTermLoad(BaseModel):
+    """A student's credit load and results for one term.
+
+    Updated in the same flush as the enrollment changes that affect it (see the
+    hook at the bottom of this module), so reads are a single-row lookup.
+    `rebuild_term_loads` recomputes rows from enrollments if they ever drift.
+    """
+    __tablename__ = 'student_term_loads'
+
+    student_id = db.Column(db.Integer, db.ForeignKey('student_profiles.id'), nullable=False)
+    term = db.Column(db.String(50), nullable=False)
+
+    enrolled_credits = db.Column(db.Float, nullable=False, default=0)
+    enrolled_count = db.Column(db.Integer, nullable=False, default=0)
+    waitlisted_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    earned_credits = db.Column(db.Float, nullable=False, default=0)  # credits of completed courses
+    graded_credits = db.Column(db.Float, nullable=False, default=0)  # credits with letter grade points
+    quality_points = db.Column(db.Float, nullable=False, default=0)  # sum of credits * grade points
+
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'term', name='uq_student_term_load'),
+    )
+
+    @property
+    def term_gpa(self):
+        return round(self.quality_points / self.graded_credits, 2) if self.graded_credits else 0.0
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in LOAD_FIELDS}
+        data.update({'student_id': self.student_id, 'term': self.term, 'term_gpa': self.term_gpa})
+        return data
+
+    def __repr__(self):
+        return f'<StudentTermLoad {self.student_id} {self.term}>'
+
+
+def get_term_load(student_id, term):
+    """The aggregate row for one term, or None if the student has no enrollments in it."""
+    return StudentTermLoad.query.filter_by(student_id=student_id, term=term).first()
+
+
+def enrolled_credits_by_term(student_id, terms=None):
+    """`{term: enrolled credits}` from the aggregate rows (all terms, or only `terms`), in one query."""
+    query = db.session.query(StudentTermLoad.term, StudentTermLoad.enrolled_credits) \
+        .filter(StudentTermLoad.student_id == student_id)
+    if terms is not None:
+        query = query.filter(StudentTermLoad.term.in_(list(set(terms))))
+    return {term: credits or 0 for term, credits in query}
+
+
+def term_load_totals(student_id, term=None):
+    """Aggregate values for one term, or summed over all terms; zeros when there are no rows."""
+    query = db.session.query(*[db.func.coalesce(db.func.sum(getattr(StudentTermLoad, f)), 0) for f in LOAD_FIELDS]) \
+        .filter(StudentTermLoad.student_id == student_id)
+    if term:
+        query = query.filter(StudentTermLoad.term == term)
+    return dict(zip(LOAD_FIELDS, query.one()))
+
+
+def _contribution(status, grade_points, credits):
+    credits = credits or 0
+    graded = grade_points is not None and status in (EnrollmentStatus.COMPLETED, EnrollmentStatus.FAILED)
+    return {
+        'enrolled_credits': credits if status == EnrollmentStatus.ENROLLED else 0,
+        'enrolled_count': 1 if status == EnrollmentStatus.ENROLLED else 0,
+        'waitlisted_count': 1 if status == EnrollmentStatus.WAITLISTED else 0,
+        'completed_count': 1 if status == EnrollmentStatus.COMPLETED else 0,
+        'earned_credits': credits if status == EnrollmentStatus.COMPLETED else 0,
+        'graded_credits': credits if graded else 0,
+        'quality_points': credits * grade_points if graded else 0,
+    }
+
+
+def apply_term_load_deltas(deltas):
+    """Add `{(student_id, term): {field: delta}}` to the aggregate rows, creating missing rows.
+
+    Uses UPDATE col = col + delta so concurrent transactions never overwrite
+    each other's changes.
+    """
+    for (student_id, term), changes in deltas.items():
+        changes = {f: v for f, v in changes.items() if v}
+        if not changes or student_id is None or term is None:
+            continue
+        result = db.session.execute(
+            db.update(StudentTermLoad)
+            .where(StudentTermLoad.student_id == student_id, StudentTermLoad.term == term)
+            .values({f: getattr(StudentTermLoad, f) + v for f, v in changes.items()}),
+            execution_options={'synchronize_session': False},
+        )
+        if result.rowcount:
+            continue
+        row = {f: 0 for f in LOAD_FIELDS}
+        row.update(changes)
+        try:
+            # Connection-level savepoint: this also runs from inside a session flush
+            with db.session.connection().begin_nested():
+                db.session.execute(db.insert(StudentTermLoad).values(student_id=student_id, term=term, **row))
+        except IntegrityError:
+            # Another transaction created the row first; add to it instead
+            db.session.execute(
+                db.update(StudentTermLoad)
+                .where(StudentTermLoad.student_id == student_id, StudentTermLoad.term == term)
+                .values({f: getattr(StudentTermLoad, f) + v for f, v in changes.items()}),
+                execution_options={'synchronize_session': False},
+            )
+
+
+def rebuild_term_loads(student_ids=None):
+    """Recompute aggregate rows from enrollments (for some students, or all). Returns rows written."""
+    credits = db.func.coalesce(Course.credits, 0)
+    status = Enrollment.status
+    graded = db.and_(Enrollment.grade_points.isnot(None),
+                     status.in_([EnrollmentStatus.COMPLETED, EnrollmentStatus.FAILED]))
+
+    def total(condition, value):
+        return db.func.coalesce(db.func.sum(db.case((condition, value), else_=0)), 0)
+
+    query = db.session.query(
+        Enrollment.student_id,
+        CourseSection.term,
+        total(status == EnrollmentStatus.ENROLLED, credits),
+        total(status == EnrollmentStatus.ENROLLED, 1),
+        total(status == EnrollmentStatus.WAITLISTED, 1),
+        total(status == EnrollmentStatus.COMPLETED, 1),
+        total(status == EnrollmentStatus.COMPLETED, credits),
+        total(graded, credits),
+        total(graded, credits * Enrollment.grade_points),
+    ).join(CourseSection, CourseSection.id == Enrollment.course_section_id) \
+     .join(Course, Course.id == CourseSection.course_id) \
+     .group_by(Enrollment.student_id, CourseSection.term)
+
+    delete = db.delete(StudentTermLoad)
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        if not student_ids:
+            return 0
+        query = query.filter(Enrollment.student_id.in_(student_ids))
+        delete = delete.where(StudentTermLoad.student_id.in_(student_ids))
+
+    rows = [dict(zip(('student_id', 'term') + LOAD_FIELDS, values)) for values in query.all()]
+    db.session.execute(delete, execution_options={'synchronize_session': False})
+    if rows:
+        db.session.execute(db.insert(StudentTermLoad), rows)
+    return len(rows)
+
+
+def _apply_deltas(deltas):
+    """Write term load deltas and the per-student GPA deltas derived from them.
+    Returns the ids of students whose GPA totals changed.
+    """
+    apply_term_load_deltas(deltas)
+    gpa_deltas = defaultdict(lambda: [0, 0])
+    for (student_id, _), change in deltas.items():
+        gpa_deltas[student_id][0] += change.get('quality_points', 0)
+        gpa_deltas[student_id][1] += change.get('graded_credits', 0)
+    gpa_deltas = {sid: tuple(d) for sid, d in gpa_deltas.items() if sid is not None and any(d)}
+    if gpa_deltas:
+        apply_gpa_deltas(gpa_deltas)
+    return set(gpa_deltas)
+
+
+def apply_enrollment_changes(changes):
+    """Update term loads and GPA totals for enrollments changed by a bulk UPDATE.
+
+    The flush hook below only sees ORM changes; bulk writers pass
+    ``(student_id, term, credits, (old_status, old_grade_points), (new_status, new_grade_points))``
+    for each row they changed.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for student_id, term, credits, old, new in changes:
+        for sign, (status, grade_points) in ((-1, old), (1, new)):
+            for field, value in _contribution(status, grade_points, credits).items():
+                deltas[(student_id, term)][field] += sign * value
+    if deltas:
+        _expire_profiles(db.session, _apply_deltas(deltas))
+
+
+def _expire_profiles(session, student_ids):
+    """Profiles in the session still hold the totals from before the SQL delta."""
+    for student_id in student_ids:
+        profile = session.identity_map.get(db.inspect(StudentProfile).identity_key_from_primary_key((student_id,)))
+        if profile is not None:
+            session.expire(profile, ['quality_points', 'graded_credits', 'gpa', 'total_credits_earned'])
+
+
+def _section_info(session, section_id, cache):
+    if section_id not in cache:
+        row = session.query(CourseSection.term, Course.credits) \
+            .join(Course, Course.id == CourseSection.course_id) \
+            .filter(CourseSection.id == section_id).first() if section_id is not None else None
+        cache[section_id] = (row[0], row[1]) if row else (None, 0)
+    return cache[section_id]
+
+
+def _values(state, before):
+    """Tracked attribute values before (committed) or after this flush."""
+    values = {}
+    for name in _TRACKED:
+        history = state.attrs[name].history
+        if before and history.deleted:
+            values[name] = history.deleted[0]
+        elif before and history.added and not history.deleted:
+            values[name] = None  # attribute had no committed value
+        else:
+            values[name] = getattr(state.obj(), name)
+    return values
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the committed value before an expired attribute is overwritten, so the
+# flush hook can subtract the old contribution
+for _name in _TRACKED:
+    event.listen(getattr(Enrollment, _name), 'set', _keep_old_value, active_history=True, retval=True)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _update_term_loads(session, flush_context):
+    """Turn this flush's enrollment changes into term load and GPA deltas, in the same transaction."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    sections = {}
+
+    def add(values, sign):
+        term, credits = _section_info(session, values['course_section_id'], sections)
+        change = _contribution(values['status'], values['grade_points'], credits)
+        for field, value in change.items():
+            deltas[(values['student_id'], term)][field] += sign * value
+
+    for obj in session.new:
+        if isinstance(obj, Enrollment):
+            add(_values(db.inspect(obj), before=False), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Enrollment):
+            add(_values(db.inspect(obj), before=True), -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Enrollment) or obj in session.deleted:
+            continue
+        state = db.inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in _TRACKED):
+            continue
+        add(_values(state, before=True), -1)
+        add(_values(state, before=False), 1)
+
+    if deltas:
+        changed = _apply_deltas(deltas)
+        if changed:
+            session.info.setdefault('gpa_students_changed', set()).update(changed)
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _expire_gpa_totals(session, flush_context):
+    _expire_profiles(session, session.info.pop('gpa_students_changed', ()))
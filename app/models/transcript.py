@@ -1,4 +1,4 @@
-"""Transcript request model for gating official transcript generation."""
+"""Transcript requests and batch transcript generation."""
 
 from datetime import datetime
 from app.models import db, BaseModel
@@ -26,6 +26,9 @@ class TranscriptRequest(BaseModel):
     # Issuance tracking
     issued_at = db.Column(db.DateTime)
     filename = db.Column(db.String(255))
+    batch_id = db.Column(db.Integer, db.ForeignKey('transcript_batches.id'), index=True)  # issued in a batch archive
+    rendered_at = db.Column(db.DateTime)  # PDF stored under UPLOAD_FOLDER (see transcript_issuance)
+    render_error = db.Column(db.Text)
 
     # Relationships
     student = db.relationship('StudentProfile', backref='transcript_requests')
@@ -42,6 +45,8 @@ class TranscriptRequest(BaseModel):
         self.processed_by = processor_id
         self.processed_at = datetime.utcnow()
         self.decision_notes = notes
+        # The PDF is rendered afresh for the approval
+        self.filename = self.rendered_at = self.render_error = None
 
     def reject(self, processor_id: int, notes: str = None):
         self.status = 'Rejected'
@@ -49,8 +54,67 @@ class TranscriptRequest(BaseModel):
         self.processed_at = datetime.utcnow()
         self.decision_notes = notes
 
+    @property
+    def is_rendered(self) -> bool:
+        return self.rendered_at is not None and self.batch_id is None
+
     def mark_issued(self, filename: str = None):
         self.status = 'Issued'
         self.issued_at = datetime.utcnow()
         if filename:
             self.filename = filename
+
+
+class TranscriptBatch(BaseModel):
+    """Transcripts for many students rendered into one ZIP archive.
+
+    Covers a set of approved transcript requests or every student of a
+    graduating class. The archive is written under
+    UPLOAD_FOLDER/transcript_batches and its name recorded once complete;
+    `processed` moves with every committed chunk and serves as the progress.
+    """
+    __tablename__ = 'transcript_batches'
+
+    status = db.Column(db.String(20), nullable=False, default='Queued')  # Queued, Running, Completed, Failed
+    official = db.Column(db.Boolean, nullable=False, default=True)
+    graduation_year = db.Column(db.Integer)
+    request_ids = db.Column(db.JSON)  # approved requests issued by the batch
+    student_ids = db.Column(db.JSON, nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.JSON)  # student id -> error message
+    filename = db.Column(db.String(255))
+
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+
+    @property
+    def percent_complete(self):
+        return round((self.processed or 0) / self.total * 100, 1) if self.total else 100.0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'official': self.official,
+            'graduation_year': self.graduation_year,
+            'request_ids': self.request_ids or [],
+            'total': self.total,
+            'processed': self.processed,
+            'failed': self.failed,
+            'percent_complete': self.percent_complete,
+            'errors': self.errors or {},
+            'filename': self.filename,
+            'created_by': self.created_by,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'last_error': self.last_error,
+        }
+
+    def __repr__(self):
+        return f'<TranscriptBatch {self.id} {self.status} {self.processed}/{self.total}>'
@@ -85,8 +85,19 @@ class User(BaseModel, UserMixin):
         """Check if provided password matches."""
         return check_password_hash(self.password_hash, password)
     
+    @property
+    def principal(self):
+        """Cached status, roles and permissions (see app/services/principal_cache.py).
+        None for a new user or while its roles or status change in this transaction.
+        """
+        from app.services.principal_cache import principal_of
+        return principal_of(self)
+    
     def has_role(self, role_name):
         """Check if user has a specific role."""
+        principal = self.principal
+        if principal is not None:
+            return role_name in principal.roles
         return self.roles.filter(Role.name == role_name).count() > 0
     
     def add_role(self, role):
@@ -101,6 +112,9 @@ class User(BaseModel, UserMixin):
     
     def get_permissions(self):
         """Get all permissions from all roles."""
+        principal = self.principal
+        if principal is not None:
+            return list(principal.permissions)
         permissions = set()
         for role in self.roles:
             permissions.update(role.get_permissions())
@@ -142,6 +156,10 @@ class User(BaseModel, UserMixin):
     
     def is_locked(self):
         """Check if account is locked."""
+        principal = self.principal if 'locked_until' not in self.__dict__ else None
+        if principal is not None:
+            # Row not loaded (see principal_cache.principal_user)
+            return principal.is_locked()
         if self.locked_until and self.locked_until > datetime.utcnow():
             return True
         return False
@@ -9,6 +9,7 @@ from app.models import (
     User, CourseSection, Enrollment, StudentProfile, AuditLog, TranscriptRequest
 )
 from app.services.enrollment_service import enroll_student
+from app.services.transcript_issuance import queue_official_transcript
 
 
 def registrar_required(f):
@@ -85,7 +86,24 @@ def approve_transcript(req_id):
     )
     db.session.add(audit)
     db.session.commit()
-    flash('Transcript request approved.', 'success')
+    # Rendered in the background; the student downloads the stored PDF
+    queue_official_transcript(tr)
+    flash('Transcript request approved. The official transcript is being prepared.', 'success')
+    return redirect(request.referrer or url_for('registrar.transcript_requests'))
+
+
+@registrar_bp.route('/transcripts/<int:req_id>/render', methods=['POST'])
+@registrar_required
+def render_transcript(req_id):
+    """Queue an approved request's official PDF again (after a failed render)."""
+    tr = TranscriptRequest.query.get_or_404(req_id)
+    if tr.status not in ['Approved', 'Issued'] or tr.batch_id is not None:
+        flash('Only approved requests have an official transcript to prepare.', 'warning')
+        return redirect(request.referrer or url_for('registrar.transcript_requests'))
+    tr.rendered_at = tr.render_error = None
+    db.session.commit()
+    queue_official_transcript(tr)
+    flash('The official transcript is being prepared again.', 'info')
     return redirect(request.referrer or url_for('registrar.transcript_requests'))
 
 
@@ -118,14 +136,12 @@ def reject_transcript(req_id):
 @registrar_required
 def promote_waitlist(section_id):
     section = CourseSection.query.get_or_404(section_id)
-    before = section.enrolled_count or 0
-    # Promote one student from waitlist if capacity allows
-    section.promote_from_waitlist()
+    # Fill every free seat from the waitlist in one pass
+    promoted = section.promote_waitlisted()
     db.session.commit()
 
-    after = section.enrolled_count or 0
-    if after > before:
-        flash('Promoted next student from waitlist.', 'success')
+    if promoted:
+        flash(f'Promoted {len(promoted)} student(s) from waitlist.', 'success')
     else:
         flash('No promotion performed (section may be full or no waitlisted students).', 'warning')
 
@@ -135,6 +151,7 @@ def promote_waitlist(section_id):
         action='WAITLIST_PROMOTION',
         entity_type='CourseSection',
         entity_id=section.id,
+        new_values={'promoted_enrollment_ids': [e.id for e in promoted]},
         endpoint=request.path,
         http_method='POST'
     )
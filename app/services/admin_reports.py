@@ -0,0 +1,65 @@
+"""Admin report rows, streamed from the database.
+
+Each report is a generator over a `yield_per` query: rows come from the
+database in batches of BATCH_SIZE, with everything a row shows loaded by the
+same query or by one eager load per batch, so there are no per-row lazy loads.
+The streamed CSV and XLSX downloads (`report_export`) keep memory flat however
+many sections there are. The PDF reports (`pdf_reports`) use the same rows but
+not streamed: a render job's arguments are its rows, so the web worker collects
+them all and sends them to the render pool.
+"""
+from typing import Iterator, List, Tuple
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models import db
+from app.models.course import Course, CourseSection
+from app.models.profile import InstructorProfile
+from app.models.user import User
+
+BATCH_SIZE = 1000
+
+STUDENTS_PER_COURSE_HEADER = ('Course', 'Section', 'Term', 'Enrolled', 'Capacity', 'Instructor')
+INSTRUCTORS_WITH_COURSES_HEADER = ('Instructor', 'Department', 'Sections', 'Courses')
+
+
+def students_per_course(batch_size: int = BATCH_SIZE) -> Iterator[Tuple[str, str, str, int, int, str]]:
+    """(course code, section, term, enrolled, capacity, instructor) per section, by course code."""
+    stmt = (
+        db.select(
+            Course.code, CourseSection.section_code, CourseSection.term,
+            CourseSection.enrolled_count, CourseSection.capacity,
+            User.first_name, User.middle_name, User.last_name,
+        )
+        .join(Course, Course.id == CourseSection.course_id)
+        .outerjoin(InstructorProfile, InstructorProfile.id == CourseSection.instructor_id)
+        .outerjoin(User, User.id == InstructorProfile.user_id)
+        .order_by(Course.code, CourseSection.term.desc(), CourseSection.section_code)
+        .execution_options(yield_per=batch_size)
+    )
+    for r in db.session.execute(stmt):
+        instructor = ' '.join(filter(None, [r.first_name, r.middle_name, r.last_name])) or 'TBA'
+        yield r.code, r.section_code, r.term, r.enrolled_count or 0, r.capacity, instructor
+
+
+def instructors_with_courses(batch_size: int = BATCH_SIZE) -> Iterator[Tuple[str, str, List[str]]]:
+    """(instructor name, department, ["CS101-01 (Spring 2025)", ...]) per instructor."""
+    stmt = (
+        db.select(InstructorProfile)
+        .options(
+            joinedload(InstructorProfile.user),
+            joinedload(InstructorProfile.department),
+            selectinload(InstructorProfile.course_sections).joinedload(CourseSection.course),
+        )
+        .order_by(InstructorProfile.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for instructor in db.session.scalars(stmt):
+        courses = [f"{s.course.code}-{s.section_code} ({s.term})" for s in instructor.course_sections]
+        yield instructor.user.full_name, instructor.department.name if instructor.department else '', courses
+
+
+def instructors_with_courses_table(batch_size: int = BATCH_SIZE) -> Iterator[Tuple[str, str, int, str]]:
+    """`instructors_with_courses` as flat rows for CSV and XLSX."""
+    for name, department, courses in instructors_with_courses(batch_size):
+        yield name, department, len(courses), ', '.join(courses)
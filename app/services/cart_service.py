@@ -0,0 +1,138 @@
+"""Registration cart: stage sections, validate them together, enroll all or nothing."""
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from app.models import db
+from app.models.audit import AuditLog
+from app.models.cart import CartItem
+from app.models.course import CourseSection
+from app.models.enrollment import Enrollment
+from app.services.eligibility_service import EligibilityContext
+from app.services.enrollment_service import add_enrollment_notifications
+
+# Upper bound on staged sections (a full-time load is 5-7 sections)
+MAX_CART_SECTIONS = 12
+
+
+def get_cart(student_profile) -> List[CartItem]:
+    """Cart items in the order they were added."""
+    return CartItem.query.filter_by(student_id=student_profile.id).order_by(CartItem.id).all()
+
+
+def add_to_cart(student_profile, section: CourseSection) -> Tuple[bool, List[str]]:
+    """Stage a section. Returns: (success, messages)"""
+    if CartItem.query.filter_by(student_id=student_profile.id, course_section_id=section.id).first():
+        return False, ["Section is already in your cart"]
+    if CartItem.query.filter_by(student_id=student_profile.id).count() >= MAX_CART_SECTIONS:
+        return False, [f"Your cart can hold at most {MAX_CART_SECTIONS} sections"]
+    db.session.add(CartItem(student_id=student_profile.id, course_section_id=section.id))
+    db.session.commit()
+    return True, [f"Added {section.course.code}-{section.section_code} to your cart"]
+
+
+def remove_from_cart(student_profile, section_id: int) -> bool:
+    """Unstage a section; returns False when it was not in the cart."""
+    removed = CartItem.query.filter_by(student_id=student_profile.id, course_section_id=section_id).delete()
+    db.session.commit()
+    return bool(removed)
+
+
+def validate_cart(student_profile, section_ids: Optional[Iterable[int]] = None) -> Tuple[bool, List[dict]]:
+    """
+    Validate a set of sections as one schedule (the cart by default).
+    Each section is checked against the student's enrollments and against the
+    cart sections before it, so time conflicts, repeated courses and the credit
+    total inside the cart are caught as well.
+    Returns: (all_ok, per-section results in cart order)
+    """
+    if section_ids is None:
+        section_ids = [item.course_section_id for item in get_cart(student_profile)]
+    ids = list(dict.fromkeys(section_ids))
+    found = {s.id: s for s in EligibilityContext.load_sections(ids)}
+    context = EligibilityContext.load(student_profile, terms={s.term for s in found.values()})
+
+    results = []
+    courses_in_cart: Dict[Tuple[int, str], str] = {}
+    for sid in ids:
+        section = found.get(sid)
+        if section is None:
+            results.append({'course_section_id': sid, 'ok': False, 'errors': ['Course section not found'], 'warnings': []})
+            continue
+        ok, errors, warnings = context.check(section)
+        # A cart only enrolls; joining a waitlist stays a single-section action
+        if "Already on waitlist" in warnings:
+            warnings.remove("Already on waitlist")
+            errors.append("Already on waitlist")
+        key = (section.course_id, section.term)
+        if key in courses_in_cart:
+            errors.append(f"Another section of {section.course.code} is in your cart ({courses_in_cart[key]})")
+        if not errors:
+            courses_in_cart[key] = section.section_code
+            # Later cart sections are checked against this one too
+            context.add(section)
+        results.append({
+            'course_section_id': sid,
+            'course_code': section.course.code,
+            'section_code': section.section_code,
+            'term': section.term,
+            'ok': not errors,
+            'errors': errors,
+            'warnings': warnings,
+        })
+    return bool(results) and all(r['ok'] for r in results), results
+
+
+def submit_cart(student_profile, section_ids: Optional[Iterable[int]] = None) -> Tuple[List[Enrollment], bool, List[str], List[dict]]:
+    """
+    Enroll in every section of the cart (or of `section_ids`) in one transaction.
+    Sections are locked in id order, so two carts sharing sections always lock
+    them in the same order and cannot deadlock. If any section fails validation
+    or has no seat left, nothing is enrolled.
+    Returns: (enrollments, success, messages, per-section results)
+    """
+    ok, results = validate_cart(student_profile, section_ids)
+    if not results:
+        return [], False, ["Your cart is empty"], results
+    if not ok:
+        return [], False, ["No sections were enrolled: fix the problems below and submit again"], results
+
+    ids = sorted(r['course_section_id'] for r in results)
+    by_id = {r['course_section_id']: r for r in results}
+    try:
+        sections = CourseSection.query.filter(CourseSection.id.in_(ids)) \
+            .order_by(CourseSection.id).with_for_update().all()
+        enrollments = []
+        now = datetime.utcnow()
+        for section in sections:
+            if not section.claim_seat():
+                db.session.rollback()
+                by_id[section.id]['ok'] = False
+                by_id[section.id]['errors'].append("Course section is full")
+                return [], False, ["No sections were enrolled: a section filled up while you were registering"], results
+            enrollment = Enrollment(student_id=student_profile.id, course_section_id=section.id,
+                                    status='Enrolled', enrolled_at=now)
+            db.session.add(enrollment)
+            enrollments.append((section, enrollment))
+
+        db.session.flush()
+        for section, enrollment in enrollments:
+            add_enrollment_notifications(student_profile, section, enrollment)
+            db.session.add(AuditLog(
+                user_id=getattr(student_profile, 'user_id', None) or 0,
+                action='ENROLL',
+                entity_type='Enrollment',
+                entity_id=enrollment.id,
+                new_values={'status': enrollment.status, 'student_id': enrollment.student_id, 'course_section_id': enrollment.course_section_id},
+                extra_data={'cart': ids},
+            ))
+        CartItem.query.filter(
+            CartItem.student_id == student_profile.id,
+            CartItem.course_section_id.in_(ids),
+        ).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return [], False, ['Enrollment failed due to an unexpected error. Please try again.'], results
+
+    enrolled = [enrollment for _, enrollment in enrollments]
+    codes = ', '.join(f"{s.course.code}-{s.section_code}" for s, _ in enrollments)
+    return enrolled, True, [f"Successfully enrolled in {codes}"], results
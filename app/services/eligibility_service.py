@@ -0,0 +1,154 @@
+"""Batched enrollment eligibility checks.
+
+`EligibilityContext` loads a student's enrollments (with their sections and
+courses) in one query and their enrolled credits per term from the term load
+aggregate (`StudentTermLoad`) in another, and then answers eligibility
+questions for any number of course sections in memory, instead of issuing the
+conflict, credit and existing-enrollment queries once per section.
+With ENFORCE_PREREQUISITES on, missing prerequisites are an error as well; the
+student's completed courses and the prerequisite closure are read once per
+context.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from app.models.enrollment import Enrollment, EnrollmentStatus, completed_course_ids
+from app.models.course import Course, CourseSection, prerequisite_closure
+from app.models.term_load import enrolled_credits_by_term
+
+
+class EligibilityContext:
+    """In-memory snapshot of a student's schedule, credit load and enrollments."""
+
+    MAX_CREDITS = 18
+
+    def __init__(self, student, enrollments: Iterable[Enrollment], max_credits: int = None,
+                 enforce_prerequisites: bool = None):
+        self.student = student
+        self.max_credits = max_credits if max_credits is not None else self.MAX_CREDITS
+        if enforce_prerequisites is None:
+            enforce_prerequisites = current_app.config.get('ENFORCE_PREREQUISITES', False)
+        self.enforce_prerequisites = enforce_prerequisites
+        self._completed: Optional[Set[int]] = None
+        self._required: Dict[int, Set[int]] = {}
+        self._existing: Dict[int, Enrollment] = {}
+        self._schedule: Dict[str, List[CourseSection]] = {}
+        self._enrolled_credits: Dict[str, float] = {}  # per term, from StudentTermLoad
+        self._added_credits: Dict[str, float] = {}  # sections counted with `add`
+        for enrollment in enrollments:
+            self._existing[enrollment.course_section_id] = enrollment
+            if enrollment.status == EnrollmentStatus.ENROLLED and enrollment.course_section is not None:
+                section = enrollment.course_section
+                self._schedule.setdefault(section.term, []).append(section)
+
+    @classmethod
+    def load(cls, student, terms: Optional[Iterable[str]] = None, max_credits: int = None):
+        """Build a context from the student's enrollments (optionally limited to some terms)."""
+        query = Enrollment.query.options(
+            joinedload(Enrollment.course_section).joinedload(CourseSection.course)
+        ).filter(Enrollment.student_id == student.id)
+        if terms is not None:
+            terms = set(terms)
+            query = query.join(CourseSection).filter(CourseSection.term.in_(list(terms)))
+        context = cls(student, query.all(), max_credits=max_credits)
+        context.load_credits(terms)
+        return context
+
+    def load_credits(self, terms: Optional[Iterable[str]] = None):
+        """Read the enrolled credits of some terms (or all) from the term load aggregate."""
+        terms = None if terms is None else [t for t in set(terms) if t not in self._enrolled_credits]
+        if terms == []:
+            return
+        credits = enrolled_credits_by_term(self.student.id, terms)
+        for term in (terms if terms is not None else credits):
+            self._enrolled_credits[term] = credits.get(term, 0)
+
+    @staticmethod
+    def load_sections(section_ids: Iterable[int]) -> List[CourseSection]:
+        """Fetch sections with their course eagerly loaded, in one query."""
+        ids = list(set(section_ids))
+        if not ids:
+            return []
+        return CourseSection.query.options(
+            joinedload(CourseSection.course)
+        ).filter(CourseSection.id.in_(ids)).all()
+
+    def add(self, section: CourseSection):
+        """Count a section towards the student's schedule and credit load for its term."""
+        self._schedule.setdefault(section.term, []).append(section)
+        credits = section.course.credits if section.course else 0
+        self._added_credits[section.term] = self._added_credits.get(section.term, 0) + (credits or 0)
+
+    def term_credits(self, term: str) -> float:
+        """Credits enrolled for a term (term load aggregate), plus sections counted with `add`."""
+        if term not in self._enrolled_credits:
+            self.load_credits([term])
+        return self._enrolled_credits[term] + self._added_credits.get(term, 0)
+
+    def missing_prerequisites(self, course: Course) -> List[str]:
+        """Codes of prerequisites (direct or indirect) of `course` the student has not completed."""
+        if self._completed is None:
+            self._completed = completed_course_ids(self.student.id)
+        if course.id not in self._required:
+            self._required.update(prerequisite_closure([course.id]))
+        missing = self._required.get(course.id, set()) - self._completed
+        if not missing:
+            return []
+        return sorted(code for (code,) in Course.query.with_entities(Course.code).filter(Course.id.in_(missing)))
+
+    def conflicts(self, section: CourseSection) -> List[CourseSection]:
+        """Scheduled sections in the same term that overlap with `section`."""
+        return [s for s in self._schedule.get(section.term, [])
+                if s.id != section.id and section.conflicts_with(s)]
+
+    def check(self, section: CourseSection) -> Tuple[bool, List[str], List[str]]:
+        """Eligibility for one section; same result shape and messages as `Enrollment.can_enroll`."""
+        errors = []
+        warnings = []
+
+        if section.is_full:
+            errors.append("Course section is full")
+
+        conflicting_sections = self.conflicts(section)
+        if conflicting_sections:
+            conflict_names = [f"{s.course.code}-{s.section_code}" for s in conflicting_sections]
+            errors.append(f"Time conflict with: {', '.join(conflict_names)}")
+
+        total_credits = self.term_credits(section.term) + (section.course.credits or 0)
+        if total_credits > self.max_credits:
+            warnings.append(f"Exceeds credit limit: {total_credits} credits")
+
+        existing = self._existing.get(section.id)
+        if existing:
+            if existing.status == EnrollmentStatus.ENROLLED:
+                errors.append("Already enrolled in this section")
+            elif existing.status == EnrollmentStatus.WAITLISTED:
+                warnings.append("Already on waitlist")
+
+        if self.enforce_prerequisites and section.course is not None:
+            missing = self.missing_prerequisites(section.course)
+            if missing:
+                errors.append(f"Missing prerequisites: {', '.join(missing)}")
+
+        if not self.student.can_register():
+            errors.append(f"Academic status is {self.student.academic_status}")
+
+        return len(errors) == 0, errors, warnings
+
+    def check_many(self, sections: Iterable[CourseSection]) -> Dict[int, Tuple[bool, List[str], List[str]]]:
+        """Check several sections independently; returns results keyed by section id."""
+        return {section.id: self.check(section) for section in sections}
+
+
+def check_sections(student, section_ids: Iterable[int]) -> Tuple[Dict[int, Tuple[bool, List[str], List[str]]], List[int]]:
+    """
+    Check eligibility for many sections with a fixed number of queries.
+    Returns: (results keyed by section id, ids that were not found)
+    """
+    ids = list(dict.fromkeys(section_ids))
+    sections = EligibilityContext.load_sections(ids)
+    found = {s.id: s for s in sections}
+    context = EligibilityContext.load(student, terms={s.term for s in sections})
+    results = {sid: context.check(found[sid]) for sid in ids if sid in found}
+    missing = [sid for sid in ids if sid not in found]
+    return results, missing
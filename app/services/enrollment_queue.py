@@ -0,0 +1,358 @@
+"""Queued enrollment for registration rushes.
+
+Instead of every request thread running `enroll_student` against a popular
+section (and queueing up on its row), requests are appended to a per-section
+FIFO and a small pool of workers drains them. Sections are sharded over the
+workers by `section_id % ENROLLMENT_QUEUE_WORKERS`, so each section is only
+ever written by one worker, in arrival order, and a batch of requests is
+committed together. Web processes can run the pool themselves or leave it to
+`scripts/enrollment_worker.py` (ENROLLMENT_QUEUE_RUN_WORKERS=false).
+
+Clients get a request id back and poll (or long-poll) its status.
+
+Two backends are available: `RedisQueueBackend` when Redis is reachable (queues
+and statuses are shared by all web processes; a per-shard lock keeps one active
+worker per shard across processes), and `LocalQueueBackend`, an in-process
+fallback used when Redis is absent, mirroring the cache/limiter fallback in
+`create_app`. With the local backend a request must be polled on the process
+that accepted it, so run a single web process (or use Redis) in that mode.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from app.models import db
+
+QUEUED = 'queued'
+PROCESSING = 'processing'
+COMPLETED = 'completed'
+FAILED = 'failed'
+FINAL_STATES = (COMPLETED, FAILED)
+
+GENERIC_ERROR = 'Enrollment failed due to an unexpected error. Please try again.'
+
+
+class LocalQueueBackend:
+    """In-process queues and request statuses guarded by one condition variable.
+
+    Like the Redis backend, a status expires `result_ttl` seconds after it was
+    last written.
+    """
+
+    def __init__(self, result_ttl: int = 3600):
+        self.result_ttl = result_ttl
+        self._cond = threading.Condition()
+        self._sections: "OrderedDict[int, deque]" = OrderedDict()
+        # request id -> (expiry, record), oldest write first
+        self._status: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    def _store(self, request: dict):
+        """Record a status and drop expired ones (caller holds the lock)."""
+        now = time.monotonic()
+        self._status[request['request_id']] = (now + self.result_ttl, dict(request))
+        self._status.move_to_end(request['request_id'])
+        while self._status:
+            request_id, (expires, _) = next(iter(self._status.items()))
+            if expires > now:
+                break
+            del self._status[request_id]
+
+    def _record(self, request_id: str) -> Optional[dict]:
+        entry = self._status.get(request_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def push(self, section_id: int, request: dict) -> int:
+        with self._cond:
+            self._store(request)
+            queue = self._sections.setdefault(section_id, deque())
+            queue.append(request)
+            self._cond.notify_all()
+            return len(queue)
+
+    def take(self, shard: int, shards: int, limit: int, timeout: float) -> Optional[Tuple[int, List[dict]]]:
+        """Pop up to `limit` requests from one section of the shard (round-robin)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                for section_id in list(self._sections):
+                    if section_id % shards != shard:
+                        continue
+                    queue = self._sections.pop(section_id)
+                    batch = [queue.popleft() for _ in range(min(limit, len(queue)))]
+                    if queue:
+                        # Re-append so other sections in the shard get a turn
+                        self._sections[section_id] = queue
+                    return section_id, batch
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def set_status(self, request: dict):
+        with self._cond:
+            self._store(request)
+            self._cond.notify_all()
+
+    def get_status(self, request_id: str) -> Optional[dict]:
+        with self._cond:
+            record = self._record(request_id)
+            return dict(record) if record else None
+
+    def wait_status(self, request_id: str, timeout: float) -> Optional[dict]:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                record = self._record(request_id)
+                remaining = deadline - time.monotonic()
+                if record is None or record['status'] in FINAL_STATES or remaining <= 0:
+                    return dict(record) if record else None
+                self._cond.wait(remaining)
+
+    def acquire_shard(self, shard: int, owner: str, ttl: int) -> bool:
+        return True
+
+
+class RedisQueueBackend:
+    """Redis lists per section, a set of busy sections per shard, JSON statuses."""
+
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, client, prefix: str = 'enrollq', result_ttl: int = 3600):
+        self.client = client
+        self.prefix = prefix
+        self.result_ttl = result_ttl
+
+    def _key(self, *parts) -> str:
+        return ':'.join([self.prefix] + [str(p) for p in parts])
+
+    def push(self, section_id: int, request: dict) -> int:
+        shard = request['shard']
+        pipe = self.client.pipeline()
+        pipe.set(self._key('req', request['request_id']), json.dumps(request), ex=self.result_ttl)
+        pipe.rpush(self._key('section', section_id), json.dumps(request))
+        pipe.sadd(self._key('shard', shard), section_id)
+        pipe.rpush(self._key('wake', shard), 1)
+        pipe.ltrim(self._key('wake', shard), 0, 0)
+        results = pipe.execute()
+        return int(results[1])
+
+    def take(self, shard: int, shards: int, limit: int, timeout: float) -> Optional[Tuple[int, List[dict]]]:
+        shard_key = self._key('shard', shard)
+        for member in sorted(int(m) for m in self.client.smembers(shard_key)):
+            section_key = self._key('section', member)
+            items = self.client.lpop(section_key, limit)
+            if items:
+                return member, [json.loads(item) for item in items]
+            self.client.srem(shard_key, member)
+            if self.client.llen(section_key):
+                # A push raced with the removal; keep the section scheduled
+                self.client.sadd(shard_key, member)
+        if timeout > 0:
+            self.client.blpop([self._key('wake', shard)], timeout=max(1, int(timeout)))
+        return None
+
+    def set_status(self, request: dict):
+        self.client.set(self._key('req', request['request_id']), json.dumps(request), ex=self.result_ttl)
+
+    def get_status(self, request_id: str) -> Optional[dict]:
+        raw = self.client.get(self._key('req', request_id))
+        return json.loads(raw) if raw else None
+
+    def wait_status(self, request_id: str, timeout: float) -> Optional[dict]:
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self.get_status(request_id)
+            if record is None or record['status'] in FINAL_STATES or time.monotonic() >= deadline:
+                return record
+            time.sleep(self.POLL_INTERVAL)
+
+    def acquire_shard(self, shard: int, owner: str, ttl: int) -> bool:
+        """Take or extend the shard lock so only one process drains a shard."""
+        key = self._key('lock', shard)
+        if self.client.set(key, owner, nx=True, ex=ttl):
+            return True
+        current = self.client.get(key)
+        if current is not None and current.decode() == owner:
+            self.client.expire(key, ttl)
+            return True
+        return False
+
+
+class EnrollmentQueue:
+    """Per-section serialized enrollment with a sharded worker pool."""
+
+    LOCK_TTL = 30
+
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        self.enabled = False
+        self.workers = 1
+        self.run_workers = False
+        self.batch_size = 25
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._owner = uuid.uuid4().hex
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, redis_available: bool = False):
+        self.app = app
+        self.enabled = bool(app.config.get('ENROLLMENT_QUEUE_ENABLED', False))
+        self.workers = max(1, int(app.config.get('ENROLLMENT_QUEUE_WORKERS', 4)))
+        self.run_workers = bool(app.config.get('ENROLLMENT_QUEUE_RUN_WORKERS', True))
+        self.batch_size = max(1, int(app.config.get('ENROLLMENT_QUEUE_BATCH_SIZE', 25)))
+        backend = app.config.get('ENROLLMENT_QUEUE_BACKEND', 'auto')
+        if backend == 'redis' or (backend == 'auto' and redis_available):
+            import redis as _redis
+            self.backend = RedisQueueBackend(
+                _redis.from_url(app.config['REDIS_URL']),
+                result_ttl=int(app.config.get('ENROLLMENT_QUEUE_RESULT_TTL', 3600)),
+            )
+        else:
+            self.backend = LocalQueueBackend(result_ttl=int(app.config.get('ENROLLMENT_QUEUE_RESULT_TTL', 3600)))
+        self._threads = []
+        self._stop.clear()
+        app.extensions['enrollment_queue'] = self
+
+    # Submission and status
+
+    def submit(self, student_profile, section) -> dict:
+        """Queue an enrollment request and return its status record."""
+        request = {
+            'request_id': uuid.uuid4().hex,
+            'status': QUEUED,
+            'student_id': student_profile.id,
+            'course_section_id': section.id,
+            'shard': section.id % self.workers,
+            'submitted_at': datetime.utcnow().isoformat(),
+            'enrollment': None,
+            'messages': [],
+        }
+        request['position'] = self.backend.push(section.id, request)
+        self._ensure_started()
+        return request
+
+    def status(self, request_id: str) -> Optional[dict]:
+        return self.backend.get_status(request_id)
+
+    def wait(self, request_id: str, timeout: float) -> Optional[dict]:
+        """Block until the request is final or `timeout` seconds pass (long-poll)."""
+        return self.backend.wait_status(request_id, timeout)
+
+    # Processing
+
+    def process_batch(self, section_id: int, requests: List[dict]) -> List[dict]:
+        """Enroll a batch of requests for one section in order and commit once."""
+        from app.models.course import CourseSection
+        from app.models.profile import StudentProfile
+        from app.services.enrollment_service import enroll_student
+
+        for request in requests:
+            request['status'] = PROCESSING
+            self.backend.set_status(request)
+
+        section = db.session.get(CourseSection, section_id)
+        outcomes = []
+        for request in requests:
+            if section is None:
+                outcomes.append((request, None, False, ['Course section not found']))
+                continue
+            student = db.session.get(StudentProfile, request['student_id'])
+            try:
+                # A savepoint per request keeps one failure from discarding the batch
+                with db.session.begin_nested():
+                    enrollment, success, messages = enroll_student(student, section, commit=False)
+            except Exception:
+                self.app.logger.exception('Queued enrollment failed for request %s', request['request_id'])
+                enrollment, success, messages = None, False, [GENERIC_ERROR]
+            outcomes.append((request, enrollment, success, messages))
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.app.logger.exception('Commit failed for enrollment batch on section %s', section_id)
+            outcomes = [(request, None, False, [GENERIC_ERROR]) for request, *_ in outcomes]
+
+        # Statuses are published only after the commit so clients never see an
+        # enrollment that was rolled back.
+        for request, enrollment, success, messages in outcomes:
+            request['status'] = COMPLETED if success else FAILED
+            request['enrollment'] = enrollment.to_dict() if (success and enrollment) else None
+            request['messages'] = messages
+            request['finished_at'] = datetime.utcnow().isoformat()
+            self.backend.set_status(request)
+        return [request for request, *_ in outcomes]
+
+    def drain(self, shard: Optional[int] = None) -> int:
+        """Synchronously process everything queued (all shards by default)."""
+        processed = 0
+        for current in ([shard] if shard is not None else range(self.workers)):
+            while True:
+                taken = self.backend.take(current, self.workers, self.batch_size, timeout=0)
+                if not taken:
+                    break
+                processed += len(self.process_batch(*taken))
+        return processed
+
+    # Worker pool
+
+    def _ensure_started(self):
+        # Started lazily so forked web workers (gunicorn --preload) get their own threads
+        if not self.run_workers or any(t.is_alive() for t in self._threads):
+            return
+        with self._start_lock:
+            if any(t.is_alive() for t in self._threads):
+                return
+            self._stop.clear()
+            self._owner = uuid.uuid4().hex
+            self._threads = [
+                threading.Thread(target=self._run, args=(shard,), name=f'enrollment-queue-{shard}', daemon=True)
+                for shard in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _run(self, shard: int):
+        while not self._stop.is_set():
+            if not self.backend.acquire_shard(shard, self._owner, self.LOCK_TTL):
+                self._stop.wait(self.LOCK_TTL / 3)
+                continue
+            with self.app.app_context():
+                try:
+                    taken = self.backend.take(shard, self.workers, self.batch_size, timeout=1.0)
+                    if taken:
+                        self.process_batch(*taken)
+                except Exception:
+                    self.app.logger.exception('Enrollment queue worker %s failed', shard)
+                    db.session.rollback()
+                    self._stop.wait(1.0)
+                finally:
+                    db.session.remove()
+
+    def run_forever(self):
+        """Run the worker pool in the foreground (standalone worker process)."""
+        self.run_workers = True
+        self._ensure_started()
+        try:
+            while any(t.is_alive() for t in self._threads):
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+enrollment_queue = EnrollmentQueue()
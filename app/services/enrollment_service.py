@@ -5,6 +5,7 @@ from app.models import db
 from app.models.enrollment import Enrollment
 from app.models.course import CourseSection, Course
 from app.models.audit import AuditLog
+from app.models.term_load import term_load_totals
 
 
 def can_enroll(student_profile, section: CourseSection):
@@ -14,9 +15,13 @@ def can_enroll(student_profile, section: CourseSection):
 
 def enroll_student(student_profile, section: CourseSection, 
                   audit_mode: bool = False, 
-                  override_by: int = None) -> Tuple[Enrollment, bool, List[str]]:
+                  override_by: int = None,
+                  commit: bool = True) -> Tuple[Enrollment, bool, List[str]]:
     """
     Enroll student in section with validation.
+    The enrollment, its notifications and the audit row are written in a single
+    transaction (one commit). With commit=False they are only flushed and errors
+    propagate, so a caller batching several enrollments can commit them together.
     Returns: (enrollment, success, messages)
     """
     messages = []
@@ -45,26 +50,21 @@ def enroll_student(student_profile, section: CourseSection,
             return None, False, messages
         messages.extend(warnings)
     
-    # Concurrency hardening: lock section row before capacity checks (no-op on SQLite)
-    try:
-        locked_section = db.session.query(CourseSection).filter_by(id=section.id).with_for_update().first()
-        if locked_section:
-            section = locked_section
-    except Exception:
-        # If DB doesn't support SELECT ... FOR UPDATE, proceed without locking
-        pass
-
+    if audit_mode and not section.allow_audit:
+        messages.append("This section does not allow auditing")
+        return None, False, messages
+    
+    # Capacity is enforced by Enrollment.enroll(), which claims the seat with a single
+    # conditional UPDATE on the section row; no SELECT ... FOR UPDATE is needed.
     try:
         # Create enrollment
         enrollment = Enrollment(
             student_id=student_profile.id,
             course_section_id=section.id
         )
+        db.session.add(enrollment)
         
         if audit_mode:
-            if not section.allow_audit:
-                messages.append("This section does not allow auditing")
-                return None, False, messages
             enrollment.status = 'Auditing'
             enrollment.enrolled_at = datetime.utcnow()
         else:
@@ -76,58 +76,27 @@ def enroll_student(student_profile, section: CourseSection,
             enrollment.override_by = override_by
             enrollment.override_at = datetime.utcnow()
         
-        db.session.add(enrollment)
-        db.session.commit()
-    except Exception:
-        db.session.rollback()
-        messages.append('Enrollment failed due to an unexpected error. Please try again.')
-        return None, False, messages
-    
-    # Notify student and instructor
-    try:
-        from app.models.notification import Notification
-        # Student confirmation
-        if getattr(student_profile, 'user_id', None):
-            student_note = Notification(
-                user_id=student_profile.user_id,
-                notification_type='enrollment',
-                title='Enrollment Confirmed' if enrollment.status == 'Enrolled' else 'Added to Waitlist',
-                message=(
-                    f"You have been {'enrolled in' if enrollment.status == 'Enrolled' else 'added to the waitlist for'} "
-                    f"{section.course.code}-{section.section_code} ({section.term})."
-                    + (f" Waitlist position: {enrollment.waitlist_position}." if enrollment.status == 'Waitlisted' else "")
-                ),
-                payload={'enrollment_id': enrollment.id, 'section_id': section.id}
-            )
-            db.session.add(student_note)
-        # Instructor notification
-        if section.instructor and section.instructor.user:
-            instructor_note = Notification(
-                user_id=section.instructor.user_id,
-                notification_type='enrollment',
-                title='New Student Enrollment',
-                message=f"{student_profile.user.full_name} has enrolled in {section.course.code}-{section.section_code} ({section.term}).",
-                payload={'enrollment_id': enrollment.id, 'section_id': section.id}
-            )
-            db.session.add(instructor_note)
-        db.session.commit()
-    except Exception:
-        # Don't fail enrollment if notification fails
-        pass
-    
-    # Audit log
-    try:
-        audit = AuditLog(
+        # Side records need the enrollment id; flush once and write them in the same transaction
+        db.session.flush()
+        add_enrollment_notifications(student_profile, section, enrollment)
+        db.session.add(AuditLog(
             user_id=override_by or getattr(student_profile, 'user_id', None) or 0,
             action='ENROLL_OVERRIDE' if override_by else 'ENROLL',
             entity_type='Enrollment',
             entity_id=enrollment.id,
             new_values={'status': enrollment.status, 'student_id': enrollment.student_id, 'course_section_id': enrollment.course_section_id}
-        )
-        db.session.add(audit)
-        db.session.commit()
+        ))
+        
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
     except Exception:
+        if not commit:
+            raise
         db.session.rollback()
+        messages.append('Enrollment failed due to an unexpected error. Please try again.')
+        return None, False, messages
 
     if enrollment.status == 'Enrolled':
         messages.append(f"Successfully enrolled in {section.course.code}")
@@ -139,9 +108,38 @@ def enroll_student(student_profile, section: CourseSection,
     return enrollment, True, messages
 
 
-def drop_enrollment(enrollment: Enrollment, reason: str = None) -> Tuple[bool, List[str]]:
+def add_enrollment_notifications(student_profile, section: CourseSection, enrollment: Enrollment):
+    """Queue the student confirmation and instructor notice in the current session."""
+    from app.models.notification import Notification
+    # Student confirmation
+    if getattr(student_profile, 'user_id', None):
+        db.session.add(Notification(
+            user_id=student_profile.user_id,
+            notification_type='enrollment',
+            title='Enrollment Confirmed' if enrollment.status == 'Enrolled' else 'Added to Waitlist',
+            message=(
+                f"You have been {'enrolled in' if enrollment.status == 'Enrolled' else 'added to the waitlist for'} "
+                f"{section.course.code}-{section.section_code} ({section.term})."
+                + (f" Waitlist position: {enrollment.waitlist_position}." if enrollment.status == 'Waitlisted' else "")
+            ),
+            payload={'enrollment_id': enrollment.id, 'section_id': section.id}
+        ))
+    # Instructor notification
+    if section.instructor and section.instructor.user:
+        db.session.add(Notification(
+            user_id=section.instructor.user_id,
+            notification_type='enrollment',
+            title='New Student Enrollment',
+            message=f"{student_profile.user.full_name} has enrolled in {section.course.code}-{section.section_code} ({section.term}).",
+            payload={'enrollment_id': enrollment.id, 'section_id': section.id}
+        ))
+
+
+def drop_enrollment(enrollment: Enrollment, reason: str = None, commit: bool = True) -> Tuple[bool, List[str]]:
     """
     Drop enrollment.
+    The drop, the waitlist promotion it triggers (see Enrollment.drop) and the
+    audit row are committed together.
     Returns: (success, messages)
     """
     messages = []
@@ -151,28 +149,27 @@ def drop_enrollment(enrollment: Enrollment, reason: str = None) -> Tuple[bool, L
         return False, messages
     
     course_title = enrollment.course_section.course.title
-    enrollment.drop(reason=reason)
-    db.session.commit()
-    
-    # Promote from waitlist if applicable
-    if hasattr(enrollment.course_section, 'promote_from_waitlist'):
-        enrollment.course_section.promote_from_waitlist()
-        db.session.commit()
-    
-    # Audit log
+    old_status = enrollment.status
     try:
-        audit = AuditLog(
+        enrollment.drop(reason=reason)
+        db.session.add(AuditLog(
             user_id=getattr(enrollment.student, 'user_id', None) or 0,
             action='DROP',
             entity_type='Enrollment',
             entity_id=enrollment.id,
-            old_values={'status': 'Enrolled'},
+            old_values={'status': old_status},
             new_values={'status': 'Dropped', 'reason': reason},
-        )
-        db.session.add(audit)
-        db.session.commit()
+        ))
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
     except Exception:
+        if not commit:
+            raise
         db.session.rollback()
+        messages.append('Drop failed due to an unexpected error. Please try again.')
+        return False, messages
 
     messages.append(f"Successfully dropped {course_title}")
     return True, messages
@@ -239,25 +236,15 @@ def get_student_enrollments(student_profile, status: str = None,
 
 def get_enrollment_summary(student_profile, term: str = None) -> dict:
     """
-    Get enrollment summary statistics.
+    Get enrollment summary statistics (from the per-term load aggregates).
     """
-    query = Enrollment.query.filter_by(student_id=student_profile.id)
-    
-    if term:
-        query = query.join(CourseSection).filter(CourseSection.term == term)
-    
-    enrollments = query.all()
-    
-    enrolled = [e for e in enrollments if e.status == 'Enrolled']
-    waitlisted = [e for e in enrollments if e.status == 'Waitlisted']
-    completed = [e for e in enrollments if e.status == 'Completed']
-    
-    total_credits = sum(e.course_section.course.credits for e in enrolled)
+    totals = term_load_totals(student_profile.id, term)
     
     return {
-        'enrolled_count': len(enrolled),
-        'waitlisted_count': len(waitlisted),
-        'completed_count': len(completed),
-        'total_credits': total_credits,
+        'enrolled_count': totals['enrolled_count'],
+        'waitlisted_count': totals['waitlisted_count'],
+        'completed_count': totals['completed_count'],
+        'total_credits': totals['enrolled_credits'],
+        'earned_credits': totals['earned_credits'],
         'gpa': student_profile.gpa or 0.0
     }
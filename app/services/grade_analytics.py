@@ -0,0 +1,232 @@
+"""Term-wide grade analytics.
+
+One columnar query pulls every enrollment of a term (plus the previous term,
+for grade inflation), then pandas computes the statistics for all sections,
+courses and departments at once with grouped aggregations, instead of looping
+over ORM objects one section at a time like
+`GradeService.get_grade_distribution`.
+
+Statistics are on the 4.0 grade-point scale. Numeric percentage grades are
+converted to their letter equivalent and grade points on the course's grading
+scale, one vectorized conversion per scale, so they count like letter grades
+in GPA statistics, distributions and DFW rates. DFW is D+/D/D-, F, W or a
+Failed/Withdrawn status, over enrollments with a final grade.
+
+Results are cached as serialized JSON per term until an enrollment, section or
+grading scale of the term or its baseline term changes (`tag_cache`), and for
+GRADE_ANALYTICS_CACHE_TTL seconds at most; pass refresh=True to recompute.
+"""
+import json
+from datetime import datetime
+from typing import Optional
+
+from flask import current_app
+
+from app.models import db
+from app.models.course import Course, CourseSection, Department
+from app.models.enrollment import Enrollment
+from app.models.grading_scale import get_scale
+from app.services import tag_cache
+
+# Grades that count as D, F or W for the DFW rate
+DFW_GRADES = ('D+', 'D', 'D-', 'F', 'W')
+DFW_STATUSES = ('Failed', 'Withdrawn')
+
+# Enrollments that carry a final grade (Incomplete is not final)
+NON_FINAL_GRADES = ('I',)
+
+PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+
+_COLUMNS = ('enrollment_id', 'status', 'grade', 'grade_points', 'term',
+            'section_id', 'section_code', 'course_id', 'course_code', 'credits', 'grading_scale_id',
+            'department_id', 'department_code')
+
+# Grouping key, the label columns carried into the output and the key the
+# baseline term is matched on, per level. Sections are new every term, so a
+# section is compared with its course's previous offering.
+_LEVELS = {
+    'sections': ('section_id', ['course_id', 'course_code', 'section_code', 'department_code'], 'course_id'),
+    'courses': ('course_id', ['course_code', 'department_code'], 'course_id'),
+    'departments': ('department_id', ['department_code'], 'department_id'),
+}
+
+_FLOAT_COLUMNS = ['mean_gpa', 'std_gpa', 'dfw_rate', 'baseline_mean_gpa', 'inflation_delta'] + \
+    [f"p{int(q * 100)}" for q in PERCENTILES]
+
+
+def _cache_key(term: str) -> str:
+    return f"grade_analytics:{term}"
+
+
+def previous_term(term: str) -> Optional[str]:
+    """The term whose sections start most recently before `term`'s, or None."""
+    starts = db.session.query(CourseSection.term, db.func.min(CourseSection.start_date)) \
+        .group_by(CourseSection.term).all()
+    start_of = dict(starts)
+    current = start_of.get(term)
+    if current is None:
+        return None
+    earlier = [(start, name) for name, start in starts if start is not None and start < current]
+    return max(earlier)[1] if earlier else None
+
+
+def load_enrollments(terms):
+    """DataFrame with one row per enrollment of `terms` (single query)."""
+    import pandas as pd
+
+    rows = db.session.execute(
+        db.select(
+            Enrollment.id, Enrollment.status, Enrollment.grade, Enrollment.grade_points,
+            CourseSection.term, CourseSection.id, CourseSection.section_code,
+            Course.id, Course.code, Course.credits, Course.grading_scale_id, Department.id, Department.code,
+        )
+        .join(CourseSection, CourseSection.id == Enrollment.course_section_id)
+        .join(Course, Course.id == CourseSection.course_id)
+        .outerjoin(Department, Department.id == Course.department_id)
+        .where(CourseSection.term.in_(list(terms)))
+    ).all()
+    frame = pd.DataFrame.from_records(rows, columns=_COLUMNS)
+    frame['grade_points'] = pd.to_numeric(frame['grade_points'], errors='coerce')
+    return frame
+
+
+def _prepare(frame):
+    import pandas as pd
+
+    frame = frame.copy()
+    percentage = pd.to_numeric(frame['grade'].astype('string').str.replace('%', '', regex=False).str.strip(),
+                               errors='coerce')
+    numeric = percentage.notna()
+    frame['letter'] = frame['grade']
+    if numeric.any():
+        scale_ids = frame['grading_scale_id'].astype('object').where(frame['grading_scale_id'].notna(), None)
+        for scale_id in scale_ids[numeric].unique():
+            rows = numeric & (scale_ids == scale_id) if scale_id is not None else numeric & scale_ids.isna()
+            letters, points = get_scale(None if scale_id is None else int(scale_id)).convert(percentage[rows].tolist())
+            frame.loc[rows, 'letter'] = letters
+            # Grades stored before numeric grades carried points
+            frame.loc[rows, 'grade_points'] = frame.loc[rows, 'grade_points'].fillna(
+                pd.Series(points, index=frame.index[rows], dtype=float))
+    final = frame['grade'].notna() & (frame['grade'] != '') & ~frame['grade'].isin(NON_FINAL_GRADES)
+    frame = frame.assign(
+        final=final,
+        dfw=final & (frame['letter'].isin(DFW_GRADES) | frame['status'].isin(DFW_STATUSES)),
+    )
+    return frame
+
+
+def _summarize(frame, key, labels, baseline_key, baseline=None):
+    """Aggregates for every group of `key` in one grouped pass; the baseline
+    mean is that of the group's `baseline_key` in the baseline term."""
+    import numpy as np
+    import pandas as pd
+
+    grouped = frame.groupby(key, sort=True, dropna=False)
+    points = grouped['grade_points']
+    stats = pd.DataFrame({
+        'enrollments': grouped.size(),
+        'graded': grouped['final'].sum(),
+        'dfw': grouped['dfw'].sum(),
+        'mean_gpa': points.mean(),
+        'std_gpa': points.std(ddof=0),
+    })
+    quantiles = points.quantile(list(PERCENTILES)).unstack()
+    quantiles.columns = [f"p{int(q * 100)}" for q in quantiles.columns]
+    stats = stats.join(quantiles).join(grouped[labels].first())
+    stats['dfw_rate'] = stats['dfw'] / stats['graded'].replace(0, np.nan)
+
+    if baseline is not None and not baseline.empty:
+        means = baseline.groupby(baseline_key)['grade_points'].mean()
+        groups = stats.index.to_series() if baseline_key == key else stats[baseline_key]
+        stats['baseline_mean_gpa'] = groups.map(means)
+    else:
+        stats['baseline_mean_gpa'] = np.nan
+    stats['inflation_delta'] = stats['mean_gpa'] - stats['baseline_mean_gpa']
+
+    graded = frame[frame['final']]
+    distributions = pd.crosstab(graded[key], graded['letter']).to_dict('index') if not graded.empty else {}
+
+    records = []
+    for record in stats.reset_index().to_dict('records'):
+        for column in ('enrollments', 'graded', 'dfw'):
+            record[column] = int(record[column])
+        for column in _FLOAT_COLUMNS:
+            record[column] = _round(record[column])
+        for column in [key] + labels:
+            record[column] = _label(record[column])
+        counts = distributions.get(record[key], {})
+        record['distribution'] = {grade: int(n) for grade, n in counts.items() if n}
+        records.append(record)
+    return records
+
+
+def _plain(value):
+    """numpy scalars -> Python scalars for JSON."""
+    if hasattr(value, 'item'):
+        value = value.item()
+    return value
+
+
+def _label(value):
+    """Group keys and labels: NaN (missing department) -> None, float ids -> int."""
+    value = _plain(value)
+    if value is None or value != value:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _round(value, digits=3):
+    value = _plain(value)
+    if value is None or value != value:  # NaN
+        return None
+    return round(float(value), digits)
+
+
+def compute_term_analytics(term: str, baseline_term: Optional[str] = None) -> dict:
+    """Statistics per section, course and department for `term` (not cached)."""
+    baseline_term = baseline_term or previous_term(term)
+    frame = load_enrollments([term] + ([baseline_term] if baseline_term else []))
+    frame = _prepare(frame)
+    current = frame[frame['term'] == term]
+    baseline = frame[frame['term'] == baseline_term] if baseline_term else None
+
+    result = {
+        'term': term,
+        'baseline_term': baseline_term,
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+    }
+    if current.empty:
+        result.update({level: [] for level in _LEVELS})
+        result['overall'] = {'enrollments': 0, 'graded': 0, 'dfw': 0, 'mean_gpa': None, 'std_gpa': None,
+                             'dfw_rate': None}
+        return result
+
+    for level, (key, labels, baseline_key) in _LEVELS.items():
+        result[level] = _summarize(current, key, labels, baseline_key, baseline)
+    graded = int(current['final'].sum())
+    dfw = int(current['dfw'].sum())
+    result['overall'] = {
+        'enrollments': int(len(current)),
+        'graded': graded,
+        'dfw': dfw,
+        'mean_gpa': _round(current['grade_points'].mean()),
+        'std_gpa': _round(current['grade_points'].std(ddof=0)),
+        'dfw_rate': _round(dfw / graded) if graded else None,
+        'baseline_mean_gpa': _round(baseline['grade_points'].mean()) if baseline is not None and not baseline.empty else None,
+    }
+    return result
+
+
+def get_term_analytics_json(term: str, refresh: bool = False) -> str:
+    """Serialized analytics for `term`, from the cache unless `refresh` is set."""
+    baseline_term = previous_term(term)
+    tags = [f'term:{t}' for t in (term, baseline_term) if t] + ['grading_scale']
+    return tag_cache.cached(
+        _cache_key(term),
+        lambda: json.dumps(compute_term_analytics(term, baseline_term)),
+        tags=tags,
+        timeout=int(current_app.config.get('GRADE_ANALYTICS_CACHE_TTL', 600)),
+        refresh=refresh,
+    )
@@ -0,0 +1,346 @@
+"""Term grade finalization.
+
+Closing a term used to mean grading and completing enrollments one at a time
+through the UI. This pipeline does it for a whole term in two checkpointed
+phases (see `GradeFinalizationRun`):
+
+  sections  For each batch of the term's sections (id order): remaining
+            Enrolled rows get their final status in one executemany UPDATE
+            (Completed/Failed/Withdrawn from the grade already entered;
+            GRADE_FINALIZATION_MISSING_GRADE, 'I' by default, when there is
+            none, and an Incomplete grade ends as Incomplete). The sections'
+            grades are locked, audit records are bulk-inserted and "Final Grade
+            Posted" notifications go through the outbox. Term loads, GPA totals
+            and completed courses get the same explicit adjustment as other
+            bulk writers.
+  students  For each batch of affected students: GPA, graded credits and
+            total_credits_earned are recomputed from enrollments in one
+            grouped query and written with one executemany UPDATE, so the
+            stored totals are exact after the term closes.
+
+Each batch commits with its checkpoint, so a crash loses at most the batch in
+flight and a restarted run continues after the last checkpoint. Locked grades
+are rejected by `GradeService.set_grade` and `GradeImport`; an Incomplete is
+later replaced by its final grade with `GradeService.resolve_incomplete`
+(registrar/admin), which a locked section allows.
+
+GRADE_FINALIZATION_MODE selects where a run started by `start_grade_finalization`
+executes: a background thread (default), the `tasks.finalize_term_grades`
+Celery task, or inline in the caller (tests).
+"""
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Tuple
+
+from flask import current_app
+
+from app.models import db
+from app.models.audit import AuditLog
+from app.models.course import Course, CourseSection
+from app.models.enrollment import Enrollment, EnrollmentStatus, refresh_completed_courses
+from app.models.finalization import GradeFinalizationRun
+from app.models.grading_scale import get_scale
+from app.models.profile import StudentProfile, grade_totals
+from app.models.term_load import apply_enrollment_changes
+from app.services.outbox_service import enqueue_notification
+from app.services.tag_cache import invalidate_tags
+from app.services.transcript_cache import invalidate_transcripts
+
+# Statuses of enrollments that carry a result once the term is closed
+FINAL_STATUSES = (EnrollmentStatus.COMPLETED, EnrollmentStatus.FAILED,
+                  EnrollmentStatus.WITHDRAWN, EnrollmentStatus.INCOMPLETE)
+
+
+def _config(name, default):
+    return current_app.config.get(name, default)
+
+
+def final_result(grade, missing_grade='I', scale=None) -> Tuple[str, float, str]:
+    """(grade, grade_points, status) an Enrolled row ends the term with."""
+    stored, points, status = Enrollment.resolve_grade(grade or missing_grade, EnrollmentStatus.ENROLLED, scale)
+    if status == EnrollmentStatus.ENROLLED:  # Incomplete
+        status = EnrollmentStatus.INCOMPLETE
+    return stored, points, status
+
+
+def _term_students(term: str, statuses: Iterable[str]):
+    return db.select(Enrollment.student_id) \
+        .join(CourseSection, CourseSection.id == Enrollment.course_section_id) \
+        .where(CourseSection.term == term, Enrollment.status.in_(list(statuses)))
+
+
+def latest_run(term: str):
+    return GradeFinalizationRun.query.filter_by(term=term).order_by(GradeFinalizationRun.id.desc()).first()
+
+
+def is_active(run: GradeFinalizationRun) -> bool:
+    """Running and heard from within GRADE_FINALIZATION_STALE_AFTER seconds."""
+    stale_after = int(_config('GRADE_FINALIZATION_STALE_AFTER', 600))
+    return run.status == 'Running' and run.updated_at >= datetime.utcnow() - timedelta(seconds=stale_after)
+
+
+def claim_run(term: str, user_id: int = None, restart: bool = False) -> Tuple[GradeFinalizationRun, bool]:
+    """The run to execute for `term` and whether the caller should execute it.
+
+    Returns the existing run and False when it is still active, or completed
+    and `restart` is not set. A failed or stalled run is claimed for resuming;
+    otherwise a new run is created.
+    """
+    run = latest_run(term)
+    if run is not None and (is_active(run) or (run.status == 'Completed' and not restart)):
+        return run, False
+
+    if run is not None and run.status != 'Completed' and not restart:
+        # Conditional claim, so two callers cannot both resume the same run
+        cutoff = datetime.utcnow() - timedelta(seconds=int(_config('GRADE_FINALIZATION_STALE_AFTER', 600)))
+        claimed = db.session.execute(
+            db.update(GradeFinalizationRun)
+            .where(GradeFinalizationRun.id == run.id,
+                   db.or_(GradeFinalizationRun.status != 'Running', GradeFinalizationRun.updated_at < cutoff))
+            .values(status='Running', last_error=None, updated_at=datetime.utcnow()),
+            execution_options={'synchronize_session': False},
+        ).rowcount
+        db.session.commit()
+        db.session.refresh(run)
+        return run, bool(claimed)
+
+    total_sections = db.session.execute(
+        db.select(db.func.count(CourseSection.id)).where(CourseSection.term == term)).scalar() or 0
+    students = _term_students(term, FINAL_STATUSES + (EnrollmentStatus.ENROLLED,)).distinct().subquery()
+    total_students = db.session.execute(db.select(db.func.count()).select_from(students)).scalar() or 0
+    run = GradeFinalizationRun(term=term, status='Running', phase='sections', started_by=user_id,
+                               total_sections=total_sections, total_students=total_students, counts={})
+    db.session.add(run)
+    db.session.commit()
+    return run, True
+
+
+def run_grade_finalization(run: GradeFinalizationRun, section_batch: int = None, student_batch: int = None,
+                           progress: Callable[[GradeFinalizationRun], None] = None) -> GradeFinalizationRun:
+    """Execute a claimed run from its checkpoints to the end.
+
+    `progress` is called with the run after each committed batch. On an error
+    the run is marked Failed (keeping its checkpoints) and the error re-raised.
+    """
+    section_batch = section_batch or int(_config('GRADE_FINALIZATION_SECTION_BATCH', 50))
+    student_batch = student_batch or int(_config('GRADE_FINALIZATION_STUDENT_BATCH', 500))
+    missing_grade = _config('GRADE_FINALIZATION_MISSING_GRADE', 'I')
+
+    try:
+        while run.phase == 'sections':
+            section_ids = db.session.execute(
+                db.select(CourseSection.id)
+                .where(CourseSection.term == run.term, CourseSection.id > run.last_section_id)
+                .order_by(CourseSection.id).limit(section_batch)
+            ).scalars().all()
+            if not section_ids:
+                run.phase = 'students'
+                db.session.commit()
+                break
+            counts = Counter(run.counts or {})
+            counts.update(_finalize_sections(section_ids, run.started_by, missing_grade))
+            run.counts = dict(counts)
+            run.sections_done = (run.sections_done or 0) + len(section_ids)
+            run.last_section_id = section_ids[-1]
+            db.session.commit()  # statuses, locks, audit, notifications and checkpoint together
+            current_app.logger.info('Grade finalization %s (%s): %s/%s sections',
+                                    run.id, run.term, run.sections_done, run.total_sections)
+            if progress:
+                progress(run)
+
+        while run.phase == 'students':
+            student_ids = db.session.execute(
+                _term_students(run.term, FINAL_STATUSES)
+                .where(Enrollment.student_id > run.last_student_id)
+                .distinct().order_by(Enrollment.student_id).limit(student_batch)
+            ).scalars().all()
+            if not student_ids:
+                run.phase = 'done'
+                break
+            _recompute_students(student_ids)
+            run.students_done = (run.students_done or 0) + len(student_ids)
+            run.last_student_id = student_ids[-1]
+            db.session.commit()
+            current_app.logger.info('Grade finalization %s (%s): %s/%s students',
+                                    run.id, run.term, run.students_done, run.total_students)
+            if progress:
+                progress(run)
+
+        run.status = 'Completed'
+        run.finished_at = datetime.utcnow()
+        db.session.commit()
+    except Exception as ex:
+        db.session.rollback()
+        run.status = 'Failed'
+        run.last_error = str(ex)[:2000]
+        db.session.commit()
+        raise
+    return run
+
+
+def finalize_term(term: str, user_id: int = None, restart: bool = False,
+                  progress: Callable[[GradeFinalizationRun], None] = None) -> GradeFinalizationRun:
+    """Claim and execute the term's run in the caller (scripts, Celery)."""
+    run, claimed = claim_run(term, user_id=user_id, restart=restart)
+    if not claimed:
+        return run
+    return run_grade_finalization(run, progress=progress)
+
+
+def start_grade_finalization(term: str, user_id: int = None, restart: bool = False) -> Tuple[GradeFinalizationRun, bool]:
+    """Claim the term's run and hand it to GRADE_FINALIZATION_MODE. Returns (run, started)."""
+    run, claimed = claim_run(term, user_id=user_id, restart=restart)
+    if not claimed:
+        return run, False
+
+    mode = _config('GRADE_FINALIZATION_MODE', 'thread')
+    if mode == 'celery':
+        from app.tasks import finalize_term_grades
+        finalize_term_grades.delay(run.id)
+    elif mode == 'inline':
+        try:
+            run_grade_finalization(run)
+        except Exception:
+            current_app.logger.exception('Grade finalization %s failed', run.id)
+    else:
+        app = current_app._get_current_object()
+        threading.Thread(target=_run_in_thread, args=(app, run.id),
+                         name=f'grade-finalization-{run.id}', daemon=True).start()
+    return run, True
+
+
+def _run_in_thread(app, run_id: int):
+    with app.app_context():
+        try:
+            run_grade_finalization(db.session.get(GradeFinalizationRun, run_id))
+        except Exception:
+            app.logger.exception('Grade finalization %s failed', run_id)
+        finally:
+            db.session.remove()
+
+
+def _finalize_sections(section_ids: List[int], user_id: int, missing_grade: str) -> Counter:
+    """Close one batch of sections; returns counts per final status plus notifications."""
+    now = datetime.utcnow()
+    rows = db.session.query(
+        Enrollment.id, Enrollment.student_id, Enrollment.course_section_id, Enrollment.status,
+        Enrollment.grade, Enrollment.grade_points, StudentProfile.user_id,
+        CourseSection.term, CourseSection.section_code, Course.code, Course.credits, Course.grading_scale_id,
+    ).join(StudentProfile, StudentProfile.id == Enrollment.student_id) \
+     .join(CourseSection, CourseSection.id == Enrollment.course_section_id) \
+     .join(Course, Course.id == CourseSection.course_id) \
+     .filter(Enrollment.course_section_id.in_(section_ids),
+             Enrollment.status.in_(FINAL_STATUSES + (EnrollmentStatus.ENROLLED,))) \
+     .order_by(Enrollment.id).all()
+
+    changes = {}
+    for r in rows:
+        if r.status == EnrollmentStatus.ENROLLED:
+            changes[r.id] = final_result(r.grade, missing_grade, get_scale(r.grading_scale_id))
+
+    if changes:
+        table = Enrollment.__table__
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('b_id')).values(
+                grade=db.bindparam('b_grade'),
+                grade_points=db.bindparam('b_points'),
+                status=db.bindparam('b_status'),
+                updated_at=now,
+            ),
+            [{'b_id': eid, 'b_grade': grade, 'b_points': points, 'b_status': status}
+             for eid, (grade, points, status) in changes.items()],
+        )
+        changed = [r for r in rows if r.id in changes]
+        apply_enrollment_changes(
+            (r.student_id, r.term, r.credits or 0, (r.status, r.grade_points), (changes[r.id][2], changes[r.id][1]))
+            for r in changed
+        )
+        refresh_completed_courses({r.student_id for r in changed})
+        invalidate_transcripts({r.student_id for r in changed})
+        invalidate_tags({f'term:{r.term}' for r in changed})
+
+    # Only sections locked by this batch announce their grades (a restart does not notify twice)
+    locked = set(db.session.execute(
+        db.update(CourseSection)
+        .where(CourseSection.id.in_(section_ids), CourseSection.grades_locked_at.is_(None))
+        .values(grades_locked_at=now)
+        .returning(CourseSection.id),
+        execution_options={'synchronize_session': False},
+    ).scalars())
+
+    audit = [{
+        'user_id': user_id or 0,
+        'action': 'GRADE_FINALIZE',
+        'entity_type': 'Enrollment',
+        'entity_id': r.id,
+        'old_values': {'grade': r.grade, 'status': r.status},
+        'new_values': {'grade': changes[r.id][0], 'status': changes[r.id][2]},
+        'extra_data': {'course_section_id': r.course_section_id, 'term': r.term},
+    } for r in rows if r.id in changes]
+    audit += [{
+        'user_id': user_id or 0,
+        'action': 'GRADES_LOCKED',
+        'entity_type': 'CourseSection',
+        'entity_id': section_id,
+        'new_values': {'grades_locked_at': now.isoformat()},
+    } for section_id in sorted(locked)]
+    if audit:
+        db.session.execute(db.insert(AuditLog), audit)
+
+    counts = Counter()
+    for r in rows:
+        grade, status = (changes[r.id][0], changes[r.id][2]) if r.id in changes else (r.grade, r.status)
+        if r.id in changes:
+            counts[status] += 1
+        if not r.user_id or not grade or (r.course_section_id not in locked and r.id not in changes):
+            continue
+        enqueue_notification(
+            user_id=r.user_id,
+            notification_type='grade',
+            title='Final Grade Posted',
+            message=f"Your final grade for {r.code}-{r.section_code} ({r.term}) is {grade}"
+                    + (" (Incomplete)" if status == EnrollmentStatus.INCOMPLETE else ""),
+            payload={'enrollment_id': r.id, 'grade': grade, 'status': status, 'final': True},
+        )
+        counts['notifications'] += 1
+
+    _expire(Enrollment, changes)
+    _expire(CourseSection, locked)
+    return counts
+
+
+def _recompute_students(student_ids: List[int]):
+    """Exact GPA totals and credits for a batch of students (one grouped query, one executemany)."""
+    totals = grade_totals(student_ids)
+    table = StudentProfile.__table__
+    params = []
+    for student_id in student_ids:
+        points, credits = totals.get(student_id, (0.0, 0.0))
+        params.append({
+            'b_id': student_id,
+            'b_points': points,
+            'b_credits': credits,
+            'b_gpa': round(points / credits, 2) if credits > 0 else 0.0,
+        })
+    db.session.execute(
+        table.update().where(table.c.id == db.bindparam('b_id')).values(
+            quality_points=db.bindparam('b_points'),
+            graded_credits=db.bindparam('b_credits'),
+            total_credits_earned=db.bindparam('b_credits'),
+            gpa=db.bindparam('b_gpa'),
+            updated_at=datetime.utcnow(),
+        ),
+        params,
+    )
+    invalidate_transcripts(student_ids)
+    _expire(StudentProfile, student_ids)
+
+
+def _expire(model, ids):
+    """Objects already in the session predate the bulk UPDATEs."""
+    mapper = db.inspect(model)
+    for pk in ids:
+        obj = db.session.identity_map.get(mapper.identity_key_from_primary_key((pk,)))
+        if obj is not None:
+            db.session.expire(obj)
@@ -0,0 +1,293 @@
+"""Bulk grade ingestion for a course section.
+
+Grades arrive as a CSV or JSON upload keyed by student number (the roster
+form posts enrollment ids instead). Rows are validated one at a time as they
+are read against a roster loaded once, then every valid grade is written with
+one executemany UPDATE, guarded on the roster's grade, status and grade
+points so a concurrent grade change is reported as a conflict instead of
+overwritten. Audit records go in with one bulk INSERT, student notifications
+through the outbox, and term loads, GPA totals and completed courses are
+adjusted once per affected student. Everything commits together,
+and the caller gets a per-row report.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from app.models import db
+from app.models.audit import AuditLog
+from app.models.course import CourseSection
+from app.models.enrollment import Enrollment, refresh_completed_courses
+from app.models.grading_scale import scale_for_course
+from app.models.profile import StudentProfile
+from app.models.term_load import apply_enrollment_changes
+from app.services.grade_service import GradeService
+from app.services.outbox_service import enqueue_notification
+from app.services.tag_cache import invalidate_tags, section_tags
+from app.services.transcript_cache import invalidate_transcripts
+
+# Same rule as GradeService.set_grade
+GRADABLE_STATUSES = ('Enrolled', 'Completed')
+
+# Rows per executemany batch
+CHUNK_SIZE = 500
+
+# Upload formats by file extension / content type
+FORMATS = {'csv': 'csv', 'text/csv': 'csv', 'json': 'json', 'application/json': 'json'}
+
+
+class GradeImportError(ValueError):
+    """The upload as a whole cannot be read (per-row problems go in the report instead)."""
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """'csv' or 'json' from the upload's file name or content type."""
+    ext = (filename or '').rsplit('.', 1)[-1].lower() if filename and '.' in filename else ''
+    fmt = FORMATS.get(ext) or FORMATS.get((content_type or '').split(';')[0].strip().lower())
+    if not fmt:
+        raise GradeImportError("Upload a .csv or .json file")
+    return fmt
+
+
+def parse_grade_rows(stream, fmt: str) -> Iterator[dict]:
+    """Yield ``{'row', 'student_number', 'grade'}`` from a binary upload stream.
+
+    CSV needs a header with `student_number` and `grade` columns and is read
+    line by line. JSON is a list of objects (or ``{"grades": [...]}``) with the
+    same keys.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        # Undecodable bytes or broken quoting can surface on any line, header included
+        try:
+            reader = csv.DictReader(text)
+            fields = {(name or '').strip().lower(): name for name in (reader.fieldnames or [])}
+            if 'student_number' not in fields or 'grade' not in fields:
+                raise GradeImportError("CSV header must include student_number and grade columns")
+            for record in reader:
+                yield {
+                    'row': reader.line_num,
+                    'student_number': (record.get(fields['student_number']) or '').strip(),
+                    'grade': (record.get(fields['grade']) or '').strip(),
+                }
+        except (UnicodeDecodeError, csv.Error) as ex:
+            raise GradeImportError(f"File must be UTF-8 CSV: {ex}")
+    elif fmt == 'json':
+        try:
+            data = json.load(text)
+        except ValueError as ex:
+            raise GradeImportError(f"Invalid JSON: {ex}")
+        yield from json_grade_rows(data)
+    else:
+        raise GradeImportError(f"Unsupported format: {fmt}")
+
+
+def json_grade_rows(data) -> Iterator[dict]:
+    """Rows from an already decoded JSON body (list, or object with a `grades` list)."""
+    if isinstance(data, dict):
+        data = data.get('grades')
+    if not isinstance(data, list):
+        raise GradeImportError("JSON must be a list of {student_number, grade} objects")
+    for index, item in enumerate(data, start=1):
+        item = item if isinstance(item, dict) else {}
+        grade = item.get('grade')
+        yield {
+            'row': index,
+            'student_number': str(item.get('student_number') or '').strip(),
+            'grade': grade.strip() if isinstance(grade, str) else grade,
+        }
+
+
+class GradeImport:
+    """Validate and apply a batch of grades for one section."""
+
+    def __init__(self, section: CourseSection, grader_id: int = None):
+        self.section = section
+        self.grader_id = grader_id
+        self.scale = scale_for_course(section.course)
+        # The whole roster in one query; rows are checked against it in memory
+        roster = db.session.query(
+            Enrollment.id, Enrollment.student_id, Enrollment.status, Enrollment.grade,
+            Enrollment.grade_points, StudentProfile.student_number, StudentProfile.user_id,
+        ).join(StudentProfile, StudentProfile.id == Enrollment.student_id) \
+         .filter(Enrollment.course_section_id == section.id).all()
+        self._by_number = {r.student_number: r for r in roster}
+        self._by_id = {r.id: r for r in roster}
+
+    def validate(self, rows: Iterable[dict]) -> Iterator[dict]:
+        """Check rows as they are read; yields one result per row.
+
+        `result` is 'valid', 'unchanged' or 'error'. Valid rows carry the
+        enrollment and the resolved grade, grade points and status.
+        """
+        seen: Dict[int, int] = {}
+        for index, row in enumerate(rows, start=1):
+            number = row.get('student_number')
+            result = {'row': row.get('row', index), 'student_number': number, 'grade': row.get('grade')}
+            grade = row.get('grade')
+            if not number and row.get('enrollment_id') is None:
+                yield dict(result, result='error', message="student_number is required")
+                continue
+            entry = self._by_number.get(number) if number else self._by_id.get(row.get('enrollment_id'))
+            if entry is None:
+                who = f"Student {number}" if number else f"Enrollment {row.get('enrollment_id')}"
+                yield dict(result, result='error', message=f"{who} is not enrolled in this section")
+                continue
+            result['student_number'] = entry.student_number
+            if grade in (None, ''):
+                yield dict(result, result='error', message="Grade is required")
+                continue
+            if not GradeService.is_valid_grade(grade, self.scale):
+                yield dict(result, result='error', message=f"Invalid grade: {grade}")
+                continue
+            if entry.id in seen:
+                yield dict(result, result='error', message=f"Duplicate row for student {entry.student_number} (first on row {seen[entry.id]})")
+                continue
+            seen[entry.id] = result['row']
+            if self.section.grades_locked:
+                yield dict(result, result='error', message="Cannot grade: Grades for this section have been finalized")
+                continue
+            if entry.status not in GRADABLE_STATUSES:
+                yield dict(result, result='error', message="Cannot grade: Student is not enrolled or completed")
+                continue
+            stored, points, status = Enrollment.resolve_grade(grade, entry.status, self.scale)
+            if stored == entry.grade and status == entry.status:
+                yield dict(result, result='unchanged', message="Grade unchanged")
+                continue
+            yield dict(result, result='valid', enrollment=entry, new_grade=stored, new_points=points, new_status=status)
+
+    def run(self, rows: Iterable[dict]) -> dict:
+        """Validate `rows` and apply every valid grade in one transaction. Returns the report."""
+        results = []
+        valid = []
+        for result in self.validate(rows):
+            results.append(result)
+            if result['result'] == 'valid':
+                valid.append(result)
+
+        if valid:
+            try:
+                conflicts = self._apply(valid)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                for result in valid:
+                    result['result'] = 'error'
+                    result['message'] = 'Failed to set grade due to an unexpected error. Please try again.'
+                valid = []
+            else:
+                for result in valid:
+                    if result['enrollment'].id in conflicts:
+                        result['result'] = 'error'
+                        result['message'] = 'Grade was changed by someone else during the import. Please try again.'
+
+        report_rows = []
+        for result in results:
+            if result['result'] == 'valid':
+                entry = result['enrollment']
+                result = {'row': result['row'], 'student_number': result['student_number'], 'grade': result['grade'],
+                          'result': 'applied',
+                          'message': f"Grade changed from {entry.grade} to {result['grade']}" if entry.grade
+                          else f"Grade set to {result['grade']}"}
+            report_rows.append(result)
+        counts = {key: sum(1 for r in report_rows if r['result'] == key) for key in ('applied', 'unchanged', 'error')}
+        return {
+            'section_id': self.section.id,
+            'total': len(report_rows),
+            'applied': counts['applied'],
+            'unchanged': counts['unchanged'],
+            'failed': counts['error'],
+            'rows': report_rows,
+        }
+
+    def _apply(self, valid: List[dict]) -> Set[int]:
+        """Write the grades and everything derived from them.
+
+        Each UPDATE is guarded on the grade, status and grade points the row
+        was validated against, so a grade changed since the roster was read is not
+        overwritten. Returns the ids of those enrollments (left untouched).
+        """
+        section = self.section
+        now = datetime.utcnow()
+        table = Enrollment.__table__
+        update = table.update().where(
+            table.c.id == db.bindparam('b_id'),
+            table.c.grade.is_not_distinct_from(db.bindparam('b_old_grade')),
+            table.c.status == db.bindparam('b_old_status'),
+            table.c.grade_points.is_not_distinct_from(db.bindparam('b_old_points')),
+        ).values(
+            grade=db.bindparam('b_grade'),
+            grade_points=db.bindparam('b_points'),
+            status=db.bindparam('b_status'),
+            graded_at=now,
+            updated_at=now,
+        )
+        conflicts = set()
+        for start in range(0, len(valid), CHUNK_SIZE):
+            chunk = valid[start:start + CHUNK_SIZE]
+            result = db.session.execute(update, [
+                {'b_id': r['enrollment'].id, 'b_grade': r['new_grade'],
+                 'b_points': r['new_points'], 'b_status': r['new_status'],
+                 'b_old_grade': r['enrollment'].grade, 'b_old_status': r['enrollment'].status,
+                 'b_old_points': r['enrollment'].grade_points}
+                for r in chunk
+            ])
+            if db.session.get_bind().dialect.supports_sane_multi_rowcount and result.rowcount == len(chunk):
+                continue
+            # Some rows matched nothing: the ones this UPDATE did not stamp
+            ids = [r['enrollment'].id for r in chunk]
+            written = set(db.session.scalars(
+                db.select(table.c.id).where(table.c.id.in_(ids), table.c.graded_at == now)))
+            conflicts.update(set(ids) - written)
+        valid = [r for r in valid if r['enrollment'].id not in conflicts]
+        if not valid:
+            return conflicts
+
+        # Derived per-student state: one adjustment per affected student
+        credits = section.course.credits if section.course else 0
+        apply_enrollment_changes(
+            (r['enrollment'].student_id, section.term, credits,
+             (r['enrollment'].status, r['enrollment'].grade_points), (r['new_status'], r['new_points']))
+            for r in valid
+        )
+        refresh_completed_courses({r['enrollment'].student_id for r in valid})
+        invalidate_transcripts({r['enrollment'].student_id for r in valid})
+        invalidate_tags(section_tags(section))
+
+        db.session.execute(db.insert(AuditLog), [{
+            'user_id': self.grader_id or 0,
+            'action': 'GRADE_CHANGE',
+            'entity_type': 'Enrollment',
+            'entity_id': r['enrollment'].id,
+            'old_values': {'grade': r['enrollment'].grade} if r['enrollment'].grade else None,
+            'new_values': {'grade': r['grade'], 'status': r['new_status']},
+            'extra_data': {'bulk': True, 'course_section_id': section.id},
+        } for r in valid])
+
+        label = f"{section.course.code}-{section.section_code}"
+        for r in valid:
+            if not r['enrollment'].user_id:
+                continue
+            if r['new_status'] == 'Failed':
+                outcome_text = " (Failed)"
+            elif r['new_status'] == 'Completed' and r['new_grade'] != 'NP':
+                outcome_text = " (Passed)"
+            else:
+                outcome_text = ""
+            enqueue_notification(
+                user_id=r['enrollment'].user_id,
+                notification_type='grade',
+                title='Grade Posted',
+                message=f"Your grade for {label} has been posted: {r['grade']}{outcome_text}",
+                payload={'enrollment_id': r['enrollment'].id, 'grade': r['grade']},
+            )
+
+        # Enrollment objects already in the session predate the bulk UPDATE
+        identity = db.inspect(Enrollment)
+        for r in valid:
+            obj = db.session.identity_map.get(identity.identity_key_from_primary_key((r['enrollment'].id,)))
+            if obj is not None:
+                db.session.expire(obj)
+        return conflicts
@@ -8,23 +8,17 @@ from app.models import db
 from app.models.enrollment import Enrollment, EnrollmentStatus
 from app.models.profile import StudentProfile
 from app.models.audit import AuditLog
+from app.models.course import CourseSection
+from app.models.grading_scale import get_scale
 
 
 class GradeService:
     """Service for managing grades and GPA calculations."""
     
-    # Valid grade values
-    VALID_GRADES = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 
-                    'D+', 'D', 'D-', 'F', 'W', 'I', 'P', 'NP']
-    
-    # Grade point mapping
-    GRADE_POINTS = {
-        'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-        'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-        'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-        'D+': 1.3, 'D': 1.0, 'D-': 0.7,
-        'F': 0.0, 'W': None, 'I': None, 'P': None, 'NP': None
-    }
+    @staticmethod
+    def is_valid_grade(grade, scale=None) -> bool:
+        """True for a letter on the grading scale (institution default when omitted) or a numeric percentage."""
+        return (scale or get_scale()).is_valid(grade.strip() if isinstance(grade, str) else grade)
     
     @staticmethod
     def set_grade(enrollment: Enrollment, grade: str, 
@@ -42,21 +36,16 @@ class GradeService:
         """
         messages = []
         
-        # Validate grade value (allow numeric percentage as well)
-        is_numeric = False
-        g = grade.strip() if isinstance(grade, str) else grade
-        if isinstance(g, (int, float)):
-            is_numeric = True
-        elif isinstance(g, str):
-            try:
-                float(g.replace('%', '').strip())
-                is_numeric = True
-            except Exception:
-                is_numeric = False
-        if not is_numeric and grade not in GradeService.VALID_GRADES:
+        # Validate grade value on the course's scale (allow numeric percentage as well)
+        if not GradeService.is_valid_grade(grade, enrollment.grading_scale):
             messages.append(f"Invalid grade: {grade}")
             return False, messages
         
+        # Grades of a finalized term are locked
+        if enrollment.course_section and enrollment.course_section.grades_locked:
+            messages.append("Cannot grade: Grades for this section have been finalized")
+            return False, messages
+        
         # Check if enrollment is in a gradable status
         if enrollment.status not in ['Enrolled', 'Completed']:
             messages.append("Cannot grade: Student is not enrolled or completed")
@@ -65,24 +54,19 @@ class GradeService:
         # Record old grade for audit
         old_grade = enrollment.grade
         
-        try:
-            # Set the grade using enrollment's method
-            enrollment.set_grade(grade, grader_id)
-            # Recalculate student's GPA
-            try:
-                enrollment.student.calculate_gpa()
-            except Exception:
-                pass
-            db.session.commit()
-        except Exception as ex:
-            db.session.rollback()
-            messages.append('Failed to set grade due to an unexpected error. Please try again.')
-            return False, messages
+        # Audit message
+        if old_grade:
+            action_msg = f"Grade changed from {old_grade} to {grade}"
+        else:
+            action_msg = f"Grade set to {grade}"
         
-        # Notify student about grade
         try:
-            from app.models.notification import Notification
+            # Set the grade; the GPA delta is applied when this is flushed
+            enrollment.set_grade(grade, grader_id)
+            
+            # Student notification goes through the outbox so it is committed with the grade
             if enrollment.student and enrollment.student.user:
+                from app.services.outbox_service import enqueue_notification
                 # Include pass/fail in message if determinable
                 outcome = None
                 try:
@@ -90,50 +74,82 @@ class GradeService:
                 except Exception:
                     outcome = None
                 outcome_text = f" ({outcome})" if outcome else ""
-                notification = Notification(
+                enqueue_notification(
                     user_id=enrollment.student.user_id,
                     notification_type='grade',
                     title='Grade Posted',
                     message=f"Your grade for {enrollment.course_section.course.code}-{enrollment.course_section.section_code} has been posted: {grade}{outcome_text}",
                     payload={'enrollment_id': enrollment.id, 'grade': grade}
                 )
-                db.session.add(notification)
-                db.session.commit()
-        except Exception:
-            # Don't fail grading if notification fails
-            pass
-        
-        # Create audit message and log
-        action_msg = None
-        if old_grade:
-            action_msg = f"Grade changed from {old_grade} to {grade}"
-            messages.append(action_msg)
-        else:
-            action_msg = f"Grade set to {grade}"
-            messages.append(action_msg)
-
-        try:
-            audit = AuditLog(
+            
+            db.session.add(AuditLog(
                 user_id=grader_id or 0,
                 action='GRADE_CHANGE',
                 entity_type='Enrollment',
                 entity_id=enrollment.id,
                 old_values={'grade': old_grade} if old_grade else None,
                 new_values={'grade': grade, 'status': enrollment.status},
-            )
-            db.session.add(audit)
+            ))
             db.session.commit()
         except Exception:
-            # Avoid breaking grading flow due to audit issues
             db.session.rollback()
+            messages.append('Failed to set grade due to an unexpected error. Please try again.')
+            return False, messages
         
+        messages.append(action_msg)
         return True, messages
     
+    @staticmethod
+    def resolve_incomplete(enrollment: Enrollment, grade: str,
+                           grader_id: int = None) -> Tuple[bool, List[str]]:
+        """
+        Replace an Incomplete with the final grade (registrar/admin).
+        
+        Finalization turns missing grades into Incompletes and locks the
+        section, so this is the one change allowed on a locked section.
+        
+        Returns:
+            Tuple of (success, messages)
+        """
+        if enrollment.status != EnrollmentStatus.INCOMPLETE:
+            return False, ["Cannot resolve: Enrollment is not Incomplete"]
+        if grade == 'I' or not GradeService.is_valid_grade(grade, enrollment.grading_scale):
+            return False, [f"Invalid grade: {grade}"]
+        
+        try:
+            # GPA totals and term loads get the delta when this is flushed
+            enrollment.set_grade(grade, grader_id)
+            if enrollment.student and enrollment.student.user:
+                from app.services.outbox_service import enqueue_notification
+                section = enrollment.course_section
+                enqueue_notification(
+                    user_id=enrollment.student.user_id,
+                    notification_type='grade',
+                    title='Incomplete Resolved',
+                    message=f"Your Incomplete for {section.course.code}-{section.section_code} has been resolved: {grade}",
+                    payload={'enrollment_id': enrollment.id, 'grade': grade}
+                )
+            db.session.add(AuditLog(
+                user_id=grader_id or 0,
+                action='INCOMPLETE_RESOLVED',
+                entity_type='Enrollment',
+                entity_id=enrollment.id,
+                old_values={'grade': 'I', 'status': EnrollmentStatus.INCOMPLETE},
+                new_values={'grade': enrollment.grade, 'status': enrollment.status},
+            ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            return False, ['Failed to resolve grade due to an unexpected error. Please try again.']
+        
+        return True, [f"Incomplete resolved to {grade}"]
+    
     @staticmethod
     def bulk_set_grades(enrollments_grades: List[Tuple[Enrollment, str]], 
                        grader_id: int = None) -> Tuple[int, int, List[str]]:
         """
-        Set grades for multiple enrollments.
+        Set grades for multiple enrollments (one bulk write per section,
+        see app/services/grade_import.py).
         
         Args:
             enrollments_grades: List of (enrollment, grade) tuples
@@ -142,17 +158,23 @@ class GradeService:
         Returns:
             Tuple of (success_count, fail_count, messages)
         """
+        from app.services.grade_import import GradeImport
+        
+        by_section = {}
+        for enrollment, grade in enrollments_grades:
+            by_section.setdefault(enrollment.course_section_id, []).append(
+                {'enrollment_id': enrollment.id, 'grade': grade})
+        
         success_count = 0
         fail_count = 0
         messages = []
         
-        for enrollment, grade in enrollments_grades:
-            success, msgs = GradeService.set_grade(enrollment, grade, grader_id)
-            if success:
-                success_count += 1
-            else:
-                fail_count += 1
-                messages.extend(msgs)
+        for section_id, rows in by_section.items():
+            section = CourseSection.query.get(section_id)
+            report = GradeImport(section, grader_id).run(rows)
+            success_count += report['applied'] + report['unchanged']
+            fail_count += report['failed']
+            messages.extend(r['message'] for r in report['rows'] if r['result'] == 'error')
         
         messages.insert(0, f"Grades set: {success_count} success, {fail_count} failed")
         return success_count, fail_count, messages
@@ -233,7 +255,7 @@ class GradeService:
     @staticmethod
     def calculate_term_gpa(student_profile: StudentProfile, term: str) -> float:
         """
-        Calculate GPA for a specific term.
+        Calculate GPA for a specific term (one aggregate query).
         
         Args:
             student_profile: StudentProfile instance
@@ -242,29 +264,10 @@ class GradeService:
         Returns:
             Term GPA as float
         """
-        from app.models.course import CourseSection
+        from app.services.standing_service import term_gpas
         
-        enrollments = Enrollment.query.filter_by(
-            student_id=student_profile.id
-        ).join(CourseSection).filter(
-            CourseSection.term == term,
-            Enrollment.grade.isnot(None)
-        ).all()
-        
-        total_points = 0
-        total_credits = 0
-        
-        for enrollment in enrollments:
-            if enrollment.grade in GradeService.GRADE_POINTS:
-                points = GradeService.GRADE_POINTS[enrollment.grade]
-                if points is not None:  # Exclude W, I, P, NP
-                    credits = enrollment.course_section.course.credits
-                    total_points += points * credits
-                    total_credits += credits
-        
-        if total_credits > 0:
-            return round(total_points / total_credits, 2)
-        return 0.0
+        term_gpa, _ = term_gpas(term, student_ids=[student_profile.id]).get(student_profile.id, (0.0, 0.0))
+        return term_gpa
     
     @staticmethod
     def get_grade_distribution(section_id: int) -> dict:
@@ -304,8 +307,9 @@ class GradeService:
         if not grade:
             return False, "Grade cannot be empty"
         
-        if grade not in GradeService.VALID_GRADES:
-            return False, f"Invalid grade: {grade}. Valid grades: {', '.join(GradeService.VALID_GRADES)}"
+        scale = get_scale()
+        if not scale.is_valid(grade):
+            return False, f"Invalid grade: {grade}. Valid grades: {', '.join(scale.points)}"
         
         return True, None
     
@@ -0,0 +1,99 @@
+"""Grading scale administration and bulk re-scoring of numeric grades."""
+from collections import defaultdict
+from typing import Iterable, Optional, Sequence, Tuple
+
+from app.models import db
+from app.models.course import Course, CourseSection
+from app.models.enrollment import Enrollment, refresh_completed_courses
+from app.models.grading_scale import GradingScale, GradingScaleEntry, get_scale, parse_percentage
+from app.models.term_load import apply_enrollment_changes
+from app.services.tag_cache import invalidate_tags
+from app.services.transcript_cache import invalidate_transcripts
+
+# Rows per executemany batch
+CHUNK_SIZE = 1000
+
+
+def save_grading_scale(name: str, entries: Sequence[Tuple[str, Optional[float], Optional[float]]],
+                       passing_percentage: float = None, is_default: bool = False,
+                       description: str = None) -> GradingScale:
+    """Create or replace the scale `name` from ``(letter, grade_points, min_percentage)`` entries.
+
+    A default scale replaces the previous default. The compiled-scale cache is
+    cleared when the caller commits.
+    """
+    letters = [letter for letter, _, _ in entries]
+    if len(set(letters)) != len(letters):
+        raise ValueError("Duplicate letters in grading scale")
+    if not any(minimum is not None for _, _, minimum in entries):
+        raise ValueError("A grading scale needs at least one percentage breakpoint")
+
+    scale = GradingScale.query.filter_by(name=name).first() or GradingScale(name=name)
+    scale.description = description
+    scale.passing_percentage = passing_percentage
+    if is_default:
+        GradingScale.query.filter(GradingScale.is_default.is_(True), GradingScale.name != name) \
+            .update({'is_default': False}, synchronize_session='fetch')
+    scale.is_default = is_default
+    scale.entries = [GradingScaleEntry(letter=letter, grade_points=points, min_percentage=minimum)
+                     for letter, points, minimum in entries]
+    db.session.add(scale)
+    return scale
+
+
+def rescore_numeric_grades(course_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute grade points and pass/fail status of numeric grades on their course's scale.
+
+    Percentages are converted one scale at a time with `CompiledScale.convert`;
+    changed rows are written with executemany UPDATEs and term loads, GPA
+    totals and completed courses adjusted like other bulk writers. Use it
+    after changing a scale, and once on databases graded before numeric
+    grades carried grade points. Returns the number of enrollments changed
+    (caller commits).
+    """
+    query = db.session.query(
+        Enrollment.id, Enrollment.student_id, Enrollment.grade, Enrollment.grade_points, Enrollment.status,
+        CourseSection.term, Course.credits, Course.grading_scale_id,
+    ).join(CourseSection, CourseSection.id == Enrollment.course_section_id) \
+     .join(Course, Course.id == CourseSection.course_id) \
+     .filter(Enrollment.grade.isnot(None), Enrollment.status.in_(['Completed', 'Failed']))
+    if course_ids is not None:
+        query = query.filter(Course.id.in_(list(course_ids)))
+
+    by_scale = defaultdict(list)
+    for row in query:
+        percentage = parse_percentage(row.grade)
+        if percentage is not None:
+            by_scale[row.grading_scale_id].append((row, percentage))
+
+    changed = []
+    for scale_id, rows in by_scale.items():
+        scale = get_scale(scale_id)
+        _, points = scale.convert([percentage for _, percentage in rows])
+        for (row, percentage), new_points in zip(rows, points):
+            new_status = 'Completed' if percentage >= scale.passing_percentage else 'Failed'
+            if new_points != row.grade_points or new_status != row.status:
+                changed.append((row, new_points, new_status))
+    if not changed:
+        return 0
+
+    table = Enrollment.__table__
+    update = table.update().where(table.c.id == db.bindparam('b_id')).values(
+        grade_points=db.bindparam('b_points'), status=db.bindparam('b_status'))
+    for start in range(0, len(changed), CHUNK_SIZE):
+        db.session.execute(update, [{'b_id': row.id, 'b_points': points, 'b_status': status}
+                                    for row, points, status in changed[start:start + CHUNK_SIZE]])
+    apply_enrollment_changes(
+        (row.student_id, row.term, row.credits or 0, (row.status, row.grade_points), (status, points))
+        for row, points, status in changed
+    )
+    refresh_completed_courses({row.student_id for row, _, _ in changed})
+    invalidate_transcripts({row.student_id for row, _, _ in changed})
+    invalidate_tags({f'term:{row.term}' for row, _, _ in changed})
+
+    identity = db.inspect(Enrollment)
+    for row, _, _ in changed:
+        obj = db.session.identity_map.get(identity.identity_key_from_primary_key((row.id,)))
+        if obj is not None:
+            db.session.expire(obj)
+    return len(changed)
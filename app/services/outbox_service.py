@@ -0,0 +1,285 @@
+"""Transactional outbox: enqueue side effects with the business change, deliver them later.
+
+Callers add an `OutboxMessage` to the current session (`enqueue_notification`,
+`enqueue_email`) instead of creating notifications or sending mail inline, so
+the message commits or rolls back with the change that caused it. The
+dispatcher claims pending rows in batches, inserts the in-app notifications in
+one flush and sends all e-mails of the batch over a single SMTP connection.
+Failed e-mails are retried with exponential backoff and dead-lettered after
+OUTBOX_MAX_ATTEMPTS.
+
+OUTBOX_DISPATCH_MODE selects who runs the dispatcher:
+  thread  - an in-process background thread, woken after each commit (default)
+  celery  - the `tasks.dispatch_outbox` Celery task, queued after each commit
+  worker  - nothing in the web process; run scripts/outbox_worker.py
+  manual  - nothing; call `dispatch_pending()` yourself (tests)
+"""
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from app.models import db
+from app.models.outbox import OutboxMessage
+
+# A row left in Processing this long is assumed orphaned by a crashed dispatcher
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+_SESSION_FLAG = 'outbox_pending'
+
+
+def enqueue_notification(user_id: int, notification_type: str, title: str, message: str,
+                         payload: dict = None, action_url: str = None,
+                         email: Optional[dict] = None) -> OutboxMessage:
+    """Record an in-app notification (optionally e-mailed) in the current transaction.
+
+    `email` is ``{'to': [...], 'subject': str, 'body': str}``.
+    """
+    data = {
+        'user_id': user_id,
+        'notification_type': notification_type,
+        'title': title,
+        'message': message,
+        'payload': payload,
+        'action_url': action_url,
+    }
+    if email:
+        data['email'] = email
+    return _enqueue('notification', data)
+
+
+def enqueue_email(recipients: List[str], subject: str, body: str) -> OutboxMessage:
+    """Record an e-mail (no in-app notification) in the current transaction."""
+    return _enqueue('email', {'email': {'to': list(recipients), 'subject': subject, 'body': body}})
+
+
+def _enqueue(kind: str, payload: dict) -> OutboxMessage:
+    item = OutboxMessage(kind=kind, payload=payload, status='Pending', attempts=0,
+                         available_at=datetime.utcnow())
+    db.session.add(item)
+    db.session.info[_SESSION_FLAG] = True
+    return item
+
+
+def _claim(batch_size: int) -> List[OutboxMessage]:
+    """Mark up to `batch_size` due rows as ours; safe with several dispatchers."""
+    now = datetime.utcnow()
+    due = db.or_(
+        db.and_(OutboxMessage.status == 'Pending', OutboxMessage.available_at <= now),
+        db.and_(OutboxMessage.status == 'Processing', OutboxMessage.claimed_at < now - CLAIM_TIMEOUT),
+    )
+    ids = [row_id for (row_id,) in db.session.query(OutboxMessage.id).filter(due)
+           .order_by(OutboxMessage.id).limit(batch_size)]
+    if not ids:
+        db.session.rollback()
+        return []
+    token = uuid.uuid4().hex
+    db.session.execute(
+        db.update(OutboxMessage)
+        .where(OutboxMessage.id.in_(ids), due)
+        .values(status='Processing', claimed_by=token, claimed_at=now),
+        execution_options={'synchronize_session': False},
+    )
+    db.session.commit()
+    return OutboxMessage.query.filter_by(claimed_by=token, status='Processing').order_by(OutboxMessage.id).all()
+
+
+def _fail(item: OutboxMessage, error: str, max_attempts: int, backoff: int):
+    item.attempts = (item.attempts or 0) + 1
+    item.last_error = error[:2000]
+    item.claimed_by = None
+    if item.attempts >= max_attempts:
+        item.status = 'Dead'
+    else:
+        item.status = 'Pending'
+        item.available_at = datetime.utcnow() + timedelta(seconds=backoff * 2 ** (item.attempts - 1))
+
+
+def _send_emails(items: List[OutboxMessage], notifications: Dict[int, object], on_error):
+    """Send the e-mails of a batch over one SMTP connection; returns sent items."""
+    from flask_mail import Message
+    from app import mail
+    from app.models.notification import Notification
+
+    sent = []
+    try:
+        conn_ctx = mail.connect()
+        conn = conn_ctx.__enter__()
+    except Exception as ex:
+        for item in items:
+            on_error(item, f'SMTP connect failed: {ex}')
+        return sent
+    try:
+        for item in items:
+            spec = item.payload['email']
+            msg = Message(subject=spec.get('subject', ''), recipients=spec.get('to') or [], body=spec.get('body', ''))
+            try:
+                conn.send(msg)
+            except (smtplib.SMTPServerDisconnected, OSError) as ex:
+                on_error(item, str(ex))
+                try:
+                    conn.host = conn.configure_host()
+                except Exception:
+                    conn.host = None
+                    raise
+                continue
+            except Exception as ex:
+                on_error(item, str(ex))
+                continue
+            sent.append(item)
+            note = notifications.get(item.notification_id)
+            if note is None and item.notification_id:
+                note = db.session.get(Notification, item.notification_id)
+            if note is not None:
+                note.email_sent = True
+    except Exception as ex:
+        # Connection lost for good: everything not yet handled is retried later
+        for item in items:
+            if item not in sent and item.status == 'Processing':
+                on_error(item, f'SMTP connection lost: {ex}')
+    finally:
+        try:
+            conn_ctx.__exit__(None, None, None)
+        except Exception:
+            pass
+    return sent
+
+
+def dispatch_pending(batch_size: int = None, max_batches: int = None) -> Dict[str, int]:
+    """Deliver due outbox messages in batches. Returns counts of sent/retried/dead rows."""
+    from flask import current_app
+    from app.models.notification import Notification
+
+    config = current_app.config
+    batch_size = batch_size or int(config.get('OUTBOX_BATCH_SIZE', 100))
+    max_attempts = int(config.get('OUTBOX_MAX_ATTEMPTS', 5))
+    backoff = int(config.get('OUTBOX_RETRY_BACKOFF', 30))
+    stats = {'sent': 0, 'retried': 0, 'dead': 0}
+
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        items = _claim(batch_size)
+        if not items:
+            break
+        batches += 1
+
+        # In-app notifications for the whole batch in one flush
+        new_notes = {}
+        for item in items:
+            if item.kind == 'notification' and item.notification_id is None:
+                data = item.payload
+                new_notes[item.id] = Notification(
+                    user_id=data['user_id'],
+                    notification_type=data['notification_type'],
+                    title=data['title'],
+                    message=data['message'],
+                    payload=data.get('payload'),
+                    action_url=data.get('action_url'),
+                )
+        if new_notes:
+            db.session.add_all(new_notes.values())
+            db.session.flush()
+            for item in items:
+                if item.id in new_notes:
+                    item.notification_id = new_notes[item.id].id
+        notifications = {note.id: note for note in new_notes.values()}
+
+        mail_items = [item for item in items if item.payload.get('email')]
+        if mail_items:
+            _send_emails(mail_items, notifications, lambda item, error: _fail(item, error, max_attempts, backoff))
+
+        now = datetime.utcnow()
+        for item in items:
+            if item.status == 'Processing':
+                item.status = 'Sent'
+                item.sent_at = now
+                item.claimed_by = None
+                stats['sent'] += 1
+            elif item.status == 'Dead':
+                stats['dead'] += 1
+                current_app.logger.error('Outbox message %s dead-lettered: %s', item.id, item.last_error)
+            else:
+                stats['retried'] += 1
+        db.session.commit()
+    return stats
+
+
+class OutboxDispatcher:
+    """Runs `dispatch_pending` in a background thread, woken after commits."""
+
+    def __init__(self):
+        self.app = None
+        self.mode = 'manual'
+        self.poll_interval = 5.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get('OUTBOX_DISPATCH_MODE', 'thread')
+        self.poll_interval = float(app.config.get('OUTBOX_POLL_INTERVAL', 5))
+        app.extensions['outbox_dispatcher'] = self
+
+    def notify(self):
+        """Called after a commit that wrote outbox rows."""
+        if self.mode == 'thread':
+            self._ensure_started()
+            self._wake.set()
+        elif self.mode == 'celery':
+            try:
+                from app.tasks import dispatch_outbox
+                dispatch_outbox.delay()
+            except Exception:
+                # Broker down: rows stay Pending and the next trigger or worker picks them up
+                self.app.logger.warning('Could not queue outbox dispatch task', exc_info=True)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='outbox-dispatcher', daemon=True)
+            self._thread.start()
+
+    def run(self):
+        """Dispatch loop: drain, then sleep until woken or the poll interval passes."""
+        while not self._stop.is_set():
+            self._wake.clear()
+            with self.app.app_context():
+                try:
+                    dispatch_pending()
+                except Exception:
+                    self.app.logger.exception('Outbox dispatch failed')
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            self._wake.wait(self.poll_interval)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+
+outbox_dispatcher = OutboxDispatcher()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _outbox_after_commit(session):
+    if session.info.pop(_SESSION_FLAG, False) and outbox_dispatcher.app is not None:
+        outbox_dispatcher.notify()
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _outbox_after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_FLAG, None)
@@ -0,0 +1,494 @@
+"""PDF render service.
+
+Every PDF a web request asks for (transcripts, the admin reports, course
+rosters, proof of registration) is rendered here rather than in the request's
+own worker: Gunicorn runs two sync workers, and a long render used to hold one
+of them for its whole duration.
+
+A job is a renderer from RENDERERS plus JSON-serializable arguments (plain
+rows, `TranscriptData.to_dict()`). `pdf_response` submits the job and waits up
+to PDF_RENDER_WAIT seconds. A PDF ready by then is sent straight away;
+otherwise a browser is redirected to a page that refreshes until the PDF can
+be downloaded (`main.pdf_job`), and an API client gets 202 with the job id and
+a status URL to poll (`api.pdf_job`).
+
+Job records and results are files in PDF_RENDER_JOB_DIR (`JobStore`), so
+every web worker on the node can answer a poll, whichever worker took the job.
+They are removed after PDF_RENDER_RESULT_TTL seconds.
+
+PDF_RENDER_MODE selects where jobs run:
+  pool    a bounded pool of PDF_RENDER_WORKERS processes per web worker, no
+          broker needed (default). A job gets PDF_RENDER_TIMEOUT seconds, after
+          which its process is killed and replaced. Processes are capped at
+          PDF_RENDER_MEMORY_MB of address space and replaced after
+          PDF_RENDER_MAX_JOBS jobs. Once PDF_RENDER_QUEUE jobs are waiting, new
+          ones are refused (503) instead of piling up.
+  celery  the `tasks.render_pdf` task, with PDF_RENDER_TIMEOUT as time limit
+          (cap memory with the Celery worker's --max-memory-per-child)
+  inline  in the caller (tests)
+"""
+import base64
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+import uuid
+from typing import Optional, Sequence, Tuple
+
+from flask import current_app, flash, jsonify, redirect, request, send_file, url_for
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> renderer ('module:attribute'); each returns a BytesIO
+RENDERERS = {
+    'transcript': 'app.services.pdf_render:render_transcript',
+    'courses_by_department': 'app.services.pdf_reports:render_courses_by_department',
+    'students_per_course': 'app.services.pdf_reports:render_students_per_course',
+    'instructors_with_courses': 'app.services.pdf_reports:render_instructors_with_courses',
+    'roster': 'app.services.pdf_reports:render_roster',
+    'registration_proof': 'app.services.pdf_reports:render_registration_proof',
+}
+
+_JOB_ID = re.compile(r'^[A-Za-z0-9_-]{1,100}$')
+
+
+class RenderBusy(Exception):
+    """The render queue is full."""
+
+
+class RenderError(Exception):
+    """A render job failed, timed out or ran out of memory."""
+
+
+def _config(name, default):
+    return current_app.config.get(name, default)
+
+
+def render_transcript(data: dict, official: bool):
+    """`TranscriptService.render_transcript` for a `TranscriptData.to_dict()` payload."""
+    from app.services.transcript_data import TranscriptData
+    from app.services.transcript_service import TranscriptService
+
+    return TranscriptService.render_transcript(TranscriptData.from_dict(data), official)
+
+
+def render(kind: str, args: Sequence) -> bytes:
+    """Run a job's renderer in this process."""
+    module, _, name = RENDERERS[kind].partition(':')
+    func = importlib.import_module(module)
+    for part in name.split('.'):
+        func = getattr(func, part)
+    return func(*args).getvalue()
+
+
+class JobStore:
+    """Jobs as files: `<id>.json` (record), then `<id>.pdf` or `<id>.error`."""
+
+    def __init__(self, directory: str, ttl: int):
+        self.directory = directory
+        self.ttl = ttl
+        self._pruned = 0.0
+
+    def _path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.{suffix}")
+
+    def _write(self, job_id: str, suffix: str, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename, so a poll never sees a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, self._path(job_id, suffix))
+
+    def _remove(self, job_id: str, *suffixes):
+        for suffix in suffixes:
+            try:
+                os.remove(self._path(job_id, suffix))
+            except OSError:
+                pass
+
+    def create(self, job_id: str, record: dict):
+        self.prune()
+        self._remove(job_id, 'pdf', 'error')
+        self._write(job_id, 'json', json.dumps(record).encode('utf-8'))
+
+    def discard(self, job_id: str):
+        self._remove(job_id, 'json', 'pdf', 'error')
+
+    def record(self, job_id: str) -> Optional[dict]:
+        try:
+            with open(self._path(job_id, 'json'), 'rb') as fh:
+                return json.loads(fh.read())
+        except (OSError, ValueError):
+            return None
+
+    def status(self, job_id: str) -> Optional[str]:
+        """'done', 'failed', 'pending' or None for an unknown job."""
+        if os.path.exists(self._path(job_id, 'pdf')):
+            return 'done'
+        if os.path.exists(self._path(job_id, 'error')):
+            return 'failed'
+        if os.path.exists(self._path(job_id, 'json')):
+            return 'pending'
+        return None
+
+    def pdf_path(self, job_id: str) -> str:
+        return self._path(job_id, 'pdf')
+
+    def error(self, job_id: str) -> str:
+        try:
+            with open(self._path(job_id, 'error'), 'rb') as fh:
+                return fh.read().decode('utf-8', 'replace')
+        except OSError:
+            return ''
+
+    def complete(self, job_id: str, pdf: bytes):
+        self._write(job_id, 'pdf', pdf)
+
+    def fail(self, job_id: str, message: str):
+        self._write(job_id, 'error', (message or 'Rendering failed').encode('utf-8'))
+
+    def prune(self):
+        """Remove files older than the TTL (at most once a minute)."""
+        now = time.time()
+        if now - self._pruned < 60:
+            return
+        self._pruned = now
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def _worker(conn, memory_mb: int):
+    """Render process: reads (kind, args) from the pipe, answers (ok, PDF or error)."""
+    if memory_mb:
+        try:
+            import resource
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            limit = memory_mb * 1024 * 1024
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+        except (ImportError, ValueError, OSError):
+            pass  # no address space limits on this platform
+    parent = multiprocessing.parent_process()
+    while True:
+        try:
+            # Stop with the web worker, even when a forked sibling keeps the pipe open
+            if not conn.poll(1.0):
+                if parent is not None and not parent.is_alive():
+                    return
+                continue
+            kind, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            result = (True, render(kind, args))
+        except MemoryError:
+            conn.send((False, f'Rendering exceeded the {memory_mb} MB memory limit'))
+            return
+        except Exception as ex:
+            result = (False, str(ex) or ex.__class__.__name__)
+        conn.send(result)
+
+
+class RenderPool:
+    """Bounded pool of render processes, each driven by a supervisor thread.
+
+    A supervisor hands one job at a time to its process and waits at most
+    `timeout` seconds for the answer; a process that runs over, dies or hits
+    the memory cap is replaced before the next job.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, timeout: float = 60, memory_mb: int = 1024,
+                 max_jobs: int = 200, queue_size: int = 16, start_method: str = 'spawn'):
+        self.store = store
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.max_jobs = max_jobs
+        self.start_method = start_method
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._events = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, job_id: str, kind: str, args: Sequence):
+        """Queue a job; raises RenderBusy when the queue is full."""
+        with self._lock:
+            if job_id in self._events:
+                return
+            self._start()
+            try:
+                self._queue.put_nowait((job_id, kind, args))
+            except queue.Full:
+                raise RenderBusy('Too many documents are being prepared, please try again shortly') from None
+            self._events[job_id] = threading.Event()
+
+    def wait(self, job_id: str, timeout: float) -> bool:
+        """Wait for a job of this pool; False when it is still running (or not ours)."""
+        event = self._events.get(job_id)
+        return event.wait(timeout) if event is not None else False
+
+    def _start(self):
+        if self._threads:
+            return
+        context = multiprocessing.get_context(self.start_method)
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._supervise, args=(context,),
+                                      name=f'pdf-render-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _supervise(self, context):
+        process = conn = None
+        jobs = 0
+        while True:
+            job_id, kind, args = self._queue.get()
+            if process is None or not process.is_alive() or jobs >= self.max_jobs:
+                _stop(process, conn)
+                conn, child = context.Pipe()
+                process = context.Process(target=_worker, args=(child, self.memory_mb),
+                                          name='pdf-render-worker', daemon=True)
+                process.start()
+                child.close()
+                jobs = 0
+            jobs += 1
+            try:
+                conn.send((kind, args))
+                if conn.poll(self.timeout):
+                    ok, value = conn.recv()
+                else:
+                    ok, value = False, f'Rendering timed out after {self.timeout:g} seconds'
+                    _stop(process, conn)
+                    process = None
+            except (EOFError, OSError):
+                ok, value = False, 'The render process exited unexpectedly'
+                _stop(process, conn)
+                process = None
+            try:
+                if ok:
+                    self.store.complete(job_id, value)
+                else:
+                    self.store.fail(job_id, value)
+            except OSError:
+                logger.exception('Could not store the result of PDF job %s', job_id)
+            finally:
+                with self._lock:
+                    event = self._events.pop(job_id, None)
+                if event is not None:
+                    event.set()
+
+
+def _stop(process, conn):
+    if conn is not None:
+        conn.close()
+    if process is not None and process.is_alive():
+        process.kill()
+        process.join(5)
+
+
+def get_store() -> JobStore:
+    """The app's job store; PDF_RENDER_JOB_DIR None means a temporary directory."""
+    store = current_app.extensions.get('pdf_render_store')
+    if store is None:
+        directory = _config('PDF_RENDER_JOB_DIR', None) or tempfile.mkdtemp(prefix='pdf-jobs-')
+        store = JobStore(directory, int(_config('PDF_RENDER_RESULT_TTL', 900)))
+        current_app.extensions['pdf_render_store'] = store
+    return store
+
+
+def get_pool() -> RenderPool:
+    """The app's render pool, created once per (web worker) process."""
+    pool = current_app.extensions.get('pdf_render_pool')
+    if pool is None:
+        pool = RenderPool(
+            get_store(),
+            workers=int(_config('PDF_RENDER_WORKERS', 2)),
+            timeout=float(_config('PDF_RENDER_TIMEOUT', 60)),
+            memory_mb=int(_config('PDF_RENDER_MEMORY_MB', 1024)),
+            max_jobs=int(_config('PDF_RENDER_MAX_JOBS', 200)),
+            queue_size=int(_config('PDF_RENDER_QUEUE', 16)),
+            start_method=_config('PDF_RENDER_START_METHOD', 'spawn'),
+        )
+        current_app.extensions['pdf_render_pool'] = pool
+    return pool
+
+
+def _lost_after() -> float:
+    """Seconds after which a pending job must have been lost (its worker restarted)."""
+    timeout = float(_config('PDF_RENDER_TIMEOUT', 60))
+    waiting = int(_config('PDF_RENDER_QUEUE', 16)) / max(1, int(_config('PDF_RENDER_WORKERS', 2)))
+    return timeout * (waiting + 2)
+
+
+def submit(kind: str, args: Sequence, download_name: str, user=None, job_id: str = None) -> str:
+    """Start a render job and return its id.
+
+    A given `job_id` names the content (e.g. a transcript's cache key): while
+    that job is pending or done it is reused rather than rendered again.
+    Raises RenderBusy when the pool's queue is full.
+    """
+    if kind not in RENDERERS:
+        raise ValueError(f'Unknown PDF job kind: {kind}')
+    store = get_store()
+    if job_id is None:
+        job_id = uuid.uuid4().hex
+    elif job_status(job_id) in ('pending', 'done'):
+        return job_id
+
+    store.create(job_id, {
+        'kind': kind,
+        'download_name': download_name,
+        'owner_id': getattr(user, 'id', None),
+        'submitted': time.time(),
+    })
+    mode = _config('PDF_RENDER_MODE', 'pool')
+    if mode == 'inline':
+        try:
+            store.complete(job_id, render(kind, args))
+        except Exception as ex:
+            store.fail(job_id, str(ex) or ex.__class__.__name__)
+    elif mode == 'celery':
+        from app.tasks import render_pdf as task
+        timeout = float(_config('PDF_RENDER_TIMEOUT', 60))
+        task.apply_async(args=(kind, list(args)), task_id=job_id, soft_time_limit=timeout, time_limit=timeout + 10)
+    else:
+        try:
+            get_pool().submit(job_id, kind, args)
+        except RenderBusy:
+            store.discard(job_id)
+            raise
+    return job_id
+
+
+def job_status(job_id: str) -> Optional[str]:
+    """'done', 'failed', 'pending' or None for an unknown job."""
+    store = get_store()
+    status = store.status(job_id)
+    if status != 'pending':
+        return status
+    if _config('PDF_RENDER_MODE', 'pool') == 'celery':
+        from app import celery
+        result = celery.AsyncResult(job_id)
+        if result.successful():
+            store.complete(job_id, base64.b64decode(result.result))
+        elif result.failed():
+            store.fail(job_id, str(result.result))
+        return store.status(job_id)
+    record = store.record(job_id) or {}
+    if time.time() - record.get('submitted', 0) > _lost_after():
+        store.fail(job_id, 'The render job was lost, please try again')
+        return 'failed'
+    return status
+
+
+def wait_for(job_id: str, seconds: float) -> Optional[str]:
+    """Wait up to `seconds` for a job to finish; returns its status."""
+    mode = _config('PDF_RENDER_MODE', 'pool')
+    if mode == 'pool':
+        get_pool().wait(job_id, seconds)
+    elif mode == 'celery':
+        from app import celery
+        try:
+            celery.AsyncResult(job_id).get(timeout=seconds, propagate=False)
+        except Exception:
+            pass  # still running; the status says so
+    return job_status(job_id)
+
+
+def start(kind: str, args: Sequence, download_name: str, user=None,
+          job_id: str = None) -> Tuple[Optional[str], str]:
+    """Submit a job and give it PDF_RENDER_WAIT seconds: (job id, status), or (None, 'busy')."""
+    try:
+        job_id = submit(kind, args, download_name, user=user, job_id=job_id)
+    except RenderBusy:
+        return None, 'busy'
+    return job_id, wait_for(job_id, float(_config('PDF_RENDER_WAIT', 5)))
+
+
+def render_pdf(kind: str, args: Sequence, job_id: str = None) -> bytes:
+    """Render through the service and wait for the PDF (for callers off the request path).
+
+    Raises RenderError when the job fails or does not finish.
+    """
+    job_id = submit(kind, args, f'{kind}.pdf', job_id=job_id)
+    status = wait_for(job_id, _lost_after())
+    if status != 'done':
+        raise RenderError(get_store().error(job_id) or 'Rendering did not finish')
+    return read_pdf(job_id)
+
+
+def read_pdf(job_id: str) -> bytes:
+    """A finished job's PDF."""
+    with open(get_store().pdf_path(job_id), 'rb') as fh:
+        return fh.read()
+
+
+def job_record(job_id: str, user) -> Optional[dict]:
+    """The job's record when `user` may see it: its requester, admins and registrars."""
+    if not _JOB_ID.match(job_id or ''):
+        return None
+    record = get_store().record(job_id)
+    if record is None:
+        return None
+    if record.get('owner_id') == user.id or user.is_admin() or user.is_registrar():
+        return record
+    return None
+
+
+def job_response(job_id: Optional[str], status: str, api: bool = False, fallback: str = None):
+    """The PDF when done; otherwise the failure, busy or pending response for a browser or API client."""
+    store = get_store()
+    if status == 'done':
+        record = store.record(job_id) or {}
+        return send_file(store.pdf_path(job_id), mimetype='application/pdf', as_attachment=True,
+                         download_name=record.get('download_name') or f'{job_id}.pdf', max_age=0)
+
+    if status in ('busy', 'failed', None):
+        if status == 'busy':
+            message, code = 'Too many documents are being prepared, please try again shortly.', 503
+        elif status == 'failed':
+            message, code = f'PDF generation failed: {store.error(job_id)}', 500
+            current_app.logger.warning('PDF job %s failed: %s', job_id, store.error(job_id))
+        else:
+            message, code = 'Document not found.', 404
+        if api:
+            return jsonify({'error': message}), code
+        flash(message, 'danger')
+        return redirect(fallback or request.referrer or url_for('main.index'))
+
+    if api:
+        status_url = url_for('api.pdf_job', job_id=job_id)
+        response = jsonify({
+            'job_id': job_id,
+            'status': status,
+            'status_url': status_url,
+            'download_url': url_for('api.pdf_job_download', job_id=job_id),
+        })
+        response.status_code = 202
+        response.headers['Location'] = status_url
+        response.headers['Retry-After'] = '2'
+        return response
+    return redirect(url_for('main.pdf_job', job_id=job_id))
+
+
+def pdf_response(kind: str, args: Sequence, download_name: str, user=None, api: bool = False,
+                 fallback: str = None):
+    """Render a PDF for a route: the PDF if ready within PDF_RENDER_WAIT, else a job to poll."""
+    job_id, status = start(kind, args, download_name, user=user)
+    return job_response(job_id, status, api=api, fallback=fallback)
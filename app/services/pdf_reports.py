@@ -0,0 +1,113 @@
+"""PDF renderers for admin reports, course rosters and proof of registration.
+
+Each renderer takes plain rows (no ORM objects, no database access) and
+returns a BytesIO with the PDF, using the shared `pdf_templates`. The routes
+query the rows; the renderers can be benchmarked or run in another process
+on their own.
+"""
+from datetime import datetime
+from io import BytesIO
+from typing import Iterable, Optional, Sequence, Tuple
+
+from app.services.pdf_templates import pdf_templates
+
+REPORT_MARGINS = (0.5, 0.5, 1.0, 1.0)  # left, right, top, bottom (inches)
+
+
+def render_courses_by_department(
+        departments: Iterable[Tuple[str, Iterable[Tuple[str, str, float, bool]]]]) -> BytesIO:
+    """Departments as (name, [(code, title, credits, is_active), ...])."""
+    t = pdf_templates()
+    elements = [t.static('All Courses by Department', t.styles['Title']), t.Spacer(1, 0.2 * t.inch)]
+    for name, courses in departments:
+        elements.append(t.Paragraph(name, t.styles['Heading2']))
+        data = [["Code", "Title", "Credits", "Active"]]
+        data += [[code, title, str(credits), 'Yes' if active else 'No'] for code, title, credits, active in courses]
+        elements.append(t.table(data, [1.0, 3.5, 0.7, 0.8], t.report_table))
+        elements.append(t.Spacer(1, 0.2 * t.inch))
+    return t.build(elements, REPORT_MARGINS)
+
+
+def render_students_per_course(rows: Iterable[Tuple[str, str, str, int]]) -> BytesIO:
+    """Rows as (course code, section code, term, enrolled count)."""
+    t = pdf_templates()
+    data = [["Course", "Section", "Term", "Enrolled"]]
+    data += [[code, section, term, str(enrolled or 0)] for code, section, term, enrolled in rows]
+    elements = [
+        t.static('Students Enrolled per Course Section', t.styles['Title']),
+        t.Spacer(1, 0.2 * t.inch),
+        t.table(data, [1.2, 0.8, 1.4, 0.8], t.report_table),
+    ]
+    return t.build(elements, REPORT_MARGINS)
+
+
+def render_instructors_with_courses(rows: Iterable[Tuple[str, str, Sequence[str]]]) -> BytesIO:
+    """Rows as (instructor name, department name, ["CS101-01 (Spring 2025)", ...])."""
+    t = pdf_templates()
+    data = [["Instructor", "Department", "Courses (most recent term)"]]
+    data += [[name, department or '', ", ".join(courses) or 'None'] for name, department, courses in rows]
+    elements = [
+        t.static('Instructors with Assigned Courses', t.styles['Title']),
+        t.Spacer(1, 0.2 * t.inch),
+        t.table(data, [2.2, 1.6, 3.0], t.report_table),
+    ]
+    return t.build(elements, REPORT_MARGINS)
+
+
+def render_roster(heading: str, subheading: str, rows: Iterable[Tuple[str, str, str, str, str]]) -> BytesIO:
+    """Course roster; rows as (student number, full name, email, enrolled on, grade)."""
+    t = pdf_templates()
+    data = [["Student ID", "Full Name", "Email", "Enrolled On", "Grade"]]
+    data += [list(row) for row in rows]
+    elements = [
+        t.static('COURSE ROSTER', t.roster_title),
+        t.Paragraph(heading, t.styles['Heading2']),
+        t.Paragraph(subheading, t.styles['Normal']),
+        t.Spacer(1, 0.2 * t.inch),
+        t.table(data, [1.2, 2.2, 2.4, 1.0, 0.9], t.roster_table),
+    ]
+    return t.build(elements, (0.5, 0.5, 0.5, 0.5))
+
+
+def render_registration_proof(student: Sequence[Tuple[str, str]],
+                              terms: Iterable[Tuple[str, Iterable[Tuple[str, str, str, str, str]]]],
+                              total_credits: Optional[float], status_note: str = None) -> BytesIO:
+    """Proof of registration.
+
+    `student` is the (label, value) information table; `terms` holds
+    (term, [(code, title, section, credits, instructor), ...]), newest first,
+    and is empty when the student has no current enrollments.
+    """
+    t = pdf_templates()
+    inch, Spacer = t.inch, t.Spacer
+    elements = [
+        t.static("PROOF OF REGISTRATION", t.proof_title),
+        t.static("University Registration System", t.styles['Normal']),
+        Spacer(1, 0.3 * inch),
+        t.table([list(row) for row in student], [2, 4], t.proof_info_table),
+        Spacer(1, 0.4 * inch),
+        t.static("CURRENT ENROLLMENTS", t.styles['Heading2']),
+        Spacer(1, 0.2 * inch),
+    ]
+
+    terms = list(terms)
+    if not terms:
+        elements.append(t.static("No courses enrolled", t.styles['Normal']))
+    else:
+        for term, courses in terms:
+            elements.append(t.Paragraph(f"<b>{term}</b>", t.styles['Normal']))
+            elements.append(Spacer(1, 0.1 * inch))
+            data = [["Course Code", "Course Title", "Section", "Credits", "Instructor"]]
+            data += [list(course) for course in courses]
+            elements.append(t.table(data, [1, 2.5, 0.7, 0.7, 1.6], t.proof_course_table))
+            elements.append(Spacer(1, 0.3 * inch))
+        elements.append(t.Paragraph(f"<b>Total Credits Enrolled: {total_credits}</b>", t.styles['Normal']))
+        elements.append(Spacer(1, 0.4 * inch))
+
+    footer_text = (
+        f"Issued on {datetime.now().strftime('%B %d, %Y')}. "
+        + ("Status: " + status_note + ". " if status_note else "")
+        + "This document lists the student's current enrollments."
+    )
+    elements.append(t.Paragraph(footer_text, t.proof_footer))
+    return t.build(elements)
@@ -0,0 +1,202 @@
+"""Shared ReportLab document templates.
+
+Every PDF the application produces (transcripts, the admin reports, course
+rosters, proof of registration) takes its paragraph styles, table styles and
+static text from one `PdfTemplates` instance. It is built on the first call to
+`pdf_templates()` and then reused for the life of the process, so a render no
+longer pays for `getSampleStyleSheet()`, a dozen `ParagraphStyle`s and the
+parsing of fixed headings.
+
+ReportLab is still imported lazily, on first use, so application startup does
+not load it and servers without it only fail on PDF routes.
+
+Table styles are read-only once built and can be shared between documents.
+Static flowables are parsed once and handed out as shallow copies (`static`),
+because ReportLab keeps layout state on a flowable while it is wrapped.
+"""
+import copy
+import threading
+from io import BytesIO
+
+_templates = None
+_lock = threading.Lock()
+
+# Brand colour of headings and table headers
+BRAND = '#003366'
+
+
+class PdfTemplates:
+    """Styles, table styles and static flowables for all PDF documents."""
+
+    def __init__(self):
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+        self.colors = colors
+        self.inch = inch
+        self.pagesize = letter
+        self.Paragraph = Paragraph
+        self.SimpleDocTemplate = SimpleDocTemplate
+        self.Spacer = Spacer
+        self.Table = Table
+        self._static = {}
+        self._static_lock = threading.Lock()
+
+        styles = getSampleStyleSheet()
+        self.styles = styles
+        brand = colors.HexColor(BRAND)
+
+        # Transcript
+        self.title = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=18, textColor=brand,
+                                    spaceAfter=6, alignment=TA_CENTER, fontName='Helvetica-Bold')
+        self.subtitle = ParagraphStyle('CustomSubtitle', parent=styles['Normal'], fontSize=12, textColor=colors.black,
+                                       spaceAfter=12, alignment=TA_CENTER, fontName='Helvetica')
+        self.header = ParagraphStyle('CustomHeader', parent=styles['Heading2'], fontSize=14, textColor=brand,
+                                     spaceAfter=6, spaceBefore=12, fontName='Helvetica-Bold')
+        self.info = ParagraphStyle('InfoStyle', parent=styles['Normal'], fontSize=10, fontName='Helvetica')
+        self.watermark = ParagraphStyle('Watermark', parent=styles['Normal'], fontSize=16, textColor=colors.red,
+                                        alignment=TA_CENTER, fontName='Helvetica-Bold')
+        self.term = ParagraphStyle('TermStyle', parent=styles['Normal'], fontSize=11, fontName='Helvetica-Bold',
+                                   spaceBefore=12, spaceAfter=6)
+        self.footer = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, textColor=colors.grey,
+                                     alignment=TA_CENTER, fontName='Helvetica-Oblique')
+
+        # Course roster and proof of registration
+        self.roster_title = ParagraphStyle('Title', parent=styles['Heading1'], alignment=TA_CENTER, textColor=brand)
+        self.proof_title = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=20, textColor=brand,
+                                          spaceAfter=12, alignment=TA_CENTER, fontName='Helvetica-Bold')
+        self.proof_footer = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, textColor=colors.grey,
+                                           alignment=TA_CENTER)
+
+        # Label/value tables (student information, academic summary)
+        self.key_value_table = TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
+        # Transcript term table: header row, course rows, totals row
+        self.term_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), brand),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -2), 9),
+            ('ALIGN', (2, 1), (-1, -2), 'CENTER'),
+            ('GRID', (0, 0), (-1, -2), 0.5, colors.grey),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, -1), (-1, -1), 9),
+            ('ALIGN', (2, -1), (-1, -1), 'CENTER'),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#E8E8E8')),
+            ('LINEABOVE', (0, -1), (-1, -1), 1.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 4),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ])
+        self.legend_table = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
+        # Admin report listings
+        self.report_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), brand),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ])
+        self.roster_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), brand),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
+        ])
+        self.proof_info_table = TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ])
+        self.proof_course_table = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), brand),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ])
+
+    def static(self, text: str, style):
+        """Paragraph for fixed text (headings, labels), parsed once per process.
+
+        Only for text that does not vary between documents: every distinct
+        text is kept for the life of the process.
+        """
+        key = (text, style.name, id(style))
+        paragraph = self._static.get(key)
+        if paragraph is None:
+            with self._static_lock:
+                paragraph = self._static.setdefault(key, self.Paragraph(text, style))
+        return copy.copy(paragraph)
+
+    def table(self, data, col_widths, style):
+        """Table with widths in inches and a shared style."""
+        table = self.Table(data, colWidths=[w * self.inch for w in col_widths])
+        table.setStyle(style)
+        return table
+
+    def build(self, elements, margins=(0.75, 0.75, 0.75, 0.75)) -> BytesIO:
+        """Render flowables to a letter-size PDF; margins (left, right, top, bottom) in inches."""
+        left, right, top, bottom = margins
+        buffer = BytesIO()
+        doc = self.SimpleDocTemplate(
+            buffer,
+            pagesize=self.pagesize,
+            leftMargin=left * self.inch,
+            rightMargin=right * self.inch,
+            topMargin=top * self.inch,
+            bottomMargin=bottom * self.inch,
+        )
+        doc.build(elements)
+        buffer.seek(0)
+        return buffer
+
+
+def pdf_templates() -> PdfTemplates:
+    """The process-wide templates, built (and ReportLab imported) on first use.
+
+    Raises ImportError when ReportLab is not installed.
+    """
+    global _templates
+    if _templates is None:
+        with _lock:
+            if _templates is None:
+                _templates = PdfTemplates()
+    return _templates
@@ -0,0 +1,129 @@
+"""Cached principal (status, roles, permissions, profile ids) per user.
+
+Every authenticated request needs the same few facts about its user: whether
+the account is active, which roles and permissions it has and which student
+or instructor profile belongs to it. They are loaded with two queries, kept in
+the shared cache under the `user:<id>` and `roles` tags (`tag_cache`) for
+PRINCIPAL_CACHE_TTL seconds at most, and invalidated as soon as a change to
+the user's status, lock, roles or profiles, or to any role's permissions,
+commits.
+
+Only a shared backend (Redis) is used: with a per-process cache another
+worker would keep a deactivated or de-roled user's access until the entry
+expired, so principals are then read from the database on every request
+(still once per request, not once per role check).
+
+`principal_user` returns the request's `User` without loading its row: the
+row is read only if the request uses a column that is not in the principal.
+`User.has_role`, `is_admin()` etc. and `can()` answer from the principal.
+"""
+from datetime import datetime
+from typing import FrozenSet, NamedTuple, Optional
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from app.models import db
+from app.models.profile import InstructorProfile, StudentProfile
+from app.models.user import Role, User, user_roles
+from app.services import tag_cache
+
+# Where a User instance keeps its principal for the rest of the request
+_ATTR = '_principal'
+
+
+class Principal(NamedTuple):
+    user_id: int
+    is_active: bool
+    locked_until: Optional[datetime]
+    roles: FrozenSet[str]
+    permissions: FrozenSet[str]
+    student_profile_id: Optional[int]
+    instructor_profile_id: Optional[int]
+
+    def is_locked(self) -> bool:
+        return self.locked_until is not None and self.locked_until > datetime.utcnow()
+
+
+def load_principal(user_id: int) -> Optional[Principal]:
+    """The user's principal from the database, or None if there is no such user."""
+    row = db.session.execute(
+        db.select(User.is_active, User.locked_until,
+                  StudentProfile.id.label('student_profile_id'),
+                  InstructorProfile.id.label('instructor_profile_id'))
+        .outerjoin(StudentProfile, StudentProfile.user_id == User.id)
+        .outerjoin(InstructorProfile, InstructorProfile.user_id == User.id)
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    roles = db.session.execute(
+        db.select(Role.name, Role.permissions)
+        .join(user_roles, user_roles.c.role_id == Role.id)
+        .where(user_roles.c.user_id == user_id)
+    ).all()
+    return Principal(
+        user_id=user_id,
+        is_active=bool(row.is_active),
+        locked_until=row.locked_until,
+        roles=frozenset(r.name for r in roles),
+        permissions=frozenset(p for r in roles for p in (r.permissions or [])),
+        student_profile_id=row.student_profile_id,
+        instructor_profile_id=row.instructor_profile_id,
+    )
+
+
+def get_principal(user_id: int) -> Optional[Principal]:
+    """The user's principal, through the cache when every worker shares it."""
+    if not tag_cache.is_shared():
+        return load_principal(user_id)
+    return tag_cache.cached(
+        f"principal:{user_id}",
+        lambda: load_principal(user_id),
+        tags=[f'user:{user_id}', 'roles'],
+        timeout=int(current_app.config.get('PRINCIPAL_CACHE_TTL', 900)),
+    )
+
+
+def principal_user(user_id: int) -> Optional[User]:
+    """The active user `user_id` for an authenticated request, or None.
+
+    Unless the session already has the user, the returned instance is attached
+    with only its id and principal; its columns load on first access.
+    """
+    principal = get_principal(user_id)
+    if principal is None or not principal.is_active:
+        return None
+    session = db.session
+    user = session.identity_map.get(identity_key(User, user_id))
+    if user is None:
+        user = User()
+        user.id = user_id
+        make_transient_to_detached(user)
+        session.add(user)
+    user.__dict__.setdefault(_ATTR, principal)
+    return user
+
+
+def principal_of(user: User) -> Optional[Principal]:
+    """`user`'s principal, or None while it is unsettled: a new user, or roles
+    or status changed in the current transaction (ask the database then)."""
+    if user.id is None:
+        return None
+    if inspect(user).attrs.roles.history.has_changes() or f'user:{user.id}' in tag_cache.pending_tags():
+        user.__dict__.pop(_ATTR, None)
+        return None
+    principal = user.__dict__.get(_ATTR)
+    if principal is None:
+        principal = get_principal(user.id)
+        if principal is not None:
+            user.__dict__[_ATTR] = principal
+    return principal
+
+
+@event.listens_for(User, 'expire', raw=True)
+def _forget_principal(state, attrs):
+    # Expired after commit or rollback: the next check reads the (re-validated) cache
+    state.dict.pop(_ATTR, None)
@@ -0,0 +1,194 @@
+"""Streamed CSV and XLSX downloads.
+
+`export_response` turns a header and an iterable of rows into a download
+that is written while it is sent: rows are consumed in chunks of CHUNK_ROWS
+and each chunk is flushed to the client, so neither the rows nor the file are
+held in memory. Pass a generator (e.g. from `admin_reports`) and the database
+query behind it is streamed too.
+
+XLSX files are written directly as SpreadsheetML (one worksheet, inline
+strings) into a ZIP archive that is streamed as well; no spreadsheet library
+is needed.
+"""
+import csv
+import io
+import re
+import zipfile
+from typing import Iterable, Iterator, Sequence
+from xml.sax.saxutils import escape
+
+from flask import current_app, stream_with_context
+
+CHUNK_ROWS = 500
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Cells starting with these are read as formulas by spreadsheet programs
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Control characters XML 1.0 does not allow
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _csv_value(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header: Sequence, rows: Iterable[Sequence], chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    """CSV text in chunks of `chunk_rows` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_csv_value(v) for v in row])
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Style 1: bold (header row)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '</styleSheet>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _column(index: int) -> str:
+    """Spreadsheet column letters for a 0-based index (0 -> A, 26 -> AA)."""
+    letters = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def _cell(ref: str, value, style: str) -> str:
+    if value is None:
+        return f'<c r="{ref}"{style}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{style}><v>{value}</v></c>'
+    text = escape(_INVALID_XML.sub('', str(value)))
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(number: int, values: Sequence, bold: bool = False) -> bytes:
+    style = ' s="1"' if bold else ''
+    cells = ''.join(_cell(f'{_column(i)}{number}', v, style) for i, v in enumerate(values))
+    return f'<row r="{number}">{cells}</row>'.encode('utf-8')
+
+
+class _Chunks:
+    """Write-only, unseekable sink for ZipFile; `take` hands out what was written so far."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def stream_xlsx(sheet_name: str, header: Sequence, rows: Iterable[Sequence],
+                chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """An XLSX workbook with one worksheet, in chunks of about `chunk_rows` rows."""
+    sink = _Chunks()
+    name = escape(_INVALID_XML.sub('', sheet_name))[:31]
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=name))
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        archive.writestr('xl/styles.xml', _STYLES)
+        yield sink.take()
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD.encode('utf-8'))
+            sheet.write(_row(1, header, bold=True))
+            for number, row in enumerate(rows, start=2):
+                sheet.write(_row(number, row))
+                if number % chunk_rows == 0:
+                    chunk = sink.take()
+                    if chunk:
+                        yield chunk
+            sheet.write(_SHEET_TAIL.encode('utf-8'))
+    yield sink.take()
+
+
+def export_response(fmt: str, filename: str, sheet_name: str, header: Sequence, rows: Iterable[Sequence]):
+    """Streamed download of `rows` as 'csv' or 'xlsx' (`filename` without extension)."""
+    if fmt == 'xlsx':
+        body, mimetype = stream_xlsx(sheet_name, header, rows), XLSX_MIMETYPE
+    else:
+        body, mimetype = stream_csv(header, rows), 'text/csv'
+    # The request context (and database session) stays open until the last chunk
+    response = current_app.response_class(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{fmt}'
+    return response
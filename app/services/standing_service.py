@@ -0,0 +1,192 @@
+"""Term-close academic standing batch.
+
+For a closed term, every student's term GPA comes from one GROUP BY query per
+batch (students in id order). Each student gets a standing by the
+STANDING_* thresholds in config:
+
+  Suspension    term GPA below STANDING_SUSPENSION_GPA, or below
+                STANDING_PROBATION_GPA while already on probation
+  Probation     term GPA below STANDING_PROBATION_GPA
+  Dean's List   term GPA at least STANDING_DEANS_LIST_GPA with at least
+                STANDING_DEANS_LIST_MIN_CREDITS graded credits
+  Good Standing otherwise
+
+`academic_status` is bulk-updated (Suspended / Probation / Active) for
+students currently Active or on Probation; other statuses (Graduated, ...) are
+left alone. Results go to `TermStanding`. Progress and the checkpoint live on
+`StandingRun` and are committed with each batch, so an interrupted run resumes
+where it stopped. Run it after grades are final and before registration for
+the next term opens, since enrollment eligibility reads `academic_status`
+(students on probation may register only with STANDING_PROBATION_CAN_ENROLL).
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from flask import current_app
+
+from app.models import db
+from app.models.course import Course, CourseSection
+from app.models.enrollment import Enrollment, EnrollmentStatus
+from app.models.profile import StudentProfile
+from app.models.standing import StandingRun, TermStanding
+from app.services.transcript_cache import invalidate_transcripts
+
+DEANS_LIST = "Dean's List"
+GOOD_STANDING = 'Good Standing'
+PROBATION = 'Probation'
+SUSPENSION = 'Suspension'
+
+# academic_status the job assigns for each standing
+STATUS_FOR_STANDING = {
+    DEANS_LIST: 'Active',
+    GOOD_STANDING: 'Active',
+    PROBATION: 'Probation',
+    SUSPENSION: 'Suspended',
+}
+
+# Only these statuses are changed by the job
+MANAGED_STATUSES = ('Active', 'Probation')
+
+
+def _term_gpa_select(term: str):
+    credits = db.func.coalesce(Course.credits, 0)
+    return (
+        db.select(
+            Enrollment.student_id,
+            db.func.sum(credits * Enrollment.grade_points).label('quality_points'),
+            db.func.sum(credits).label('graded_credits'),
+        )
+        .join(CourseSection, CourseSection.id == Enrollment.course_section_id)
+        .join(Course, Course.id == CourseSection.course_id)
+        .where(
+            CourseSection.term == term,
+            Enrollment.grade_points.isnot(None),
+            Enrollment.status.in_([EnrollmentStatus.COMPLETED, EnrollmentStatus.FAILED]),
+        )
+        .group_by(Enrollment.student_id)
+    )
+
+
+def term_gpas(term: str, student_ids: Optional[Iterable[int]] = None,
+              after_student_id: int = 0, limit: int = None) -> Dict[int, Tuple[float, float]]:
+    """{student_id: (term_gpa, graded_credits)} from one GROUP BY query, in student id order."""
+    query = _term_gpa_select(term).where(Enrollment.student_id > after_student_id) \
+        .order_by(Enrollment.student_id)
+    if student_ids is not None:
+        query = query.where(Enrollment.student_id.in_(list(student_ids)))
+    if limit:
+        query = query.limit(limit)
+    result = {}
+    for student_id, points, credits in db.session.execute(query):
+        credits = float(credits or 0)
+        result[student_id] = (round(float(points or 0) / credits, 2) if credits > 0 else 0.0, credits)
+    return result
+
+
+def thresholds_from_config() -> dict:
+    config = current_app.config
+    return {
+        'deans_list_gpa': float(config.get('STANDING_DEANS_LIST_GPA', 3.5)),
+        'deans_list_min_credits': float(config.get('STANDING_DEANS_LIST_MIN_CREDITS', 12)),
+        'probation_gpa': float(config.get('STANDING_PROBATION_GPA', 2.0)),
+        'suspension_gpa': float(config.get('STANDING_SUSPENSION_GPA', 1.0)),
+    }
+
+
+def classify(term_gpa: float, graded_credits: float, previous_status: Optional[str], thresholds: dict) -> str:
+    """Standing for one student's term result."""
+    if term_gpa < thresholds['suspension_gpa'] or (
+            term_gpa < thresholds['probation_gpa'] and previous_status == 'Probation'):
+        return SUSPENSION
+    if term_gpa < thresholds['probation_gpa']:
+        return PROBATION
+    if term_gpa >= thresholds['deans_list_gpa'] and graded_credits >= thresholds['deans_list_min_credits']:
+        return DEANS_LIST
+    return GOOD_STANDING
+
+
+def run_term_standing(term: str, batch_size: int = None, restart: bool = False,
+                      progress: Callable[[StandingRun], None] = None) -> StandingRun:
+    """Close `term`: compute standings for every graded student and update academic_status.
+
+    Resumes the latest unfinished run for the term unless `restart` is set.
+    A completed run is returned as is unless `restart` is set. `progress` is
+    called with the run after each committed batch.
+    """
+    batch_size = batch_size or int(current_app.config.get('STANDING_BATCH_SIZE', 1000))
+    thresholds = thresholds_from_config()
+
+    run = StandingRun.query.filter_by(term=term).order_by(StandingRun.id.desc()).first()
+    if run is not None and run.status == 'Completed' and not restart:
+        return run
+    if run is None or restart:
+        graded_students = _term_gpa_select(term).subquery()
+        total = db.session.execute(db.select(db.func.count()).select_from(graded_students)).scalar() or 0
+        run = StandingRun(term=term, status='Running', total=total, processed=0, last_student_id=0, counts={})
+        db.session.add(run)
+        db.session.commit()
+    else:
+        run.status = 'Running'
+        run.last_error = None
+        db.session.commit()
+
+    try:
+        while True:
+            gpas = term_gpas(term, after_student_id=run.last_student_id, limit=batch_size)
+            if not gpas:
+                break
+            counts = Counter(run.counts or {})
+            counts.update(_apply_batch(term, gpas, thresholds))
+            run.counts = dict(counts)
+            run.processed = (run.processed or 0) + len(gpas)
+            run.last_student_id = max(gpas)
+            db.session.commit()  # results and checkpoint together
+            current_app.logger.info('Standing run %s (%s): %s/%s students', run.id, term, run.processed, run.total)
+            if progress:
+                progress(run)
+        run.status = 'Completed'
+        run.finished_at = datetime.utcnow()
+        db.session.commit()
+    except Exception as ex:
+        db.session.rollback()
+        run.status = 'Failed'
+        run.last_error = str(ex)[:2000]
+        db.session.commit()
+        raise
+    return run
+
+
+def _apply_batch(term: str, gpas: Dict[int, Tuple[float, float]], thresholds: dict) -> Counter:
+    """Write standings and academic_status for one batch; returns counts per standing."""
+    ids = list(gpas)
+    current = dict(db.session.query(StudentProfile.id, StudentProfile.academic_status)
+                   .filter(StudentProfile.id.in_(ids)))
+    # On a re-run, start from the status the student had before this term was closed
+    earlier = dict(db.session.query(TermStanding.student_id, TermStanding.previous_status)
+                   .filter(TermStanding.term == term, TermStanding.student_id.in_(ids)))
+
+    rows = []
+    by_status: Dict[str, list] = {}
+    counts = Counter()
+    for student_id, (term_gpa, credits) in gpas.items():
+        previous = earlier.get(student_id, current.get(student_id))
+        standing = classify(term_gpa, credits, previous, thresholds)
+        status = STATUS_FOR_STANDING[standing] if previous in MANAGED_STATUSES else previous
+        counts[standing] += 1
+        if status != current.get(student_id):
+            by_status.setdefault(status, []).append(student_id)
+        rows.append({
+            'student_id': student_id, 'term': term, 'term_gpa': term_gpa, 'graded_credits': credits,
+            'standing': standing, 'previous_status': previous, 'academic_status': status,
+        })
+
+    db.session.execute(db.delete(TermStanding).where(TermStanding.term == term, TermStanding.student_id.in_(ids)))
+    db.session.execute(db.insert(TermStanding), rows)
+    for status, student_ids in by_status.items():
+        invalidate_transcripts(student_ids)  # the transcript shows academic_status
+        db.session.execute(
+            db.update(StudentProfile).where(StudentProfile.id.in_(student_ids)).values(academic_status=status),
+            execution_options={'synchronize_session': False},
+        )
+    return counts
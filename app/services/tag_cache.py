@@ -0,0 +1,261 @@
+"""Tag-based invalidation for the Flask-Caching backend.
+
+A cached read declares the tags its data depends on:
+
+    tag_cache.cached(f"api:course:{id}", load, tags=[f"course:{id}"])
+
+Every tag has a version token in the cache (`tag:<name>`). An entry is stored
+together with the versions its tags had before the data was loaded, and is
+only served while all of them are still current. Invalidating a tag replaces
+its token, which makes every entry carrying the tag a miss at once; nothing
+has to be listed or deleted, so this works the same on Redis, SimpleCache and
+NullCache (where every read is a miss). An evicted tag version simply counts
+as changed.
+
+Tags are bumped after a commit that touched a tagged model (see `_tagger`):
+
+    course:<id>    the course, any of its sections
+    courses        any course (catalog listings)
+    section:<id>   the section, its counters, its enrollments (a change to a
+                   section or its enrollments also bumps its course and term)
+    term:<term>    any section of the term
+    student:<id>   the student's user, profile and enrollments (and transcript)
+    grading_scale  any grading scale
+    user:<id>      the user's status, lock, roles and profiles (`principal_cache`)
+    roles          any role's permissions
+
+Writers that bypass the ORM (bulk UPDATEs, counter updates) call
+`invalidate_tags`; the tags are bumped once the transaction commits.
+
+Tags are bumped in the cache of the process that commits, so invalidation
+reaches every worker only with a shared backend (Redis). Entries live for
+TAG_CACHE_TTL seconds at most there; with a per-process backend (SimpleCache)
+they live for TAG_CACHE_LOCAL_TTL seconds at most, which bounds how long other
+workers serve data changed elsewhere.
+
+When the cache backend fails, reads fall back to the loader.
+"""
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+from flask import current_app
+from flask_caching.backends import NullCache, SimpleCache
+from sqlalchemy import event, inspect
+
+from app import cache
+from app.models import db
+
+T = TypeVar('T')
+
+_SESSION_KEY = 'cache_tags_changed'
+
+
+def _tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def _entry_key(key: str) -> str:
+    return f"tagged:{key}"
+
+
+def _versions(tags: List[str], create: bool = False) -> Dict[str, Optional[str]]:
+    """Current version token per tag; missing tokens are created when `create` is set."""
+    keys = [_tag_key(t) for t in tags]
+    versions = dict(zip(tags, cache.get_many(*keys))) if keys else {}
+    if create:
+        for tag, version in versions.items():
+            if version is None:
+                # add() keeps a token another worker created meanwhile
+                cache.add(_tag_key(tag), uuid.uuid4().hex, timeout=0)
+                versions[tag] = cache.get(_tag_key(tag))
+    return versions
+
+
+def is_shared() -> bool:
+    """Whether every worker sees the same cache, and with it every tag bump."""
+    return not isinstance(cache.cache, (SimpleCache, NullCache))
+
+
+def _timeout(timeout: Optional[int]) -> int:
+    timeout = timeout if timeout is not None else int(current_app.config.get('TAG_CACHE_TTL', 3600))
+    if not is_shared():
+        timeout = min(timeout, int(current_app.config.get('TAG_CACHE_LOCAL_TTL', 60)))
+    return timeout
+
+
+def cached(key: str, loader: Callable[[], T], tags: Iterable[str], timeout: int = None,
+           refresh: bool = False) -> T:
+    """`loader()`'s result, cached under `key` until one of `tags` is invalidated.
+
+    The result must be picklable (plain data: dicts, lists, tuples). `refresh`
+    skips the lookup and stores a fresh result.
+    """
+    tags = sorted(set(tags))
+    try:
+        entry = None if refresh else cache.get(_entry_key(key))
+        if entry is not None:
+            versions, value = entry
+            if sorted(versions) == tags and None not in versions.values() and _versions(tags) == versions:
+                return value
+
+        # Versions are taken before loading: a change committed while loading makes the entry stale, not fresh
+        versions = _versions(tags, create=True)
+    except Exception:
+        current_app.logger.warning('Cache unavailable, loading %s directly', key, exc_info=True)
+        return loader()
+
+    value = loader()
+    if None not in versions.values():
+        try:
+            cache.set(_entry_key(key), (versions, value), timeout=_timeout(timeout))
+        except Exception:
+            current_app.logger.warning('Could not cache %s', key, exc_info=True)
+    return value
+
+
+def bump_tags(tags: Iterable[str]):
+    """Invalidate every entry carrying one of `tags`, now."""
+    tags = set(tags)
+    if tags:
+        cache.set_many({_tag_key(t): uuid.uuid4().hex for t in tags}, timeout=0)
+
+
+def invalidate_tags(tags: Iterable[str], session=None):
+    """Bump `tags` after the current transaction commits."""
+    session = session or db.session
+    session.info.setdefault(_SESSION_KEY, set()).update(t for t in tags if t)
+
+
+def pending_tags(session=None) -> set:
+    """Tags changed by the current transaction so far (bumped when it commits)."""
+    session = session or db.session
+    return set(session.info.get(_SESSION_KEY, ()))
+
+
+def _history_values(obj, attr: str) -> set:
+    """Current and (when changed in this flush) previous values of an attribute."""
+    history = inspect(obj).attrs[attr].history
+    return {v for v in (list(history.added) + list(history.deleted) + list(history.unchanged)) if v is not None}
+
+
+def _course_tags(course) -> List[str]:
+    return ['courses', f'course:{course.id}']
+
+
+def _section_tags(section) -> List[str]:
+    return ([f'section:{section.id}']
+            + [f'course:{cid}' for cid in _history_values(section, 'course_id')]
+            + [f'term:{term}' for term in _history_values(section, 'term')])
+
+
+def _enrollment_tags(enrollment) -> List[str]:
+    # The section's course and term are added by `_section_scope_tags`
+    return ([f'student:{sid}' for sid in _history_values(enrollment, 'student_id')]
+            + [f'section:{sid}' for sid in _history_values(enrollment, 'course_section_id')])
+
+
+def _student_tags(profile) -> List[str]:
+    return [f'student:{profile.id}'] + [f'user:{uid}' for uid in _history_values(profile, 'user_id')]
+
+
+def _instructor_tags(profile) -> List[str]:
+    return [f'user:{uid}' for uid in _history_values(profile, 'user_id')]
+
+
+# What `principal_cache` holds of a user's own row
+_PRINCIPAL_ATTRS = ('is_active', 'locked_until', 'roles')
+
+
+def _user_tags(user) -> List[str]:
+    tags = []
+    # The student's name is on their transcript
+    profile = user.__dict__.get('student_profile')
+    if profile is not None:
+        tags.append(f'student:{profile.id}')
+    state = inspect(user)
+    if (user in state.session.new or user in state.session.deleted
+            or any(state.attrs[attr].history.has_changes() for attr in _PRINCIPAL_ATTRS)):
+        tags.append(f'user:{user.id}')
+    return tags
+
+
+def _role_tags(role) -> List[str]:
+    return ['roles']
+
+
+def _prerequisite_tags(link) -> List[str]:
+    return ['courses', f'course:{link.course_id}']
+
+
+def _grading_scale_tags(scale) -> List[str]:
+    return ['grading_scale']
+
+
+def section_tags(section) -> List[str]:
+    """Tags to invalidate when a section's row changes outside the ORM (e.g. its counters)."""
+    return [f'section:{section.id}', f'course:{section.course_id}', f'term:{section.term}']
+
+
+_taggers = {}
+
+
+def _tagger(obj):
+    """The tag function for `obj`'s model, or None for untagged models."""
+    if not _taggers:
+        from app.models.course import Course, CoursePrerequisite, CourseSection
+        from app.models.enrollment import Enrollment
+        from app.models.grading_scale import GradingScale
+        from app.models.profile import InstructorProfile, StudentProfile
+        from app.models.user import Role, User
+
+        _taggers.update({
+            Course: _course_tags, CourseSection: _section_tags, Enrollment: _enrollment_tags,
+            StudentProfile: _student_tags, InstructorProfile: _instructor_tags, User: _user_tags,
+            Role: _role_tags, CoursePrerequisite: _prerequisite_tags, GradingScale: _grading_scale_tags,
+        })
+    return _taggers.get(type(obj))
+
+
+def _section_scope_tags(session, tags: set) -> set:
+    """course:/term: tags of the sections in `tags`, read in one query on the flush's connection."""
+    from app.models.course import CourseSection
+
+    ids = [int(t.split(':', 1)[1]) for t in tags if t.startswith('section:')]
+    if not ids:
+        return set()
+    rows = session.connection().execute(
+        db.select(CourseSection.course_id, CourseSection.term).where(CourseSection.id.in_(ids)).distinct()
+    )
+    scope = set()
+    for course_id, term in rows:
+        scope.update((f'course:{course_id}', f'term:{term}'))
+    return scope
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_tag_changes(session, flush_context):
+    tags = set()
+    # Still the pre-flush lists here, but with primary keys assigned to new objects
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tagger = _tagger(obj)
+        if tagger is not None and (obj in session.new or obj in session.deleted or session.is_modified(obj)):
+            tags.update(tagger(obj))
+    if tags:
+        invalidate_tags(tags | _section_scope_tags(session, tags), session)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_committed_tags(session):
+    tags = session.info.pop(_SESSION_KEY, None)
+    if not tags:
+        return
+    try:
+        bump_tags(tags)
+    except Exception:
+        current_app.logger.warning('Could not invalidate cache tags %s', sorted(tags), exc_info=True)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _forget_tag_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_KEY, None)
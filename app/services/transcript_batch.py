@@ -0,0 +1,287 @@
+"""Batch transcript generation.
+
+Registrars issue transcripts for a whole graduating class, or for every
+approved transcript request at once, as a single ZIP archive
+(`TranscriptBatch`).
+
+The parent process reads each chunk of students from the database and turns
+it into plain transcript data (`TranscriptService.transcript_data`); a pool of
+TRANSCRIPT_BATCH_WORKERS processes renders the PDFs
+(`TranscriptService.render_transcript` needs no database or app context).
+At most two jobs per worker are in flight, and every finished PDF is written
+straight into the archive on disk, so memory stays flat however large the
+class. Progress is committed once per chunk. A student whose transcript fails
+to render is recorded in `errors` and the batch carries on.
+
+Once the archive is complete, the batch's approved requests are marked issued
+in one executemany UPDATE (the bulk form of `TranscriptRequest.mark_issued`),
+with their PDF's name in the archive as filename.
+
+TRANSCRIPT_BATCH_MODE selects where a batch started by `start_batch` runs: a
+background thread (default), the `tasks.render_transcript_batch` Celery task,
+or inline in the caller (tests).
+"""
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy.orm import selectinload
+
+from app.models import db
+from app.models.audit import AuditLog
+from app.models.profile import StudentProfile
+from app.models.transcript import TranscriptBatch, TranscriptRequest
+from app.services.transcript_service import TranscriptService
+
+BATCH_FOLDER = 'transcript_batches'
+
+# (student id, PDF name, transcript data, official)
+Job = Tuple[int, str, dict, bool]
+
+
+def _config(name, default):
+    return current_app.config.get(name, default)
+
+
+def batch_directory() -> str:
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], BATCH_FOLDER)
+
+
+def batch_path(batch: TranscriptBatch) -> Optional[str]:
+    """Path of a completed batch's archive."""
+    return os.path.join(batch_directory(), batch.filename) if batch.filename else None
+
+
+def worker_count(workers: int = None) -> int:
+    """Render processes to use: `workers`, TRANSCRIPT_BATCH_WORKERS, or one per CPU when 0."""
+    workers = workers if workers is not None else int(_config('TRANSCRIPT_BATCH_WORKERS', 0))
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def create_batch(user_id: int = None, request_ids: Iterable[int] = None, all_approved: bool = False,
+                 graduation_year: int = None, student_ids: Iterable[int] = None,
+                 official: bool = True) -> TranscriptBatch:
+    """Queue a batch (committed) for approved requests, a graduating class or given students.
+
+    Requests are taken only while Approved; raises ValueError when nothing is selected.
+    """
+    request_list = []
+    if request_ids is not None or all_approved:
+        query = TranscriptRequest.query.filter_by(status='Approved')
+        if request_ids is not None:
+            query = query.filter(TranscriptRequest.id.in_(list(request_ids)))
+        request_list = query.order_by(TranscriptRequest.id).all()
+        official = True  # requests are for official transcripts
+
+    students = [r.student_id for r in request_list]
+    if graduation_year is not None:
+        students += db.session.execute(
+            db.select(StudentProfile.id).where(StudentProfile.graduation_year == graduation_year)
+        ).scalars().all()
+    if student_ids is not None:
+        students += db.session.execute(
+            db.select(StudentProfile.id).where(StudentProfile.id.in_(list(student_ids)))
+        ).scalars().all()
+    students = sorted(set(students))
+    if not students:
+        raise ValueError('No transcripts to generate')
+
+    batch = TranscriptBatch(
+        status='Queued',
+        official=official,
+        graduation_year=graduation_year,
+        request_ids=[r.id for r in request_list] or None,
+        student_ids=students,
+        total=len(students),
+        created_by=user_id,
+    )
+    db.session.add(batch)
+    db.session.commit()
+    return batch
+
+
+def render_job(job: Job) -> Tuple[int, str, Optional[bytes], Optional[str]]:
+    """Render one transcript (runs in a worker process): (student id, name, PDF, error)."""
+    student_id, name, data, official = job
+    try:
+        return student_id, name, TranscriptService.render_transcript(data, official).getvalue(), None
+    except Exception as ex:
+        return student_id, name, None, str(ex) or ex.__class__.__name__
+
+
+def render_jobs(jobs: Iterable[Job], workers: int = 1,
+                start_method: str = None) -> Iterator[Tuple[int, str, Optional[bytes], Optional[str]]]:
+    """Rendered results in completion order, at most two jobs per worker in flight."""
+    if workers <= 1:
+        for job in jobs:
+            yield render_job(job)
+        return
+
+    context = multiprocessing.get_context(start_method) if start_method else None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = set()
+        for job in jobs:
+            pending.add(pool.submit(render_job, job))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def _jobs(student_ids: List[int], official: bool, chunk_size: int, errors: dict) -> Iterator[Job]:
+    for start in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[start:start + chunk_size]
+        profiles = {p.id: p for p in StudentProfile.query.options(selectinload(StudentProfile.user))
+                    .filter(StudentProfile.id.in_(chunk))}
+        jobs = []
+        for student_id in chunk:
+            profile = profiles.get(student_id)
+            if profile is None:
+                errors[str(student_id)] = 'Student not found'
+                continue
+            jobs.append((student_id, TranscriptService.generate_filename(profile, official),
+                         TranscriptService.transcript_data(profile), official))
+        # Built before yielding: progress commits expire the profiles
+        yield from jobs
+
+
+def run_batch(batch: TranscriptBatch, workers: int = None, chunk_size: int = None,
+              progress: Callable[[TranscriptBatch], None] = None) -> TranscriptBatch:
+    """Render a queued batch into its archive and issue its requests.
+
+    `progress` is called with the batch after each committed chunk. On an
+    error the partial archive is removed, the batch marked Failed and the
+    error re-raised.
+    """
+    workers = worker_count(workers)
+    chunk_size = chunk_size or int(_config('TRANSCRIPT_BATCH_CHUNK', 50))
+    start_method = _config('TRANSCRIPT_BATCH_START_METHOD', 'spawn')
+    student_ids = list(batch.student_ids or [])
+    official = batch.official
+    batch.status = 'Running'
+    batch.started_at = datetime.utcnow()
+    batch.processed = batch.failed = 0
+    batch.errors = batch.last_error = batch.filename = None
+    db.session.commit()
+
+    os.makedirs(batch_directory(), exist_ok=True)
+    filename = f"transcripts_batch_{batch.id}_{datetime.now().strftime('%Y%m%d')}.zip"
+    path = os.path.join(batch_directory(), filename)
+    partial = path + '.part'
+    members, errors = {}, {}
+    try:
+        # PDF streams are already compressed; storing keeps the writer from becoming the bottleneck
+        with zipfile.ZipFile(partial, 'w', zipfile.ZIP_STORED) as archive:
+            results = render_jobs(_jobs(student_ids, official, chunk_size, errors), workers, start_method)
+            for done, (student_id, name, pdf, error) in enumerate(results, start=1):
+                if error is None:
+                    archive.writestr(name, pdf)
+                    members[student_id] = name
+                else:
+                    errors[str(student_id)] = error
+                if done % chunk_size == 0:
+                    _checkpoint(batch, done, errors, progress)
+        os.replace(partial, path)
+
+        issued = _issue_requests(batch, members, filename)
+        batch.filename = filename
+        batch.status = 'Completed'
+        batch.finished_at = datetime.utcnow()
+        _checkpoint(batch, len(members) + len(errors), errors, progress)
+        current_app.logger.info('Transcript batch %s: %s transcripts, %s failed, %s requests issued',
+                                batch.id, len(members), len(errors), issued)
+    except Exception as ex:
+        db.session.rollback()
+        if os.path.exists(partial):
+            os.remove(partial)
+        batch.status = 'Failed'
+        batch.last_error = str(ex)[:2000]
+        db.session.commit()
+        raise
+    return batch
+
+
+def _checkpoint(batch: TranscriptBatch, processed: int, errors: dict, progress):
+    batch.processed = processed
+    batch.failed = len(errors)
+    batch.errors = dict(errors) or None
+    db.session.commit()
+    if progress:
+        progress(batch)
+
+
+def _issue_requests(batch: TranscriptBatch, members: dict, filename: str) -> int:
+    """Mark the batch's still-approved requests issued (students whose PDF is in the archive)."""
+    if not batch.request_ids:
+        return 0
+    rows = db.session.execute(
+        db.select(TranscriptRequest.id, TranscriptRequest.student_id)
+        .where(TranscriptRequest.id.in_(batch.request_ids), TranscriptRequest.status == 'Approved')
+    ).all()
+    rows = [r for r in rows if r.student_id in members]
+    if not rows:
+        return 0
+
+    now = datetime.utcnow()
+    table = TranscriptRequest.__table__
+    db.session.execute(
+        table.update().where(table.c.id == db.bindparam('b_id'), table.c.status == 'Approved').values(
+            status='Issued',
+            issued_at=now,
+            filename=db.bindparam('b_filename'),
+            batch_id=batch.id,
+            updated_at=now,
+        ),
+        [{'b_id': r.id, 'b_filename': members[r.student_id]} for r in rows],
+    )
+    db.session.execute(db.insert(AuditLog), [{
+        'user_id': batch.created_by or 0,
+        'action': 'ISSUE',
+        'entity_type': 'TranscriptRequest',
+        'entity_id': r.id,
+        'new_values': {'status': 'Issued', 'filename': members[r.student_id]},
+        'extra_data': {'transcript_batch_id': batch.id, 'archive': filename},
+    } for r in rows])
+
+    identity = db.inspect(TranscriptRequest)
+    for r in rows:
+        obj = db.session.identity_map.get(identity.identity_key_from_primary_key((r.id,)))
+        if obj is not None:
+            db.session.expire(obj)
+    return len(rows)
+
+
+def start_batch(batch: TranscriptBatch) -> TranscriptBatch:
+    """Hand a queued batch to TRANSCRIPT_BATCH_MODE."""
+    mode = _config('TRANSCRIPT_BATCH_MODE', 'thread')
+    if mode == 'celery':
+        from app.tasks import render_transcript_batch
+        render_transcript_batch.delay(batch.id)
+    elif mode == 'inline':
+        try:
+            run_batch(batch)
+        except Exception:
+            current_app.logger.exception('Transcript batch %s failed', batch.id)
+    else:
+        app = current_app._get_current_object()
+        threading.Thread(target=_run_in_thread, args=(app, batch.id),
+                         name=f'transcript-batch-{batch.id}', daemon=True).start()
+    return batch
+
+
+def _run_in_thread(app, batch_id: int):
+    with app.app_context():
+        try:
+            run_batch(db.session.get(TranscriptBatch, batch_id))
+        except Exception:
+            app.logger.exception('Transcript batch %s failed', batch_id)
+        finally:
+            db.session.remove()
+
@@ -0,0 +1,280 @@
+"""Content-addressed cache of rendered transcript PDFs.
+
+A transcript's cache key is a SHA-256 of everything the PDF shows: the
+transcript data (`transcript_data.load_transcript`, one query), the official
+flag and the issue date printed in the footer. Computing it needs no ReportLab
+work, and a miss renders from the same data through the PDF render service
+(`pdf_render`, job id `transcript-<key>`). The key doubles as the response's
+ETag, so a client holding the current PDF gets a 304 without anything being
+rendered or read from the store.
+
+Because the key covers the whole state, a changed grade can never serve a
+stale PDF; it simply hashes to a new key. The key is therefore always hashed
+from freshly loaded data, never from the tag-cached `transcript_data` another
+worker may not have invalidated yet. Old entries are purged after a commit that
+changes a student's enrollments, profile or name (bulk grade writers call
+`invalidate_transcripts`).
+
+TRANSCRIPT_CACHE_BACKEND selects the store:
+  filesystem  the newest official and unofficial PDF per student under
+              TRANSCRIPT_CACHE_DIR/<student id>/ (default)
+  cache       the Flask-Caching backend (Redis in production), TRANSCRIPT_CACHE_TTL
+  none        no storage; ETags still apply
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from io import BytesIO
+from typing import Iterable, Optional, Tuple
+
+from flask import current_app, request, send_file
+from sqlalchemy import event, inspect
+
+from app import cache
+from app.models import db
+from app.models.enrollment import Enrollment
+from app.models.profile import StudentProfile
+from app.models.user import User
+from app.services import pdf_render, tag_cache
+from app.services.tag_cache import invalidate_tags
+from app.services.transcript_data import TranscriptData, load_transcript
+from app.services.transcript_service import TranscriptService
+
+# Bump when the transcript layout changes so earlier renders are not reused
+RENDER_VERSION = 2
+
+_SESSION_KEY = 'transcript_students_changed'
+
+# The user columns a transcript shows; other user changes (last_login...) keep stored PDFs
+_USER_FIELDS = ('first_name', 'last_name')
+
+
+def _kind(official: bool) -> str:
+    return 'official' if official else 'unofficial'
+
+
+class FileSystemTranscriptStore:
+    """PDFs as files under `<directory>/<student id>/<kind>-<key>.pdf`.
+
+    Only the newest PDF of each kind is kept: the key changes every day with
+    the issue date, so older files would never be read again.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, student_id: int, key: str, official: bool) -> str:
+        return os.path.join(self.directory, str(student_id), f"{_kind(official)}-{key}.pdf")
+
+    def get(self, student_id: int, key: str, official: bool) -> Optional[bytes]:
+        try:
+            with open(self._path(student_id, key, official), 'rb') as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def set(self, student_id: int, key: str, official: bool, pdf: bytes):
+        path = self._path(student_id, key, official)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees a partial file
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(pdf)
+        os.replace(tmp, path)
+        for old in glob.glob(os.path.join(folder, f"{_kind(official)}-*.pdf")):
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass  # removed by a concurrent writer
+
+    def purge(self, student_id: int):
+        shutil.rmtree(os.path.join(self.directory, str(student_id)), ignore_errors=True)
+
+
+class CacheTranscriptStore:
+    """PDFs in the Flask-Caching backend; stale keys expire with the TTL."""
+
+    def __init__(self, timeout: int):
+        self.timeout = timeout
+
+    def get(self, student_id: int, key: str, official: bool) -> Optional[bytes]:
+        return cache.get(f"transcript:{student_id}:{key}")
+
+    def set(self, student_id: int, key: str, official: bool, pdf: bytes):
+        cache.set(f"transcript:{student_id}:{key}", pdf, timeout=self.timeout)
+
+    def purge(self, student_id: int):
+        pass  # keys cannot be listed; unreachable once the state changes
+
+
+class NullTranscriptStore:
+    def get(self, student_id, key, official):
+        return None
+
+    def set(self, student_id, key, official, pdf):
+        pass
+
+    def purge(self, student_id):
+        pass
+
+
+def get_store():
+    """The configured store, created once per app."""
+    store = current_app.extensions.get('transcript_store')
+    if store is None:
+        backend = current_app.config.get('TRANSCRIPT_CACHE_BACKEND', 'filesystem')
+        if backend == 'filesystem':
+            store = FileSystemTranscriptStore(current_app.config['TRANSCRIPT_CACHE_DIR'])
+        elif backend == 'cache':
+            store = CacheTranscriptStore(int(current_app.config.get('TRANSCRIPT_CACHE_TTL', 86400)))
+        else:
+            store = NullTranscriptStore()
+        current_app.extensions['transcript_store'] = store
+    return store
+
+
+def transcript_data(student_profile: StudentProfile) -> TranscriptData:
+    """The student's transcript data through the tag cache, for the HTML and JSON views.
+
+    Covered by `student:<id>` (enrollments, profile, name, standing), `courses`
+    (titles, credits) and `grading_scale`; a renamed department or changed
+    section dates show after TAG_CACHE_TTL. PDFs and their ETags are built from
+    `load_transcript` instead.
+    """
+    return tag_cache.cached(
+        f"transcript-data:{student_profile.id}",
+        lambda: load_transcript(student_profile),
+        tags=[f'student:{student_profile.id}', 'courses', 'grading_scale'],
+    )
+
+
+def transcript_key(student_profile: StudentProfile, official: bool, data: TranscriptData = None) -> str:
+    """Content hash of everything the transcript PDF shows."""
+    data = data or load_transcript(student_profile)
+    state = {
+        'version': RENDER_VERSION,
+        'official': bool(official),
+        'issued': date.today().isoformat(),
+        'transcript': data.to_dict(),
+    }
+    payload = json.dumps(state, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_transcript(student_profile: StudentProfile, official: bool = False,
+                   key: str = None, data: TranscriptData = None) -> Tuple[bytes, str]:
+    """(PDF bytes, key) from the store, rendering and storing it on a miss.
+
+    Waits for the render; for callers off the request path. Raises
+    `pdf_render.RenderError` when rendering fails.
+    """
+    data = data or load_transcript(student_profile)
+    key = key or transcript_key(student_profile, official, data)
+    store = get_store()
+    pdf = store.get(student_profile.id, key, official)
+    if pdf is None:
+        pdf = pdf_render.render_pdf('transcript', (data.to_dict(), bool(official)), job_id=f"transcript-{key}")
+        _store(store, student_profile.id, key, official, pdf)
+    return pdf, key
+
+
+def _store(store, student_id: int, key: str, official: bool, pdf: bytes):
+    try:
+        store.set(student_id, key, official, pdf)
+    except Exception:
+        current_app.logger.warning('Could not store transcript for student %s', student_id, exc_info=True)
+
+
+def transcript_response(student_profile: StudentProfile, official: bool = False, download_name: str = None,
+                        user=None, api: bool = False, fallback: str = None):
+    """PDF download response with the content key as ETag; 304 when If-None-Match matches.
+
+    A transcript that is not stored yet is rendered by `pdf_render`; if it
+    takes longer than PDF_RENDER_WAIT, the response is the job to poll
+    (`pdf_render.job_response`).
+    """
+    data = load_transcript(student_profile)
+    key = transcript_key(student_profile, official, data)
+    download_name = download_name or TranscriptService.generate_filename(student_profile, official=official)
+    if key in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(key)
+    else:
+        store = get_store()
+        pdf = store.get(student_profile.id, key, official)
+        if pdf is None:
+            job_id, status = pdf_render.start('transcript', (data.to_dict(), bool(official)), download_name,
+                                              user=user, job_id=f"transcript-{key}")
+            if status != 'done':
+                return pdf_render.job_response(job_id, status, api=api, fallback=fallback)
+            pdf = pdf_render.read_pdf(job_id)
+            _store(store, student_profile.id, key, official, pdf)
+        response = send_file(
+            BytesIO(pdf),
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name=download_name,
+            etag=key,
+            max_age=0,
+            conditional=False,
+        )
+    # Per-student content: browsers may keep it but must revalidate
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def invalidate_transcripts(student_ids: Iterable[int], session=None):
+    """Purge the students' stored transcripts after the current transaction commits.
+
+    Also bumps their `student:<id>` cache tags, for writers that bypass the ORM.
+    """
+    session = session or db.session
+    student_ids = {sid for sid in student_ids if sid is not None}
+    session.info.setdefault(_SESSION_KEY, set()).update(student_ids)
+    invalidate_tags([f'student:{sid}' for sid in student_ids], session)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _collect_transcript_changes(session, flush_context, instances):
+    changed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Enrollment):
+            changed.add(obj.student_id)
+        elif isinstance(obj, StudentProfile):
+            changed.add(obj.id)
+        elif isinstance(obj, User) and 'student_profile' in obj.__dict__ and obj.student_profile is not None \
+                and (obj in session.deleted or _name_changed(obj)):
+            changed.add(obj.student_profile.id)
+    if changed:
+        invalidate_transcripts(changed, session)
+
+
+def _name_changed(user: User) -> bool:
+    attrs = inspect(user).attrs
+    return any(attrs[name].history.has_changes() for name in _USER_FIELDS)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _purge_transcripts(session):
+    student_ids = session.info.pop(_SESSION_KEY, None)
+    if not student_ids:
+        return
+    try:
+        store = get_store()
+        for student_id in student_ids:
+            store.purge(student_id)
+    except Exception:
+        current_app.logger.warning('Could not purge cached transcripts', exc_info=True)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _forget_transcript_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_KEY, None)
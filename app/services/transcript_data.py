@@ -0,0 +1,168 @@
+"""Transcript data layer shared by the PDF, JSON and HTML transcripts.
+
+`load_transcript` reads a student's whole course history in one joined query
+(enrollment, section and course columns, no ORM objects). SQL orders the rows
+term by term, newest term first, using window functions over each term's
+dates, so the rows only need to be split where the term changes. Each term
+comes back as a compact `TranscriptTerm` with its credit and quality point
+totals already added up.
+
+The result holds plain values only. It can be pickled for render workers
+(`transcript_batch`), hashed for the PDF cache (`transcript_cache`),
+serialized with `to_dict` and read back with `from_dict`.
+"""
+from datetime import date
+from itertools import groupby
+from typing import NamedTuple, Optional, Tuple
+
+from app.models import db
+from app.models.course import Course, CourseSection
+from app.models.enrollment import Enrollment
+from app.models.grading_scale import get_scale
+from app.models.profile import StudentProfile
+
+# Statuses whose grade points count towards GPA
+GRADED_STATUSES = ('Completed', 'Failed')
+
+
+class TranscriptCourse(NamedTuple):
+    code: str
+    title: str
+    credits: int
+    grade: Optional[str]
+    grade_points: Optional[float]
+    status: str
+
+    @property
+    def quality_points(self) -> float:
+        return self.grade_points * self.credits if self.grade_points is not None else 0.0
+
+    @property
+    def graded(self) -> bool:
+        return self.grade_points is not None and self.status in GRADED_STATUSES
+
+    def to_dict(self):
+        return {**self._asdict(), 'quality_points': round(self.quality_points, 2)}
+
+
+class TranscriptTerm(NamedTuple):
+    term: str
+    start_date: Optional[date]
+    end_date: Optional[date]
+    courses: Tuple[TranscriptCourse, ...]
+    credits: int
+    graded_credits: int
+    quality_points: float
+
+    @property
+    def gpa(self) -> float:
+        """GPA over credits that carry grade points, as for the cumulative GPA."""
+        return self.quality_points / self.graded_credits if self.graded_credits > 0 else 0.0
+
+    @property
+    def title(self) -> str:
+        if self.start_date and self.end_date:
+            return f"{self.term} ({self.start_date.strftime('%B %Y')} - {self.end_date.strftime('%B %Y')})"
+        return self.term
+
+    def to_dict(self):
+        return {
+            'term': self.term,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'courses': [c.to_dict() for c in self.courses],
+            'credits': self.credits,
+            'graded_credits': self.graded_credits,
+            'quality_points': round(self.quality_points, 2),
+            'gpa': round(self.gpa, 2),
+        }
+
+
+class TranscriptData(NamedTuple):
+    student: dict  # id, name, last_name, student_number, birth_date, major, academic_status
+    summary: dict  # gpa, total_credits_earned
+    terms: Tuple[TranscriptTerm, ...]  # newest first
+    grading_scale: Tuple[str, ...]  # legend labels
+
+    def to_dict(self):
+        return {
+            'student': dict(self.student),
+            'summary': dict(self.summary),
+            'terms': [t.to_dict() for t in self.terms],
+            'grading_scale': list(self.grading_scale),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> 'TranscriptData':
+        """Inverse of `to_dict` (render jobs travel as JSON, see `pdf_render`)."""
+        terms = tuple(
+            build_term(
+                t['term'],
+                date.fromisoformat(t['start_date']) if t['start_date'] else None,
+                date.fromisoformat(t['end_date']) if t['end_date'] else None,
+                (TranscriptCourse(c['code'], c['title'], c['credits'], c['grade'], c['grade_points'], c['status'])
+                 for c in t['courses']),
+            )
+            for t in payload['terms']
+        )
+        return cls(dict(payload['student']), dict(payload['summary']), terms, tuple(payload['grading_scale']))
+
+
+def build_term(term: str, start_date, end_date, courses) -> TranscriptTerm:
+    """Term record with its totals from `TranscriptCourse` rows."""
+    courses = tuple(courses)
+    return TranscriptTerm(
+        term=term,
+        start_date=start_date,
+        end_date=end_date,
+        courses=courses,
+        credits=sum(c.credits or 0 for c in courses),
+        graded_credits=sum(c.credits or 0 for c in courses if c.graded),
+        quality_points=sum(c.quality_points for c in courses if c.graded),
+    )
+
+
+def load_terms(student_id: int) -> Tuple[TranscriptTerm, ...]:
+    """The student's course history by term, newest term first (one query)."""
+    term_start = db.func.min(CourseSection.start_date).over(partition_by=CourseSection.term).label('term_start')
+    term_end = db.func.max(CourseSection.end_date).over(partition_by=CourseSection.term).label('term_end')
+    rows = db.session.execute(
+        db.select(
+            CourseSection.term, term_start, term_end,
+            Course.code, Course.title, Course.credits,
+            Enrollment.grade, Enrollment.grade_points, Enrollment.status,
+        )
+        .join(CourseSection, CourseSection.id == Enrollment.course_section_id)
+        .join(Course, Course.id == CourseSection.course_id)
+        .where(Enrollment.student_id == student_id)
+        .order_by(term_start.desc(), CourseSection.term, Course.code, Enrollment.id)
+    ).all()
+
+    return tuple(
+        build_term(term, start, end, (TranscriptCourse(r.code, r.title, r.credits, r.grade, r.grade_points, r.status)
+                                      for r in group))
+        for (term, start, end), group in groupby(rows, key=lambda r: (r.term, r.term_start, r.term_end))
+    )
+
+
+def load_transcript(student_profile: StudentProfile) -> TranscriptData:
+    """Everything the transcript shows, for PDF, JSON and HTML output."""
+    user = student_profile.user
+    birth_date = getattr(user, 'birth_date', None)
+    return TranscriptData(
+        student={
+            'id': student_profile.id,
+            'name': f"{user.first_name} {user.last_name}",
+            'last_name': user.last_name,
+            'student_number': str(student_profile.student_number),
+            'birth_date': birth_date.strftime('%B %d, %Y') if birth_date else "N/A",
+            'major': student_profile.major,
+            'academic_status': student_profile.academic_status,
+        },
+        summary={
+            'gpa': student_profile.gpa,
+            'total_credits_earned': student_profile.total_credits_earned,
+        },
+        terms=load_terms(student_profile.id),
+        grading_scale=tuple(get_scale().legend()),
+    )
@@ -0,0 +1,107 @@
+"""Official transcript issuance with stored PDFs.
+
+Approving a transcript request queues the official PDF to be rendered once,
+away from the web request, and written to UPLOAD_FOLDER/transcripts/<request
+id>.pdf. `TranscriptRequest.filename` gets the download name and `rendered_at`
+is set. The document is a snapshot of the record at approval; approving the
+request again renders a new one.
+
+Downloads are then served from disk (`artifact_response`) with Range and
+conditional GET (ETag, Last-Modified) support, so no web worker ever renders
+an official transcript. A failed render is recorded in `render_error` and can
+be queued again.
+
+TRANSCRIPT_ISSUANCE_MODE selects where rendering runs: a background thread
+(default), the `tasks.render_official_transcript` Celery task, or inline in
+the caller (tests).
+"""
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Optional
+
+from flask import current_app, send_file
+
+from app.models import db
+from app.models.transcript import TranscriptRequest
+from app.services.transcript_cache import get_transcript
+from app.services.transcript_service import TranscriptService
+
+ISSUANCE_FOLDER = 'transcripts'
+
+
+def issuance_directory() -> str:
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], ISSUANCE_FOLDER)
+
+
+def artifact_path(tr: TranscriptRequest) -> Optional[str]:
+    """Path of the request's stored PDF, or None when it has none (yet)."""
+    if not tr.is_rendered:
+        return None
+    path = os.path.join(issuance_directory(), f"{tr.id}.pdf")
+    return path if os.path.exists(path) else None
+
+
+def render_official_transcript(request_id: int) -> Optional[TranscriptRequest]:
+    """Render and store an approved request's PDF (commits). Skips requests already rendered."""
+    tr = db.session.get(TranscriptRequest, request_id)
+    if tr is None or tr.status not in ('Approved', 'Issued') or artifact_path(tr):
+        return tr
+    try:
+        profile = tr.student
+        pdf, _ = get_transcript(profile, official=True)
+        folder = issuance_directory()
+        os.makedirs(folder, exist_ok=True)
+        # Write then rename, so a download never sees a partial file
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(pdf)
+        os.replace(tmp, os.path.join(folder, f"{tr.id}.pdf"))
+        tr.filename = TranscriptService.generate_filename(profile, official=True)
+        tr.rendered_at = datetime.utcnow()
+        tr.render_error = None
+    except Exception as ex:
+        db.session.rollback()
+        tr.render_error = str(ex)[:2000]
+        current_app.logger.exception('Rendering official transcript for request %s failed', request_id)
+    db.session.commit()
+    return tr
+
+
+def queue_official_transcript(tr: TranscriptRequest):
+    """Hand a committed, approved request to TRANSCRIPT_ISSUANCE_MODE."""
+    mode = current_app.config.get('TRANSCRIPT_ISSUANCE_MODE', 'thread')
+    if mode == 'celery':
+        from app.tasks import render_official_transcript as task
+        task.delay(tr.id)
+    elif mode == 'inline':
+        render_official_transcript(tr.id)
+    else:
+        app = current_app._get_current_object()
+        threading.Thread(target=_render_in_thread, args=(app, tr.id),
+                         name=f'official-transcript-{tr.id}', daemon=True).start()
+
+
+def _render_in_thread(app, request_id: int):
+    with app.app_context():
+        try:
+            render_official_transcript(request_id)
+        finally:
+            db.session.remove()
+
+
+def artifact_response(tr: TranscriptRequest, path: str):
+    """The stored PDF with Range, ETag and Last-Modified handling."""
+    response = send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=tr.filename or os.path.basename(path),
+        conditional=True,
+        etag=True,
+        max_age=0,
+    )
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -1,6 +1,6 @@
 """Student blueprint routes."""
 
-from flask import render_template, redirect, url_for, flash, request, jsonify, send_file
+from flask import render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from functools import wraps
 from app import db
@@ -12,7 +12,10 @@ from app.forms import EnrollmentForm, SubmissionForm, ProfileForm, StudentProfil
 from app.services.enrollment_service import (enroll_student, drop_enrollment, 
                                           get_available_sections, get_student_enrollments,
                                           get_enrollment_summary)
-from app.services.transcript_service import TranscriptService
+from app.services.cart_service import get_cart, add_to_cart, remove_from_cart, validate_cart, submit_cart
+from app.services.transcript_cache import transcript_data, transcript_response
+from app.services.transcript_issuance import artifact_path, artifact_response, queue_official_transcript
+from app.services import pdf_render
 from app.models.course import Department
 from app.models.transcript import TranscriptRequest
 from app.models.enrollment import EnrollmentStatus
@@ -48,6 +51,9 @@ def dashboard():
         status='Enrolled'
     ).all()
     
+    # Credit totals from the per-term load aggregates
+    summary = get_enrollment_summary(student)
+    
     # Upcoming assignments
     upcoming_assignments = []
     for enrollment in current_enrollments:
@@ -67,6 +73,7 @@ def dashboard():
                          student=student,
                          student_profile=student,
                          enrollments=current_enrollments,
+                         summary=summary,
                          assignments=upcoming_assignments,
                          announcements=announcements)
 
@@ -82,6 +89,7 @@ def courses():
     current = get_student_enrollments(student, status='enrolled', term=term)
     waitlisted = get_student_enrollments(student, status='waitlisted', term=term)
     completed = get_student_enrollments(student, status='completed', term=term)
+    Enrollment.load_waitlist_positions(waitlisted)
     
     # Get enrollment summary
     summary = get_enrollment_summary(student, term=term)
@@ -150,6 +158,7 @@ def course_detail(course_id):
         CourseSection.course_id == course_id,
         Enrollment.status.in_(['Enrolled', 'Waitlisted'])
     ).all()
+    Enrollment.load_waitlist_positions(enrolled_sections)
     
     return render_template('student/course_detail.html',
                          title=course.title,
@@ -188,6 +197,50 @@ def enroll(section_id):
     return redirect(next_page)
 
 
+@student_bp.route('/cart')
+@student_required
+def cart():
+    """View the registration cart with a validation preview."""
+    student = current_user.student_profile
+    items = get_cart(student)
+    ok, results = validate_cart(student)
+    return render_template('student/cart.html',
+                         title='Registration Cart',
+                         items=items,
+                         results={r['course_section_id']: r for r in results},
+                         cart_ok=ok)
+
+
+@student_bp.route('/cart/add/<int:section_id>', methods=['POST'])
+@student_required
+def cart_add(section_id):
+    """Stage a section in the registration cart."""
+    section = CourseSection.query.get_or_404(section_id)
+    success, messages = add_to_cart(current_user.student_profile, section)
+    for msg in messages:
+        flash(msg, 'success' if success else 'warning')
+    next_page = request.args.get('next') or request.referrer or url_for('student.cart')
+    return redirect(next_page)
+
+
+@student_bp.route('/cart/remove/<int:section_id>', methods=['POST'])
+@student_required
+def cart_remove(section_id):
+    """Remove a section from the registration cart."""
+    remove_from_cart(current_user.student_profile, section_id)
+    return redirect(url_for('student.cart'))
+
+
+@student_bp.route('/cart/submit', methods=['POST'])
+@student_required
+def cart_submit():
+    """Enroll in every section of the cart at once (all or nothing)."""
+    enrollments, success, messages, _ = submit_cart(current_user.student_profile)
+    for msg in messages:
+        flash(msg, 'success' if success else 'danger')
+    return redirect(url_for('student.courses') if success else url_for('student.cart'))
+
+
 @student_bp.route('/drop/<int:enrollment_id>', methods=['POST'])
 @student_required
 def drop(enrollment_id):
@@ -252,8 +305,7 @@ def grades():
         Enrollment.status.in_(['Enrolled', 'Completed', 'Failed'])
     ).join(CourseSection).order_by(CourseSection.term.desc()).all()
     
-    # Calculate GPA
-    student.calculate_gpa()
+    # GPA is kept current on the profile as grades change
     
     return render_template('student/grades.html',
                          title='My Grades',
@@ -362,7 +414,8 @@ def transcript():
     
     return render_template('student/transcript.html',
                          title='My Transcript',
-                         student=student)
+                         student=student,
+                         transcript=transcript_data(student))
 
 
 @student_bp.route('/transcript/download')
@@ -372,24 +425,9 @@ def download_transcript():
     student = current_user.student_profile
     
     try:
-        # Generate PDF transcript
-        pdf_buffer = TranscriptService.generate_transcript(
-            student_profile=student,
-            official=False
-        )
-        
-        # Generate filename
-        filename = TranscriptService.generate_filename(
-            student_profile=student,
-            official=False
-        )
-        
-        return send_file(
-            pdf_buffer,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
+        # Served from the transcript cache unless grades or profile changed
+        return transcript_response(student, official=False, user=current_user,
+                                   fallback=url_for('student.transcript'))
     except Exception as e:
         flash(f'Error generating transcript: {str(e)}', 'danger')
         return redirect(url_for('student.transcript'))
@@ -416,38 +454,34 @@ def request_official_transcript():
 @student_bp.route('/transcript/official/download')
 @student_required
 def download_official_transcript():
-    """Download official transcript as PDF if approved."""
+    """Download the official transcript PDF rendered when the request was approved."""
     student = current_user.student_profile
-    # Require an approved request
-    approved = TranscriptRequest.query.filter_by(student_id=student.id, status='Approved').order_by(TranscriptRequest.processed_at.desc()).first()
-    if not approved:
+    # Require an approved (or already issued) request
+    tr = TranscriptRequest.query.filter(
+        TranscriptRequest.student_id == student.id,
+        TranscriptRequest.status.in_(['Approved', 'Issued']),
+        TranscriptRequest.batch_id.is_(None),
+    ).order_by(TranscriptRequest.processed_at.desc()).first()
+    if not tr:
         flash('Official transcript requires Registrar approval. Please submit a request first.', 'warning')
         return redirect(url_for('student.transcript'))
-    try:
-        # Generate PDF transcript
-        pdf_buffer = TranscriptService.generate_transcript(
-            student_profile=student,
-            official=True
-        )
-        
-        # Generate filename
-        filename = TranscriptService.generate_filename(
-            student_profile=student,
-            official=True
-        )
-        # Mark as issued
-        approved.mark_issued(filename=filename)
-        db.session.commit()
-        return send_file(
-            pdf_buffer,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
-    except Exception as e:
-        flash(f'Error generating official transcript: {str(e)}', 'danger')
+    path = artifact_path(tr)
+    if path is None:
+        if tr.render_error:
+            flash('Your official transcript could not be prepared. Please contact the Registrar\'s Office.', 'danger')
+        else:
+            if tr.is_rendered:  # stored file went missing
+                tr.rendered_at = None
+                db.session.commit()
+                queue_official_transcript(tr)
+            flash('Your official transcript is being prepared. Please check back in a moment.', 'info')
         return redirect(url_for('student.transcript'))
 
+    if tr.status == 'Approved':
+        tr.mark_issued()
+        db.session.commit()
+    return artifact_response(tr, path)
+
 
 @student_bp.route('/profile', methods=['GET', 'POST'])
 @student_required
@@ -489,159 +523,48 @@ def registration_proof_for_admin(student_id):
 def _registration_proof_for_student(student):
     # Check if student is approved/active
     if (not student or not getattr(student, 'user', None)
-            or not student.user.is_active or student.academic_status != 'Active'):
+            or not student.user.is_active or not student.can_register()):
         # Still generate a PDF with header but note inactive status
         status_note = 'Inactive or not approved'
     else:
         status_note = None
 
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.platypus import (
-            SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        )
-        from reportlab.lib.enums import TA_CENTER
-        from io import BytesIO
-    except ImportError:
-        flash('PDF generation is not available. Please contact support.', 'danger')
-        return redirect(url_for('student.dashboard'))
-
     # Get current enrollments
     current_enrollments = Enrollment.query.filter_by(
         student_id=student.id,
         status='Enrolled'
     ).join(CourseSection).order_by(CourseSection.term.desc()).all()
 
-    # Create PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=0.75*inch,
-        leftMargin=0.75*inch,
-        topMargin=0.75*inch,
-        bottomMargin=0.75*inch
-    )
-
-    elements = []
-    styles = getSampleStyleSheet()
-
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        textColor=colors.HexColor('#003366'),
-        spaceAfter=12,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-
-    elements.append(Paragraph("PROOF OF REGISTRATION", title_style))
-    elements.append(Paragraph("University Registration System", styles['Normal']))
-    elements.append(Spacer(1, 0.3*inch))
-
-    # Student Information
+    # Group by term
+    terms_dict = {}
+    for enrollment in current_enrollments:
+        section = enrollment.course_section
+        terms_dict.setdefault(section.term, []).append((
+            section.course.code,
+            section.course.title[:35],
+            section.section_code,
+            str(section.course.credits),
+            section.instructor.user.full_name if section.instructor else 'TBA'
+        ))
     student_data = [
-        ["Student Name:", f"{student.user.first_name} {student.user.last_name}"],
-        ["Student Number:", student.student_number],
-        ["Program:", student.program or "Not specified"],
-        ["Academic Status:", student.academic_status],
-        ["Date Issued:", datetime.now().strftime('%B %d, %Y')]
+        ("Student Name:", f"{student.user.first_name} {student.user.last_name}"),
+        ("Student Number:", student.student_number),
+        ("Program:", student.program or "Not specified"),
+        ("Academic Status:", student.academic_status),
+        ("Date Issued:", datetime.now().strftime('%B %d, %Y'))
     ]
-
-    student_table = Table(student_data, colWidths=[2*inch, 4*inch])
-    student_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-    ]))
-
-    elements.append(student_table)
-    elements.append(Spacer(1, 0.4*inch))
-
-    # Current Enrollments
-    elements.append(Paragraph("CURRENT ENROLLMENTS", styles['Heading2']))
-    elements.append(Spacer(1, 0.2*inch))
-
-    if not current_enrollments:
-        elements.append(Paragraph("No courses enrolled", styles['Normal']))
-    else:
-        # Group by term
-        terms_dict = {}
-        for enrollment in current_enrollments:
-            term = enrollment.course_section.term
-            if term not in terms_dict:
-                terms_dict[term] = []
-            terms_dict[term].append(enrollment)
-
-        for term in sorted(terms_dict.keys(), reverse=True):
-            elements.append(Paragraph(f"<b>{term}</b>", styles['Normal']))
-            elements.append(Spacer(1, 0.1*inch))
-
-            course_data = [["Course Code", "Course Title", "Section", "Credits", "Instructor"]]
-
-            for enrollment in terms_dict[term]:
-                course_data.append([
-                    enrollment.course_section.course.code,
-                    enrollment.course_section.course.title[:35],
-                    enrollment.course_section.section_code,
-                    str(enrollment.course_section.course.credits),
-                    enrollment.course_section.instructor.user.full_name if enrollment.course_section.instructor else 'TBA'
-                ])
-
-            course_table = Table(course_data, colWidths=[1*inch, 2.5*inch, 0.7*inch, 0.7*inch, 1.6*inch])
-            course_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003366')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('TOPPADDING', (0, 0), (-1, -1), 3),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-            ]))
-
-            elements.append(course_table)
-            elements.append(Spacer(1, 0.3*inch))
-
-        # Total Credits
-        total_credits = sum(e.course_section.course.credits for e in current_enrollments)
-        elements.append(Paragraph(f"<b>Total Credits Enrolled: {total_credits}</b>", styles['Normal']))
-        elements.append(Spacer(1, 0.4*inch))
-
-    # Footer
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=TA_CENTER
-    )
-    footer_text = (
-        f"Issued on {datetime.now().strftime('%B %d, %Y')}. "
-        + ("Status: " + status_note + ". " if status_note else "")
-        + "This document lists the student's current enrollments."
-    )
-    elements.append(Paragraph(footer_text, footer_style))
-
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
+    total_credits = sum(e.course_section.course.credits for e in current_enrollments)
 
     filename = f"registration_proof_{student.student_number}_{datetime.now().strftime('%Y%m%d')}.pdf"
-
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
+    return pdf_render.pdf_response(
+        'registration_proof',
+        (
+            student_data,
+            [(term, terms_dict[term]) for term in sorted(terms_dict.keys(), reverse=True)],
+            total_credits,
+            status_note,
+        ),
+        filename,
+        user=current_user,
+        fallback=url_for('student.dashboard'),
     )
@@ -19,3 +19,86 @@ def recalc_enrollment_counts(course_section_id: int) -> int:
     section.waitlist_count = waitlisted
     db.session.commit()
     return enrolled
+
+
+@celery.task(name="tasks.dispatch_outbox")
+def dispatch_outbox() -> dict:
+    """Deliver pending outbox messages (notifications and e-mail)."""
+    from app.services.outbox_service import dispatch_pending
+
+    return dispatch_pending()
+
+
+@celery.task(name="tasks.reconcile_term_loads")
+def reconcile_term_loads() -> int:
+    """Rebuild the per-student term load aggregates from enrollments."""
+    from app.models.term_load import rebuild_term_loads
+
+    rows = rebuild_term_loads()
+    db.session.commit()
+    return rows
+
+
+@celery.task(name="tasks.verify_gpa_totals")
+def verify_gpa_totals(fix: bool = False) -> int:
+    """Recompute every student's GPA totals and log (optionally repair) any drift."""
+    from flask import current_app
+    from app.models.profile import verify_gpa_totals as verify
+
+    drift = verify(fix=fix)
+    for item in drift:
+        current_app.logger.warning('GPA drift for student %s: stored %s, expected %s',
+                                   item['student_id'], item['stored'], item['expected'])
+    if fix:
+        db.session.commit()
+    return len(drift)
+
+
+@celery.task(name="tasks.close_term_standing")
+def close_term_standing(term: str, restart: bool = False) -> dict:
+    """Compute academic standing for a closed term (resumes an interrupted run)."""
+    from app.services.standing_service import run_term_standing
+
+    return run_term_standing(term, restart=restart).to_dict()
+
+
+@celery.task(name="tasks.finalize_term_grades")
+def finalize_term_grades(run_id: int) -> dict:
+    """Execute a claimed grade finalization run from its last checkpoint."""
+    from app.models.finalization import GradeFinalizationRun
+    from app.services.grade_finalization import run_grade_finalization
+
+    run = db.session.get(GradeFinalizationRun, run_id)
+    if run is None or run.status == 'Completed':
+        return run.to_dict() if run else {}
+    return run_grade_finalization(run).to_dict()
+
+
+@celery.task(name="tasks.render_transcript_batch")
+def render_transcript_batch(batch_id: int) -> dict:
+    """Render a queued transcript batch into its ZIP archive."""
+    from app.models.transcript import TranscriptBatch
+    from app.services.transcript_batch import run_batch
+
+    batch = db.session.get(TranscriptBatch, batch_id)
+    if batch is None or batch.status == 'Completed':
+        return batch.to_dict() if batch else {}
+    return run_batch(batch).to_dict()
+
+
+@celery.task(name="tasks.render_official_transcript")
+def render_official_transcript(request_id: int) -> bool:
+    """Render and store the official PDF of an approved transcript request."""
+    from app.services.transcript_issuance import render_official_transcript as render
+
+    tr = render(request_id)
+    return bool(tr is not None and tr.rendered_at)
+
+
+@celery.task(name="tasks.render_pdf")
+def render_pdf(kind: str, args: list) -> str:
+    """Render a PDF job (see app.services.pdf_render); returns the PDF base64-encoded."""
+    import base64
+    from app.services.pdf_render import render
+
+    return base64.b64encode(render(kind, args)).decode('ascii')
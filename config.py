@@ -20,6 +20,39 @@ class Config:
     
     # Registration behavior
     AUTO_APPROVE_REGISTRATIONS = bool(os.environ.get('AUTO_APPROVE_REGISTRATIONS', 'False').lower() in ['true','1','yes','on'])
+    # Term-end academic standing (term GPA thresholds; see app/services/standing_service.py)
+    STANDING_DEANS_LIST_GPA = float(os.environ.get('STANDING_DEANS_LIST_GPA', '3.5'))
+    STANDING_DEANS_LIST_MIN_CREDITS = float(os.environ.get('STANDING_DEANS_LIST_MIN_CREDITS', '12'))
+    STANDING_PROBATION_GPA = float(os.environ.get('STANDING_PROBATION_GPA', '2.0'))
+    STANDING_SUSPENSION_GPA = float(os.environ.get('STANDING_SUSPENSION_GPA', '1.0'))
+    STANDING_BATCH_SIZE = int(os.environ.get('STANDING_BATCH_SIZE', '1000'))
+    # Let students on probation keep registering (only Active students may by default)
+    STANDING_PROBATION_CAN_ENROLL = os.environ.get('STANDING_PROBATION_CAN_ENROLL', 'false').lower() in ['true', '1', 'yes', 'on']
+    
+    # Term grade finalization (see app/services/grade_finalization.py)
+    GRADE_FINALIZATION_MODE = os.environ.get('GRADE_FINALIZATION_MODE', 'thread')  # thread | celery | inline
+    GRADE_FINALIZATION_SECTION_BATCH = int(os.environ.get('GRADE_FINALIZATION_SECTION_BATCH', '50'))
+    GRADE_FINALIZATION_STUDENT_BATCH = int(os.environ.get('GRADE_FINALIZATION_STUDENT_BATCH', '500'))
+    GRADE_FINALIZATION_STALE_AFTER = int(os.environ.get('GRADE_FINALIZATION_STALE_AFTER', '600'))  # seconds without progress
+    GRADE_FINALIZATION_MISSING_GRADE = os.environ.get('GRADE_FINALIZATION_MISSING_GRADE', 'I')  # grade for ungraded rows
+    
+    # Seconds a compiled grading scale is reused before it is reloaded (changes in this process clear it at once)
+    GRADING_SCALE_CACHE_TTL = int(os.environ.get('GRADING_SCALE_CACHE_TTL', '300'))
+    
+    # Seconds the term grade analytics JSON stays cached
+    GRADE_ANALYTICS_CACHE_TTL = int(os.environ.get('GRADE_ANALYTICS_CACHE_TTL', '600'))
+    
+    # Upper bound in seconds for tag-invalidated cache entries (app/services/tag_cache.py);
+    # the LOCAL bound applies to per-process caches (SimpleCache), where other workers miss the invalidation
+    TAG_CACHE_TTL = int(os.environ.get('TAG_CACHE_TTL', '3600'))
+    TAG_CACHE_LOCAL_TTL = int(os.environ.get('TAG_CACHE_LOCAL_TTL', '60'))
+
+    # Seconds a user's cached roles, permissions and status are reused (changes invalidate them at once);
+    # principals are only cached in a shared cache (Redis)
+    PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', '900'))
+    
+    # Block enrollment when prerequisites (direct or indirect) are not completed with a C or better
+    ENFORCE_PREREQUISITES = os.environ.get('ENFORCE_PREREQUISITES', 'false').lower() in ['true', '1', 'yes', 'on']
     
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
@@ -47,6 +80,32 @@ class Config:
     
     # File upload settings
     UPLOAD_FOLDER = os.path.join(basedir, 'uploads')
+    
+    # Rendered transcript PDFs, keyed by a hash of the student's academic record
+    TRANSCRIPT_CACHE_BACKEND = os.environ.get('TRANSCRIPT_CACHE_BACKEND', 'filesystem')  # filesystem | cache | none
+    TRANSCRIPT_CACHE_DIR = os.environ.get('TRANSCRIPT_CACHE_DIR') or os.path.join(basedir, 'instance', 'transcript_cache')
+    TRANSCRIPT_CACHE_TTL = int(os.environ.get('TRANSCRIPT_CACHE_TTL', '86400'))  # seconds, 'cache' backend
+
+    # Batch transcripts (graduating classes, approved requests) rendered into ZIP archives under UPLOAD_FOLDER
+    TRANSCRIPT_BATCH_MODE = os.environ.get('TRANSCRIPT_BATCH_MODE', 'thread')  # thread | celery | inline
+    TRANSCRIPT_BATCH_WORKERS = int(os.environ.get('TRANSCRIPT_BATCH_WORKERS', '0'))  # render processes, 0: one per CPU
+    TRANSCRIPT_BATCH_CHUNK = int(os.environ.get('TRANSCRIPT_BATCH_CHUNK', '50'))  # students per progress commit
+    TRANSCRIPT_BATCH_START_METHOD = os.environ.get('TRANSCRIPT_BATCH_START_METHOD', 'spawn')  # multiprocessing start method
+
+    # Official transcripts are rendered once on approval and stored under UPLOAD_FOLDER/transcripts
+    TRANSCRIPT_ISSUANCE_MODE = os.environ.get('TRANSCRIPT_ISSUANCE_MODE', 'thread')  # thread | celery | inline
+
+    # PDFs for web requests are rendered away from the web workers (app/services/pdf_render.py)
+    PDF_RENDER_MODE = os.environ.get('PDF_RENDER_MODE', 'pool')  # pool | celery | inline
+    PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', '2'))  # render processes per web worker ('pool')
+    PDF_RENDER_TIMEOUT = int(os.environ.get('PDF_RENDER_TIMEOUT', '60'))  # seconds per job before it is killed
+    PDF_RENDER_MEMORY_MB = int(os.environ.get('PDF_RENDER_MEMORY_MB', '1024'))  # address space per render process, 0: no cap
+    PDF_RENDER_MAX_JOBS = int(os.environ.get('PDF_RENDER_MAX_JOBS', '200'))  # jobs before a render process is replaced
+    PDF_RENDER_QUEUE = int(os.environ.get('PDF_RENDER_QUEUE', '16'))  # waiting jobs per web worker before new ones get 503
+    PDF_RENDER_WAIT = float(os.environ.get('PDF_RENDER_WAIT', '5'))  # seconds a request waits before handing out the job
+    PDF_RENDER_START_METHOD = os.environ.get('PDF_RENDER_START_METHOD', 'spawn')  # multiprocessing start method
+    PDF_RENDER_JOB_DIR = os.environ.get('PDF_RENDER_JOB_DIR') or os.path.join(basedir, 'instance', 'pdf_jobs')
+    PDF_RENDER_RESULT_TTL = int(os.environ.get('PDF_RENDER_RESULT_TTL', '900'))  # seconds finished jobs are kept
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt', 'png', 'jpg', 'jpeg', 'gif', 'zip'}
     
@@ -69,6 +128,21 @@ class Config:
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or REDIS_URL
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or REDIS_URL
     
+    # Queued enrollment for registration rushes (see app/services/enrollment_queue.py)
+    ENROLLMENT_QUEUE_ENABLED = os.environ.get('ENROLLMENT_QUEUE_ENABLED', 'false').lower() in ['true', '1', 'yes', 'on']
+    ENROLLMENT_QUEUE_BACKEND = os.environ.get('ENROLLMENT_QUEUE_BACKEND', 'auto')  # auto | redis | local
+    ENROLLMENT_QUEUE_WORKERS = int(os.environ.get('ENROLLMENT_QUEUE_WORKERS', 4))
+    ENROLLMENT_QUEUE_RUN_WORKERS = os.environ.get('ENROLLMENT_QUEUE_RUN_WORKERS', 'true').lower() in ['true', '1', 'yes', 'on']
+    ENROLLMENT_QUEUE_BATCH_SIZE = int(os.environ.get('ENROLLMENT_QUEUE_BATCH_SIZE', 25))
+    ENROLLMENT_QUEUE_RESULT_TTL = 3600
+
+    # Transactional outbox (see app/services/outbox_service.py)
+    OUTBOX_DISPATCH_MODE = os.environ.get('OUTBOX_DISPATCH_MODE', 'thread')  # thread | celery | worker | manual
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+    OUTBOX_RETRY_BACKOFF = int(os.environ.get('OUTBOX_RETRY_BACKOFF', 30))  # seconds, doubled per attempt
+    OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', 5))
+
     # Rate limiting
     # Flask-Limiter 3.x uses RATELIMIT_STORAGE_URI
     RATELIMIT_STORAGE_URI = REDIS_URL
@@ -127,6 +201,28 @@ class TestingConfig(Config):
     RATELIMIT_STORAGE_URI = 'memory://'
     RATELIMIT_DEFAULT = "1000 per minute"
 
+    # Queued enrollment runs in-process and is drained explicitly by tests
+    ENROLLMENT_QUEUE_BACKEND = 'local'
+    ENROLLMENT_QUEUE_RUN_WORKERS = False
+
+    # Outbox is dispatched explicitly by tests
+    OUTBOX_DISPATCH_MODE = 'manual'
+
+    # Grade finalization runs in the request
+    GRADE_FINALIZATION_MODE = 'inline'
+
+    # Tests opt in to a transcript store with a temporary directory
+    TRANSCRIPT_CACHE_BACKEND = 'none'
+
+    # Batch transcripts render in the request, in-process
+    TRANSCRIPT_BATCH_MODE = 'inline'
+    TRANSCRIPT_BATCH_WORKERS = 1
+    TRANSCRIPT_ISSUANCE_MODE = 'inline'
+
+    # PDFs render in the request; jobs go to a temporary directory per app
+    PDF_RENDER_MODE = 'inline'
+    PDF_RENDER_JOB_DIR = None
+
 
 class ProductionConfig(Config):
     """Production configuration."""
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Set waitlisted_at on waitlisted enrollments that predate it being required
+(from enrolled_at, else created_at). Waitlist order and positions read
+waitlisted_at alone so the idx_enrollment_waitlist_order index serves them;
+run this once after upgrading an existing database.
+
+Usage:
+  FLASK_CONFIG=production python scripts/backfill_waitlisted_at.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.models.enrollment import backfill_waitlisted_at  # noqa: E402
+
+
+def main():
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        rows = backfill_waitlisted_at()
+        db.session.commit()
+        print(f"Backfilled waitlisted_at on {rows} enrollments.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF rendering: time and peak memory per document type at realistic
+data sizes, so regressions in the PDF paths show up.
+
+Renders synthetic data (no database needed) through the same renderers the
+routes use: transcripts, the three admin reports, course rosters and proof of
+registration. Reports the one-off cost of building the shared templates, then
+the median render time over --runs and the peak traced memory of one render
+per type. --save writes the results as JSON; --compare checks them against a
+saved run and exits non-zero when a type got slower or bigger than
+--tolerance allows.
+
+Usage:
+  python scripts/bench_pdf_rendering.py [--runs 5] [--scale 1.0] [--only transcript,roster]
+                                        [--save bench.json] [--compare bench.json] [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services import pdf_reports  # noqa: E402
+from app.services.pdf_templates import pdf_templates  # noqa: E402
+from app.services.transcript_service import TranscriptService  # noqa: E402
+from scripts.bench_transcript_batch import build_data  # noqa: E402
+
+TERMS = ['Fall 2024', 'Spring 2025', 'Summer 2025', 'Fall 2025']
+
+
+def cases(scale, rng):
+    """Document type -> (renderer, args) at realistic sizes times `scale`."""
+    n = lambda count: max(1, int(count * scale))  # noqa: E731
+    legend = ['A+ = 4.0', 'A = 4.0', 'A- = 3.7', 'B+ = 3.3', 'B = 3.0', 'B- = 2.7', 'C+ = 2.3', 'C = 2.0',
+              'C- = 1.7', 'D+ = 1.3', 'D = 1.0', 'D- = 0.7', 'F = 0.0']
+    course = lambda i: (f"CS{100 + i % 400}", f"Course Title Number {i} With Some Length")  # noqa: E731
+    return {
+        # A senior with eight terms of courses
+        'transcript': (TranscriptService.render_transcript, (build_data(1, n(8), rng, legend), True)),
+        # 25 departments with 40 courses each
+        'courses_by_department': (pdf_reports.render_courses_by_department, ([
+            (f"Department {d}", [(*course(i), rng.choice([3, 4]), i % 7 != 0) for i in range(n(40))])
+            for d in range(25)
+        ],)),
+        # 3000 sections
+        'students_per_course': (pdf_reports.render_students_per_course, ([
+            (course(i)[0], f"{i % 5 + 1:02d}", TERMS[i % 4], rng.randint(0, 120)) for i in range(n(3000))
+        ],)),
+        # 400 instructors with up to six sections
+        'instructors_with_courses': (pdf_reports.render_instructors_with_courses, ([
+            (f"Instructor {i}", f"Department {i % 25}",
+             [f"{course(i + k)[0]}-0{k + 1} ({TERMS[k % 4]})" for k in range(rng.randint(0, 6))])
+            for i in range(n(400))
+        ],)),
+        # A 300 student lecture
+        'roster': (pdf_reports.render_roster, (
+            "CS101 - Introduction to Computer Science", "Section 01 • Fall 2025 • Instructor: Jane Doe",
+            [(f"S2025{i:05d}", f"Student {i}", f"student{i}@university.edu", '2025-08-20', rng.choice('ABCDF'))
+             for i in range(n(300))],
+        )),
+        # Six courses in the current term
+        'registration_proof': (pdf_reports.render_registration_proof, (
+            [("Student Name:", "Test Student"), ("Student Number:", "S202500001"),
+             ("Program:", "Computer Science"), ("Academic Status:", "Active"), ("Date Issued:", "January 01, 2026")],
+            [('Fall 2025', [(*course(i), '01', '3', 'Jane Doe') for i in range(n(6))])],
+            n(6) * 3,
+        )),
+    }
+
+
+def measure(render, args, runs):
+    times = []
+    size = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        size = len(render(*args).getvalue())
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    render(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'median_ms': statistics.median(times) * 1000, 'peak_kb': peak / 1024, 'pdf_kb': size / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--only', help='comma-separated document types')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save')
+    parser.add_argument('--compare')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    pdf_templates()
+    print(f"shared templates (once per process): {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+    selected = cases(args.scale, random.Random(args.seed))
+    if args.only:
+        selected = {k: v for k, v in selected.items() if k in args.only.split(',')}
+    results = {}
+    for name, (render, render_args) in selected.items():
+        render(*render_args)  # warm up
+        results[name] = measure(render, render_args, args.runs)
+        r = results[name]
+        print(f"{name:26s} {r['median_ms']:8.1f} ms  peak {r['peak_kb']:9.1f} KiB  pdf {r['pdf_kb']:8.1f} KiB")
+
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump({'scale': args.scale, 'results': results}, fh, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)['results']
+        regressions = []
+        for name, r in results.items():
+            base = baseline.get(name)
+            if not base:
+                continue
+            for metric in ('median_ms', 'peak_kb'):
+                if r[metric] > base[metric] * (1 + args.tolerance):
+                    regressions.append(f"{name} {metric}: {base[metric]:.1f} -> {r[metric]:.1f}")
+        if regressions:
+            print("Regressions beyond {:.0%}:".format(args.tolerance))
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark schedule conflict detection: legacy JSON/strptime comparison vs. the
+precompiled minute-of-week bitmaps on CourseSection.
+
+Builds a synthetic term (no database needed), times pairwise checks on a random
+sample of section pairs with both implementations, and times a full term
+conflict matrix with the bitmap path (the legacy figure is extrapolated from
+its per-pair rate, since running it for every pair takes minutes).
+
+Usage:
+  python scripts/bench_schedule_conflicts.py [--sections 5000] [--pairs 200000] [--seed 42]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.course import CourseSection, conflict_matrix  # noqa: E402
+
+TERM = 'Fall 2025'
+DAY_PATTERNS = [['Mon', 'Wed', 'Fri'], ['Tue', 'Thu'], ['Mon', 'Wed'], ['Mon'], ['Tue'],
+                ['Wed'], ['Thu'], ['Fri'], ['Sat']]
+DURATIONS = [50, 75, 110, 170]
+
+
+def legacy_conflicts_with(a, b):
+    """The pre-bitmap CourseSection.conflicts_with implementation."""
+    if a.term != b.term:
+        return False
+    if not a.schedule or not b.schedule:
+        return False
+    my_schedule = a.get_meeting_times()
+    other_schedule = b.get_meeting_times()
+    my_days = set(my_schedule.get('days', []))
+    other_days = set(other_schedule.get('days', []))
+    if not my_days.intersection(other_days):
+        return False
+    my_start = datetime.strptime(my_schedule.get('start', '00:00'), '%H:%M').time()
+    my_end = datetime.strptime(my_schedule.get('end', '00:00'), '%H:%M').time()
+    other_start = datetime.strptime(other_schedule.get('start', '00:00'), '%H:%M').time()
+    other_end = datetime.strptime(other_schedule.get('end', '00:00'), '%H:%M').time()
+    return not (my_end <= other_start or other_end <= my_start)
+
+
+def build_term(n, rng):
+    sections = []
+    for i in range(n):
+        start = rng.randrange(8 * 60, 20 * 60, 30)
+        end = min(start + rng.choice(DURATIONS), 23 * 60 + 59)
+        section = CourseSection(
+            section_code=f"{i:04d}",
+            term=TERM,
+            capacity=30,
+            schedule={
+                'days': rng.choice(DAY_PATTERNS),
+                'start': f"{start // 60:02d}:{start % 60:02d}",
+                'end': f"{end // 60:02d}:{end % 60:02d}",
+            },
+        )
+        section.id = i + 1
+        sections.append(section)
+    return sections
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sections', type=int, default=5000)
+    parser.add_argument('--pairs', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sections = build_term(args.sections, rng)
+    pairs = [(rng.choice(sections), rng.choice(sections)) for _ in range(args.pairs)]
+    total_pairs = args.sections * (args.sections - 1) // 2
+
+    _, compile_time = timed(lambda: [s.occupancy for s in sections])
+    legacy, legacy_time = timed(lambda: [legacy_conflicts_with(a, b) for a, b in pairs])
+    bitmap, bitmap_time = timed(lambda: [a.conflicts_with(b) for a, b in pairs])
+    mismatches = sum(1 for x, y in zip(legacy, bitmap) if x != y)
+
+    matrix, matrix_time = timed(lambda: conflict_matrix(sections))
+    conflict_pairs = sum(len(v) for v in matrix.values()) // 2
+    legacy_matrix_estimate = legacy_time / args.pairs * total_pairs
+
+    print(f"sections: {args.sections}  sampled pairs: {args.pairs}  all pairs: {total_pairs}")
+    print(f"bitmap compile (all sections):    {compile_time * 1000:9.1f} ms")
+    print(f"pairwise legacy:                  {legacy_time * 1000:9.1f} ms "
+          f"({legacy_time / args.pairs * 1e6:.2f} us/pair)")
+    print(f"pairwise bitmap:                  {bitmap_time * 1000:9.1f} ms "
+          f"({bitmap_time / args.pairs * 1e6:.2f} us/pair)")
+    print(f"pairwise speedup:                 {legacy_time / bitmap_time:9.1f}x")
+    print(f"mismatches on sample:             {mismatches:9d}")
+    print(f"term conflict matrix (bitmap):    {matrix_time * 1000:9.1f} ms, {conflict_pairs} conflicting pairs")
+    print(f"term conflict matrix (legacy est): {legacy_matrix_estimate:8.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch transcript rendering throughput against the number of worker
+processes.
+
+Builds synthetic transcript data (no database needed), renders it through the
+same pool and ZIP writer as `run_batch` once per worker count, and reports
+transcripts per second, speedup over one process and archive size.
+
+Usage:
+  python scripts/bench_transcript_batch.py [--students 200] [--terms 8] [--workers 1,2,4,8] [--seed 42]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.grading_scale import get_scale  # noqa: E402
+from app.services.transcript_batch import render_jobs  # noqa: E402
+from app.services.transcript_data import TranscriptCourse, TranscriptData, build_term  # noqa: E402
+
+LETTERS = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'F', 'W', None]
+
+
+def build_data(student_id, terms, rng, legend):
+    term_list = []
+    for t in range(terms):
+        year, spring = 2018 + t // 2, t % 2 == 0
+        courses = []
+        for c in range(rng.randint(3, 6)):
+            grade = rng.choice(LETTERS)
+            courses.append(TranscriptCourse(
+                code=f"CS{rng.randint(100, 499)}",
+                title=f"Synthetic Course {c} With A Reasonably Long Title",
+                credits=rng.choice([1, 3, 3, 4]),
+                grade=grade,
+                grade_points=None if grade in (None, 'W') else round(rng.uniform(0, 4), 1),
+                status='Withdrawn' if grade == 'W' else ('Completed' if grade else 'Enrolled'),
+            ))
+        term_list.append(build_term(f"{'Spring' if spring else 'Fall'} {year}",
+                                    date(year, 1 if spring else 9, 10), date(year, 5 if spring else 12, 15),
+                                    courses))
+    return TranscriptData(
+        student={
+            'id': student_id, 'name': f"Student {student_id}", 'last_name': f"Student{student_id}",
+            'student_number': f"S{student_id:07d}", 'birth_date': 'January 01, 2000',
+            'major': 'Computer Science', 'academic_status': 'Active',
+        },
+        summary={'gpa': round(rng.uniform(1.5, 4.0), 2), 'total_credits_earned': terms * 12},
+        terms=tuple(reversed(term_list)),
+        grading_scale=tuple(legend),
+    )
+
+
+def run(jobs, workers, path):
+    started = time.perf_counter()
+    rendered = failed = 0
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as archive:
+        for _, name, pdf, error in render_jobs(iter(jobs), workers, 'spawn'):
+            if error is None:
+                archive.writestr(name, pdf)
+                rendered += 1
+            else:
+                failed += 1
+    return rendered, failed, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=200)
+    parser.add_argument('--terms', type=int, default=8)
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    legend = get_scale().legend()
+    jobs = [(i, f"transcript_official_{i:05d}.pdf", build_data(i, args.terms, rng, legend), True)
+            for i in range(1, args.students + 1)]
+
+    print(f"students: {args.students}  terms each: {args.terms}  CPUs: {os.cpu_count()}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in [int(w) for w in args.workers.split(',')]:
+            path = os.path.join(tmp, f"batch_{workers}.zip")
+            rendered, failed, elapsed = run(jobs, workers, path)
+            baseline = baseline or elapsed
+            print(f"workers {workers:2d}: {elapsed:7.2f} s  {rendered / elapsed:7.1f} transcripts/s  "
+                  f"speedup {baseline / elapsed:4.1f}x  failed {failed}  "
+                  f"archive {os.path.getsize(path) / 1e6:6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
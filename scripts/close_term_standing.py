@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Close a term: compute every student's term GPA, assign dean's list,
+probation or suspension and update academic_status. Thresholds come from the
+STANDING_* settings. Safe to interrupt: running it again resumes from the
+last committed batch. --restart recomputes the term from the beginning.
+
+Usage:
+  FLASK_CONFIG=production python scripts/close_term_standing.py "Spring 2025" [--restart]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.services.standing_service import run_term_standing  # noqa: E402
+
+
+def _report(run):
+    print(f"  {run.processed}/{run.total} students ({run.percent_complete}%)", flush=True)
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(args) != 1:
+        print(__doc__)
+        sys.exit(2)
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        db.create_all()  # creates the standing tables on databases that predate them
+        print(f"Closing {args[0]}...")
+        run = run_term_standing(args[0], restart='--restart' in sys.argv[1:], progress=_report)
+        print(f"{run.status}: {run.processed} students; " +
+              ", ".join(f"{k}: {v}" for k, v in sorted((run.counts or {}).items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Run the queued-enrollment worker pool in its own process.
+
+Use with ENROLLMENT_QUEUE_ENABLED=true and Redis, and set
+ENROLLMENT_QUEUE_RUN_WORKERS=false on the web processes so they only enqueue.
+ENROLLMENT_QUEUE_WORKERS must be the same everywhere (it defines the shards).
+Several copies may run; the per-shard lock keeps one active drainer per shard.
+
+Usage:
+  FLASK_CONFIG=production python scripts/enrollment_worker.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app  # noqa: E402
+from app.services.enrollment_queue import enrollment_queue, RedisQueueBackend  # noqa: E402
+
+
+def main():
+    create_app(os.environ.get('FLASK_CONFIG', 'production'))
+    if not isinstance(enrollment_queue.backend, RedisQueueBackend):
+        print("Redis is not available; the local backend only serves the web process that owns it.")
+        sys.exit(1)
+    print(f"Draining enrollment queue with {enrollment_queue.workers} worker(s). Ctrl+C to stop.")
+    enrollment_queue.run_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Finalize a term's grades: remaining Enrolled rows get their final status,
+grades are locked, students are notified and GPA / earned credits are
+recomputed for everyone affected. Safe to interrupt: running it again resumes
+from the last committed batch. --restart starts a new run (already locked
+sections are not announced again).
+
+Usage:
+  FLASK_CONFIG=production python scripts/finalize_term_grades.py "Spring 2025" [--restart]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.services.grade_finalization import finalize_term  # noqa: E402
+
+
+def _report(run):
+    print(f"  {run.phase}: {run.sections_done}/{run.total_sections} sections, "
+          f"{run.students_done}/{run.total_students} students ({run.percent_complete}%)", flush=True)
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(args) != 1:
+        print(__doc__)
+        sys.exit(2)
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        db.create_all()  # creates the finalization table on databases that predate it
+        print(f"Finalizing grades for {args[0]}...")
+        run = finalize_term(args[0], restart='--restart' in sys.argv[1:], progress=_report)
+        print(f"{run.status}: {run.sections_done} sections, {run.students_done} students; " +
+              ", ".join(f"{k}: {v}" for k, v in sorted((run.counts or {}).items())))
+
+
+if __name__ == '__main__':
+    main()
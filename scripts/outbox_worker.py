@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Deliver outbox messages (in-app notifications and e-mail) from a standalone process.
+
+Use with OUTBOX_DISPATCH_MODE=worker on the web processes so they only write
+outbox rows. Several workers may run; rows are claimed atomically.
+
+Usage:
+  python scripts/outbox_worker.py [--once] [--interval 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app  # noqa: E402
+from app.services.outbox_service import dispatch_pending  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--once', action='store_true', help='drain what is due and exit')
+    parser.add_argument('--interval', type=float, default=None, help='seconds between polls')
+    args = parser.parse_args()
+
+    app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+    interval = args.interval or app.config.get('OUTBOX_POLL_INTERVAL', 5)
+    with app.app_context():
+        while True:
+            stats = dispatch_pending()
+            if any(stats.values()):
+                print(f"sent={stats['sent']} retried={stats['retried']} dead={stats['dead']}")
+            if args.once:
+                break
+            time.sleep(interval)
+
+
+if __name__ == '__main__':
+    main()
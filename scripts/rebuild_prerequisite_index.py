@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Rebuild the prerequisite closure table and the per-student completed-course
+index from courses and enrollments. Run once after upgrading an existing
+database, or any time the two tables are suspected to be out of sync.
+
+Usage:
+  FLASK_CONFIG=production python scripts/rebuild_prerequisite_index.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.models.course import rebuild_prerequisite_closure  # noqa: E402
+from app.models.enrollment import refresh_completed_courses  # noqa: E402
+
+
+def main():
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        db.create_all()  # creates the two index tables on databases that predate them
+        rows = rebuild_prerequisite_closure()
+        refresh_completed_courses()
+        db.session.commit()
+        print(f"Rebuilt prerequisite closure ({rows} rows) and completed-course index.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Rebuild the per-student term load aggregates (student_term_loads) from
+enrollments. The aggregates are kept current on every enrollment change; run
+this after upgrading an existing database, after editing course credits, or
+on a schedule (also available as the `tasks.reconcile_term_loads` Celery task)
+to repair any drift.
+
+Usage:
+  FLASK_CONFIG=production python scripts/reconcile_term_loads.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.models.term_load import rebuild_term_loads  # noqa: E402
+
+
+def main():
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        db.create_all()  # creates student_term_loads on databases that predate it
+        rows = rebuild_term_loads()
+        db.session.commit()
+        print(f"Rebuilt {rows} student term load rows.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Recompute grade points and pass/fail status of numeric percentage grades on
+their course's grading scale (the institution default unless the course has
+its own). Run it after changing a scale, and once after upgrading a database
+graded before numeric grades counted towards GPA.
+
+Usage:
+  FLASK_CONFIG=production python scripts/rescore_numeric_grades.py [COURSE_ID ...]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.services.grading_scale_service import rescore_numeric_grades  # noqa: E402
+
+
+def main():
+    try:
+        course_ids = [int(a) for a in sys.argv[1:]] or None
+    except ValueError:
+        print(__doc__)
+        sys.exit(2)
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        db.create_all()  # creates the grading scale tables on databases that predate them
+        changed = rescore_numeric_grades(course_ids)
+        db.session.commit()
+        print(f"{changed} enrollment(s) re-scored.")
+
+
+if __name__ == '__main__':
+    main()
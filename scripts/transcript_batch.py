@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Render transcripts for many students into one ZIP archive under
+UPLOAD_FOLDER/transcript_batches: every approved transcript request
+(--approved, marked issued once the archive is complete) or a graduating
+class (--graduation-year). Prints progress per committed chunk.
+
+Usage:
+  FLASK_CONFIG=production python scripts/transcript_batch.py --approved [--workers 8]
+  FLASK_CONFIG=production python scripts/transcript_batch.py --graduation-year 2025 [--unofficial] [--workers 8]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.services.transcript_batch import batch_path, create_batch, run_batch, worker_count  # noqa: E402
+
+
+def _report(batch):
+    print(f"  {batch.processed}/{batch.total} transcripts ({batch.percent_complete}%), "
+          f"{batch.failed} failed", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--approved', action='store_true', help='all approved transcript requests')
+    parser.add_argument('--graduation-year', type=int)
+    parser.add_argument('--unofficial', action='store_true')
+    parser.add_argument('--workers', type=int, help='render processes (default TRANSCRIPT_BATCH_WORKERS)')
+    args = parser.parse_args()
+    if not args.approved and args.graduation_year is None:
+        print(__doc__)
+        sys.exit(2)
+
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        db.create_all()  # creates the batch table on databases that predate it
+        try:
+            batch = create_batch(all_approved=args.approved, graduation_year=args.graduation_year,
+                                 official=not args.unofficial)
+        except ValueError as ex:
+            print(ex)
+            sys.exit(1)
+        print(f"Batch {batch.id}: {batch.total} transcripts, {worker_count(args.workers)} workers...")
+        batch = run_batch(batch, workers=args.workers, progress=_report)
+        print(f"{batch.status}: {batch.processed - batch.failed} rendered, {batch.failed} failed -> {batch_path(batch)}")
+        for student_id, error in sorted((batch.errors or {}).items()):
+            print(f"  student {student_id}: {error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Recompute every student's GPA totals (quality points and graded credits) from
+enrollments and report any drift from the running totals stored on the
+profile. Pass --fix to overwrite drifted values; run it with --fix once after
+upgrading an existing database to initialise the totals.
+
+Usage:
+  FLASK_CONFIG=production python scripts/verify_gpa_totals.py [--fix]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.models.profile import verify_gpa_totals  # noqa: E402
+
+
+def main():
+    fix = '--fix' in sys.argv[1:]
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        drift = verify_gpa_totals(fix=fix)
+        for item in drift:
+            print(f"student {item['student_id']}: stored {item['stored']} expected {item['expected']}")
+        if fix and drift:
+            db.session.commit()
+        print(f"{len(drift)} student(s) with drift{' (fixed)' if fix and drift else ''}.")
+        sys.exit(1 if drift and not fix else 0)
+
+
+if __name__ == '__main__':
+    main()
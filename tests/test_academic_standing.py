@@ -0,0 +1,66 @@
+import pytest
+from app.models import db
+from app.models.enrollment import Enrollment
+from app.models.standing import StandingRun, TermStanding
+from app.services.grade_service import GradeService
+from app.services.standing_service import run_term_standing
+from tests.helpers import create_student, seed_simple_course
+
+
+def _students_with_grades(grades):
+    section = seed_simple_course()  # 3 credits
+    section.capacity = len(grades)
+    profiles = []
+    for i, grade in enumerate(grades):
+        profile = create_student(f"standing{i}@test.edu").student_profile
+        e = Enrollment(student_id=profile.id, course_section_id=section.id, status="Enrolled")
+        db.session.add(e)
+        db.session.flush()
+        e.set_grade(grade)
+        profiles.append(profile)
+    db.session.commit()
+    return section, profiles
+
+
+def test_standing_run_resumes_after_interruption(app, app_context):
+    app.config["STANDING_DEANS_LIST_MIN_CREDITS"] = 3
+    section, (honors, good, low, failing) = _students_with_grades(["A", "B", "D", "F"])
+    assert GradeService.calculate_term_gpa(low, section.term) == 1.0
+
+    def interrupt(run):
+        raise RuntimeError("worker killed")
+
+    with pytest.raises(RuntimeError):
+        run_term_standing(section.term, batch_size=2, progress=interrupt)
+    run = StandingRun.query.one()
+    assert (run.status, run.processed, run.total) == ("Failed", 2, 4)
+    assert run.last_error == "worker killed"
+
+    seen = []
+    run = run_term_standing(section.term, batch_size=2, progress=lambda r: seen.append(r.processed))
+    assert StandingRun.query.count() == 1
+    assert (run.status, run.processed, seen) == ("Completed", 4, [4])
+    assert run.counts == {"Dean's List": 1, "Good Standing": 1, "Probation": 1, "Suspension": 1}
+
+    db.session.expire_all()
+    assert [p.academic_status for p in (honors, good, low, failing)] == ["Active", "Active", "Probation", "Suspended"]
+    assert TermStanding.query.filter_by(student_id=honors.id).one().standing == "Dean's List"
+
+    # A restart re-evaluates from the pre-close status, so probation is not escalated
+    run_term_standing(section.term, restart=True)
+    db.session.expire_all()
+    assert low.academic_status == "Probation"
+    assert StandingRun.query.count() == 2
+
+
+def test_probation_enrolls_only_when_configured(app, app_context):
+    section, (student,) = _students_with_grades(["D"])
+    student.academic_status = "Probation"
+    db.session.commit()
+    other = seed_simple_course()
+    ok, errors, _ = Enrollment.can_enroll(student, other)
+    assert "Academic status is Probation" in errors
+
+    app.config["STANDING_PROBATION_CAN_ENROLL"] = True
+    ok, errors, _ = Enrollment.can_enroll(student, other)
+    assert not any("Academic status" in e for e in errors)
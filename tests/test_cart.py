@@ -0,0 +1,103 @@
+from datetime import date
+from app.models import db
+from app.models.cart import CartItem
+from app.models.course import Course, CourseSection
+from app.models.enrollment import Enrollment
+from tests.helpers import create_student, seed_simple_course, login_user
+
+
+def _api_login(client, email, password):
+    r = client.post(
+        "/api/v1/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert r.status_code == 200
+    return r.get_json()["access_token"]
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _course(code):
+    seed_simple_course()
+    course = Course(code=code, title=code, department_id=Course.query.first().department_id, credits=3.0)
+    db.session.add(course)
+    db.session.commit()
+    return course
+
+
+def _section(course, days, start, end, capacity=30, code="01"):
+    sec = CourseSection(course_id=course.id, section_code=code, term="Spring 2025", capacity=capacity,
+                        schedule={"days": days, "start": start, "end": end},
+                        start_date=date(2025, 1, 1), end_date=date(2025, 5, 1))
+    db.session.add(sec)
+    db.session.commit()
+    return sec
+
+
+def test_cart_validates_together_and_submits_all_or_nothing(client, app_context):
+    math = _section(_course("MATH101"), ["Tue"], "09:00", "10:00")
+    phys = _section(_course("PHYS101"), ["Tue"], "09:30", "10:30")
+    chem = _section(_course("CHEM101"), ["Wed"], "09:00", "10:00")
+    user = create_student("cart@test.edu")
+    token = _api_login(client, user.email, "pass12345")
+
+    for sec in (math, phys, chem):
+        r = client.post("/api/v1/cart/items", json={"course_section_id": sec.id}, headers=_auth(token))
+        assert r.status_code == 201
+    assert client.post("/api/v1/cart/items", json={"course_section_id": math.id}, headers=_auth(token)).status_code == 400
+
+    r = client.post("/api/v1/cart/validate", headers=_auth(token))
+    data = r.get_json()
+    assert data["ok"] is False
+    results = {x["course_section_id"]: x for x in data["results"]}
+    assert results[math.id]["ok"] and results[chem.id]["ok"]
+    # The conflict is between two cart sections, not with an existing enrollment
+    assert results[phys.id]["errors"] == ["Time conflict with: MATH101-01"]
+
+    r = client.post("/api/v1/cart/submit", headers=_auth(token))
+    assert r.status_code == 400
+    assert Enrollment.query.count() == 0
+
+    assert client.delete(f"/api/v1/cart/items/{phys.id}", headers=_auth(token)).status_code == 204
+    r = client.post("/api/v1/cart/submit", headers=_auth(token))
+    assert r.status_code == 201
+    assert {e["course_section_id"] for e in r.get_json()["enrollments"]} == {math.id, chem.id}
+    assert CartItem.query.count() == 0
+    db.session.expire_all()
+    assert db.session.get(CourseSection, math.id).enrolled_count == 1
+    assert db.session.get(CourseSection, chem.id).enrolled_count == 1
+
+
+def test_cart_submit_rolls_back_when_a_section_is_full(client, app_context):
+    full = seed_simple_course()  # capacity 1
+    other = _section(_course("ART101"), ["Fri"], "09:00", "10:00")
+    taken_by = create_student("first@test.edu").student_profile
+    e = Enrollment(student_id=taken_by.id, course_section_id=full.id)
+    db.session.add(e)
+    e.enroll()
+    db.session.commit()
+
+    user = create_student("late@test.edu")
+    token = _api_login(client, user.email, "pass12345")
+    r = client.post("/api/v1/cart/submit", json={"course_section_ids": [other.id, full.id]}, headers=_auth(token))
+    assert r.status_code == 400
+    results = {x["course_section_id"]: x for x in r.get_json()["results"]}
+    assert "Course section is full" in results[full.id]["errors"]
+    assert Enrollment.query.filter_by(student_id=user.student_profile.id).count() == 0
+    assert db.session.get(CourseSection, other.id).enrolled_count == 0
+
+
+def test_cart_page(client, app_context):
+    section = seed_simple_course()
+    user = create_student("cartweb@test.edu")
+    login_user(client, user.email, "pass12345")
+    r = client.post(f"/student/cart/add/{section.id}", follow_redirects=False)
+    assert r.status_code == 302
+    r = client.get("/student/cart")
+    assert r.status_code == 200
+    assert b"CS101-01" in r.data
+    r = client.post("/student/cart/submit")
+    assert r.status_code == 302
+    assert Enrollment.query.filter_by(student_id=user.student_profile.id, status="Enrolled").count() == 1
@@ -0,0 +1,118 @@
+"""
+Stress test for atomic seat claims: many threads enroll (and some drop) in one
+section concurrently against a file-backed SQLite database, then the section
+counters are compared with the real enrollment rows.
+"""
+import os
+import threading
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from config import TestingConfig
+from app import create_app
+from app.models import db
+from app.models.user import User
+from app.models.profile import StudentProfile
+from app.models.course import Department, Course, CourseSection
+from app.models.enrollment import Enrollment
+
+STUDENTS = int(os.environ.get('STRESS_ENROLLMENTS', '2000'))
+THREADS = 16
+CAPACITY = 50
+
+
+@pytest.fixture()
+def file_app(tmp_path, monkeypatch):
+    # In-memory SQLite shares one connection across threads; use a real file instead
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'stress.db'}")
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_ENGINE_OPTIONS', {'connect_args': {'timeout': 60}})
+    application = create_app('testing')
+    with application.app_context():
+        @event.listens_for(db.engine, 'connect')
+        def _fast_sqlite(dbapi_connection, _record):
+            dbapi_connection.execute('PRAGMA journal_mode=WAL')
+            dbapi_connection.execute('PRAGMA synchronous=OFF')
+
+        db.create_all()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+def _seed(count):
+    dep = Department(code="CS", name="Computer Science")
+    db.session.add(dep)
+    db.session.flush()
+    course = Course(code="CS101", title="Intro", department_id=dep.id, credits=3.0)
+    db.session.add(course)
+    db.session.flush()
+    section = CourseSection(course_id=course.id, section_code="01", term="Spring 2025", capacity=CAPACITY,
+                            start_date=date(2025, 1, 1), end_date=date(2025, 5, 1))
+    db.session.add(section)
+    users = [User(email=f"stress{i}@test.edu", first_name="S", last_name=str(i), password_hash="!")
+             for i in range(count)]
+    db.session.add_all(users)
+    db.session.flush()
+    profiles = [StudentProfile(user_id=u.id, student_number=f"X{u.id:06d}", enrollment_year=2025) for u in users]
+    db.session.add_all(profiles)
+    db.session.commit()
+    return section.id, [p.id for p in profiles]
+
+
+def _with_retry(fn):
+    for _ in range(20):
+        try:
+            fn()
+            db.session.commit()
+            return True
+        except OperationalError:
+            db.session.rollback()
+    return False
+
+
+def test_concurrent_enrollments_never_oversell(file_app):
+    section_id, student_ids = _seed(STUDENTS)
+    errors = []
+
+    def worker(chunk, drop_every):
+        with file_app.app_context():
+            try:
+                for n, student_id in enumerate(chunk):
+                    def enroll():
+                        e = Enrollment(student_id=student_id, course_section_id=section_id)
+                        e.enroll()
+                        db.session.add(e)
+                    assert _with_retry(enroll)
+                    if drop_every and n % drop_every == 0:
+                        def drop():
+                            e = Enrollment.query.filter_by(student_id=student_id, course_section_id=section_id).one()
+                            e.drop(reason='stress')
+                        assert _with_retry(drop)
+            except Exception as ex:  # pragma: no cover - surfaced by the assertion below
+                errors.append(ex)
+            finally:
+                db.session.remove()
+
+    chunks = [student_ids[i::THREADS] for i in range(THREADS)]
+    threads = [threading.Thread(target=worker, args=(chunk, 7 if i % 2 else 0)) for i, chunk in enumerate(chunks)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+
+    db.session.expire_all()
+    section = db.session.get(CourseSection, section_id)
+    enrolled = Enrollment.query.filter_by(course_section_id=section_id, status='Enrolled').count()
+    waitlisted = Enrollment.query.filter_by(course_section_id=section_id, status='Waitlisted').count()
+    total = Enrollment.query.filter_by(course_section_id=section_id).count()
+
+    assert total == STUDENTS
+    assert enrolled <= CAPACITY
+    assert section.enrolled_count == enrolled
+    assert section.waitlist_count == waitlisted
+    # Drops free seats that are refilled from the waitlist, so the section stays full
+    assert enrolled == CAPACITY
@@ -0,0 +1,98 @@
+from datetime import date
+from app.models import db
+from app.models.course import Course, CourseSection
+from app.models.enrollment import Enrollment
+from app.services.eligibility_service import EligibilityContext
+from tests.helpers import create_student, seed_simple_course
+
+
+def _api_login(client, email, password):
+    r = client.post(
+        "/api/v1/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert r.status_code == 200
+    return r.get_json()["access_token"]
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _section(course, code, days, start, end, capacity=30):
+    sec = CourseSection(course_id=course.id, section_code=code, term="Spring 2025", capacity=capacity,
+                        schedule={"days": days, "start": start, "end": end},
+                        start_date=date(2025, 1, 1), end_date=date(2025, 5, 1))
+    db.session.add(sec)
+    db.session.commit()
+    return sec
+
+
+def test_context_matches_can_enroll(client, app_context):
+    section = seed_simple_course()
+    course = Course.query.filter_by(code="CS101").first()
+    overlapping = _section(course, "02", ["Mon"], "10:30", "11:30")
+    free = _section(course, "03", ["Tue"], "10:00", "11:00")
+    student = create_student("elig@test.edu").student_profile
+
+    e = Enrollment(student_id=student.id, course_section_id=section.id)
+    e.enroll()
+    db.session.add(e)
+    db.session.commit()
+
+    context = EligibilityContext.load(student)
+    for sec in (section, overlapping, free):
+        assert context.check(sec) == Enrollment.can_enroll(student, sec)
+
+    ok, errors, _ = context.check(overlapping)
+    assert not ok
+    assert errors == ["Time conflict with: CS101-01"]
+    assert context.check(free)[0] is True
+
+
+def test_check_batch_endpoint(client, app_context):
+    section = seed_simple_course()
+    course = Course.query.filter_by(code="CS101").first()
+    overlapping = _section(course, "02", ["Mon"], "10:30", "11:30")
+    student_user = create_student("batch@test.edu")
+    e = Enrollment(student_id=student_user.student_profile.id, course_section_id=section.id)
+    e.enroll()
+    db.session.add(e)
+    db.session.commit()
+
+    token = _api_login(client, student_user.email, "pass12345")
+    resp = client.post("/api/v1/enrollments/check-batch",
+                       json={"course_section_ids": [section.id, overlapping.id, 9999]},
+                       headers=_auth(token))
+    assert resp.status_code == 200
+    data = resp.get_json()
+    results = {r["course_section_id"]: r for r in data["results"]}
+    assert results[section.id]["eligible"] is False
+    assert "Already enrolled in this section" in results[section.id]["errors"]
+    assert results[overlapping.id]["eligible"] is False
+    assert data["missing"] == [9999]
+
+    resp = client.post("/api/v1/enrollments/check-batch", json={"course_section_ids": []}, headers=_auth(token))
+    assert resp.status_code == 400
+
+
+def test_credit_limit_reads_term_load(client, app_context):
+    from app.models.term_load import get_term_load
+    section = seed_simple_course()  # 3.0 credits
+    course = Course.query.filter_by(code="CS101").first()
+    free = _section(course, "03", ["Tue"], "10:00", "11:00")
+    student = create_student("credits@test.edu").student_profile
+    e = Enrollment(student_id=student.id, course_section_id=section.id)
+    e.enroll()
+    db.session.add(e)
+    db.session.commit()
+
+    # The aggregate row is the source of the credit count, not the loaded enrollments
+    get_term_load(student.id, section.term).enrolled_credits = 16
+    db.session.commit()
+    context = EligibilityContext.load(student, terms=[section.term])
+    assert context.term_credits(section.term) == 16
+    assert context.check(free)[2] == ["Exceeds credit limit: 19.0 credits"]
+    assert Enrollment.check_credit_limit(student, free) == (False, 19.0)
+    context.add(free)
+    assert context.term_credits(section.term) == 19
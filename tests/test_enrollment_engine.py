@@ -258,3 +258,35 @@ def test_enrollment_with_permission_required(app_context, student_user):
     db.session.commit()
     
     assert section.require_permission is True
+
+
+def test_enroll_and_drop_commit_once(app_context):
+    """enroll_student and drop_enrollment write their side records in one transaction."""
+    from sqlalchemy import event
+    from app.models.audit import AuditLog
+    from app.models.notification import Notification
+    from app.services.enrollment_service import enroll_student, drop_enrollment
+
+    section = CourseSection.query.first()  # seeded for this module; capacity 1
+    first = create_student("once1@test.edu").student_profile
+    second = create_student("once2@test.edu").student_profile
+
+    commits = []
+    listener = lambda session: commits.append(session)  # noqa: E731
+    event.listen(db.session, 'after_commit', listener)
+    try:
+        enrollment, success, _ = enroll_student(first, section)
+        assert success and len(commits) == 1
+        waitlisted, success, _ = enroll_student(second, section, override_by=first.user_id)
+        assert success and waitlisted.status == 'Waitlisted'
+        assert len(commits) == 2
+
+        ok, _ = drop_enrollment(enrollment, reason='test')
+        assert ok and len(commits) == 3
+    finally:
+        event.remove(db.session, 'after_commit', listener)
+
+    assert waitlisted.status == 'Enrolled'
+    assert section.enrolled_count == 1 and section.waitlist_count == 0
+    assert AuditLog.query.filter_by(action='DROP', entity_id=enrollment.id).count() == 1
+    assert Notification.query.filter_by(user_id=first.user_id, title='Enrollment Confirmed').count() == 1
@@ -33,3 +33,93 @@ def test_waitlist_promotion(client, app_context):
 
     db.session.refresh(e2)
     assert e2.status == EnrollmentStatus.ENROLLED
+
+
+def test_waitlist_positions_are_derived_and_bulk_promotion_fills_seats(client, app_context):
+    from sqlalchemy import event
+    section = seed_simple_course()  # capacity 1
+    students = [create_student(f"w{n}@example.com").student_profile for n in range(6)]
+    enrollments = []
+    for student in students:
+        e = Enrollment(student_id=student.id, course_section_id=section.id)
+        db.session.add(e)
+        e.enroll()
+        enrollments.append(e)
+    db.session.commit()
+    holder, waitlist = enrollments[0], enrollments[1:]
+    assert [e.waitlist_position for e in waitlist] == [1, 2, 3, 4, 5]
+
+    # Dropping from the middle of the waitlist writes no other enrollment rows
+    updated = []
+    listener = lambda session, ctx, instances: updated.extend(  # noqa: E731
+        o for o in session.dirty if isinstance(o, Enrollment))
+    event.listen(db.session, 'before_flush', listener)
+    try:
+        waitlist[1].drop(reason="changed mind")
+        db.session.commit()
+    finally:
+        event.remove(db.session, 'before_flush', listener)
+    assert updated == [waitlist[1]]
+    remaining = [waitlist[0]] + waitlist[2:]
+    Enrollment.load_waitlist_positions(remaining)
+    assert [e.waitlist_position for e in remaining] == [1, 2, 3, 4]
+
+    # Capacity goes up by three: one call promotes the first three in order
+    section.capacity = 4
+    promoted = section.promote_waitlisted()
+    db.session.commit()
+    assert [e.id for e in promoted] == [e.id for e in remaining[:3]]
+    assert all(e.status == EnrollmentStatus.ENROLLED for e in promoted)
+    assert section.enrolled_count == 4
+    assert section.waitlist_count == 1
+    assert remaining[3].waitlist_position == 1
+    assert holder.status == EnrollmentStatus.ENROLLED
+
+
+def test_waitlist_order_uses_index_and_backfill(client, app_context):
+    from app.models.enrollment import backfill_waitlisted_at
+    section = seed_simple_course()
+    query = db.session.query(Enrollment.id).filter(
+        Enrollment.course_section_id == section.id, Enrollment.status == 'Waitlisted',
+    ).order_by(*Enrollment.waitlist_sort_key()).limit(3)
+    sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    plan = ' '.join(str(row[-1]) for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert 'idx_enrollment_waitlist_order' in plan and 'TEMP B-TREE' not in plan
+
+    # Rows written without waitlisted_at get it on flush, or from the backfill for old rows
+    student = create_student("stamp@example.com").student_profile
+    e = Enrollment(student_id=student.id, course_section_id=section.id, status='Waitlisted')
+    db.session.add(e)
+    db.session.commit()
+    assert e.waitlisted_at is not None
+    db.session.execute(db.update(Enrollment).where(Enrollment.id == e.id).values(waitlisted_at=None))
+    assert backfill_waitlisted_at() == 1
+    db.session.commit()
+    db.session.refresh(e)
+    assert e.waitlisted_at == (e.enrolled_at or e.created_at)
+
+
+def test_promotion_retries_with_remaining_seats(client, app_context, monkeypatch):
+    from app.models.course import CourseSection
+    section = seed_simple_course()  # capacity 1
+    students = [create_student(f"r{n}@example.com").student_profile for n in range(4)]
+    for student in students:
+        e = Enrollment(student_id=student.id, course_section_id=section.id)
+        db.session.add(e)
+        e.enroll()
+    db.session.commit()
+
+    # The first seat claim loses a race: the retry still fills every free seat
+    original = CourseSection._update_counts
+    failures = [1]
+
+    def racing(self, values, *criteria):
+        if failures and criteria:
+            failures.pop()
+            return False
+        return original(self, values, *criteria)
+    monkeypatch.setattr(CourseSection, '_update_counts', racing)
+    section.capacity = 4
+    promoted = section.promote_waitlisted()
+    db.session.commit()
+    assert len(promoted) == 3 and section.enrolled_count == 4
@@ -0,0 +1,91 @@
+from app.models import db
+from app.models.course import CourseSection
+from app.models.enrollment import Enrollment
+from app.services.enrollment_queue import LocalQueueBackend, enrollment_queue
+from tests.helpers import create_student, seed_simple_course
+
+
+def _api_login(client, email, password):
+    r = client.post(
+        "/api/v1/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert r.status_code == 200
+    return r.get_json()["access_token"]
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_local_backend_is_fifo_per_section_and_round_robin():
+    backend = LocalQueueBackend()
+    for n in range(3):
+        backend.push(2, {"request_id": f"a{n}", "status": "queued"})
+    backend.push(4, {"request_id": "b0", "status": "queued"})
+
+    section_id, batch = backend.take(0, 2, limit=2, timeout=0)
+    assert section_id == 2 and [r["request_id"] for r in batch] == ["a0", "a1"]
+    # The other section in the shard is served before section 2's remainder
+    section_id, batch = backend.take(0, 2, limit=2, timeout=0)
+    assert section_id == 4
+    assert backend.take(0, 2, limit=2, timeout=0)[1][0]["request_id"] == "a2"
+    assert backend.take(0, 2, limit=2, timeout=0) is None
+    assert backend.take(1, 2, limit=2, timeout=0) is None
+    assert backend.wait_status("a0", timeout=0.01)["status"] == "queued"
+
+
+def test_local_backend_expires_statuses(monkeypatch):
+    from app.services import enrollment_queue as module
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    backend = LocalQueueBackend(result_ttl=60)
+    backend.push(1, {"request_id": "old", "status": "queued"})
+    backend.set_status({"request_id": "old", "status": "completed"})
+    now[0] += 30
+    backend.push(1, {"request_id": "new", "status": "queued"})
+    assert backend.get_status("old")["status"] == "completed"
+
+    now[0] += 31
+    assert backend.get_status("old") is None
+    backend.set_status({"request_id": "new", "status": "completed"})
+    assert list(backend._status) == ["new"]
+
+
+def test_queued_enrollment_is_first_come_first_served(client, app_context, app):
+    section = seed_simple_course()  # capacity 1
+    first = create_student("first@test.edu")
+    second = create_student("second@test.edu")
+    app.config["ENROLLMENT_QUEUE_ENABLED"] = True
+    enrollment_queue.enabled = True
+
+    requests = []
+    for user in (first, second):
+        token = _api_login(client, user.email, "pass12345")
+        resp = client.post("/api/v1/enrollments", json={"course_section_id": section.id}, headers=_auth(token))
+        assert resp.status_code == 202
+        data = resp.get_json()
+        assert data["status"] == "queued"
+        assert resp.headers["Location"].endswith(data["request_id"])
+        requests.append((token, data))
+
+    # Nothing is written until the queue is drained
+    assert Enrollment.query.count() == 0
+    assert enrollment_queue.drain() == 2
+
+    (first_token, first_req), (second_token, second_req) = requests
+    resp = client.get(f"/api/v1/enrollments/requests/{first_req['request_id']}?wait=1", headers=_auth(first_token))
+    assert resp.status_code == 200
+    assert resp.get_json()["status"] == "completed"
+    assert resp.get_json()["enrollment"]["status"] == "Enrolled"
+
+    resp = client.get(f"/api/v1/enrollments/requests/{second_req['request_id']}", headers=_auth(second_token))
+    assert resp.get_json()["status"] == "failed"
+    assert "Course section is full" in resp.get_json()["messages"]
+
+    # Requests are only visible to the student who made them
+    resp = client.get(f"/api/v1/enrollments/requests/{first_req['request_id']}", headers=_auth(second_token))
+    assert resp.status_code == 404
+
+    db.session.expire_all()
+    assert db.session.get(CourseSection, section.id).enrolled_count == 1
@@ -0,0 +1,82 @@
+from datetime import date
+from app.models import db
+from app.models.course import CourseSection
+from app.models.enrollment import Enrollment
+from app.services.grade_analytics import compute_term_analytics, previous_term
+from tests.helpers import create_admin, create_student, seed_simple_course
+
+
+def _api_login(client, email, password):
+    r = client.post(
+        "/api/v1/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert r.status_code == 200
+    return r.get_json()["access_token"]
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _graded(section, grades, prefix):
+    for i, grade in enumerate(grades):
+        profile = create_student(f"{prefix}{i}@test.edu").student_profile
+        e = Enrollment(student_id=profile.id, course_section_id=section.id, status="Enrolled")
+        db.session.add(e)
+        db.session.flush()
+        if grade:
+            e.set_grade(grade)
+    db.session.commit()
+
+
+def _two_terms():
+    spring = seed_simple_course()
+    spring.capacity = 10
+    fall = CourseSection(course_id=spring.course_id, section_code="01", term="Fall 2024", capacity=10,
+                         schedule={"days": ["Tue"], "start": "10:00", "end": "11:00"},
+                         start_date=date(2024, 9, 1), end_date=date(2024, 12, 15))
+    db.session.add(fall)
+    db.session.commit()
+    _graded(fall, ["B", "B", "C", "C"], "fall")             # mean 2.5
+    _graded(spring, ["A", "B", "D", "F", "W", None], "spr")  # mean of A,B,D,F = 2.0
+    return spring, fall
+
+
+def test_term_analytics_statistics(app_context):
+    spring, fall = _two_terms()
+    assert previous_term("Spring 2025") == "Fall 2024"
+
+    result = compute_term_analytics("Spring 2025")
+    assert result["baseline_term"] == "Fall 2024"
+    [section] = result["sections"]
+    assert section["section_id"] == spring.id and section["course_code"] == "CS101"
+    assert (section["enrollments"], section["graded"], section["dfw"]) == (6, 5, 3)
+    assert section["dfw_rate"] == 0.6
+    assert section["mean_gpa"] == 2.0 and section["std_gpa"] == round(2.5 ** 0.5, 3)
+    assert section["p50"] == 2.0
+    assert section["distribution"] == {"A": 1, "B": 1, "D": 1, "F": 1, "W": 1}
+    # Compared with the course's previous offering, not the (different) section
+    assert section["course_id"] == spring.course_id
+    assert section["baseline_mean_gpa"] == 2.5 and section["inflation_delta"] == -0.5
+    [course] = result["courses"]
+    assert course["baseline_mean_gpa"] == 2.5 and course["inflation_delta"] == -0.5
+    [dept] = result["departments"]
+    assert dept["department_code"] == "CS" and dept["enrollments"] == 6
+    assert result["overall"]["graded"] == 5
+
+
+def test_analytics_endpoint_requires_admin(client, app_context):
+    _two_terms()
+    admin = create_admin()
+    student = create_student("analytics_student@test.edu")
+    token = _api_login(client, admin.email, "adminpass123")
+
+    resp = client.get("/api/v1/analytics/grades?term=Spring 2025", headers=_auth(token))
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["term"] == "Spring 2025" and len(data["sections"]) == 1
+    assert client.get("/api/v1/analytics/grades", headers=_auth(token)).status_code == 400
+
+    student_token = _api_login(client, student.email, "pass12345")
+    assert client.get("/api/v1/analytics/grades?term=Spring 2025", headers=_auth(student_token)).status_code == 403
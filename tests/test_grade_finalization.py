@@ -0,0 +1,145 @@
+from datetime import date
+
+import pytest
+from app.models import db
+from app.models.audit import AuditLog
+from app.models.course import CourseSection
+from app.models.enrollment import Enrollment
+from app.models.finalization import GradeFinalizationRun
+from app.models.outbox import OutboxMessage
+from app.models.profile import verify_gpa_totals
+from app.models.term_load import get_term_load
+from app.services.grade_finalization import finalize_term, run_grade_finalization
+from app.services.grade_service import GradeService
+from tests.helpers import create_registrar, create_student, seed_simple_course
+
+
+def _api_login(client, email, password):
+    r = client.post(
+        "/api/v1/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert r.status_code == 200
+    return r.get_json()["access_token"]
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _term_with_grades():
+    """Two Spring 2025 sections: graded, incomplete and ungraded enrollments."""
+    first = seed_simple_course()
+    first.capacity = 3
+    second = CourseSection(course_id=first.course_id, section_code="02", term=first.term, capacity=5,
+                           start_date=date(2025, 1, 1), end_date=date(2025, 5, 1))
+    db.session.add(second)
+    db.session.commit()
+    enrollments = {}
+    for name, section, grade in (("graded", first, "A"), ("incomplete", first, "I"), ("ungraded", first, None)):
+        profile = create_student(f"final_{name}@test.edu").student_profile
+        e = Enrollment(student_id=profile.id, course_section_id=section.id, status="Enrolled")
+        db.session.add(e)
+        db.session.flush()
+        if grade:
+            e.set_grade(grade)
+        enrollments[name] = e
+    # A grade recorded without set_grade leaves the row Enrolled until finalization
+    profile = create_student("final_late@test.edu").student_profile
+    enrollments["late"] = Enrollment(student_id=profile.id, course_section_id=second.id, status="Enrolled", grade="B")
+    db.session.add(enrollments["late"])
+    db.session.commit()
+    return first, second, enrollments
+
+
+def test_finalization_resumes_and_locks_grades(app, app_context):
+    app.config["GRADE_FINALIZATION_SECTION_BATCH"] = 1
+    first, second, enrollments = _term_with_grades()
+
+    def interrupt(run):
+        raise RuntimeError("worker killed")
+
+    with pytest.raises(RuntimeError):
+        finalize_term(first.term, progress=interrupt)
+    run = GradeFinalizationRun.query.one()
+    assert (run.status, run.phase, run.sections_done, run.total_sections, run.total_students) == ("Failed", "sections", 1, 2, 4)
+    db.session.expire_all()
+    assert first.grades_locked and not second.grades_locked
+
+    seen = []
+    run = run_grade_finalization(GradeFinalizationRun.query.one(),
+                                 progress=lambda r: seen.append((r.phase, r.sections_done, r.students_done)))
+    assert GradeFinalizationRun.query.count() == 1
+    assert run.status == "Completed" and run.phase == "done"
+    assert seen == [("sections", 2, 0), ("students", 2, 4)]
+    assert run.counts == {"Incomplete": 2, "Completed": 1, "notifications": 4}
+
+    db.session.expire_all()
+    assert [(enrollments[n].status, enrollments[n].grade) for n in ("graded", "incomplete", "ungraded", "late")] == [
+        ("Completed", "A"), ("Incomplete", "I"), ("Incomplete", "I"), ("Completed", "B")]
+    late = enrollments["late"].student
+    assert (late.gpa, late.total_credits_earned) == (3.0, 3.0)
+    assert get_term_load(late.id, first.term).enrolled_count == 0
+    assert verify_gpa_totals() == []
+
+    assert OutboxMessage.query.count() == 4
+    assert AuditLog.query.filter_by(action="GRADE_FINALIZE").count() == 3
+    assert AuditLog.query.filter_by(action="GRADES_LOCKED").count() == 2
+
+    ok, messages = GradeService.set_grade(enrollments["incomplete"], "B")
+    assert not ok and "finalized" in messages[0]
+
+    # A completed term is not finalized again unless restarted, and a restart does not re-notify
+    assert finalize_term(first.term).id == run.id
+    rerun = finalize_term(first.term, restart=True)
+    assert rerun.id != run.id and rerun.counts == {}
+    assert OutboxMessage.query.count() == 4
+
+
+def test_finalization_api(client, app_context):
+    first, _, _ = _term_with_grades()
+    create_registrar("final_registrar@test.edu")
+    create_student("final_outsider@test.edu")
+    headers = _auth(_api_login(client, "final_registrar@test.edu", "registrarpass123"))
+    url = "/api/v1/terms/Spring 2025/finalize"
+
+    assert client.get(url, headers=headers).status_code == 404
+    r = client.post(url, headers=headers)
+    assert r.status_code == 202
+    assert r.get_json()["status"] == "Completed"
+    assert r.get_json()["percent_complete"] == 100.0
+
+    assert client.post(url, headers=headers).status_code == 200
+    status = client.get(url, headers=headers).get_json()
+    assert status["sections"] == {"total": 2, "done": 2}
+    assert status["students"] == {"total": 4, "done": 4}
+
+    student = _auth(_api_login(client, "final_outsider@test.edu", "pass12345"))
+    assert client.get(url, headers=student).status_code == 403
+    assert client.post(url, headers=student).status_code == 403
+
+
+def test_registrar_resolves_incomplete_after_finalization(client, app_context):
+    first, _, enrollments = _term_with_grades()
+    finalize_term(first.term)
+    incomplete = enrollments["incomplete"]
+    db.session.expire_all()
+    assert first.grades_locked and incomplete.status == "Incomplete"
+    create_registrar("resolve_registrar@test.edu")
+    url = f"/api/v1/enrollments/{incomplete.id}/resolve-incomplete"
+
+    student = _auth(_api_login(client, "final_graded@test.edu", "pass12345"))
+    assert client.post(url, json={"grade": "B"}, headers=student).status_code == 403
+    headers = _auth(_api_login(client, "resolve_registrar@test.edu", "registrarpass123"))
+    assert client.post(url, json={"grade": "I"}, headers=headers).status_code == 400
+    r = client.post(url, json={"grade": "B"}, headers=headers)
+    assert r.status_code == 200 and r.get_json()["enrollment"]["grade"] == "B"
+
+    db.session.expire_all()
+    assert (incomplete.status, incomplete.grade) == ("Completed", "B")
+    profile = incomplete.student
+    assert (profile.gpa, profile.total_credits_earned) == (3.0, 3.0)
+    assert verify_gpa_totals() == []
+    assert AuditLog.query.filter_by(action="INCOMPLETE_RESOLVED", entity_id=incomplete.id).count() == 1
+    # Resolved once: it is a locked, final grade again
+    assert client.post(url, json={"grade": "A"}, headers=headers).status_code == 400
@@ -0,0 +1,155 @@
+import io
+from app.models import db
+from app.models.audit import AuditLog
+from app.models.enrollment import Enrollment, completed_course_ids
+from app.models.outbox import OutboxMessage
+from app.models.profile import verify_gpa_totals
+from app.models.term_load import get_term_load
+from tests.helpers import create_instructor, create_student, login_user, seed_simple_course
+
+
+def _api_login(client, email, password):
+    r = client.post(
+        "/api/v1/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert r.status_code == 200
+    return r.get_json()["access_token"]
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _section_with_students(count):
+    section = seed_simple_course()
+    section.capacity = count
+    instructor = create_instructor("imp_instructor@test.edu")
+    section.instructor_id = instructor.instructor_profile.id
+    db.session.commit()
+    students = []
+    for i in range(count):
+        profile = create_student(f"imp{i}@test.edu").student_profile
+        e = Enrollment(student_id=profile.id, course_section_id=section.id)
+        db.session.add(e)
+        e.enroll()
+        students.append(profile)
+    db.session.commit()
+    return section, instructor, students
+
+
+def test_csv_upload_applies_valid_rows_and_reports_the_rest(client, app_context):
+    section, instructor, students = _section_with_students(3)
+    s0, s1, s2 = (s.student_number for s in students)
+    csv_body = (
+        "student_number,grade\n"
+        f"{s0},A\n"
+        f"{s1},B-\n"
+        f"{s2},Z\n"
+        "NOPE123,A\n"
+        f"{s0},C\n"
+    )
+    token = _api_login(client, instructor.email, "instructorpass123")
+    resp = client.post(
+        f"/api/v1/sections/{section.id}/grades/import",
+        data={"file": (io.BytesIO(csv_body.encode()), "grades.csv")},
+        content_type="multipart/form-data",
+        headers=_auth(token),
+    )
+    assert resp.status_code == 200
+    report = resp.get_json()
+    assert (report["total"], report["applied"], report["failed"]) == (5, 2, 3)
+    results = {row["row"]: row for row in report["rows"]}
+    assert results[4]["message"] == "Invalid grade: Z"
+    assert "not enrolled" in results[5]["message"]
+    assert "Duplicate" in results[6]["message"]
+
+    e0 = Enrollment.query.filter_by(student_id=students[0].id).one()
+    assert (e0.grade, e0.status) == ("A", "Completed")
+    assert Enrollment.query.filter_by(student_id=students[2].id).one().grade is None
+
+    # Derived state, audit and notifications were written with the grades
+    assert students[0].gpa == 4.0 and students[1].gpa == 2.7
+    assert verify_gpa_totals() == []
+    assert get_term_load(students[1].id, section.term).completed_count == 1
+    assert section.course_id in completed_course_ids(students[0].id)
+    assert AuditLog.query.filter_by(action="GRADE_CHANGE").count() == 2
+    assert OutboxMessage.query.count() == 2
+
+
+def test_json_body_regrade_and_unchanged(client, app_context):
+    section, instructor, students = _section_with_students(2)
+    token = _api_login(client, instructor.email, "instructorpass123")
+    url = f"/api/v1/sections/{section.id}/grades/import"
+    body = {"grades": [{"student_number": s.student_number, "grade": "B"} for s in students]}
+    assert client.post(url, json=body, headers=_auth(token)).get_json()["applied"] == 2
+
+    body["grades"][1]["grade"] = "D"
+    report = client.post(url, json=body, headers=_auth(token)).get_json()
+    assert (report["applied"], report["unchanged"]) == (1, 1)
+    assert students[1].gpa == 1.0 and students[1].graded_credits == 3.0
+
+    bad = client.post(url, data="not json", content_type="application/json", headers=_auth(token))
+    assert bad.status_code == 400
+
+
+def test_grade_changed_after_roster_read_is_a_conflict(app_context):
+    from app.services.grade_import import GradeImport
+    section, instructor, students = _section_with_students(2)
+    grades = GradeImport(section, instructor.id)
+
+    # Another grader sets the first student's grade after the roster was read
+    db.session.execute(db.update(Enrollment).where(Enrollment.student_id == students[0].id)
+                       .values(grade='A', grade_points=4.0, status='Completed'))
+    db.session.commit()
+
+    report = grades.run([{'student_number': s.student_number, 'grade': 'C'} for s in students])
+    assert (report['applied'], report['failed']) == (1, 1)
+    assert 'changed by someone else' in report['rows'][0]['message']
+    first, second = (Enrollment.query.filter_by(student_id=s.id).one() for s in students)
+    assert (first.grade, second.grade) == ('A', 'C')
+    assert AuditLog.query.filter_by(action='GRADE_CHANGE').count() == 1
+    assert get_term_load(students[1].id, section.term).graded_credits == 3.0
+
+
+def test_same_points_regrade_after_roster_read_is_a_conflict(app_context):
+    from app.services.grade_import import GradeImport
+    section, instructor, students = _section_with_students(2)
+    rows = [{'student_number': s.student_number, 'grade': '87'} for s in students]
+    assert GradeImport(section, instructor.id).run(rows)['applied'] == 2
+    grades = GradeImport(section, instructor.id)
+
+    # 87 -> 88 keeps the letter, points and status: only the grade tells them apart
+    first = Enrollment.query.filter_by(student_id=students[0].id).one()
+    points, status = first.grade_points, first.status
+    db.session.execute(db.update(Enrollment).where(Enrollment.id == first.id).values(grade='88'))
+    db.session.commit()
+    assert (first.grade_points, first.status) == (points, status)
+
+    report = grades.run([{'student_number': s.student_number, 'grade': '91'} for s in students])
+    assert (report['applied'], report['failed']) == (1, 1)
+    assert Enrollment.query.filter_by(student_id=students[0].id).one().grade == '88'
+
+
+def test_non_utf8_csv_is_rejected_on_both_routes(client, app_context):
+    section, instructor, students = _section_with_students(1)
+    body = f"student_number,grade\n{students[0].student_number},A\nJos\xe9,B\n".encode("cp1252")
+
+    token = _api_login(client, instructor.email, "instructorpass123")
+    resp = client.post(
+        f"/api/v1/sections/{section.id}/grades/import",
+        data={"file": (io.BytesIO(body), "grades.csv")},
+        content_type="multipart/form-data",
+        headers=_auth(token),
+    )
+    assert resp.status_code == 400 and "UTF-8" in resp.get_json()["error"]
+
+    login_user(client, instructor.email, "instructorpass123")
+    resp = client.post(
+        f"/instructor/sections/{section.id}/grades/import",
+        data={"file": (io.BytesIO(body), "grades.csv")},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+    assert resp.status_code == 200 and b"UTF-8" in resp.data
+    assert Enrollment.query.filter_by(student_id=students[0].id).one().grade is None
@@ -19,3 +19,32 @@ def test_set_grade_and_gpa(client, app_context):
     assert e.status == EnrollmentStatus.COMPLETED
     s1.student_profile.calculate_gpa()
     assert s1.student_profile.gpa >= 3.9
+
+
+def test_gpa_totals_follow_grade_changes(client, app_context):
+    from app.models.profile import verify_gpa_totals
+    section = seed_simple_course()  # 3.0 credits
+    profile = create_student("g2@example.com").student_profile
+
+    e = Enrollment(student_id=profile.id, course_section_id=section.id)
+    db.session.add(e)
+    e.enroll()
+    db.session.commit()
+
+    e.set_grade('A-')
+    db.session.commit()
+    assert (profile.quality_points, profile.graded_credits, profile.gpa) == (3.0 * 3.7, 3.0, 3.7)
+
+    # A regrade applies only the old-to-new difference
+    e.set_grade('C')
+    db.session.commit()
+    assert profile.graded_credits == 3.0 and profile.gpa == 2.0
+    assert verify_gpa_totals() == []
+
+    # Drift is reported and repaired by the verifier
+    profile.quality_points = 99.0
+    db.session.commit()
+    drift = verify_gpa_totals(fix=True)
+    assert [d['student_id'] for d in drift] == [profile.id]
+    db.session.commit()
+    assert profile.quality_points == 6.0 and verify_gpa_totals() == []
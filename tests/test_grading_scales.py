@@ -0,0 +1,95 @@
+import pytest
+from app.models import db
+from app.models.enrollment import Enrollment
+from app.models.grading_scale import clear_scale_cache, get_scale
+from app.models.profile import verify_gpa_totals
+from app.services.grade_service import GradeService
+from app.services.grading_scale_service import rescore_numeric_grades, save_grading_scale
+from tests.helpers import create_student, seed_simple_course
+
+
+@pytest.fixture(autouse=True)
+def _fresh_scale_cache():
+    clear_scale_cache()
+    yield
+    clear_scale_cache()
+
+
+def _enroll(section, email):
+    profile = create_student(email).student_profile
+    e = Enrollment(student_id=profile.id, course_section_id=section.id, status="Enrolled")
+    db.session.add(e)
+    db.session.flush()
+    return e
+
+
+def test_default_scale_converts_percentages(app_context):
+    scale = get_scale()
+    letters, points = scale.convert([95, 85, 79.9, 50, 49.5, -3])
+    assert letters == ["A+", "A", "B+", "D-", "F", "F"]
+    assert points == [4.0, 4.0, 3.3, 0.7, 0.0, 0.0]
+    assert [scale.letter_for(p) for p in (95, 49.5)] == [("A+", 4.0), ("F", 0.0)]
+    assert scale.resolve("I", "Enrolled") == ("I", None, "Enrolled")
+    assert scale.resolve("87.25%") == ("87.2", 4.0, "Completed")
+
+
+def test_numeric_grades_count_towards_gpa(app_context):
+    section = seed_simple_course()
+    section.capacity = 2
+    passing, failing = _enroll(section, "numeric1@test.edu"), _enroll(section, "numeric2@test.edu")
+    passing.set_grade("74")
+    failing.set_grade("40")
+    db.session.commit()
+
+    assert (passing.grade, passing.grade_points, passing.status) == ("74", 3.0, "Completed")
+    assert (failing.grade_points, failing.status) == (0.0, "Failed")
+    db.session.expire_all()
+    assert passing.student.gpa == 3.0 and passing.student.total_credits_earned == 3.0
+    assert verify_gpa_totals() == []
+
+
+def test_course_scale_and_rescoring(app_context):
+    section = seed_simple_course()
+    section.capacity = 2
+    legacy, regular = _enroll(section, "scale1@test.edu"), _enroll(section, "scale2@test.edu")
+    # Graded before numeric grades carried points
+    legacy.grade, legacy.status = "65", "Completed"
+    regular.set_grade("B")
+    db.session.commit()
+    assert legacy.grade_points is None
+
+    scale = save_grading_scale("Honours", [
+        ("H", 4.0, 80), ("P", 2.0, 60), ("N", 0.0, 0), ("W", None, None),
+    ], passing_percentage=60)
+    db.session.commit()
+    section.course.grading_scale_id = scale.id
+    db.session.commit()
+
+    assert GradeService.is_valid_grade("H", get_scale(scale.id))
+    ok, messages = GradeService.set_grade(regular, "B")
+    assert not ok and messages == ["Invalid grade: B"]
+
+    assert rescore_numeric_grades() == 1
+    db.session.commit()
+    db.session.expire_all()
+    assert (legacy.grade_points, legacy.status) == (2.0, "Completed")
+    assert legacy.student.gpa == 2.0
+    assert verify_gpa_totals() == []
+
+    ok, _ = GradeService.set_grade(regular, "55")
+    assert ok and (regular.grade_points, regular.status) == (0.0, "Failed")
+
+
+def test_roster_shows_course_scale(authenticated_instructor_client, app_context):
+    from app.models.profile import InstructorProfile
+    section = seed_simple_course()
+    section.instructor_id = InstructorProfile.query.first().id
+    scale = save_grading_scale("Pass/Fail", [("PASS", None, 60), ("FAIL", 0.0, 0)], passing_percentage=60)
+    db.session.commit()
+    section.course.grading_scale_id = scale.id
+    db.session.commit()
+
+    resp = authenticated_instructor_client.get(f"/instructor/roster/{section.id}")
+    assert resp.status_code == 200
+    assert b"<strong>PASS:</strong> no points" in resp.data
+    assert b"pass at 60.0%" in resp.data
@@ -0,0 +1,134 @@
+import socketserver
+import threading
+from datetime import datetime
+
+import pytest
+
+from app.models import db
+from app.models.enrollment import Enrollment
+from app.models.notification import Notification
+from app.models.outbox import OutboxMessage
+from app.services.outbox_service import dispatch_pending, enqueue_email, enqueue_notification
+from tests.helpers import create_student, seed_simple_course
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: records one entry per connection and message."""
+
+    def _reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self._reply("220 stand-in ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self._reply("250 stand-in")
+            elif command.startswith("DATA"):
+                self._reply("354 end with .")
+                body = []
+                while True:
+                    data = self.rfile.readline().decode()
+                    if data.rstrip("\r\n") == ".":
+                        break
+                    body.append(data)
+                self.server.messages.append("".join(body))
+                self._reply("250 queued")
+            elif command.startswith("QUIT"):
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("250 ok")
+
+
+@pytest.fixture()
+def smtp_server(app):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state = app.extensions["mail"]
+    state.server, state.port = "127.0.0.1", server.server_address[1]
+    state.use_tls = state.use_ssl = False
+    state.suppress = False
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_waitlist_promotion_is_delivered_by_dispatcher(client, app_context, smtp_server):
+    section = seed_simple_course()  # capacity 1
+    first = create_student("first@test.edu").student_profile
+    second = create_student("second@test.edu")
+    e1 = Enrollment(student_id=first.id, course_section_id=section.id)
+    db.session.add(e1)
+    e1.enroll()
+    e2 = Enrollment(student_id=second.student_profile.id, course_section_id=section.id)
+    db.session.add(e2)
+    e2.enroll()
+    db.session.commit()
+
+    e1.drop(reason="test")
+    db.session.commit()
+    assert e2.status == "Enrolled"
+    # Nothing is delivered inside the drop itself
+    assert smtp_server.messages == []
+    assert Notification.query.filter_by(user_id=second.id).count() == 0
+    assert OutboxMessage.query.filter_by(status="Pending").count() == 1
+
+    assert dispatch_pending() == {"sent": 1, "retried": 0, "dead": 0}
+    note = Notification.query.filter_by(user_id=second.id, title="Waitlist Promotion").one()
+    assert note.email_sent is True
+    assert len(smtp_server.messages) == 1
+    assert "moved from the waitlist" in smtp_server.messages[0]
+    row = OutboxMessage.query.one()
+    assert row.status == "Sent" and row.notification_id == note.id
+
+
+def test_batch_reuses_one_smtp_connection(client, app_context, smtp_server):
+    user = create_student("bulk@test.edu")
+    for n in range(5):
+        enqueue_notification(user.id, "system", f"N{n}", "hello",
+                             email={"to": [user.email], "subject": f"S{n}", "body": "hi"})
+    enqueue_email(["someone@test.edu"], "Plain", "no notification")
+    db.session.commit()
+
+    assert dispatch_pending()["sent"] == 6
+    assert smtp_server.connections == 1
+    assert len(smtp_server.messages) == 6
+    assert Notification.query.filter_by(user_id=user.id).count() == 5
+
+
+def test_failed_email_is_retried_then_dead_lettered(client, app, app_context):
+    state = app.extensions["mail"]
+    state.server, state.port, state.use_tls, state.suppress = "127.0.0.1", 1, False, False
+    app.config["OUTBOX_MAX_ATTEMPTS"] = 2
+    user = create_student("retry@test.edu")
+    enqueue_notification(user.id, "system", "T", "M", email={"to": [user.email], "subject": "S", "body": "B"})
+    db.session.commit()
+
+    assert dispatch_pending() == {"sent": 0, "retried": 1, "dead": 0}
+    row = OutboxMessage.query.one()
+    assert row.status == "Pending" and row.attempts == 1 and row.available_at > datetime.utcnow()
+    # The in-app notification is created once, even though the e-mail failed
+    assert row.notification_id is not None
+
+    row.available_at = datetime.utcnow()
+    db.session.commit()
+    assert dispatch_pending() == {"sent": 0, "retried": 0, "dead": 1}
+    assert OutboxMessage.query.one().status == "Dead"
+    assert Notification.query.filter_by(user_id=user.id).count() == 1
+
+
+def test_rolled_back_change_leaves_no_outbox_row(client, app_context):
+    user = create_student("rollback@test.edu")
+    enqueue_notification(user.id, "system", "T", "M")
+    db.session.rollback()
+    assert OutboxMessage.query.count() == 0
+    assert dispatch_pending() == {"sent": 0, "retried": 0, "dead": 0}
@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from app.models import db
+from app.models.enrollment import Enrollment
+from app.services import pdf_render
+from tests.helpers import create_student, seed_simple_course
+
+
+def _slow_report(rows, seconds=1.0):
+    time.sleep(seconds)
+    from app.services.pdf_reports import render_students_per_course
+    return render_students_per_course(rows)
+
+
+def _hang(*args):
+    time.sleep(10)
+
+
+def _use_pool(app, tmp_path, **config):
+    app.config.update(
+        PDF_RENDER_MODE='pool',
+        PDF_RENDER_JOB_DIR=str(tmp_path),
+        PDF_RENDER_START_METHOD='fork',
+        PDF_RENDER_WORKERS=1,
+        PDF_RENDER_MEMORY_MB=0,
+        **config,
+    )
+
+
+def _api_login(client, email, password):
+    resp = client.post('/api/v1/auth/login', json={'email': email, 'password': password})
+    assert resp.status_code == 200
+    return resp.get_json()['access_token']
+
+
+def _auth(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_slow_report_hands_out_job_page(app, authenticated_admin_client, app_context, tmp_path, monkeypatch):
+    _use_pool(app, tmp_path, PDF_RENDER_WAIT=0)
+    monkeypatch.setitem(pdf_render.RENDERERS, 'students_per_course', 'tests.test_pdf_render:_slow_report')
+    seed_simple_course()
+
+    resp = authenticated_admin_client.get('/admin/reports/students_per_course.pdf')
+    assert resp.status_code == 302 and '/pdf-jobs/' in resp.headers['Location']
+    job_url = resp.headers['Location']
+
+    page = authenticated_admin_client.get(job_url)
+    assert page.status_code == 200 and b'http-equiv="refresh"' in page.data
+
+    deadline = time.time() + 30
+    while pdf_render.job_status(job_url.rsplit('/', 1)[-1]) == 'pending' and time.time() < deadline:
+        time.sleep(0.1)
+    resp = authenticated_admin_client.get(job_url + '/download')
+    assert resp.status_code == 200 and resp.data[:4] == b'%PDF'
+    assert 'students_per_course.pdf' in resp.headers['Content-Disposition']
+
+
+def test_api_transcript_returns_job_to_poll(app, client, app_context, tmp_path):
+    _use_pool(app, tmp_path, PDF_RENDER_WAIT=0)
+    section = seed_simple_course()
+    student = create_student('pdfjob@test.edu')
+    e = Enrollment(student_id=student.student_profile.id, course_section_id=section.id)
+    e.enroll()
+    e.set_grade('B')
+    db.session.add(e)
+    db.session.commit()
+    headers = _auth(_api_login(client, 'pdfjob@test.edu', 'pass12345'))
+
+    resp = client.get('/api/v1/transcripts/me', headers=headers)
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert resp.headers['Location'] == body['status_url']
+
+    deadline = time.time() + 30
+    status = client.get(body['status_url'], headers=headers).get_json()
+    while status['status'] == 'pending' and time.time() < deadline:
+        time.sleep(0.1)
+        status = client.get(body['status_url'], headers=headers).get_json()
+    assert status['status'] == 'done', status
+    resp = client.get(status['download_url'], headers=headers)
+    assert resp.status_code == 200 and resp.data[:4] == b'%PDF'
+
+    # Same content, same job: the next request is answered without rendering again
+    resp = client.get('/api/v1/transcripts/me', headers=headers)
+    assert resp.status_code == 200 and resp.data[:4] == b'%PDF'
+
+    create_student('other@test.edu')
+    other = _auth(_api_login(client, 'other@test.edu', 'pass12345'))
+    assert client.get(body['status_url'], headers=other).status_code == 404
+
+
+def test_pool_kills_job_over_timeout_and_recovers(app, app_context, tmp_path, monkeypatch):
+    _use_pool(app, tmp_path, PDF_RENDER_TIMEOUT=1)
+    monkeypatch.setitem(pdf_render.RENDERERS, 'hang', 'tests.test_pdf_render:_hang')
+
+    job_id = pdf_render.submit('hang', (), 'hang.pdf')
+    assert pdf_render.wait_for(job_id, 10) == 'failed'
+    assert 'timed out' in pdf_render.get_store().error(job_id)
+
+    pdf = pdf_render.render_pdf('students_per_course', ([('CS101', '01', 'Spring 2025', 3)],))
+    assert pdf[:4] == b'%PDF'
+
+
+def test_full_queue_is_refused(app, authenticated_admin_client, app_context, tmp_path, monkeypatch):
+    _use_pool(app, tmp_path, PDF_RENDER_QUEUE=1, PDF_RENDER_WAIT=0, PDF_RENDER_TIMEOUT=5)
+    monkeypatch.setitem(pdf_render.RENDERERS, 'hang', 'tests.test_pdf_render:_hang')
+    pool = pdf_render.get_pool()
+    # One job running, one waiting: the next is refused
+    pdf_render.submit('hang', (), 'a.pdf')
+    deadline = time.time() + 10
+    while pool._queue.qsize() and time.time() < deadline:
+        time.sleep(0.05)
+    pdf_render.submit('hang', (), 'b.pdf')
+
+    resp = authenticated_admin_client.get('/admin/reports/students_per_course.pdf')
+    assert resp.status_code == 302 and '/admin/' in resp.headers['Location']
+    with pytest.raises(pdf_render.RenderBusy):
+        pdf_render.submit('hang', (), 'c.pdf')
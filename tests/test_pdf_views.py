@@ -24,3 +24,27 @@ def test_instructor_roster_pdf_view(authenticated_instructor_client, app_context
     assert resp.status_code == 200
     assert resp.headers.get('Content-Type', '').startswith('application/pdf')
     assert resp.data[:4] == b'%PDF'
+
+
+@pytest.mark.parametrize('report', ['courses_by_department', 'students_per_course', 'instructors_with_courses'])
+def test_admin_report_pdfs(authenticated_admin_client, app_context, report):
+    from app.models.profile import InstructorProfile
+    section = seed_simple_course()
+    create_instructor("reportinstr@test.edu")
+    section.instructor_id = InstructorProfile.query.first().id
+    db.session.commit()
+
+    resp = authenticated_admin_client.get(f'/admin/reports/{report}.pdf')
+    assert resp.status_code == 200
+    assert resp.headers.get('Content-Type', '').startswith('application/pdf')
+    assert resp.data[:4] == b'%PDF'
+
+
+def test_pdf_templates_built_once():
+    from app.services.pdf_templates import pdf_templates
+    templates = pdf_templates()
+    assert pdf_templates() is templates
+    heading = templates.static('COURSE ROSTER', templates.roster_title)
+    again = templates.static('COURSE ROSTER', templates.roster_title)
+    # Parsed once, but each document gets its own flowable
+    assert heading is not again and heading.frags is again.frags
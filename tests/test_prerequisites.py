@@ -0,0 +1,93 @@
+import pytest
+from datetime import date
+from app.models import db
+from app.models.course import Course, CourseSection, PrerequisiteCycleError, course_prerequisite_closure
+from app.models.enrollment import Enrollment, completed_course_ids
+from tests.helpers import create_student, seed_simple_course
+
+
+def _course(code, dept_id):
+    course = Course(code=code, title=code, credits=3.0, department_id=dept_id)
+    db.session.add(course)
+    db.session.flush()
+    return course
+
+
+def _chain():
+    """CS101 <- CS201 <- CS301 (each requires the one before)."""
+    section = seed_simple_course()
+    a = Course.query.filter_by(code="CS101").first()
+    b = _course("CS201", a.department_id)
+    c = _course("CS301", a.department_id)
+    b.set_prerequisites([a])
+    c.set_prerequisites([b])
+    db.session.commit()
+    return section, a, b, c
+
+
+def _complete(student, section, grade):
+    e = Enrollment(student_id=student.id, course_section_id=section.id, status="Enrolled")
+    db.session.add(e)
+    db.session.flush()
+    e.set_grade(grade)
+    db.session.commit()
+    return e
+
+
+def test_closure_depth_and_cycle_rejection(app_context):
+    _, a, b, c = _chain()
+    depths = dict(db.session.execute(
+        db.select(course_prerequisite_closure.c.prerequisite_id, course_prerequisite_closure.c.depth)
+        .where(course_prerequisite_closure.c.course_id == c.id)
+    ).all())
+    assert depths == {b.id: 1, a.id: 2}
+    assert {p.code for p in c.get_all_prerequisites()} == {"CS101", "CS201"}
+
+    with pytest.raises(PrerequisiteCycleError):
+        a.set_prerequisites([c])
+    with pytest.raises(PrerequisiteCycleError):
+        a.set_prerequisites([a])
+    assert a.prerequisite_ids() == set()
+
+    # Dropping the middle edge updates courses further down the chain
+    b.set_prerequisites([])
+    db.session.commit()
+    assert c.prerequisite_ids() == {b.id}
+
+
+def test_check_prerequisites_uses_completed_index(app_context):
+    section, a, b, c = _chain()
+    student = create_student("prereq@test.edu").student_profile
+
+    ok, missing = Enrollment.check_prerequisites(student, c)
+    assert not ok and [m.code for m in missing] == ["CS101", "CS201"]
+
+    # Below the minimum grade does not count
+    e = _complete(student, section, "D")
+    assert completed_course_ids(student.id) == set()
+
+    e.set_grade("B")
+    db.session.commit()
+    assert completed_course_ids(student.id) == {a.id}
+    ok, missing = Enrollment.check_prerequisites(student, c)
+    assert not ok and [m.code for m in missing] == ["CS201"]
+    assert Enrollment.check_prerequisites(student, b) == (True, [])
+
+
+def test_enforcement_is_opt_in(app, app_context):
+    _, a, b, c = _chain()
+    sec = CourseSection(course_id=b.id, section_code="01", term="Fall 2025", capacity=10,
+                        schedule={"days": ["Tue"], "start": "09:00", "end": "10:00"},
+                        start_date=date(2025, 9, 1), end_date=date(2025, 12, 15))
+    db.session.add(sec)
+    db.session.commit()
+    student = create_student("enforce@test.edu").student_profile
+
+    assert Enrollment.can_enroll(student, sec)[0]
+    app.config["ENFORCE_PREREQUISITES"] = True
+    try:
+        ok, errors, _ = Enrollment.can_enroll(student, sec)
+        assert not ok
+        assert "Missing prerequisites: CS101" in errors
+    finally:
+        app.config["ENFORCE_PREREQUISITES"] = False
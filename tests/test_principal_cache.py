@@ -0,0 +1,112 @@
+from sqlalchemy import event
+
+from app import cache
+from app.models import db
+from app.models.user import Role, User
+from tests.helpers import create_admin, create_student, login_user
+
+
+def _use_shared_cache(app, tmp_path):
+    # Shared between processes like Redis; principals are not cached in a per-process cache
+    cache.init_app(app, config={'CACHE_TYPE': 'FileSystemCache', 'CACHE_DIR': str(tmp_path)})
+
+
+def _call(client, method, url, **kwargs):
+    # Own app context (and session) per request, as in production
+    with client.application.app_context():
+        return client.open(url, method=method, **kwargs)
+
+
+def _api_login(client, email, password):
+    resp = _call(client, 'POST', '/api/v1/auth/login', json={'email': email, 'password': password})
+    assert resp.status_code == 200
+    return resp.get_json()['access_token']
+
+
+def _auth(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_cached_principal_skips_user_and_role_queries(app, client, app_context, tmp_path):
+    _use_shared_cache(app, tmp_path)
+    create_admin()
+    headers = _auth(_api_login(client, 'admin@test.edu', 'adminpass123'))
+    url = '/api/v1/analytics/grades'  # admin check, then 400 for the missing term
+
+    assert _call(client, 'GET', url, headers=headers).status_code == 400
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        assert _call(client, 'GET', url, headers=headers).status_code == 400
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert statements == []
+
+
+def test_role_and_status_changes_apply_to_the_next_request(app, client, app_context, tmp_path):
+    _use_shared_cache(app, tmp_path)
+    admin = create_admin()
+    headers = _auth(_api_login(client, 'admin@test.edu', 'adminpass123'))
+    url = '/api/v1/analytics/grades'
+    assert _call(client, 'GET', url, headers=headers).status_code == 400
+
+    admin.roles.remove(Role.query.filter_by(name=Role.ADMIN).first())
+    db.session.commit()
+    assert _call(client, 'GET', url, headers=headers).status_code == 403
+
+    admin.is_active = False
+    db.session.commit()
+    assert _call(client, 'GET', url, headers=headers).status_code == 401
+
+
+def test_deactivated_user_loses_session(app, client, app_context, tmp_path):
+    _use_shared_cache(app, tmp_path)
+    student = create_student('principal@test.edu')
+    with app.app_context():
+        login_user(client, 'principal@test.edu', 'pass12345')
+    assert _call(client, 'GET', '/student/dashboard').status_code == 200
+
+    student.is_active = False
+    db.session.commit()
+    resp = _call(client, 'GET', '/student/dashboard')
+    assert resp.status_code == 302 and '/auth/login' in resp.headers['Location']
+
+
+def test_uncommitted_role_changes_are_seen(app, app_context, tmp_path):
+    _use_shared_cache(app, tmp_path)
+    user = db.session.get(User, create_student('pending@test.edu').id)
+    assert user.is_student() and not user.is_instructor()
+    assert user.principal is not None
+
+    user.add_role(Role.query.filter_by(name=Role.INSTRUCTOR).first())
+    assert user.is_instructor()
+    user.add_role(Role.query.filter_by(name=Role.INSTRUCTOR).first())
+    db.session.commit()
+    assert user.roles.filter_by(name=Role.INSTRUCTOR).count() == 1
+    assert user.principal.roles == {Role.STUDENT, Role.INSTRUCTOR}
+
+
+def test_per_process_cache_reads_principal_from_database(app, client, app_context):
+    # Another worker's commit never reaches this SimpleCache: the database decides
+    cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+    admin = create_admin()
+    headers = _auth(_api_login(client, 'admin@test.edu', 'adminpass123'))
+    url = '/api/v1/analytics/grades'
+    assert _call(client, 'GET', url, headers=headers).status_code == 400
+
+    db.session.execute(db.update(User).where(User.id == admin.id).values(is_active=False))
+    db.session.commit()
+    assert _call(client, 'GET', url, headers=headers).status_code == 401
+
+
+def test_cache_outage_falls_back_to_database(app, client, app_context, tmp_path, monkeypatch):
+    _use_shared_cache(app, tmp_path)
+    create_admin()
+    headers = _auth(_api_login(client, 'admin@test.edu', 'adminpass123'))
+
+    def down(*args, **kwargs):
+        raise ConnectionError('cache down')
+    monkeypatch.setattr(cache, 'get', down)
+    monkeypatch.setattr(cache, 'get_many', down)
+    assert _call(client, 'GET', '/api/v1/analytics/grades', headers=headers).status_code == 400
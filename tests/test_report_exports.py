@@ -0,0 +1,79 @@
+import csv
+import io
+import zipfile
+from datetime import date
+
+import pytest
+
+from app.models import db
+from app.models.course import Course, CourseSection
+from app.services import admin_reports
+from tests.helpers import create_instructor, seed_simple_course
+
+
+def _seed_sections(count_instructors=3, sections_each=4):
+    section = seed_simple_course()
+    instructors = [create_instructor(f"exp{i}@test.edu") for i in range(count_instructors)]
+    for i, user in enumerate(instructors):
+        for j in range(sections_each):
+            course = Course(code=f"EX{i}{j:02d}", title=f"Export {i}-{j}", department_id=section.course.department_id,
+                            credits=3, level="Undergraduate")
+            db.session.add(course)
+            db.session.flush()
+            db.session.add(CourseSection(course_id=course.id, section_code="01", term="Fall 2025", capacity=30,
+                                         enrolled_count=j, instructor_id=user.instructor_profile.id,
+                                         start_date=date(2025, 9, 1), end_date=date(2025, 12, 15)))
+    db.session.commit()
+    db.session.expire_all()
+    return instructors
+
+
+def test_report_rows_load_without_per_row_queries(app_context):
+    from sqlalchemy import event
+    _seed_sections()
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        sections = list(admin_reports.students_per_course(batch_size=5))
+        section_queries = len(statements)
+        statements.clear()
+        instructors = list(admin_reports.instructors_with_courses(batch_size=2))
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+
+    assert len(sections) == 13 and section_queries == 1
+    assert sections[0][0] == "CS101" and sections[0][-1] == "TBA"
+    assert len(instructors) == 3 and all(len(courses) == 4 for _, _, courses in instructors)
+    # One query per batch of instructors plus one eager load of their sections
+    assert len(statements) <= 4
+
+
+@pytest.mark.parametrize("report", ["students_per_course", "instructors_with_courses"])
+def test_report_csv_and_xlsx_downloads(authenticated_admin_client, app_context, monkeypatch, report):
+    from app.services import report_export
+    monkeypatch.setattr(report_export, "CHUNK_ROWS", 2)
+    _seed_sections()
+
+    resp = authenticated_admin_client.get(f"/admin/reports/{report}.csv")
+    assert resp.status_code == 200 and resp.is_streamed
+    assert resp.mimetype == "text/csv" and f"{report}.csv" in resp.headers["Content-Disposition"]
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    header = list(getattr(admin_reports, f"{report.upper()}_HEADER"))
+    assert rows[0] == header and len(rows) > 3
+
+    resp = authenticated_admin_client.get(f"/admin/reports/{report}.xlsx")
+    assert resp.status_code == 200 and resp.is_streamed
+    with zipfile.ZipFile(io.BytesIO(resp.get_data())) as workbook:
+        assert workbook.testzip() is None
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+    assert sheet.count("<row ") == len(rows)
+    assert f'<c r="A1" s="1" t="inlineStr"><is><t xml:space="preserve">{header[0]}</t></is></c>' in sheet
+
+
+def test_csv_escapes_formulas():
+    from app.services.report_export import stream_csv
+    text = "".join(stream_csv(["Title", "Credits"], [("=HYPERLINK(1)", -3), ("-1+1", 4)], chunk_rows=1))
+    assert list(csv.reader(io.StringIO(text)))[1:] == [["'=HYPERLINK(1)", "-3"], ["'-1+1", "4"]]
@@ -0,0 +1,46 @@
+from app.models.course import CourseSection, compile_occupancy, conflict_matrix
+
+
+def _section(id, days, start, end, term="Spring 2025"):
+    s = CourseSection(section_code=str(id), term=term, capacity=10,
+                      schedule={"days": days, "start": start, "end": end})
+    s.id = id
+    return s
+
+
+def test_occupancy_bitmap_overlap_rules():
+    a = _section(1, ["Mon", "Wed"], "10:00", "11:15")
+    touching = _section(2, ["Mon"], "11:15", "12:00")
+    overlapping = _section(3, ["Wed"], "11:00", "11:30")
+    other_day = _section(4, ["Tue"], "10:00", "11:15")
+    other_term = _section(5, ["Mon"], "10:00", "11:00", term="Fall 2025")
+
+    assert not a.conflicts_with(touching)
+    assert a.conflicts_with(overlapping)
+    assert not a.conflicts_with(other_day)
+    assert not a.conflicts_with(other_term)
+    assert compile_occupancy(None) == 0
+
+
+def test_occupancy_rebuilt_when_schedule_changes():
+    a = _section(1, ["Mon"], "10:00", "11:00")
+    b = _section(2, ["Tue"], "10:00", "11:00")
+    assert not a.conflicts_with(b)
+    b.schedule = {"days": ["Mon"], "start": "10:30", "end": "11:30"}
+    assert a.conflicts_with(b)
+
+
+def test_conflict_matrix_matches_pairwise_checks():
+    sections = [
+        _section(1, ["Mon", "Wed"], "10:00", "11:15"),
+        _section(2, ["Mon", "Wed"], "10:00", "11:15"),
+        _section(3, ["Wed"], "11:00", "12:00"),
+        _section(4, ["Tue"], "09:00", "10:00"),
+        _section(5, [], "09:00", "10:00"),
+    ]
+    matrix = conflict_matrix(sections)
+    for a in sections:
+        expected = {b.id for b in sections if b.id != a.id and a.conflicts_with(b)}
+        assert matrix[a.id] == expected
+    assert matrix[1] == {2, 3}
+    assert matrix[4] == set()
@@ -0,0 +1,123 @@
+from app import cache
+from app.models import db
+from app.models.course import Course, CourseSection
+from app.models.enrollment import Enrollment
+from app.services import tag_cache
+from tests.helpers import create_student, seed_simple_course
+
+
+def _use_simple_cache(app):
+    cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache'})
+
+
+def test_course_change_invalidates_api_reads(app, client, app_context):
+    _use_simple_cache(app)
+    course = seed_simple_course().course
+
+    assert client.get(f'/api/v1/courses/{course.id}').get_json()['title'] == 'Intro to CS'
+    listing = client.get('/api/v1/courses').get_json()
+    assert [c['title'] for c in listing['courses']] == ['Intro to CS']
+
+    # A write that bypasses the ORM is not seen: the reads are served from the cache
+    db.session.execute(db.update(Course).where(Course.id == course.id).values(title='Renamed'))
+    db.session.commit()
+    assert client.get(f'/api/v1/courses/{course.id}').get_json()['title'] == 'Intro to CS'
+
+    # An ORM change bumps course:<id> and courses on commit
+    course = db.session.get(Course, course.id)
+    course.title = 'Introduction to Computing'
+    db.session.commit()
+    assert client.get(f'/api/v1/courses/{course.id}').get_json()['title'] == 'Introduction to Computing'
+    listing = client.get('/api/v1/courses').get_json()
+    assert [c['title'] for c in listing['courses']] == ['Introduction to Computing']
+    assert client.get('/api/v1/courses/999').status_code == 404
+
+
+def test_seat_counters_and_enrollments_invalidate_sections(app, client, app_context):
+    _use_simple_cache(app)
+    section = seed_simple_course()
+    course_id = section.course_id
+    assert client.get(f'/api/v1/courses/{course_id}/sections').get_json()[0]['enrolled'] == 0
+    term_tag = f'term:{section.term}'
+    before = tag_cache._versions([term_tag], create=True)[term_tag]
+
+    # Counters are updated with a core UPDATE, which invalidates the section explicitly
+    student = create_student('tagged@test.edu')
+    assert section.claim_seat()
+    db.session.add(Enrollment(student_id=student.student_profile.id, course_section_id=section.id))
+    db.session.commit()
+    assert client.get(f'/api/v1/courses/{course_id}/sections').get_json()[0]['enrolled'] == 1
+
+    student_tag = f'student:{student.student_profile.id}'
+    after = tag_cache._versions([student_tag, term_tag])
+    assert after[student_tag] is not None and after[term_tag] != before
+
+
+def test_rolled_back_changes_bump_nothing(app, app_context):
+    _use_simple_cache(app)
+    section = seed_simple_course()
+    calls = []
+
+    def load():
+        calls.append(1)
+        return section.capacity
+
+    assert tag_cache.cached('capacity', load, tags=[f'section:{section.id}']) == 1
+    section.capacity = 30
+    db.session.flush()
+    db.session.rollback()
+    assert tag_cache.cached('capacity', load, tags=[f'section:{section.id}']) == 1
+    assert len(calls) == 1
+
+    section = db.session.get(CourseSection, section.id)
+    section.capacity = 30
+    db.session.commit()
+    assert tag_cache.cached('capacity', load, tags=[f'section:{section.id}']) == 30
+    assert len(calls) == 2
+
+
+def test_null_cache_always_loads(app, app_context):
+    # The testing config uses NullCache: nothing is stored, every read loads
+    calls = []
+    for _ in range(2):
+        assert tag_cache.cached('key', lambda: calls.append(1) or 'value', tags=['courses']) == 'value'
+    assert len(calls) == 2
+
+
+def test_per_process_cache_keeps_entries_briefly(app, app_context, tmp_path, monkeypatch):
+    # Other workers never see a SimpleCache bump: entries there expire after TAG_CACHE_LOCAL_TTL
+    timeouts = []
+    original = cache.set
+
+    def record(key, value, timeout=None):
+        timeouts.append(timeout)
+        return original(key, value, timeout=timeout)
+    monkeypatch.setattr(cache, 'set', record)
+
+    _use_simple_cache(app)
+    assert not tag_cache.is_shared()
+    tag_cache.cached('local', lambda: 1, tags=['courses'])
+    cache.init_app(app, config={'CACHE_TYPE': 'FileSystemCache', 'CACHE_DIR': str(tmp_path)})
+    assert tag_cache.is_shared()
+    tag_cache.cached('shared', lambda: 1, tags=['courses'])
+    assert timeouts == [app.config['TAG_CACHE_LOCAL_TTL'], app.config['TAG_CACHE_TTL']]
+
+
+def test_waitlist_promotion_bumps_student_tag(app, app_context):
+    _use_simple_cache(app)
+    section = seed_simple_course()  # capacity 1
+    first = create_student('first@test.edu').student_profile
+    second = create_student('second@test.edu').student_profile
+    for profile in (first, second):
+        e = Enrollment(student_id=profile.id, course_section_id=section.id)
+        db.session.add(e)
+        e.enroll()
+    db.session.commit()
+    student_tag = f'student:{second.id}'
+    before = tag_cache._versions([student_tag], create=True)[student_tag]
+
+    section.capacity = 2
+    db.session.commit()
+    assert [e.student_id for e in section.promote_waitlisted()] == [second.id]
+    db.session.commit()
+    assert tag_cache._versions([student_tag])[student_tag] != before
@@ -0,0 +1,52 @@
+from app.models import db
+from app.models.enrollment import Enrollment
+from app.models.term_load import StudentTermLoad, LOAD_FIELDS, get_term_load, rebuild_term_loads
+from app.services.enrollment_service import enroll_student, drop_enrollment, get_enrollment_summary
+from tests.helpers import create_student, seed_simple_course
+
+
+def _snapshot():
+    return {(r.student_id, r.term): tuple(getattr(r, f) for f in LOAD_FIELDS)
+            for r in StudentTermLoad.query.all()}
+
+
+def test_loads_follow_enroll_drop_promote_and_grade(app_context):
+    section = seed_simple_course()  # capacity 1, 3.0 credits
+    first = create_student("load1@test.edu").student_profile
+    second = create_student("load2@test.edu").student_profile
+
+    e1, ok, _ = enroll_student(first, section)
+    assert ok
+    # A full section rejects enroll_student, so join the waitlist directly
+    e2 = Enrollment(student_id=second.id, course_section_id=section.id)
+    db.session.add(e2)
+    e2.enroll()
+    db.session.commit()
+    assert e2.status == "Waitlisted"
+    assert get_term_load(first.id, section.term).enrolled_credits == 3.0
+    assert get_term_load(second.id, section.term).waitlisted_count == 1
+
+    assert Enrollment.check_credit_limit(first, section) == (True, 6.0)
+
+    # Dropping promotes the waitlisted student through a bulk UPDATE
+    drop_enrollment(e1)
+    load1 = get_term_load(first.id, section.term)
+    load2 = get_term_load(second.id, section.term)
+    assert (load1.enrolled_count, load1.enrolled_credits) == (0, 0)
+    assert (load2.enrolled_count, load2.waitlisted_count, load2.enrolled_credits) == (1, 0, 3.0)
+
+    e2 = db.session.get(Enrollment, e2.id)
+    e2.set_grade("B+")
+    db.session.commit()
+    load2 = get_term_load(second.id, section.term)
+    assert (load2.enrolled_credits, load2.completed_count, load2.earned_credits) == (0, 1, 3.0)
+    assert load2.quality_points == 3.0 * 3.3 and load2.term_gpa == 3.3
+
+    summary = get_enrollment_summary(second)
+    assert summary["completed_count"] == 1 and summary["earned_credits"] == 3.0
+
+    # The incremental rows match a full rebuild
+    incremental = _snapshot()
+    rebuild_term_loads()
+    db.session.commit()
+    assert _snapshot() == incremental
@@ -54,4 +54,153 @@ def test_transcript_official_by_registrar(client, app_context):
     resp = client.get(f"/api/v1/transcripts/{student_user.id}?official=true", headers=_auth(token))
     assert resp.status_code == 200
     assert resp.headers.get("Content-Type", "").startswith("application/pdf")
-    assert resp.data[:4] == b"%PDF"
\ No newline at end of file
+    assert resp.data[:4] == b"%PDF"
+
+def test_transcript_cache_and_etag(app, client, app_context, tmp_path, monkeypatch):
+    from app.services.transcript_service import TranscriptService
+
+    app.config["TRANSCRIPT_CACHE_BACKEND"] = "filesystem"
+    app.config["TRANSCRIPT_CACHE_DIR"] = str(tmp_path)
+    renders = []
+    original = TranscriptService.render_transcript
+    monkeypatch.setattr(TranscriptService, "render_transcript",
+                        staticmethod(lambda *a, **kw: renders.append(1) or original(*a, **kw)))
+
+    section = seed_simple_course()
+    student_user = create_student("transcript_cache@test.edu")
+    e = Enrollment(student_id=student_user.student_profile.id, course_section_id=section.id)
+    e.enroll()
+    e.set_grade("B")
+    db.session.add(e)
+    db.session.commit()
+    headers = _auth(_api_login(client, student_user.email, "pass12345"))
+
+    first = client.get("/api/v1/transcripts/me", headers=headers)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.data[:4] == b"%PDF"
+    assert "private" in first.headers["Cache-Control"]
+    again = client.get("/api/v1/transcripts/me", headers=headers)
+    assert again.data == first.data and again.headers["ETag"] == etag
+    assert len(renders) == 1
+
+    not_modified = client.get("/api/v1/transcripts/me", headers=dict(headers, **{"If-None-Match": etag}))
+    assert not_modified.status_code == 304 and not not_modified.data
+    assert len(renders) == 1
+
+    # A grade change yields a new key and purges the student's stored PDFs
+    e.set_grade("A")
+    db.session.commit()
+    assert not (tmp_path / str(student_user.student_profile.id)).exists()
+    changed = client.get("/api/v1/transcripts/me", headers=dict(headers, **{"If-None-Match": etag}))
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert len(renders) == 2
+
+
+def test_transcript_store_keeps_newest_pdf_per_kind(tmp_path):
+    from app.services.transcript_cache import FileSystemTranscriptStore
+
+    store = FileSystemTranscriptStore(str(tmp_path))
+    store.set(7, "monday", False, b"%PDF-1")
+    store.set(7, "monday", True, b"%PDF-2")
+    # The next day's issue date is a new key: the day before's unofficial copy goes
+    store.set(7, "tuesday", False, b"%PDF-3")
+    assert sorted(p.name for p in (tmp_path / "7").iterdir()) == ["official-monday.pdf", "unofficial-tuesday.pdf"]
+    assert store.get(7, "monday", False) is None
+    assert store.get(7, "tuesday", False) == b"%PDF-3" and store.get(7, "monday", True) == b"%PDF-2"
+
+
+def test_transcript_pdf_ignores_stale_tag_cache_and_logins(app, client, app_context, tmp_path):
+    from app import cache
+
+    cache.init_app(app, config={"CACHE_TYPE": "SimpleCache"})
+    app.config["TRANSCRIPT_CACHE_BACKEND"] = "filesystem"
+    app.config["TRANSCRIPT_CACHE_DIR"] = str(tmp_path)
+    section = seed_simple_course()
+    student_user = create_student("transcript_stale@test.edu")
+    e = Enrollment(student_id=student_user.student_profile.id, course_section_id=section.id)
+    e.enroll()
+    e.set_grade("B")
+    db.session.add(e)
+    db.session.commit()
+    headers = _auth(_api_login(client, student_user.email, "pass12345"))
+    folder = tmp_path / str(student_user.student_profile.id)
+
+    etag = client.get("/api/v1/transcripts/me", headers=headers).headers["ETag"]
+    assert client.get("/api/v1/transcripts/me?format=json", headers=headers).status_code == 200
+    # Logging in again updates the user row but not what the transcript shows
+    headers = _auth(_api_login(client, student_user.email, "pass12345"))
+    assert len(list(folder.iterdir())) == 1
+
+    # A grade written by another worker never bumps this worker's tags
+    db.session.execute(db.update(Enrollment).where(Enrollment.id == e.id).values(grade="A", grade_points=4.0))
+    db.session.commit()
+    assert client.get("/api/v1/transcripts/me", headers=headers).headers["ETag"] != etag
+
+    student_user.last_name = "Renamed"
+    db.session.commit()
+    assert not folder.exists()
+
+
+def test_transcript_data_single_query(client, app_context):
+    from sqlalchemy import event
+    from app.models.course import Course, CourseSection
+    from app.services.transcript_data import load_transcript
+
+    section = seed_simple_course()
+    student_user = create_student("transcript_data@test.edu")
+    profile = student_user.student_profile
+    terms = [("Fall 2024", date(2024, 9, 1)), ("Spring 2025", date(2025, 1, 1)), ("Fall 2025", date(2025, 9, 1))]
+    grades = {"A": "Completed", "C": "Completed", "F": "Failed", "W": "Withdrawn", None: "Enrolled"}
+    for i, ((term, start), (grade, status)) in enumerate(
+            (t, g) for t in terms for g in grades.items()):
+        course = Course(code=f"TD{i:03d}", title=f"Course {i}", department_id=section.course.department_id,
+                        credits=3 if i % 2 else 4, level="Undergraduate")
+        db.session.add(course)
+        db.session.flush()
+        sec = CourseSection(course_id=course.id, section_code="01", term=term, capacity=10,
+                            start_date=start, end_date=date(start.year, start.month + 3, 28))
+        db.session.add(sec)
+        db.session.flush()
+        e = Enrollment(student_id=profile.id, course_section_id=sec.id, status=status)
+        if grade:
+            e.set_grade(grade)
+        db.session.add(e)
+    db.session.commit()
+    db.session.expire_all()
+    profile = db.session.get(type(profile), profile.id)
+    profile.user  # loaded by the caller in every route
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        data = load_transcript(profile)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert len(statements) <= 2  # course history, plus the grading scale on a cold cache
+
+    assert [t.term for t in data.terms] == ["Fall 2025", "Spring 2025", "Fall 2024"]
+    term = data.terms[0]
+    assert len(term.courses) == 5
+    graded = [c for c in term.courses if c.status in ("Completed", "Failed")]
+    assert term.graded_credits == sum(c.credits for c in graded)
+    assert term.quality_points == sum(c.grade_points * c.credits for c in graded)
+    assert term.credits == sum(c.credits for c in term.courses)
+
+    token = _api_login(client, student_user.email, "pass12345")
+    body = client.get("/api/v1/transcripts/me?format=json", headers=_auth(token)).get_json()
+    assert body["terms"][0]["term"] == "Fall 2025"
+    assert body["terms"][0]["gpa"] == round(term.gpa, 2)
+
+
+def test_transcript_page_shows_course_history(authenticated_student_client, student_user, app_context):
+    section = seed_simple_course()
+    e = Enrollment(student_id=student_user.student_profile.id, course_section_id=section.id)
+    e.enroll()
+    e.set_grade("B")
+    db.session.add(e)
+    db.session.commit()
+
+    resp = authenticated_student_client.get("/student/transcript")
+    assert resp.status_code == 200
+    assert b"Course History" in resp.data and b"CS101" in resp.data and b"GPA: 3.00" in resp.data
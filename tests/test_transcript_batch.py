@@ -0,0 +1,92 @@
+import zipfile
+from app.models import db
+from app.models.enrollment import Enrollment
+from app.models.transcript import TranscriptBatch, TranscriptRequest
+from app.services.transcript_batch import batch_path, create_batch, run_batch
+from tests.helpers import create_registrar, create_student, seed_simple_course
+
+
+def _api_login(client, email, password):
+    r = client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    assert r.status_code == 200
+    return r.get_json()["access_token"]
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _graded_student(section, email, grade="A"):
+    profile = create_student(email).student_profile
+    e = Enrollment(student_id=profile.id, course_section_id=section.id)
+    e.enroll()
+    e.set_grade(grade)
+    db.session.add(e)
+    db.session.commit()
+    return profile
+
+
+def test_batch_for_approved_requests(app, client, app_context, tmp_path):
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    section = seed_simple_course()
+    section.capacity = 3
+    profiles = [_graded_student(section, f"batch{i}@test.edu") for i in range(3)]
+    approved = [TranscriptRequest(student_id=p.id, status="Approved") for p in profiles[:2]]
+    pending = TranscriptRequest(student_id=profiles[2].id, status="Pending")
+    db.session.add_all(approved + [pending])
+    db.session.commit()
+
+    registrar = create_registrar("batchreg@test.edu")
+    token = _api_login(client, registrar.email, "registrarpass123")
+    resp = client.post("/api/v1/transcripts/batches", json={"approved": True}, headers=_auth(token))
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert (body["status"], body["total"], body["processed"], body["failed"]) == ("Completed", 2, 2, 0)
+
+    status = client.get(f"/api/v1/transcripts/batches/{body['id']}", headers=_auth(token)).get_json()
+    assert status["percent_complete"] == 100.0
+
+    resp = client.get(f"/api/v1/transcripts/batches/{body['id']}/download", headers=_auth(token))
+    assert resp.status_code == 200 and resp.mimetype == "application/zip"
+    with zipfile.ZipFile(batch_path(db.session.get(TranscriptBatch, body["id"]))) as archive:
+        names = archive.namelist()
+        assert len(names) == 2 and all(archive.read(n)[:4] == b"%PDF" for n in names)
+    resp.close()
+
+    for tr in approved:
+        db.session.refresh(tr)
+        assert tr.status == "Issued" and tr.batch_id == body["id"] and tr.filename in names
+    db.session.refresh(pending)
+    assert pending.status == "Pending"
+
+    resp = client.post("/api/v1/transcripts/batches", json={"approved": True}, headers=_auth(token))
+    assert resp.status_code == 400
+
+
+def test_batch_forbidden_for_students(client, app_context):
+    student = create_student("batchstudent@test.edu")
+    token = _api_login(client, student.email, "pass12345")
+    resp = client.post("/api/v1/transcripts/batches", json={"approved": True}, headers=_auth(token))
+    assert resp.status_code == 403
+
+
+def test_graduating_class_in_process_pool(app, app_context, tmp_path):
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    app.config["TRANSCRIPT_BATCH_START_METHOD"] = "fork"
+    section = seed_simple_course()
+    section.capacity = 3
+    profiles = [_graded_student(section, f"grad{i}@test.edu", grade) for i, grade in enumerate(["A", "B", "75"])]
+    for p in profiles[:2]:
+        p.graduation_year = 2025
+    db.session.commit()
+
+    batch = create_batch(graduation_year=2025, student_ids=[profiles[2].id, 999999], official=False)
+    assert batch.total == 3
+
+    seen = []
+    batch = run_batch(batch, workers=2, chunk_size=2, progress=lambda b: seen.append(b.processed))
+    assert batch.status == "Completed" and batch.processed == 3 and batch.failed == 0
+    assert seen[-1] == 3
+    with zipfile.ZipFile(batch_path(batch)) as archive:
+        names = archive.namelist()
+    assert len(names) == 3 and all("unofficial" in n for n in names)
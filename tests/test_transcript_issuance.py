@@ -0,0 +1,91 @@
+import os
+from app.models import db
+from app.models.enrollment import Enrollment
+from app.models.transcript import TranscriptRequest
+from app.services.transcript_issuance import artifact_path
+from app.services.transcript_service import TranscriptService
+from tests.helpers import create_registrar, create_student, login_user, seed_simple_course
+
+
+def _call(client, method, url, **kwargs):
+    # Own app context per request: the test's context would keep the previous client's login in `g`
+    with client.application.app_context():
+        return client.open(url, method=method, **kwargs)
+
+
+def _approved_request(app, tmp_path, monkeypatch, renders, fail=False):
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    original = TranscriptService.render_transcript
+
+    def render(*args, **kwargs):
+        renders.append(1)
+        if fail:
+            raise RuntimeError("renderer unavailable")
+        return original(*args, **kwargs)
+    monkeypatch.setattr(TranscriptService, "render_transcript", staticmethod(render))
+
+    section = seed_simple_course()
+    student = create_student("issuance@test.edu")
+    e = Enrollment(student_id=student.student_profile.id, course_section_id=section.id)
+    e.enroll()
+    e.set_grade("A")
+    db.session.add(e)
+    tr = TranscriptRequest(student_id=student.student_profile.id, status="Pending")
+    db.session.add(tr)
+    db.session.commit()
+
+    registrar_client = app.test_client()
+    registrar = create_registrar("issuance_reg@test.edu")
+    with app.app_context():
+        login_user(registrar_client, registrar.email, "registrarpass123")
+    resp = _call(registrar_client, "POST", f"/registrar/transcripts/{tr.id}/approve")
+    assert resp.status_code == 302
+    db.session.refresh(tr)
+    student_client = app.test_client()
+    with app.app_context():
+        login_user(student_client, student.email, "pass12345")
+    return tr, registrar_client, student_client
+
+
+def test_approval_renders_once_and_downloads_from_disk(app, app_context, tmp_path, monkeypatch):
+    renders = []
+    tr, _, student_client = _approved_request(app, tmp_path, monkeypatch, renders)
+    assert tr.status == "Approved" and tr.rendered_at is not None and tr.filename.endswith(".pdf")
+    path = artifact_path(tr)
+    assert path and os.path.dirname(path) == str(tmp_path / "transcripts")
+    assert renders == [1]
+
+    first = _call(student_client, "GET", "/student/transcript/official/download")
+    assert first.status_code == 200 and first.data[:4] == b"%PDF"
+    assert tr.filename in first.headers["Content-Disposition"]
+    etag = first.headers["ETag"]
+    db.session.refresh(tr)
+    assert tr.status == "Issued"
+
+    partial = _call(student_client, "GET", "/student/transcript/official/download", headers={"Range": "bytes=0-3"})
+    assert partial.status_code == 206 and partial.data == b"%PDF"
+    cached = _call(student_client, "GET", "/student/transcript/official/download", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert renders == [1]
+    for resp in (first, partial, cached):
+        resp.close()
+
+
+def test_failed_render_can_be_retried(app, app_context, tmp_path, monkeypatch):
+    renders = []
+    tr, registrar_client, student_client = _approved_request(app, tmp_path, monkeypatch, renders, fail=True)
+    assert tr.rendered_at is None and "renderer unavailable" in tr.render_error
+
+    resp = _call(student_client, "GET", "/student/transcript/official/download")
+    assert resp.status_code == 302
+    page = _call(registrar_client, "GET", "/registrar/transcripts?status=Approved")
+    assert b"PDF failed" in page.data
+
+    monkeypatch.undo()
+    resp = _call(registrar_client, "POST", f"/registrar/transcripts/{tr.id}/render")
+    assert resp.status_code == 302
+    db.session.refresh(tr)
+    assert tr.render_error is None and artifact_path(tr)
+    resp = _call(student_client, "GET", "/student/transcript/official/download")
+    assert resp.status_code == 200 and resp.data[:4] == b"%PDF"
+    resp.close()